@@ -17,6 +17,16 @@ CLAUDE_MODELS = {
 }
 
 DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
+
+# 模型价格（美元 / 百万 token，输入和输出），用于估算费用
+MODEL_PRICING = {
+    "claude-3-5-sonnet-20241022": (3.0, 15.0),
+    "claude-3-opus-20240229": (15.0, 75.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+}
+CACHE_WRITE_PRICE_RATIO = 1.25  # 写入提示缓存的价格相对输入价格的倍数
+CACHE_READ_PRICE_RATIO = 0.1  # 命中提示缓存的价格相对输入价格的倍数
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_MAX_TOKENS = 4096
 
@@ -42,6 +52,48 @@ PROGRAMMING_LANGUAGES = [
 
 DEFAULT_LANGUAGE = "Python"
 
+# 语言名称（小写，含代码块标记中常见的别名）-> 文件扩展名
+LANGUAGE_EXTENSIONS = {
+    "python": ".py", "py": ".py",
+    "javascript": ".js", "js": ".js", "jsx": ".jsx",
+    "typescript": ".ts", "ts": ".ts", "tsx": ".tsx",
+    "java": ".java",
+    "c++": ".cpp", "cpp": ".cpp", "c": ".c", "h": ".h",
+    "c#": ".cs", "csharp": ".cs", "cs": ".cs",
+    "go": ".go", "golang": ".go",
+    "rust": ".rs", "rs": ".rs",
+    "php": ".php",
+    "ruby": ".rb", "rb": ".rb",
+    "swift": ".swift",
+    "kotlin": ".kt", "kt": ".kt",
+    "html/css": ".html", "html": ".html", "css": ".css",
+    "sql": ".sql",
+    "shell": ".sh", "sh": ".sh", "bash": ".sh", "zsh": ".sh",
+    "json": ".json", "yaml": ".yaml", "yml": ".yaml", "toml": ".toml", "xml": ".xml",
+    "markdown": ".md", "md": ".md",
+}
+DEFAULT_FILE_EXTENSION = ".txt"
+
+# 编程语言对应的 Pygments 词法分析器（None 表示不高亮）
+LANGUAGE_LEXERS = {
+    "Python": "python",
+    "JavaScript": "javascript",
+    "TypeScript": "typescript",
+    "Java": "java",
+    "C++": "cpp",
+    "C#": "csharp",
+    "Go": "go",
+    "Rust": "rust",
+    "PHP": "php",
+    "Ruby": "ruby",
+    "Swift": "swift",
+    "Kotlin": "kotlin",
+    "HTML/CSS": "html",
+    "SQL": "sql",
+    "Shell": "bash",
+    "Other": None,
+}
+
 # UI 配置
 THEMES = ["System", "Dark", "Light"]
 DEFAULT_THEME = "System"
@@ -51,11 +103,91 @@ WINDOW_MIN_HEIGHT = 700
 DEFAULT_WINDOW_WIDTH = 1200
 DEFAULT_WINDOW_HEIGHT = 800
 
+# 语法高亮配色（按外观模式选择 Pygments 样式）
+HIGHLIGHT_STYLES = {
+    "Dark": "monokai",
+    "Light": "default",
+}
+HIGHLIGHT_POLL_MS = 16  # 轮询后台高亮结果的间隔
+
+# 输出视图虚拟化
+VIRTUAL_VIEW_WINDOW_LINES = 600  # 文本组件中保留的行数
+VIRTUAL_VIEW_OVERSCAN_LINES = 200  # 可见区域上方预留的行数
+
+# 流式渲染配置
+STREAM_FRAME_MIN_MS = 16  # 正常帧间隔（约 60 帧/秒）
+STREAM_FRAME_MAX_MS = 100  # 渲染跟不上时放宽到的最大帧间隔
+STREAM_FRAME_STATS_WINDOW = 240  # 帧耗时统计保留的帧数
+STREAM_SAVE_BUFFER_SIZE = 64 * 1024  # 边生成边保存时的文件写入缓冲区大小（字节）
+FENCE_PREAMBLE_MAX_LINES = 20  # 在输出开头查找代码块标记的最大行数
+MULTI_FILE_HEADER_LOOKBACK = 2  # 文件名标题行与代码块之间允许间隔的非空行数
+MULTI_FILE_WRITE_WORKERS = 4  # 并行写入多个文件的线程数
+MULTI_FILE_STATUS_NAMES = 4  # 状态栏中列出的文件名数量
+
+# 历史导出
+EXPORT_WORKERS = 4  # 导出到目录时的写入线程数
+EXPORT_MAX_IN_FLIGHT = 64  # 导出到目录时排队等待写入的文件数上限
+EXPORT_NAME_MAX_CHARS = 40  # 导出文件名中描述部分的最大长度
+EXPORT_MANIFEST_NAME = "manifest.json"  # 导出结果中的清单文件名
+EXPORT_PROGRESS_INTERVAL = 50  # 导出进度的更新间隔（条）
+
+# 会话标签页
+SESSION_MAX_TABS = 10  # 最多同时打开的会话数
+SESSION_MAX_CONCURRENT_GENERATIONS = 4  # 同时进行的生成任务数（超出时排队）
+GENERATION_MAX_PENDING = 16  # 进行中和排队中的生成任务上限（超出时拒绝）
+GENERATION_MAX_SUBTASKS = 8  # 所有会话同时进行的分段和候选请求数（超出时排队）
+GENERATION_DRAIN_TIMEOUT_S = 5  # 关闭时等待进行中的生成和写入完成的最长时间
+SHUTDOWN_POLL_MS = 50  # 关闭时检查后台等待是否结束的间隔（等待期间界面保持响应）
+
+# 差异对比
+OUTPUT_HISTORY_SIZE = 10  # 输出面板保留的历史版本数
+DIFF_MAX_EDIT_COST = 2000  # 单个区域的最大编辑距离，超出时整体视为替换
+DIFF_STABLE_LINES = 20  # 增量差异中冻结操作时距离末尾的最少行数
+DIFF_CONTEXT_LINES = 3  # 折叠未改动区域时保留的上下文行数
+
+# 模型对比
+COMPARE_REFRESH_MS = 250  # 对比窗口刷新实时指标的间隔
+
+# 启动性能
+STARTUP_IMPORT_BUDGET_MS = 600  # 导入 main 的累计耗时预算
+STARTUP_FIRST_PAINT_BUDGET_MS = 1500  # 从启动到窗口首次绘制的耗时预算
+STARTUP_BUDGET_SCALE_ENV = "CODEGEN_STARTUP_BUDGET_SCALE"  # 按比例放宽启动预算的环境变量（用于较慢的测试机器）
+# 启动时不应导入的模块（首次使用时再导入）
+STARTUP_DEFERRED_MODULES = [
+    "anthropic",
+    "pyperclip",
+    "win32crypt",
+    "ui.settings_dialog",
+    "ui.compare_window",
+    "ui.diff_view",
+    "ui.diagnostics_panel",
+    "ui.history_export_dialog",
+    "utils.file_handler",
+]
+# 窗口显示后在后台线程中预热的模块
+STARTUP_WARM_UP_MODULES = [
+    "anthropic",
+    "pyperclip",
+    "ui.settings_dialog",
+    "utils.file_handler",
+]
+
+# 界面响应监控
+WATCHDOG_INTERVAL_MS = 100  # 心跳间隔
+WATCHDOG_STALL_THRESHOLD_MS = 200  # 心跳延迟超过该值视为卡顿，并采集主线程调用栈
+WATCHDOG_HISTOGRAM_BUCKETS_MS = [16, 33, 50, 100, 200, 500, 1000, 2000, 5000]  # 延迟直方图的区间上限
+WATCHDOG_STACK_DEPTH = 15  # 采集的调用栈最大帧数
+WATCHDOG_TOP_STACKS = 10  # 报告中列出的卡顿调用栈数量
+DIAGNOSTICS_REFRESH_MS = 1000  # 诊断面板刷新间隔
+
 # 文件路径
 DATA_DIR = "data"
 CONFIG_FILE = "data/config.json"
 CONVERSATIONS_DIR = "data/conversations"
+HISTORY_FILE = "data/conversations/history.jsonl"
 LOGS_DIR = "data/logs"
+COMPARISON_LOG_FILE = "data/comparisons.jsonl"
+SECRET_KEY_FILE = "data/secret.key"
 ICONS_DIR = "assets/icons"
 
 # 配置键名
@@ -68,6 +200,7 @@ CONFIG_LANGUAGE = "language"
 CONFIG_WINDOW_GEOMETRY = "window_geometry"
 CONFIG_HISTORY_ENABLED = "history_enabled"
 CONFIG_MAX_HISTORY = "max_history_entries"
+CONFIG_PROJECT_DIR = "project_dir"
 
 # 默认配置值
 DEFAULT_CONFIG = {
@@ -80,13 +213,83 @@ DEFAULT_CONFIG = {
     CONFIG_WINDOW_GEOMETRY: f"{DEFAULT_WINDOW_WIDTH}x{DEFAULT_WINDOW_HEIGHT}",
     CONFIG_HISTORY_ENABLED: True,
     CONFIG_MAX_HISTORY: 50,
+    CONFIG_PROJECT_DIR: "",
 }
+CONFIG_SAVE_DELAY_S = 0.5  # set/update 后延迟保存的时间，期间的多次修改合并为一次写入
+CONFIG_WATCH_POLL_S = 1.0  # 无法使用 inotify 时检查配置文件变化的间隔
+CONFIG_WATCH_DEBOUNCE_S = 0.2  # 配置文件连续变化的合并等待时间
+
+# 密钥存储
+SECRET_BACKEND_ENV_VAR = "CODEGEN_SECRET_BACKEND"  # 指定后端的环境变量：dpapi、env 或 file（未设置时自动选择）
+SECRET_API_KEY_ENV_VAR = "ANTHROPIC_API_KEY"  # env 后端读取 API Key 的环境变量
 
 # API 配置
 API_RETRY_ATTEMPTS = 3
 API_TIMEOUT = 60
 API_RETRY_DELAY = 1  # 秒
 
+# 输出截断后的自动续写
+CONTINUATION_MAX_ROUNDS = 5  # 最多续写次数
+CONTINUATION_TOTAL_MAX_TOKENS = 32768  # 一次逻辑生成的输出 token 总预算
+
+# 多轮对话上下文配置
+CONTEXT_TOKEN_BUDGET = 60000  # 历史消息的 token 预算
+CONTEXT_COMPACT_RATIO = 0.6  # 压缩后保留的预算比例，避免每轮都触发压缩
+CONTEXT_KEEP_RECENT_TURNS = 2  # 始终原样保留的最近轮数
+CONTEXT_MAX_MESSAGE_TOKENS = 12000  # 单条消息的最大 token 数
+CONTEXT_SUMMARY_MAX_CHARS = 200  # 摘要中每条请求保留的最大字符数
+
+# 附加文件上下文
+CONTEXT_FILE_TOKEN_BUDGET = 8000  # 附加文件在提示词中占用的 token 预算
+CONTEXT_FILE_CHUNK_MAX_TOKENS = 1200  # 单个分块的最大 token 数，超过时在内层定义或空行处继续拆分
+CONTEXT_FILE_HEADER_RATIO = 0.25  # 文件开头（导入等）不超过预算的该比例时总是保留
+CONTEXT_FILE_MARKER_TOKENS = 50  # 每个省略标记预留的 token 数
+CONTEXT_FILE_OUTLINE_NAMES = 5  # 省略标记中最多列出的定义名
+
+# 项目代码索引
+CODE_INDEX_DIR = "data/index"
+CODE_INDEX_EXTENSIONS = {
+    ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".java", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs",
+    ".go", ".rs", ".php", ".rb", ".swift", ".kt", ".sql", ".sh",
+}
+CODE_INDEX_IGNORED_DIRS = {"node_modules", "__pycache__", "venv", "env", "dist", "build", "target", "vendor"}  # 另外跳过所有隐藏目录
+CODE_INDEX_MAX_FILE_BYTES = 1024 * 1024  # 超过该大小的文件（多为生成或压缩的代码）不索引
+CODE_INDEX_TOKEN_BUDGET = 3000  # 检索到的代码片段在提示词中占用的 token 预算
+CODE_INDEX_TOP_K = 8  # 最多放入提示词的片段数
+CODE_INDEX_SNIPPET_MAX_TOKENS = 600  # 单个片段的最大 token 数，超过时截断
+CODE_INDEX_SNIPPET_MIN_TOKENS = 100  # 剩余预算低于该值时不再添加片段
+CODE_INDEX_NAME_WEIGHT = 5.0  # bm25 排序中符号名相对签名和文档的权重
+CODE_INDEX_QUERY_MAX_TERMS = 32  # 检索时最多使用的词数
+CODE_INDEX_SIGNATURE_MAX_CHARS = 200
+CODE_INDEX_DOC_MAX_CHARS = 300
+
+# 生成模式
+GENERATION_MODE_STANDARD = "标准生成"
+GENERATION_MODE_EDIT = "修改当前代码"
+GENERATION_MODE_SECTIONED = "分段并行生成"
+GENERATION_MODE_BEST_OF = "多样本择优"
+GENERATION_MODES = [
+    GENERATION_MODE_STANDARD,
+    GENERATION_MODE_EDIT,
+    GENERATION_MODE_SECTIONED,
+    GENERATION_MODE_BEST_OF,
+]
+
+# 修改模式配置
+EDIT_TEMPERATURE = 0.0  # 补丁需要精确复制原代码，使用低温度
+
+# 分段并行生成配置
+OUTLINE_MODEL = CLAUDE_MODELS["Claude 3 Haiku"]  # 生成大纲使用的快速模型
+OUTLINE_MAX_TOKENS = 1024
+SECTION_MAX_COUNT = 8  # 最多拆分的部分数
+
+# 多样本择优配置
+BEST_OF_SAMPLES = 3  # 默认并行采样数
+BEST_OF_MAX_SAMPLES = 8
+BEST_OF_DEFAULT_SCORERS = ["syntax", "tests", "lint", "brevity"]  # "tests" 仅在提供了测试代码时启用
+BEST_OF_BREVITY_SCALE = 2000  # 简洁度评分的长度基准（字符）
+BEST_OF_TEST_TIMEOUT = 5  # 快速测试超时时间（秒）
+
 # 代码模板
 CODE_TEMPLATES = {
     "函数": "创建一个{language}函数，功能：{description}",
@@ -101,6 +304,16 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 LOG_MAX_BYTES = 10 * 1024 * 1024  # 10MB
 LOG_BACKUP_COUNT = 5
+LOG_FILE_NAME = "app.log"  # 日志目录下的当前日志文件，超过大小或跨天时轮转并压缩为 app.log.1.gz 等
+
+# 结构化事件日志（JSON Lines，每行一个事件）
+EVENT_LOG_FILE_NAME = "events.jsonl"  # 日志目录下的事件日志文件，轮转方式与 LOG_FILE_NAME 相同
+EVENT_LOG_LEVEL = "debug"  # 低于该级别的事件直接丢弃，不计算字段
+EVENT_LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+EVENT_SAMPLE_RATES = {  # 事件名 -> 采样率（0~1），未列出的事件全部记录
+    "stream.chunk": 0.01,
+}
+EVENT_PERCENTILES = (50, 90, 99)  # 离线分析输出的延迟分位数
 
 # 错误消息
 ERROR_MESSAGES = {
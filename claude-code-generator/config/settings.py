@@ -1,18 +1,24 @@
 """
 设置管理模块
 负责配置的读取、写入和验证
+
+配置先写入临时文件再替换原文件，写入中途崩溃不会损坏配置；set/update 的修改延迟合并保存。
+API Key 在首次读取时才解密并缓存明文，只有修改后才重新加密。
+reload 重新读取被外部修改的配置文件，只应用文件中实际变化的键
 """
 
 import json
 import os
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Set
 
 from config.constants import (
     CONFIG_FILE,
+    CONFIG_SAVE_DELAY_S,
     DEFAULT_CONFIG,
     CONFIG_API_KEY,
 )
-from utils.security import encrypt_api_key, decrypt_api_key
+from utils.security import encrypt_api_key, decrypt_api_key, is_encrypted
 
 
 class SettingsManager:
@@ -27,10 +33,19 @@ class SettingsManager:
         """
         self.config_file = config_file
         self._config = None
+        self._lock = threading.RLock()
+        self._save_timer = None
+        # 最近一次读取或写入时文件中的内容（API Key 为密文），用于计算外部修改了哪些键
+        self._disk_config = {}
+
+        # API Key：文件中的密文和解密后的明文缓存（None 表示尚未解密 / 需要重新加密）
+        self._api_key_cipher = ""
+        self._api_key = ""
+
         self._load_config()
 
     def _load_config(self) -> None:
-        """从文件加载配置"""
+        """从文件加载配置（不解密 API Key）"""
         # 如果配置文件不存在，创建默认配置
         if not os.path.exists(self.config_file):
             self._create_default_config()
@@ -38,51 +53,164 @@ class SettingsManager:
 
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                encrypted_config = json.load(f)
-
-            # 解密 API Key
-            config = {}
-            for key, value in encrypted_config.items():
-                if key == CONFIG_API_KEY and value:
-                    try:
-                        config[key] = decrypt_api_key(value)
-                    except Exception:
-                        config[key] = value
-                else:
-                    config[key] = value
-
-            self._config = config
-        except Exception as e:
-            print(f"加载配置失败: {e}")
+                config = json.load(f)
+            if not isinstance(config, dict):
+                raise ValueError("配置文件格式错误")
+        except (OSError, ValueError) as e:
+            # 保留损坏的文件，避免覆盖后无法恢复其中的 API Key
+            backup_file = f"{self.config_file}.corrupt"
+            print(f"加载配置失败: {e}，原文件已另存为 {backup_file}")
+            try:
+                os.replace(self.config_file, backup_file)
+            except OSError:
+                pass
             self._create_default_config()
+            return
+
+        self._disk_config = dict(config)
+        cipher = config.pop(CONFIG_API_KEY, "") or ""
+        self._config = config
+        self._api_key_cipher = cipher
+        self._api_key = None if cipher else ""
 
     def _create_default_config(self) -> None:
         """创建默认配置文件"""
         self._config = DEFAULT_CONFIG.copy()
+        self._api_key = self._config.pop(CONFIG_API_KEY, "")
+        self._api_key_cipher = None if self._api_key else ""
         self.save_config()
 
+    def _get_api_key(self) -> str:
+        """
+        获取 API Key 明文（首次调用时解密并缓存）
+
+        Returns:
+            API Key
+        """
+        if self._api_key is None:
+            try:
+                self._api_key = decrypt_api_key(self._api_key_cipher)
+            except Exception:
+                # 带后端前缀的密文解密失败时视为未设置；其他值按明文处理（如加密不可用时保存的值）
+                self._api_key = "" if is_encrypted(self._api_key_cipher) else self._api_key_cipher
+        return self._api_key
+
+    def _set_api_key(self, api_key: str) -> bool:
+        """
+        设置 API Key
+
+        Args:
+            api_key: API Key 明文
+
+        Returns:
+            是否有变化
+        """
+        api_key = api_key or ""
+        if api_key == self._get_api_key():
+            return False
+
+        self._api_key = api_key
+        self._api_key_cipher = None if api_key else ""
+        return True
+
+    def _encode_config(self) -> Dict[str, Any]:
+        """
+        生成要写入文件的配置（API Key 只在修改后重新加密）
+
+        Returns:
+            配置字典
+        """
+        if self._api_key_cipher is None:
+            try:
+                self._api_key_cipher = encrypt_api_key(self._api_key)
+            except Exception:
+                self._api_key_cipher = self._api_key
+
+        encrypted_config = dict(self._config)
+        encrypted_config[CONFIG_API_KEY] = self._api_key_cipher
+        return encrypted_config
+
     def save_config(self) -> None:
-        """保存配置到文件"""
-        try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-
-            # 加密 API Key
-            encrypted_config = {}
-            for key, value in self._config.items():
-                if key == CONFIG_API_KEY and value:
-                    try:
-                        encrypted_config[key] = encrypt_api_key(value)
-                    except Exception:
-                        encrypted_config[key] = value
+        """立即保存配置到文件（取消尚未执行的延迟保存）"""
+        with self._lock:
+            self._cancel_save_timer()
+            try:
+                # 确保目录存在
+                directory = os.path.dirname(self.config_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                # 先写临时文件，落盘后再替换原文件
+                encoded_config = self._encode_config()
+                temp_file = f"{self.config_file}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(encoded_config, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.config_file)
+                self._disk_config = encoded_config
+            except Exception as e:
+                raise RuntimeError(f"保存配置失败: {str(e)}")
+
+    def reload(self) -> Set[str]:
+        """
+        重新读取配置文件，应用文件中相对上次读取或写入发生变化的键
+        （尚未保存的本地修改中，未被外部修改的键保持不变；API Key 密文未变时不重新解密）
+
+        Returns:
+            发生变化的键集合；文件无法读取时返回空集合
+        """
+        with self._lock:
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                if not isinstance(config, dict):
+                    return set()
+            except (OSError, ValueError):
+                return set()
+
+            changed = {
+                key for key in set(config) | set(self._disk_config)
+                if config.get(key) != self._disk_config.get(key)
+            }
+            for key in changed:
+                if key == CONFIG_API_KEY:
+                    cipher = config.get(key) or ""
+                    self._api_key_cipher = cipher
+                    self._api_key = None if cipher else ""
+                elif key in config:
+                    self._config[key] = config[key]
                 else:
-                    encrypted_config[key] = value
+                    self._config.pop(key, None)
+
+            self._disk_config = config
+            return changed
 
-            # 保存到文件
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(encrypted_config, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            raise RuntimeError(f"保存配置失败: {str(e)}")
+    def flush(self) -> None:
+        """如有尚未执行的延迟保存，立即保存"""
+        with self._lock:
+            if self._save_timer is not None:
+                self.save_config()
+
+    def _schedule_save(self) -> None:
+        """安排延迟保存（期间的修改合并为一次写入）"""
+        self._cancel_save_timer()
+        self._save_timer = threading.Timer(CONFIG_SAVE_DELAY_S, self._save_delayed)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _cancel_save_timer(self) -> None:
+        """取消尚未执行的延迟保存"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def _save_delayed(self) -> None:
+        """延迟保存（在计时器线程中执行）"""
+        try:
+            self.save_config()
+        except RuntimeError as e:
+            print(e)
 
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -95,17 +223,36 @@ class SettingsManager:
         Returns:
             配置值
         """
-        return self._config.get(key, default)
+        with self._lock:
+            if key == CONFIG_API_KEY:
+                return self._get_api_key()
+            return self._config.get(key, default)
+
+    def _set_value(self, key: str, value: Any) -> bool:
+        """
+        设置单个配置值（调用方需持有锁）
+
+        Returns:
+            是否有变化
+        """
+        if key == CONFIG_API_KEY:
+            return self._set_api_key(value)
+        if key in self._config and self._config[key] == value:
+            return False
+        self._config[key] = value
+        return True
 
     def set(self, key: str, value: Any) -> None:
         """
-        设置配置值
+        设置配置值（有变化时延迟保存）
 
         Args:
             key: 配置键
             value: 配置值
         """
-        self._config[key] = value
+        with self._lock:
+            if self._set_value(key, value):
+                self._schedule_save()
 
     def get_all(self) -> Dict[str, Any]:
         """
@@ -114,21 +261,33 @@ class SettingsManager:
         Returns:
             配置字典
         """
-        return self._config.copy()
+        with self._lock:
+            config = self._config.copy()
+            config[CONFIG_API_KEY] = self._get_api_key()
+            return config
 
-    def update(self, config_dict: Dict[str, Any]) -> None:
+    def update(self, config_dict: Dict[str, Any]) -> Set[str]:
         """
-        更新多个配置值
+        更新多个配置值（有变化时延迟保存）
 
         Args:
             config_dict: 配置字典
+
+        Returns:
+            发生变化的键集合
         """
-        self._config.update(config_dict)
+        with self._lock:
+            changed = {key for key, value in config_dict.items() if self._set_value(key, value)}
+            if changed:
+                self._schedule_save()
+            return changed
 
     def reset_to_default(self) -> None:
         """重置为默认配置"""
-        self._config = DEFAULT_CONFIG.copy()
-        self.save_config()
+        with self._lock:
+            self._config = DEFAULT_CONFIG.copy()
+            self._set_api_key(self._config.pop(CONFIG_API_KEY, ""))
+            self.save_config()
 
 
 # 全局设置管理器实例
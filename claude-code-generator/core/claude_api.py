@@ -3,20 +3,37 @@ Claude API 客户端模块
 负责与 Anthropic Claude API 的通信
 """
 
+import threading
 import time
 from typing import Callable, Optional
 
-import anthropic
-
 from config.constants import (
     API_RETRY_ATTEMPTS,
     API_RETRY_DELAY,
     API_TIMEOUT,
+    CONTINUATION_MAX_ROUNDS,
+    CONTINUATION_TOTAL_MAX_TOKENS,
     DEFAULT_MAX_TOKENS,
     DEFAULT_MODEL,
     DEFAULT_TEMPERATURE,
+    EDIT_TEMPERATURE,
     ERROR_MESSAGES,
+    OUTLINE_MAX_TOKENS,
+    OUTLINE_MODEL,
 )
+from core.continuation import ContinuationSeam, build_prefill, stitch_continuation
+from core.metrics import GenerationMetrics
+from core.stream_sink import strip_fences
+from utils.event_log import get_event_log
+from utils.lazy_import import lazy_import
+from utils.logger import get_logger
+
+# anthropic 及其依赖导入较慢，首次使用时再导入
+anthropic = lazy_import("anthropic")
+
+
+class GenerationCancelled(RuntimeError):
+    """生成被调用方取消"""
 
 
 class ClaudeAPIClient:
@@ -33,8 +50,21 @@ class ClaudeAPIClient:
             raise ValueError(ERROR_MESSAGES["no_api_key"])
 
         self.api_key = api_key
-        self.client = anthropic.Anthropic(api_key=api_key)
         self.model = DEFAULT_MODEL
+        self.logger = get_logger()
+        self.events = get_event_log()
+
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Anthropic 客户端（首次使用时创建）"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = anthropic.Anthropic(api_key=self.api_key)
+        return self._client
 
     def set_model(self, model: str) -> None:
         """
@@ -68,6 +98,88 @@ Requirements:
 Respond ONLY with the code block. Do not include explanations or markdown formatting outside the code block.
 Start your response directly with the code."""
 
+    def _build_outline_system_prompt(self, language: str) -> str:
+        """
+        构建大纲模式的系统提示词
+
+        Args:
+            language: 编程语言
+
+        Returns:
+            系统提示词
+        """
+        return f"""You are an expert {language} software architect.
+
+Split the requested code into independent sections that can be written in parallel by different programmers, such as classes, groups of related functions, or separate files.
+
+Rules:
+- Sections must be ordered as they should appear in the final output
+- Each description must name the public functions, classes and signatures the section provides, and which names from other sections it uses
+- Use a single section when the request is small
+- Do not write any code
+
+Respond ONLY with JSON in this format:
+{{"sections": [{{"title": "...", "description": "..."}}]}}"""
+
+    def _build_edit_system_prompt(self, language: str) -> str:
+        """
+        构建修改模式的系统提示词
+
+        Args:
+            language: 编程语言
+
+        Returns:
+            系统提示词
+        """
+        return f"""You are an expert {language} programmer editing existing code.
+
+You will receive the current code and a change request. Reply ONLY with the minimal edits, using SEARCH/REPLACE blocks:
+
+<<<<<<< SEARCH
+exact lines copied from the current code
+=======
+the replacement lines
+>>>>>>> REPLACE
+
+Rules:
+- Each SEARCH section must match the current code exactly, including indentation, and must be unique
+- Include just enough surrounding lines to make each SEARCH section unique
+- Use multiple blocks for multiple edits, in the order they appear in the file
+- Do not repeat unchanged code and do not include explanations"""
+
+    def _build_system(self, language: str) -> list[dict]:
+        """
+        构建带缓存断点的系统提示词块
+
+        Args:
+            language: 编程语言
+
+        Returns:
+            系统提示词块列表
+        """
+        return [
+            {
+                "type": "text",
+                "text": self._build_system_prompt(language),
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    def _build_messages(self, prompt: str, history: Optional[list[dict]] = None) -> list[dict]:
+        """
+        构建消息列表
+
+        Args:
+            prompt: 用户提示词
+            history: 之前的对话消息（可选）
+
+        Returns:
+            消息列表
+        """
+        messages = list(history) if history else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     def generate_code(
         self,
         prompt: str,
@@ -75,6 +187,7 @@ Start your response directly with the code."""
         model: Optional[str] = None,
         temperature: float = DEFAULT_TEMPERATURE,
         max_tokens: int = DEFAULT_MAX_TOKENS,
+        history: Optional[list[dict]] = None,
     ) -> str:
         """
         生成代码（非流式）
@@ -85,6 +198,7 @@ Start your response directly with the code."""
             model: 模型名称（可选）
             temperature: 温度参数
             max_tokens: 最大 token 数
+            history: 之前的对话消息（可选，用于多轮对话）
 
         Returns:
             生成的代码
@@ -95,27 +209,153 @@ Start your response directly with the code."""
         if not prompt.strip():
             raise ValueError(ERROR_MESSAGES["empty_input"])
 
-        system_prompt = self._build_system_prompt(language)
+        system_prompt = self._build_system(language)
+        messages = self._build_messages(prompt, history)
         model_to_use = model or self.model
 
+        full_code = ""
+        tokens_used = 0
+
+        for round_index in range(CONTINUATION_MAX_ROUNDS + 1):
+            # 续写时以已生成内容作为助手预填充
+            request_messages = messages
+            if round_index > 0:
+                request_messages = messages + [
+                    {"role": "assistant", "content": build_prefill(full_code)}
+                ]
+
+            response = self._create_message(
+                model=model_to_use,
+                system=system_prompt,
+                messages=request_messages,
+                temperature=temperature,
+                max_tokens=min(max_tokens, CONTINUATION_TOTAL_MAX_TOKENS - tokens_used),
+            )
+
+            text = response.content[0].text if response.content else ""
+            if round_index > 0:
+                text = stitch_continuation(full_code, text)
+            full_code += text
+
+            tokens_used += response.usage.output_tokens
+            if not self._should_continue(response, tokens_used, round_index):
+                break
+
+        # 提取代码内容
+        return self._extract_code(full_code)
+
+    def generate_patch(
+        self,
+        prompt: str,
+        language: str,
+        model: Optional[str] = None,
+        temperature: float = EDIT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        history: Optional[list[dict]] = None,
+    ) -> str:
+        """
+        生成修改补丁（非流式）
+        返回原始的 SEARCH/REPLACE 块或 unified diff 文本，不做代码提取
+
+        Args:
+            prompt: 包含当前代码和修改要求的提示词
+            language: 编程语言
+            model: 模型名称（可选）
+            temperature: 温度参数
+            max_tokens: 最大 token 数
+            history: 之前的对话消息（可选）
+
+        Returns:
+            补丁文本
+
+        Raises:
+            RuntimeError: API 调用失败
+        """
+        if not prompt.strip():
+            raise ValueError(ERROR_MESSAGES["empty_input"])
+
+        response = self._create_message(
+            model=model or self.model,
+            system=[{"type": "text", "text": self._build_edit_system_prompt(language)}],
+            messages=self._build_messages(prompt, history),
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return response.content[0].text
+
+    def _should_continue(self, message, tokens_used: int, round_index: int) -> bool:
+        """
+        判断输出被截断后是否需要继续续写
+
+        Args:
+            message: 本轮 API 响应
+            tokens_used: 累计已使用的输出 token 数
+            round_index: 本轮编号（0 为首次请求）
+
+        Returns:
+            需要续写返回 True
+        """
+        if message.stop_reason != "max_tokens":
+            return False
+
+        if round_index >= CONTINUATION_MAX_ROUNDS or tokens_used >= CONTINUATION_TOTAL_MAX_TOKENS:
+            self.logger.warning("输出达到续写上限，结果可能不完整（已使用 %d tokens）", tokens_used)
+            return False
+
+        self.logger.info("输出达到 max_tokens 上限，自动续写（第 %d 次）", round_index + 1)
+        return True
+
+    def generate_outline(
+        self,
+        prompt: str,
+        language: str,
+        model: Optional[str] = None,
+        max_tokens: int = OUTLINE_MAX_TOKENS,
+    ) -> str:
+        """
+        生成代码大纲（非流式）
+        用于分段并行生成，默认使用较快的模型
+
+        Args:
+            prompt: 用户提示词
+            language: 编程语言
+            model: 模型名称（可选，默认使用大纲模型）
+            max_tokens: 最大 token 数
+
+        Returns:
+            JSON 格式的大纲文本
+
+        Raises:
+            RuntimeError: API 调用失败
+        """
+        if not prompt.strip():
+            raise ValueError(ERROR_MESSAGES["empty_input"])
+
+        response = self._create_message(
+            model=model or OUTLINE_MODEL,
+            system=[{"type": "text", "text": self._build_outline_system_prompt(language)}],
+            messages=self._build_messages(prompt),
+            temperature=0.0,
+            max_tokens=max_tokens,
+        )
+        return response.content[0].text
+
+    def _create_message(self, **kwargs):
+        """
+        调用 messages.create，并按错误类型重试
+
+        Args:
+            **kwargs: 传给 messages.create 的参数
+
+        Returns:
+            API 响应
+
+        Raises:
+            RuntimeError: API 调用失败
+        """
         for attempt in range(API_RETRY_ATTEMPTS):
             try:
-                response = self.client.messages.create(
-                    model=model_to_use,
-                    system=system_prompt,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
-
-                # 提取代码内容
-                code = response.content[0].text
-                return self._extract_code(code)
+                return self.client.messages.create(**kwargs)
 
             except anthropic.AuthenticationError:
                 raise RuntimeError(ERROR_MESSAGES["invalid_api_key"])
@@ -151,6 +391,9 @@ Start your response directly with the code."""
         model: Optional[str] = None,
         temperature: float = DEFAULT_TEMPERATURE,
         max_tokens: int = DEFAULT_MAX_TOKENS,
+        history: Optional[list[dict]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        metrics: Optional[GenerationMetrics] = None,
     ) -> str:
         """
         生成代码（流式）
@@ -162,39 +405,95 @@ Start your response directly with the code."""
             model: 模型名称（可选）
             temperature: 温度参数
             max_tokens: 最大 token 数
+            history: 之前的对话消息（可选，用于多轮对话）
+            cancel_event: 取消事件（可选），被设置后关闭连接并停止生成
+            metrics: 生成指标（可选），记录首 token 时间和每轮的 token 用量
 
         Returns:
             完整的生成代码
 
         Raises:
+            GenerationCancelled: 生成被取消
             RuntimeError: API 调用失败
         """
         if not prompt.strip():
             raise ValueError(ERROR_MESSAGES["empty_input"])
 
-        system_prompt = self._build_system_prompt(language)
+        system_prompt = self._build_system(language)
+        messages = self._build_messages(prompt, history)
         model_to_use = model or self.model
         full_code = ""
+        tokens_used = 0
 
         try:
-            with self.client.messages.stream(
-                model=model_to_use,
-                system=system_prompt,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-            ) as stream:
-                for text in stream.text_stream:
-                    full_code += text
-                    callback(text)
+            for round_index in range(CONTINUATION_MAX_ROUNDS + 1):
+                # 续写时以已生成内容作为助手预填充，并处理接缝
+                request_messages = messages
+                seam = None
+                if round_index > 0:
+                    request_messages = messages + [
+                        {"role": "assistant", "content": build_prefill(full_code)}
+                    ]
+                    seam = ContinuationSeam(full_code)
+
+                round_start = time.perf_counter()
+                with self.client.messages.stream(
+                    model=model_to_use,
+                    system=system_prompt,
+                    messages=request_messages,
+                    temperature=temperature,
+                    max_tokens=min(max_tokens, CONTINUATION_TOTAL_MAX_TOKENS - tokens_used),
+                ) as stream:
+                    for text in stream.text_stream:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise GenerationCancelled("生成已取消")
+                        if seam:
+                            text = seam.feed(text)
+                        if text:
+                            full_code += text
+                            if metrics is not None:
+                                metrics.add_text(text)
+                            # 按 EVENT_SAMPLE_RATES 采样，未采样时不计算字段
+                            self.events.event(
+                                "stream.chunk",
+                                "debug",
+                                round=round_index,
+                                chars=len(text),
+                                offset=len(full_code),
+                                elapsed_ms=lambda: round((time.perf_counter() - round_start) * 1000, 1),
+                            )
+                            callback(text)
+
+                    if seam:
+                        text = seam.flush()
+                        if text:
+                            full_code += text
+                            if metrics is not None:
+                                metrics.add_text(text)
+                            callback(text)
+
+                    final_message = stream.get_final_message()
+
+                if metrics is not None:
+                    metrics.add_usage(final_message.usage)
+                self.events.event(
+                    "api.round",
+                    model=model_to_use,
+                    round=round_index,
+                    duration_ms=round((time.perf_counter() - round_start) * 1000, 1),
+                    stop_reason=final_message.stop_reason,
+                    input_tokens=final_message.usage.input_tokens,
+                    output_tokens=final_message.usage.output_tokens,
+                )
+                tokens_used += final_message.usage.output_tokens
+                if not self._should_continue(final_message, tokens_used, round_index):
+                    break
 
             return self._extract_code(full_code)
 
+        except GenerationCancelled:
+            raise
+
         except anthropic.AuthenticationError:
             raise RuntimeError(ERROR_MESSAGES["invalid_api_key"])
 
@@ -227,7 +526,7 @@ Start your response directly with the code."""
     def _extract_code(self, text: str) -> str:
         """
         从响应中提取代码
-        移除 markdown 代码块标记（如果存在）
+        移除 markdown 代码块标记（如果存在），规则与流式保存时使用的 FenceStripper 相同
 
         Args:
             text: 原始文本
@@ -235,25 +534,5 @@ Start your response directly with the code."""
         Returns:
             提取的代码
         """
-        # 移除可能存在的 markdown 代码块标记
-        lines = text.split('\n')
-
-        # 检查是否有代码块开始
-        start_idx = 0
-        end_idx = len(lines)
-
-        for i, line in enumerate(lines):
-            if line.strip().startswith('```'):
-                start_idx = i + 1
-                break
-
-        for i in range(len(lines) - 1, -1, -1):
-            if lines[i].strip().startswith('```'):
-                end_idx = i
-                break
-
-        # 提取代码
-        code_lines = lines[start_idx:end_idx]
-        code = '\n'.join(code_lines).strip()
-
+        code = strip_fences(text)
         return code if code else text
@@ -3,28 +3,68 @@
 提供代码生成的业务逻辑
 """
 
-from typing import Optional
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
 
 from config.constants import (
+    BEST_OF_DEFAULT_SCORERS,
+    BEST_OF_MAX_SAMPLES,
+    BEST_OF_SAMPLES,
     CODE_TEMPLATES,
     DEFAULT_MAX_TOKENS,
     DEFAULT_TEMPERATURE,
+    GENERATION_MAX_SUBTASKS,
     PROGRAMMING_LANGUAGES,
+    SECTION_MAX_COUNT,
 )
-from core.claude_api import ClaudeAPIClient
+from core.claude_api import ClaudeAPIClient, GenerationCancelled
+from core.conversation import ConversationContext
+from core.metrics import GenerationMetrics
+from core.patcher import apply_patch
+from core.scorers import Scorer, create_scorers, total_score, total_upper_bound
+from core.sections import assemble_sections, parse_outline
+from core.stream_sink import FileSink, tee
+from utils.logger import get_logger
+
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """
+    检查取消事件（用于两次请求之间，请求内部由 generate_code_stream 检查）
+
+    Args:
+        cancel_event: 取消事件（可选）
+
+    Raises:
+        GenerationCancelled: 取消事件已被设置
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise GenerationCancelled("生成已取消")
 
 
 class CodeGenerator:
     """代码生成器"""
 
-    def __init__(self, api_client: ClaudeAPIClient):
+    def __init__(
+        self,
+        api_client: ClaudeAPIClient,
+        submit_subtask: Optional[Callable[..., Future]] = None,
+    ):
         """
         初始化代码生成器
 
         Args:
             api_client: Claude API 客户端
+            submit_subtask: 提交分段和候选请求的函数（可选，如 GenerationExecutor.submit_subtask，
+                使所有会话共用有界线程池；默认使用本生成器自己的线程池）
         """
         self.api_client = api_client
+        if submit_subtask is None:
+            submit_subtask = ThreadPoolExecutor(max_workers=GENERATION_MAX_SUBTASKS).submit
+        self._submit_subtask = submit_subtask
+        self.conversation = ConversationContext()
+        self.logger = get_logger()
 
     def generate(
         self,
@@ -35,6 +75,11 @@ class CodeGenerator:
         max_tokens: int = DEFAULT_MAX_TOKENS,
         use_stream: bool = False,
         callback: Optional[callable] = None,
+        use_context: bool = True,
+        cancel_event: Optional[threading.Event] = None,
+        model: Optional[str] = None,
+        metrics: Optional[GenerationMetrics] = None,
+        context: Optional[str] = None,
     ) -> str:
         """
         生成代码
@@ -47,6 +92,11 @@ class CodeGenerator:
             max_tokens: 最大 token 数
             use_stream: 是否使用流式响应
             callback: 流式响应回调函数
+            use_context: 是否携带之前的对话轮次（多轮细化）
+            cancel_event: 取消事件（仅流式生成时检查），设置后抛出 GenerationCancelled
+            model: 模型 ID（可选，默认使用客户端当前模型）
+            metrics: 生成指标（可选，仅流式生成时记录）
+            context: 参考上下文（可选，如 build_file_context 生成的文件内容）
 
         Returns:
             生成的代码
@@ -56,30 +106,491 @@ class CodeGenerator:
             language = "Python"
 
         # 构建提示词
-        prompt = self._build_prompt(description, language, template_type)
+        prompt = self._build_prompt(description, language, template_type, context)
+        history = self.conversation.build_messages() if use_context else None
 
         # 生成代码
         if use_stream and callback:
-            return self.api_client.generate_code_stream(
+            code = self.api_client.generate_code_stream(
                 prompt=prompt,
                 language=language,
                 callback=callback,
+                model=model,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                history=history,
+                cancel_event=cancel_event,
+                metrics=metrics,
             )
         else:
-            return self.api_client.generate_code(
+            code = self.api_client.generate_code(
+                prompt=prompt,
+                language=language,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                history=history,
+            )
+
+        # 记录本轮对话（只记录需求本身，参考上下文不进入对话历史）
+        if use_context:
+            self.conversation.add_turn(self._build_prompt(description, language, template_type), code)
+
+        return code
+
+    def generate_to_file(
+        self,
+        description: str,
+        language: str,
+        path: str,
+        callback: Optional[Callable[[str], None]] = None,
+        **kwargs,
+    ) -> str:
+        """
+        流式生成代码并边生成边写入文件（无界面时使用）
+        代码写入临时文件，生成成功后才替换目标文件；失败或取消时目标文件保持原样
+
+        Args:
+            description: 代码描述
+            language: 编程语言
+            path: 目标文件路径
+            callback: 同时接收原始流式数据的回调函数（可选）
+            **kwargs: 传给 generate 的其他参数（temperature、cancel_event、metrics 等）
+
+        Returns:
+            生成的代码
+        """
+        sink = FileSink(path)
+        try:
+            code = self.generate(
+                description=description,
+                language=language,
+                use_stream=True,
+                callback=tee(sink.write, callback),
+                **kwargs,
+            )
+        except BaseException:
+            sink.abort()
+            raise
+
+        sink.commit()
+        self.logger.info("代码已保存到: %s", sink.path)
+        return code
+
+    def generate_sectioned(
+        self,
+        description: str,
+        language: str,
+        template_type: Optional[str] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        callback: Optional[callable] = None,
+        context: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> str:
+        """
+        分段并行生成代码
+        先用快速模型生成大纲，再并行生成各部分，最后按顺序组装
+
+        Args:
+            description: 代码描述
+            language: 编程语言
+            template_type: 模板类型（可选）
+            temperature: 温度参数
+            max_tokens: 每个部分的最大 token 数
+            callback: 回调函数，各部分按顺序完成时收到该部分代码
+            context: 参考上下文（可选）
+            cancel_event: 取消事件（可选），设置后所有部分停止生成并抛出 GenerationCancelled
+
+        Returns:
+            组装后的代码
+        """
+        if language not in PROGRAMMING_LANGUAGES and language != "Other":
+            language = "Python"
+
+        prompt = self._build_prompt(description, language, template_type, context)
+
+        try:
+            outline_text = self.api_client.generate_outline(prompt=prompt, language=language)
+            sections = parse_outline(outline_text, SECTION_MAX_COUNT)
+        except RuntimeError as e:
+            self.logger.warning("生成大纲失败: %s", e)
+            sections = []
+        _check_cancelled(cancel_event)
+
+        # 大纲无效或只有一个部分时，直接整体生成
+        if len(sections) < 2:
+            return self.generate(
+                description=description,
+                language=language,
+                template_type=template_type,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_stream=callback is not None,
+                callback=callback,
+                cancel_event=cancel_event,
+                context=context,
+            )
+
+        self.logger.info("分段并行生成：共 %d 个部分", len(sections))
+        shared_context = self._build_section_context(prompt, sections)
+
+        # 任一部分失败或调用方取消时设置，其余部分在下一个数据块时停止
+        section_cancel = threading.Event()
+        failures = []
+
+        def on_chunk(text: str):
+            if cancel_event is not None and cancel_event.is_set():
+                section_cancel.set()
+
+        def on_done(future):
+            if future.cancelled() or isinstance(future.exception(), GenerationCancelled):
+                return
+            if future.exception() is not None:
+                failures.append(future.exception())
+                section_cancel.set()
+
+        # 各部分使用流式请求，以便取消时立即关闭连接
+        futures = []
+        try:
+            for i, section in enumerate(sections, start=1):
+                future = self._submit(
+                    self.api_client.generate_code_stream,
+                    prompt=f"{shared_context}\n\n现在只实现第 {i} 部分：{section['title']}",
+                    language=language,
+                    callback=on_chunk,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    cancel_event=section_cancel,
+                )
+                future.add_done_callback(on_done)
+                futures.append(future)
+
+            # 按大纲顺序收集结果，前面的部分完成后立即输出
+            results = []
+            for future in futures:
+                section_code = future.result()
+                results.append(section_code)
+                if callback:
+                    callback(section_code + "\n\n")
+        except Exception:
+            # 排队中的部分不再开始，并等待进行中的部分停止
+            section_cancel.set()
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            _check_cancelled(cancel_event)
+            # 等待的部分可能是因其他部分失败而被取消的，抛出最先发生的错误
+            if failures:
+                raise failures[0]
+            raise
+
+        code = assemble_sections(results, language)
+        self.conversation.add_turn(self._build_prompt(description, language, template_type), code)
+        return code
+
+    def generate_best_of(
+        self,
+        description: str,
+        language: str,
+        samples: int = BEST_OF_SAMPLES,
+        scorers: Optional[list[Scorer]] = None,
+        template_type: Optional[str] = None,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        on_progress: Optional[Callable[[str], None]] = None,
+        context: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+        test_code: Optional[str] = None,
+    ) -> tuple[str, list[dict]]:
+        """
+        多样本择优生成
+        并行生成多个候选，由评分器选出最佳结果；
+        已完成的最佳候选分数不低于某个候选的分数上界时，立即取消该候选
+
+        Args:
+            description: 代码描述
+            language: 编程语言
+            samples: 并行采样数
+            scorers: 评分器列表（默认使用 BEST_OF_DEFAULT_SCORERS）
+            template_type: 模板类型（可选）
+            temperature: 温度参数
+            max_tokens: 最大 token 数
+            on_progress: 进度回调函数，接收进度描述
+            context: 参考上下文（可选）
+            cancel_event: 取消事件（可选），设置后取消所有候选并抛出 GenerationCancelled
+            test_code: 快速测试代码（可选，使用默认评分器时用于测试评分）
+
+        Returns:
+            (最佳代码, 各候选结果列表)
+
+        Raises:
+            GenerationCancelled: 生成被取消
+            RuntimeError: 所有候选都生成失败
+        """
+        if language not in PROGRAMMING_LANGUAGES and language != "Other":
+            language = "Python"
+
+        samples = max(1, min(samples, BEST_OF_MAX_SAMPLES))
+        scorers = scorers if scorers is not None else create_scorers(BEST_OF_DEFAULT_SCORERS, test_code)
+        prompt = self._build_prompt(description, language, template_type, context)
+        history = self.conversation.build_messages()
+
+        lock = threading.Lock()
+        cancel_events = [threading.Event() for _ in range(samples)]
+        partials = [""] * samples
+        results = [{"index": i, "status": "running", "score": None, "code": ""} for i in range(samples)]
+        best = {"score": None}
+
+        def report():
+            if on_progress:
+                done = sum(1 for r in results if r["status"] != "running")
+                on_progress(f"候选进度 {done}/{samples}")
+
+        def on_chunk(index: int, text: str):
+            if cancel_event is not None and cancel_event.is_set():
+                cancel_events[index].set()
+                return
+            with lock:
+                partials[index] += text
+                best_score = best["score"]
+            # 已不可能超过当前最佳候选时提前取消
+            if best_score is not None and total_upper_bound(partials[index], language, scorers) <= best_score:
+                cancel_events[index].set()
+
+        def run_sample(index: int):
+            # 在共享线程池中排队期间可能已被取消
+            if cancel_event is not None and cancel_event.is_set():
+                cancel_events[index].set()
+            try:
+                code = self.api_client.generate_code_stream(
+                    prompt=prompt,
+                    language=language,
+                    callback=lambda text: on_chunk(index, text),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    history=history,
+                    cancel_event=cancel_events[index],
+                )
+                score = total_score(code, language, scorers)
+            except GenerationCancelled:
+                results[index]["status"] = "cancelled"
+                report()
+                return
+            except Exception as e:
+                # 线程池不会抛出任务中的异常，这里必须记录，否则该候选会一直处于运行中
+                self.logger.error("候选 #%d 生成失败: %s", index, e, exc_info=not isinstance(e, RuntimeError))
+                results[index]["status"] = "failed"
+                results[index]["error"] = str(e)
+                report()
+                return
+
+            with lock:
+                results[index].update(status="done", score=score, code=code)
+                if best["score"] is None or score > best["score"]:
+                    best["score"] = score
+
+                # 取消分数上界不超过当前最佳的候选
+                for other in range(samples):
+                    if results[other]["status"] == "running" and \
+                            total_upper_bound(partials[other], language, scorers) <= best["score"]:
+                        cancel_events[other].set()
+            report()
+
+        wait([self._submit(run_sample, i) for i in range(samples)])
+
+        _check_cancelled(cancel_event)
+        finished = [r for r in results if r["status"] == "done"]
+        if not finished:
+            errors = [r.get("error", "") for r in results if r["status"] == "failed"]
+            raise RuntimeError(errors[0] if errors else "所有候选均生成失败")
+
+        winner = max(finished, key=lambda r: r["score"])
+        self.logger.info(
+            "多样本择优完成：%s",
+            "，".join(
+                f"#{r['index']} {r['status']}" + (f" {r['score']:.3f}" if r["score"] is not None else "")
+                for r in results
+            ),
+        )
+
+        self.conversation.add_turn(self._build_prompt(description, language, template_type), winner["code"])
+        return winner["code"], results
+
+    def _submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        提交子请求，在当前上下文的副本中执行（子线程记录的事件保留请求 ID 等公共字段）
+
+        Args:
+            func: 子请求函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Future 对象
+        """
+        return self._submit_subtask(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def _build_section_context(self, prompt: str, sections: list[dict]) -> str:
+        """
+        构建各部分共享的上下文（相同前缀便于命中提示缓存）
+
+        Args:
+            prompt: 原始提示词
+            sections: 大纲部分列表
+
+        Returns:
+            共享上下文
+        """
+        outline = "\n".join(
+            f"{i}. {section['title']}：{section['description']}"
+            for i, section in enumerate(sections, start=1)
+        )
+        return (
+            f"整体需求：{prompt}\n\n"
+            f"代码按以下大纲拆分为多个部分，由不同的人并行编写：\n{outline}\n\n"
+            f"只输出指定部分的代码，不要实现其他部分；"
+            f"可以直接使用其他部分提供的名称，并写出本部分需要的导入语句。"
+        )
+
+    def edit(
+        self,
+        current_code: str,
+        instruction: str,
+        language: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        callback: Optional[callable] = None,
+        on_fallback: Optional[Callable[[], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> tuple[str, bool]:
+        """
+        修改现有代码
+        先请求紧凑的补丁并在本地应用，补丁无法应用时回退为完整重新生成
+
+        Args:
+            current_code: 当前代码
+            instruction: 修改要求
+            language: 编程语言
+            temperature: 完整重新生成时使用的温度参数
+            max_tokens: 最大 token 数
+            callback: 完整重新生成时的流式响应回调函数
+            on_fallback: 回退为完整重新生成之前调用的函数
+            cancel_event: 取消事件（可选），设置后抛出 GenerationCancelled
+
+        Returns:
+            (修改后的代码, 是否通过补丁完成)
+
+        Raises:
+            GenerationCancelled: 修改被取消
+        """
+        if language not in PROGRAMMING_LANGUAGES and language != "Other":
+            language = "Python"
+
+        prompt = self._build_edit_prompt(current_code, instruction, language)
+
+        try:
+            patch_text = self.api_client.generate_patch(
                 prompt=prompt,
                 language=language,
+                max_tokens=max_tokens,
+            )
+            success, result = apply_patch(current_code, patch_text)
+            if success:
+                success, result = self._validate_edit(current_code, result, language)
+        except RuntimeError as e:
+            success, result = False, str(e)
+
+        _check_cancelled(cancel_event)
+        if success:
+            self.conversation.add_turn(instruction, result)
+            return result, True
+
+        self.logger.warning("补丁应用失败，回退为完整生成: %s", result)
+        if on_fallback:
+            on_fallback()
+
+        # 回退：带上当前代码完整重新生成
+        fallback_prompt = f"{prompt}\n\n请输出修改后的完整代码。"
+        if callback:
+            code = self.api_client.generate_code_stream(
+                prompt=fallback_prompt,
+                language=language,
+                callback=callback,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                cancel_event=cancel_event,
+            )
+        else:
+            code = self.api_client.generate_code(
+                prompt=fallback_prompt,
+                language=language,
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
 
+        self.conversation.add_turn(instruction, code)
+        return code, False
+
+    def _build_edit_prompt(self, current_code: str, instruction: str, language: str) -> str:
+        """
+        构建修改模式的提示词
+
+        Args:
+            current_code: 当前代码
+            instruction: 修改要求
+            language: 编程语言
+
+        Returns:
+            完整的提示词
+        """
+        return (
+            f"当前代码：\n```{language.lower()}\n{current_code}\n```\n\n"
+            f"修改要求：{instruction}"
+        )
+
+    def _validate_edit(self, original: str, edited: str, language: str) -> tuple[bool, str]:
+        """
+        验证补丁应用结果
+
+        Args:
+            original: 原始代码
+            edited: 应用补丁后的代码
+            language: 编程语言
+
+        Returns:
+            (是否有效, 修改后的代码或错误消息)
+        """
+        if not edited.strip():
+            return False, "补丁应用后代码为空"
+
+        if edited == original:
+            return False, "补丁没有产生任何修改"
+
+        # Python 代码：原代码可以编译时，要求修改后仍可编译
+        if language == "Python":
+            try:
+                compile(original, "<original>", "exec")
+            except SyntaxError:
+                return True, edited
+
+            try:
+                compile(edited, "<edited>", "exec")
+            except SyntaxError as e:
+                return False, f"补丁应用后出现语法错误: {e}"
+
+        return True, edited
+
+    def reset_conversation(self) -> None:
+        """结束当前会话，清空对话历史"""
+        self.conversation.reset()
+
     def _build_prompt(
         self,
         description: str,
         language: str,
-        template_type: Optional[str] = None
+        template_type: Optional[str] = None,
+        context: Optional[str] = None,
     ) -> str:
         """
         构建提示词
@@ -88,6 +599,7 @@ class CodeGenerator:
             description: 代码描述
             language: 编程语言
             template_type: 模板类型
+            context: 参考上下文（放在需求之前）
 
         Returns:
             完整的提示词
@@ -103,6 +615,8 @@ class CodeGenerator:
             # 直接使用描述
             prompt = description
 
+        if context:
+            prompt = f"{context}\n\n{prompt}"
         return prompt
 
     def validate_description(self, description: str) -> tuple[bool, str]:
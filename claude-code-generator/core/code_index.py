@@ -0,0 +1,632 @@
+"""
+项目代码索引模块
+遍历项目目录，提取函数和类的名称、签名和文档注释，建立 BM25 全文索引，
+生成时检索与描述相关的已有代码放入提示词，使生成的代码沿用项目的命名和风格
+
+- 索引保存在 CODE_INDEX_DIR 下的 SQLite 数据库中（FTS5，bm25 排序），每个项目一个文件
+- 增量更新：只对修改时间或大小变化的文件计算哈希，内容确实变化时才重新提取符号；已删除的文件从索引移除
+- 全文索引不保存原文（contentless），删除时按符号表中的字段重新计算索引词
+- 定义行的识别与 core.context_ingest 共用同一套规则
+
+命令行用法（在项目目录下运行）：
+    python -m core.code_index 项目目录 [--query "解析配置文件"] [--top-k 8]
+"""
+
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Iterator, Optional
+
+from config.constants import (
+    CODE_INDEX_DIR,
+    CODE_INDEX_DOC_MAX_CHARS,
+    CODE_INDEX_EXTENSIONS,
+    CODE_INDEX_IGNORED_DIRS,
+    CODE_INDEX_MAX_FILE_BYTES,
+    CODE_INDEX_NAME_WEIGHT,
+    CODE_INDEX_QUERY_MAX_TERMS,
+    CODE_INDEX_SIGNATURE_MAX_CHARS,
+    CODE_INDEX_SNIPPET_MAX_TOKENS,
+    CODE_INDEX_SNIPPET_MIN_TOKENS,
+    CODE_INDEX_TOKEN_BUDGET,
+    CODE_INDEX_TOP_K,
+)
+from core.context_ingest import DefinitionScanner, fence_language
+from utils.logger import get_logger
+from utils.tokens import estimate_tokens
+
+# 数据库结构版本，变化时重建索引（修改 index_terms 的拆分规则时也需要增加）
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols(file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS symbol_fts USING fts5(name, terms, content='');
+"""
+
+# 符号类型：文件本身（模块文档和开头的导入部分）
+SYMBOL_MODULE = "module"
+
+# 使用文档字符串的语言
+_DOCSTRING_EXTENSIONS = {".py", ".pyi"}
+
+_WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[\u4e00-\u9fff]+")
+_CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+_DOCSTRING_START = re.compile(r"^[rRuUbBfF]{0,2}(\"\"\"|''')")
+_COMMENT_MARKERS = re.compile(r"^(?:/\*\*?|\*/|\*|///?|#|--)\s?")
+
+# 检索时忽略的常见词
+_STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "use", "using", "add", "make", "create",
+    "write", "function", "class", "method", "code", "implement", "return", "self", "new", "get", "set",
+}
+
+
+def index_terms(text: str) -> list[str]:
+    """
+    把文本拆分为索引词：标识符按驼峰和下划线拆开（同时保留连写形式），中文按二元组拆分
+
+    Args:
+        text: 文本
+
+    Returns:
+        索引词列表（小写）
+    """
+    terms = []
+    for word in _WORD_PATTERN.findall(text):
+        if word[0] >= "\u4e00":
+            terms.extend(word[i:i + 2] for i in range(max(len(word) - 1, 1)))
+            continue
+        parts = [part.lower() for part in _CAMEL_PATTERN.findall(word)]
+        terms.extend(parts)
+        if len(parts) > 1:
+            terms.append(word.replace("_", "").lower())
+    return terms
+
+
+def extract_symbols(text: str, extension: str, path: str) -> list[tuple]:
+    """
+    提取文件中的符号
+
+    Args:
+        text: 文件内容
+        extension: 扩展名（小写，带点）
+        path: 相对路径（用于模块符号）
+
+    Returns:
+        [(名称, 类型, 签名, 文档, 起始行, 结束行)]，行号从 1 开始，第一项为模块符号
+    """
+    lines = text.splitlines()
+    scanner = DefinitionScanner(extension)
+    definitions = []  # (分块起始行, 定义行, 缩进, 类型, 名称)
+    for index, line in enumerate(lines):
+        definition = scanner.feed(index, line)
+        if definition is not None:
+            start, indent, kind, name = definition
+            definitions.append((start, index, indent, kind, name))
+
+    # 每个定义结束于下一个缩进不大于它的定义（或模块级语句）之前
+    ends = [len(lines)] * len(definitions)
+    parents = [None] * len(definitions)
+    open_definitions = []
+    for i, (start, _, indent, _, _) in enumerate(definitions):
+        while open_definitions and definitions[open_definitions[-1]][2] >= indent:
+            ends[open_definitions.pop()] = start
+        if open_definitions:
+            parents[i] = open_definitions[-1]
+        open_definitions.append(i)
+
+    docstrings = extension in _DOCSTRING_EXTENSIONS
+    header_end = definitions[0][0] if definitions else len(lines)
+    module_doc = _docstring(lines, 0) if docstrings else _comment_doc(lines[:header_end])
+    symbols = [(
+        os.path.splitext(os.path.basename(path))[0], SYMBOL_MODULE, path, module_doc, 1, max(header_end, 1),
+    )]
+
+    for i, (start, line_index, _, kind, name) in enumerate(definitions):
+        if name is None:
+            continue
+        end = ends[i]
+        while end > line_index + 1 and not lines[end - 1].strip():
+            end -= 1
+
+        signature, signature_end = _signature(lines, line_index)
+        doc = _docstring(lines, signature_end + 1) if docstrings else _comment_doc(lines[start:line_index])
+        parent = parents[i]
+        qualified = name
+        while parent is not None:
+            # 没有名称的是块边界（如模块级语句），不计入限定名
+            parent_name = definitions[parent][4]
+            if parent_name is not None:
+                qualified = f"{parent_name}.{qualified}"
+            parent = parents[parent]
+        symbols.append((qualified, kind, signature, doc, start + 1, end))
+    return symbols
+
+
+def _signature(lines: list[str], index: int) -> tuple[str, int]:
+    """
+    获取定义的签名（括号未闭合时合并后续行）
+
+    Args:
+        lines: 文件各行
+        index: 定义行
+
+    Returns:
+        (签名, 签名最后一行)
+    """
+    parts = [lines[index].strip()]
+    depth = parts[0].count("(") - parts[0].count(")")
+    while depth > 0 and index + 1 < len(lines) and len(parts) < 8:
+        index += 1
+        part = lines[index].strip()
+        parts.append(part)
+        depth += part.count("(") - part.count(")")
+    signature = " ".join(parts).rstrip("{").rstrip()
+    return signature[:CODE_INDEX_SIGNATURE_MAX_CHARS], index
+
+
+def _docstring(lines: list[str], index: int) -> str:
+    """
+    读取从指定行开始的文档字符串（第一个非空行不是字符串时返回空字符串）
+
+    Args:
+        lines: 文件各行
+        index: 起始行
+
+    Returns:
+        文档内容
+    """
+    while index < len(lines) and not lines[index].strip():
+        index += 1
+    if index >= len(lines):
+        return ""
+
+    first = lines[index].strip()
+    match = _DOCSTRING_START.match(first)
+    if not match:
+        return ""
+
+    quote = match.group(1)
+    body = [first[match.end():]]
+    if quote not in body[0]:
+        for line in itertools.islice(lines, index + 1, index + 20):
+            body.append(line.strip())
+            if quote in line:
+                break
+    return _clean_doc(" ".join(body).split(quote)[0])
+
+
+def _comment_doc(lines: list[str]) -> str:
+    """
+    把定义之前的注释行整理为文档（忽略装饰器和注解）
+
+    Args:
+        lines: 注释行
+
+    Returns:
+        文档内容
+    """
+    comments = [line.strip() for line in lines]
+    comments = [_COMMENT_MARKERS.sub("", line) for line in comments if _COMMENT_MARKERS.match(line)]
+    return _clean_doc(" ".join(comments))
+
+
+def _clean_doc(text: str) -> str:
+    return " ".join(text.replace("*/", " ").split())[:CODE_INDEX_DOC_MAX_CHARS]
+
+
+def _search_query(text: str) -> Optional[str]:
+    """
+    把描述转换为 FTS5 查询（各词之间为 OR 关系）
+
+    Args:
+        text: 生成描述
+
+    Returns:
+        查询语句，没有可检索的词时返回 None
+    """
+    terms = [
+        term for term in dict.fromkeys(index_terms(text))
+        if len(term) > 1 and term not in _STOPWORDS
+    ][:CODE_INDEX_QUERY_MAX_TERMS]
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def _symbol_terms(name: str, signature: str, doc: str, path_terms: str) -> tuple[str, str]:
+    """
+    计算符号在全文索引两列中的内容
+
+    Args:
+        name: 符号名（可带外层定义前缀）
+        signature: 签名
+        doc: 文档
+        path_terms: 文件路径的索引词
+
+    Returns:
+        (名称列, 其他词列)
+    """
+    short_name = name.rsplit(".", 1)[-1]
+    terms = " ".join(index_terms(f"{name} {signature} {doc}"))
+    return " ".join(index_terms(short_name)), f"{terms} {path_terms}"
+
+
+class CodeIndex:
+    """项目代码索引（线程安全）"""
+
+    def __init__(self, root: str, index_dir: str = CODE_INDEX_DIR):
+        """
+        打开或创建项目的索引
+
+        Args:
+            root: 项目根目录
+            index_dir: 索引文件目录
+        """
+        self.root = os.path.abspath(root)
+        self.logger = get_logger()
+        self._lock = threading.Lock()
+
+        os.makedirs(index_dir, exist_ok=True)
+        key = hashlib.sha1(os.path.normcase(self.root).encode("utf-8")).hexdigest()[:16]
+        self.db_path = os.path.join(index_dir, f"{key}.sqlite3")
+        try:
+            self._conn = self._open()
+        except sqlite3.DatabaseError as e:
+            # 索引文件损坏：删除后重建
+            self.logger.warning("代码索引损坏，将重新建立: %s", e)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+            self._conn = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        打开数据库，结构版本不一致时重建
+
+        Returns:
+            数据库连接
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != _SCHEMA_VERSION:
+            conn.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS symbols; DROP TABLE IF EXISTS symbol_fts;"
+            )
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        return conn
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _walk(self) -> Iterator[tuple[str, os.stat_result]]:
+        """
+        遍历项目中需要索引的源文件（跳过隐藏目录、CODE_INDEX_IGNORED_DIRS 和过大的文件）
+
+        Returns:
+            (相对路径, stat 结果) 迭代器，相对路径使用 / 分隔
+        """
+        prefix = len(self.root) + 1
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not name.startswith(".") and name not in CODE_INDEX_IGNORED_DIRS:
+                                stack.append(entry.path)
+                            continue
+                        dot = name.rfind(".")
+                        if dot <= 0 or name[dot:].lower() not in CODE_INDEX_EXTENSIONS:
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.st_size <= CODE_INDEX_MAX_FILE_BYTES:
+                        yield entry.path[prefix:].replace(os.sep, "/"), stat
+
+    def update(self) -> dict:
+        """
+        增量更新索引
+
+        Returns:
+            {"files": 已索引文件数, "added", "updated", "removed", "seconds"}
+        """
+        started = time.perf_counter()
+        with self._lock:
+            known = {
+                row[1]: row for row in self._conn.execute("SELECT id, path, mtime_ns, size, hash FROM files")
+            }
+            seen = set()
+            changed = []
+            for path, stat in self._walk():
+                seen.add(path)
+                row = known.get(path)
+                if row is None or row[2] != stat.st_mtime_ns or row[3] != stat.st_size:
+                    changed.append((path, stat, row))
+            removed = [(row[0], path) for path, row in known.items() if path not in seen]
+
+            added = updated = 0
+            with self._conn:
+                for file_id, path in removed:
+                    self._delete_symbols(file_id, path)
+                    self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+                for path, stat, row in changed:
+                    try:
+                        with open(os.path.join(self.root, path), "rb") as f:
+                            data = f.read()
+                    except OSError:
+                        continue
+                    digest = hashlib.sha1(data).hexdigest()
+                    if row is not None and row[4] == digest:
+                        # 只有修改时间变化
+                        self._conn.execute(
+                            "UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                            (stat.st_mtime_ns, stat.st_size, row[0]),
+                        )
+                        continue
+
+                    if row is None:
+                        file_id = self._conn.execute(
+                            "INSERT INTO files (path, mtime_ns, size, hash) VALUES (?, ?, ?, ?)",
+                            (path, stat.st_mtime_ns, stat.st_size, digest),
+                        ).lastrowid
+                        added += 1
+                    else:
+                        file_id = row[0]
+                        self._delete_symbols(file_id, path)
+                        self._conn.execute(
+                            "UPDATE files SET mtime_ns = ?, size = ?, hash = ? WHERE id = ?",
+                            (stat.st_mtime_ns, stat.st_size, digest, file_id),
+                        )
+                        updated += 1
+
+                    extension = path[path.rfind("."):].lower()
+                    text = data.decode("utf-8", errors="replace")
+                    self._insert_symbols(file_id, path, extract_symbols(text, extension, path))
+
+        result = {
+            "files": len(seen),
+            "added": added,
+            "updated": updated,
+            "removed": len(removed),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        if added or updated or removed:
+            self.logger.info(
+                "代码索引已更新: %s（新增 %d，修改 %d，删除 %d，耗时 %.2fs）",
+                self.root, added, updated, len(removed), result["seconds"],
+            )
+        return result
+
+    def _delete_symbols(self, file_id: int, path: str) -> None:
+        """
+        删除文件的符号（全文索引不保存原文，需要提供与写入时相同的索引词）
+
+        Args:
+            file_id: 文件 ID
+            path: 相对路径
+        """
+        rows = self._conn.execute(
+            "SELECT id, name, signature, doc FROM symbols WHERE file_id = ?", (file_id,)
+        ).fetchall()
+        path_terms = " ".join(index_terms(path))
+        self._conn.executemany(
+            "INSERT INTO symbol_fts (symbol_fts, rowid, name, terms) VALUES ('delete', ?, ?, ?)",
+            [(symbol_id, *_symbol_terms(name, signature, doc, path_terms)) for symbol_id, name, signature, doc in rows],
+        )
+        self._conn.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+
+    def _insert_symbols(self, file_id: int, path: str, symbols: list[tuple]) -> None:
+        """
+        写入文件的符号及其索引词
+
+        Args:
+            file_id: 文件 ID
+            path: 相对路径
+            symbols: extract_symbols 的结果
+        """
+        path_terms = " ".join(index_terms(path))
+        for name, kind, signature, doc, start_line, end_line in symbols:
+            symbol_id = self._conn.execute(
+                "INSERT INTO symbols (file_id, name, kind, signature, doc, start_line, end_line) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_id, name, kind, signature, doc, start_line, end_line),
+            ).lastrowid
+            self._conn.execute(
+                "INSERT INTO symbol_fts (rowid, name, terms) VALUES (?, ?, ?)",
+                (symbol_id, *_symbol_terms(name, signature, doc, path_terms)),
+            )
+
+    def search(self, query: str, limit: int = CODE_INDEX_TOP_K) -> list[dict]:
+        """
+        按相关程度检索符号
+
+        Args:
+            query: 生成描述
+            limit: 最多返回的数量
+
+        Returns:
+            [{"path", "name", "kind", "signature", "doc", "start_line", "end_line", "score"}]，分数越小越相关
+        """
+        match = _search_query(query)
+        if match is None:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT f.path, s.name, s.kind, s.signature, s.doc, s.start_line, s.end_line, "
+                "bm25(symbol_fts, ?, 1.0) AS score "
+                "FROM symbol_fts JOIN symbols s ON s.id = symbol_fts.rowid JOIN files f ON f.id = s.file_id "
+                "WHERE symbol_fts MATCH ? ORDER BY score LIMIT ?",
+                (CODE_INDEX_NAME_WEIGHT, match, limit),
+            ).fetchall()
+
+        keys = ("path", "name", "kind", "signature", "doc", "start_line", "end_line", "score")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def build_context(
+        self,
+        query: str,
+        budget: int = CODE_INDEX_TOKEN_BUDGET,
+        top_k: int = CODE_INDEX_TOP_K,
+    ) -> str:
+        """
+        检索相关代码片段，生成可放入提示词的上下文
+
+        包含在已选片段之内的符号（如已选类中的方法）会被跳过；每个片段不超过 CODE_INDEX_SNIPPET_MAX_TOKENS
+
+        Args:
+            query: 生成描述
+            budget: token 预算
+            top_k: 最多包含的片段数
+
+        Returns:
+            上下文文本，没有相关代码时返回空字符串
+        """
+        intro = "以下是项目中与需求相关的已有代码，请沿用其中的命名、代码风格和已有的函数与类："
+        remaining = budget - estimate_tokens(intro)
+        parts = [intro]
+        taken = {}
+
+        for result in self.search(query, top_k * 2):
+            if len(parts) > top_k or remaining < CODE_INDEX_SNIPPET_MIN_TOKENS:
+                break
+            path, start, end = result["path"], result["start_line"], result["end_line"]
+            ranges = taken.setdefault(path, [])
+            if any(first <= start and end <= last for first, last in ranges):
+                continue
+
+            header = f"{path}:{start}-{end}"
+            extension = path[path.rfind("."):].lower()
+            fence = f"```{fence_language(extension)}"
+            overhead = estimate_tokens(header) + estimate_tokens(fence) + 2
+            snippet = self._read_snippet(path, start, end, min(CODE_INDEX_SNIPPET_MAX_TOKENS, remaining - overhead))
+            if not snippet:
+                continue
+
+            parts.append(f"{header}\n{fence}\n{snippet}\n```")
+            remaining -= overhead + estimate_tokens(snippet)
+            ranges.append((start, end))
+
+        return "\n\n".join(parts) if len(parts) > 1 else ""
+
+    def _read_snippet(self, path: str, start_line: int, end_line: int, max_tokens: int) -> str:
+        """
+        读取片段，超过 token 上限时截断
+
+        Args:
+            path: 相对路径
+            start_line: 起始行号
+            end_line: 结束行号（包含）
+            max_tokens: token 上限
+
+        Returns:
+            片段文本（文件不可读时为空字符串）
+        """
+        lines = []
+        tokens = 0
+        try:
+            with open(os.path.join(self.root, path), "r", encoding="utf-8", errors="replace") as f:
+                for line in itertools.islice(f, start_line - 1, end_line):
+                    tokens += estimate_tokens(line)
+                    if tokens > max_tokens:
+                        lines.append("...\n")
+                        break
+                    lines.append(line)
+        except OSError:
+            return ""
+        return "".join(lines).rstrip()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: str) -> CodeIndex:
+    """
+    获取项目的代码索引（每个项目目录一个实例）
+
+    Args:
+        root: 项目根目录
+
+    Returns:
+        代码索引
+    """
+    key = os.path.normcase(os.path.abspath(root))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = CodeIndex(root)
+        return index
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    命令行入口：更新索引，并可按描述检索
+
+    Args:
+        argv: 命令行参数（默认使用 sys.argv）
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description="增量更新项目代码索引，并按描述检索相关代码")
+    parser.add_argument("root", help="项目根目录")
+    parser.add_argument("--query", help="生成描述")
+    parser.add_argument("--top-k", type=int, default=CODE_INDEX_TOP_K, help="最多包含的片段数")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"目录不存在: {args.root}")
+        return 1
+
+    index = CodeIndex(args.root)
+    result = index.update()
+    print(
+        f"已索引 {result['files']} 个文件：新增 {result['added']}，修改 {result['updated']}，"
+        f"删除 {result['removed']}，耗时 {result['seconds']}s"
+    )
+    if args.query:
+        print(index.build_context(args.query, top_k=args.top_k) or "没有找到相关代码")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
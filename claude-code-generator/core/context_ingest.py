@@ -0,0 +1,553 @@
+"""
+文件上下文模块
+把已有的源文件作为生成的参考上下文（如“为这个模块编写测试”）
+
+- 通过 mmap 逐行扫描文件，只保存每行的偏移、累计 token 数和定义行的位置，不把整个文件读入内存
+- 在顶层函数和类的边界处分块（装饰器和紧邻的注释归入其后的定义），超过上限的分块继续在内层定义、
+  空行或行边界处拆分
+- 按描述中的标识符挑选相关分块，在 token 预算内按原顺序拼接，省略部分以定义名列表代替
+
+命令行用法（在项目目录下运行）：
+    python -m core.context_ingest 文件路径 [--budget 8000] [--query "为 parse 函数编写测试"]
+"""
+
+import argparse
+import bisect
+import mmap
+import os
+import re
+import sys
+from array import array
+from typing import Iterator, Optional
+
+from config.constants import (
+    CONTEXT_FILE_CHUNK_MAX_TOKENS,
+    CONTEXT_FILE_HEADER_RATIO,
+    CONTEXT_FILE_MARKER_TOKENS,
+    CONTEXT_FILE_OUTLINE_NAMES,
+    CONTEXT_FILE_TOKEN_BUDGET,
+    LANGUAGE_EXTENSIONS,
+)
+from utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# 分块类型
+CHUNK_HEADER = "header"      # 第一个定义之前的内容（导入、常量等）
+CHUNK_CLASS = "class"
+CHUNK_FUNCTION = "function"
+CHUNK_BLOCK = "block"        # 其他代码，或超长定义拆分出的后续部分
+
+CLASS_KEYWORDS = {"class", "interface", "struct", "enum", "trait", "impl", "module", "namespace", "object", "type"}
+
+_PYTHON_RULES = (
+    [re.compile(r"^(?P<indent>[ \t]*)(?:async[ \t]+)?(?P<keyword>def|class)[ \t]+(?P<name>\w+)")],
+    re.compile(r"^[ \t]*(?:@|#)"),
+)
+_RUBY_RULES = (
+    [re.compile(r"^(?P<indent>[ \t]*)(?P<keyword>def|class|module)[ \t]+(?P<name>[\w.:?!=]+)")],
+    re.compile(r"^[ \t]*#"),
+)
+_BRACE_RULES = (
+    [
+        # 带关键字的定义：function / class / struct / fn / func 等，可带修饰符
+        re.compile(
+            r"^(?P<indent>[ \t]*)(?:(?:export|default|declare|public|private|protected|internal|static|abstract|"
+            r"final|async|sealed|open|data|override|virtual|inline|extern|unsafe|const|pub(?:\([^)]*\))?)[ \t]+)*"
+            r"(?P<keyword>function\*?|class|interface|struct|enum|trait|impl|fn|func|fun|object|namespace|module|type)"
+            r"(?:<[^>]*>)?[ \t]+(?:\([^)]*\)[ \t]*)?(?P<name>[\w$]+)"
+        ),
+        # JS/TS 中赋值为函数的变量
+        re.compile(
+            r"^(?P<indent>[ \t]*)(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[\w$]+)[ \t]*(?::[^=]+)?=[ \t]*"
+            r"(?:async[ \t]+)?(?P<keyword>function\b|\([^)]*\)[ \t]*(?::[^=]+)?=>|[\w$]+[ \t]*=>)"
+        ),
+        # Java / C# / C++ 等带修饰符或返回类型的方法，以及行首的 C 函数定义（不以分号结尾）
+        re.compile(
+            r"^(?P<indent>[ \t]*)(?:(?:public|private|protected|internal|static|final|abstract|synchronized|"
+            r"override|virtual|async|extern|inline)[ \t]+)+(?:[\w<>\[\],.?* \t]+?[ \t*&]+)?(?P<name>~?\w+)[ \t]*\((?!.*;[ \t]*$)"
+        ),
+        re.compile(r"^(?P<indent>)(?:[A-Za-z_][\w<>:,*& \t]*?[ \t*&]+)(?P<name>[A-Za-z_][\w:~]*)[ \t]*\((?!.*;[ \t]*$)"),
+    ],
+    re.compile(r"^[ \t]*(?://|/\*|\*|@|#\[)"),
+)
+_SQL_RULES = (
+    [re.compile(r"^(?P<indent>[ \t]*)CREATE[ \t]+(?:OR[ \t]+REPLACE[ \t]+)?(?P<keyword>\w+)[ \t]+(?:IF[ \t]+NOT[ \t]+EXISTS[ \t]+)?(?P<name>[\w.\"`]+)", re.IGNORECASE)],
+    re.compile(r"^[ \t]*--"),
+)
+_SHELL_RULES = (
+    [re.compile(r"^(?P<indent>[ \t]*)(?:(?P<keyword>function)[ \t]+)?(?P<name>[\w-]+)[ \t]*\(\)")],
+    re.compile(r"^[ \t]*#"),
+)
+
+# 按缩进划分代码块的语言：缩进回到行首的非定义语句也作为分块边界
+_INDENT_EXTENSIONS = {".py", ".pyi"}
+
+# 扩展名 -> (定义行模式, 可归入其后定义的前导行模式)
+_LANGUAGE_RULES = {".py": _PYTHON_RULES, ".pyi": _PYTHON_RULES, ".rb": _RUBY_RULES, ".sql": _SQL_RULES, ".sh": _SHELL_RULES}
+
+# 不属于定义的控制语句（避免把 if (...) { 识别为 C 函数）
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "new", "sizeof", "elif", "with"}
+
+_IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+
+class DefinitionScanner:
+    """
+    逐行识别定义行
+
+    装饰器和紧邻定义的注释归入其后的定义；按缩进划分代码块的语言中，定义结束后回到行首的
+    模块级语句（如 if __name__ == "__main__":）也作为一个边界，类型为 block、名称为 None
+    """
+
+    def __init__(self, extension: str):
+        """
+        初始化
+
+        Args:
+            extension: 文件扩展名（小写，带点），决定使用的识别规则
+        """
+        self.patterns, self.lead_pattern = _LANGUAGE_RULES.get(extension, _BRACE_RULES)
+        self.split_dedent = extension in _INDENT_EXTENSIONS
+        self._lead_start = None  # 当前连续的装饰器 / 注释行的起始行
+        self._indented = False   # 上一个代码行（不含装饰器和注释）是否有缩进
+
+    def feed(self, index: int, line: str) -> Optional[tuple[int, int, str, Optional[str]]]:
+        """
+        处理一行
+
+        Args:
+            index: 行号（从 0 开始）
+            line: 行内容
+
+        Returns:
+            该行是定义行或边界时返回 (分块起始行, 缩进, 类型, 名称)，否则返回 None
+        """
+        stripped = line.strip()
+        if not stripped:
+            self._lead_start = None
+            return None
+
+        definition = match_definition(line, self.patterns)
+        if definition is not None:
+            indent, keyword, name = definition
+            kind = CHUNK_CLASS if keyword in CLASS_KEYWORDS else CHUNK_FUNCTION
+            start = self._lead_start if self._lead_start is not None else index
+            self._lead_start = None
+            self._indented = indent > 0
+            return start, indent, kind, name
+
+        if self.lead_pattern.match(line):
+            if self._lead_start is None:
+                self._lead_start = index
+            return None
+
+        was_indented, self._indented = self._indented, line[0] in " \t"
+        start = self._lead_start if self._lead_start is not None else index
+        self._lead_start = None
+        if self.split_dedent and was_indented and not self._indented and stripped[0] not in ")]}":
+            return start, 0, CHUNK_BLOCK, None
+        return None
+
+
+class SourceChunk:
+    """源文件中的一个分块（只保存位置和 token 数，文本通过 SourceFile.read 读取）"""
+
+    def __init__(self, start_line: int, end_line: int, tokens: int, kind: str, name: Optional[str] = None):
+        """
+        初始化
+
+        Args:
+            start_line: 起始行号（从 1 开始）
+            end_line: 结束行号（包含）
+            tokens: 估算的 token 数
+            kind: 分块类型
+            name: 定义名（可带外层定义前缀，如 Parser.parse）
+        """
+        self.start_line = start_line
+        self.end_line = end_line
+        self.tokens = tokens
+        self.kind = kind
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"SourceChunk({self.kind} {self.name or ''} L{self.start_line}-{self.end_line}, {self.tokens} tokens)"
+
+
+class SourceFile:
+    """按语法边界分块的源文件"""
+
+    def __init__(self, path: str, max_chunk_tokens: int = CONTEXT_FILE_CHUNK_MAX_TOKENS):
+        """
+        扫描文件并分块
+
+        Args:
+            path: 文件路径
+            max_chunk_tokens: 单个分块的最大 token 数（无法在行内拆分的超长行除外）
+        """
+        self.path = os.path.abspath(path)
+        self.max_chunk_tokens = max_chunk_tokens
+        self.extension = os.path.splitext(path)[1].lower()
+        self.size = os.path.getsize(self.path)
+
+        self._offsets = array("q", [0])  # 每行起始偏移，最后一项为文件末尾
+        self._tokens = array("q", [0])   # 累计 token 数，_tokens[i] 为前 i 行之和
+        self._blank = bytearray()        # 是否为空行
+        self._definitions = []           # (分块起始行, 缩进, 类型, 名称)，行号从 0 开始
+
+        self._scan()
+        self.chunks = self._split(0, self.line_count, None, top=True)
+        self._chunk_starts = [chunk.start_line for chunk in self.chunks]
+
+    @property
+    def line_count(self) -> int:
+        """行数"""
+        return len(self._blank)
+
+    @property
+    def total_tokens(self) -> int:
+        """整个文件的估算 token 数"""
+        return self._tokens[-1]
+
+    def _scan(self) -> None:
+        """逐行扫描文件，记录行偏移、token 数和定义行"""
+        if self.size == 0:
+            return
+
+        scanner = DefinitionScanner(self.extension)
+        offset = 0
+        total = 0
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for index, raw in enumerate(iter(mm.readline, b"")):
+                line = raw.decode("utf-8", errors="replace")
+                if index == 0:
+                    line = line.lstrip("\ufeff")
+                stripped = line.strip()
+
+                offset += len(raw)
+                total += (len(line) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if line.isascii() else estimate_tokens(line)
+                self._offsets.append(offset)
+                self._tokens.append(total)
+                self._blank.append(0 if stripped else 1)
+
+                definition = scanner.feed(index, line)
+                if definition is not None:
+                    self._definitions.append(definition)
+
+    def _split(self, start: int, end: int, parent: Optional[str], top: bool = False) -> list[SourceChunk]:
+        """
+        在 [start, end) 范围内按最外层的定义分块，超长分块递归拆分
+
+        Args:
+            start: 起始行（从 0 开始）
+            end: 结束行（不包含）
+            parent: 外层定义名
+            top: 是否为整个文件（第一个定义之前的部分标记为 header）
+
+        Returns:
+            分块列表
+        """
+        if start >= end:
+            return []
+
+        first = bisect.bisect_left(self._definitions, (start,))
+        last = bisect.bisect_left(self._definitions, (end,))
+        inner = self._definitions[first:last]
+        if not inner:
+            return self._split_lines(start, end, CHUNK_BLOCK, parent)
+
+        level = min(definition[1] for definition in inner)
+        boundaries = [definition for definition in inner if definition[1] == level]
+
+        chunks = []
+        if boundaries[0][0] > start:
+            kind = CHUNK_HEADER if top else CHUNK_BLOCK
+            chunks.extend(self._split_lines(start, boundaries[0][0], kind, parent))
+
+        for i, (line, _, kind, name) in enumerate(boundaries):
+            stop = boundaries[i + 1][0] if i + 1 < len(boundaries) else end
+            if name is None:
+                chunks.extend(self._split_lines(line, stop, CHUNK_BLOCK, parent))
+                continue
+            qualified = f"{parent}.{name}" if parent else name
+            if self._range_tokens(line, stop) <= self.max_chunk_tokens:
+                chunks.append(SourceChunk(line + 1, stop, self._range_tokens(line, stop), kind, qualified))
+                continue
+
+            # 超长定义：定义头部（到第一个内层定义为止）保留类型和名称，其余部分按内层定义拆分
+            nested = bisect.bisect_right(self._definitions, (line, sys.maxsize))
+            nested_start = self._definitions[nested][0] if nested < len(self._definitions) else stop
+            if nested_start >= stop:
+                chunks.extend(self._split_lines(line, stop, kind, qualified))
+            else:
+                chunks.extend(self._split_lines(line, nested_start, kind, qualified))
+                chunks.extend(self._split(nested_start, stop, qualified))
+        return chunks
+
+    def _split_lines(self, start: int, end: int, kind: str, name: Optional[str]) -> list[SourceChunk]:
+        """
+        按 token 上限拆分没有内层定义的范围，优先在空行处断开
+
+        Args:
+            start: 起始行（从 0 开始）
+            end: 结束行（不包含）
+            kind: 第一个分块的类型（后续分块为 block）
+            name: 定义名
+
+        Returns:
+            分块列表
+        """
+        chunks = []
+        while start < end:
+            # 在 token 上限内能容纳的最后一行
+            limit = self._tokens[start] + self.max_chunk_tokens
+            stop = bisect.bisect_right(self._tokens, limit, start + 1, end + 1) - 1
+            if stop <= start:
+                stop = start + 1  # 单行超过上限
+            elif stop < end:
+                # 后半段中有空行时在空行之后断开
+                for line in range(stop - 1, start + (stop - start) // 2, -1):
+                    if self._blank[line]:
+                        stop = line + 1
+                        break
+
+            chunks.append(SourceChunk(start + 1, stop, self._range_tokens(start, stop), kind, name))
+            kind = CHUNK_BLOCK
+            start = stop
+        return chunks
+
+    def _range_tokens(self, start: int, end: int) -> int:
+        return self._tokens[end] - self._tokens[start]
+
+    def read(self, chunks: list[SourceChunk]) -> Iterator[str]:
+        """
+        逐个读取分块文本（同一时间只解码一个分块）
+
+        Args:
+            chunks: 分块列表
+
+        Returns:
+            各分块文本的迭代器
+        """
+        if self.size == 0:
+            yield from ("" for _ in chunks)
+            return
+
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for chunk in chunks:
+                data = mm[self._offsets[chunk.start_line - 1]:self._offsets[chunk.end_line]]
+                text = data.decode("utf-8", errors="replace")
+                yield text.lstrip("\ufeff") if chunk.start_line == 1 else text
+
+    def select(self, budget: int, query: Optional[str] = None) -> list[SourceChunk]:
+        """
+        在 token 预算内挑选分块
+
+        开头部分（导入等）不超过预算的 CONTEXT_FILE_HEADER_RATIO 时总是保留；其余分块按与描述中
+        标识符的相关程度排序，相关程度相同时按文件顺序，依次放入预算。每个分块额外预留省略标记的开销
+
+        Args:
+            budget: token 预算
+            query: 生成描述（可选）
+
+        Returns:
+            选中的分块（按文件顺序）
+        """
+        terms = {term.lower() for term in _IDENTIFIER_PATTERN.findall(query or "")}
+        scores = self._score(terms) if terms else [0] * len(self.chunks)
+
+        remaining = budget
+        selected = set()
+        for index, chunk in enumerate(self.chunks):
+            if chunk.kind != CHUNK_HEADER:
+                break
+            cost = chunk.tokens + CONTEXT_FILE_MARKER_TOKENS
+            if cost <= min(remaining, budget * CONTEXT_FILE_HEADER_RATIO):
+                selected.add(index)
+                remaining -= cost
+
+        order = sorted(range(len(self.chunks)), key=lambda index: (-scores[index], index))
+        for index in order:
+            cost = self.chunks[index].tokens + CONTEXT_FILE_MARKER_TOKENS
+            if index not in selected and cost <= remaining:
+                selected.add(index)
+                remaining -= cost
+
+        return [self.chunks[index] for index in sorted(selected)]
+
+    def _score(self, terms: set[str]) -> list[int]:
+        """
+        计算各分块与描述的相关程度：定义名命中的权重高于正文出现次数
+
+        Args:
+            terms: 描述中的标识符（小写）
+
+        Returns:
+            各分块的分数
+        """
+        scores = []
+        for chunk, text in zip(self.chunks, self.read(self.chunks)):
+            text = text.lower()
+            name = (chunk.name or "").lower()
+            score = 0
+            for term in terms:
+                if term in name:
+                    score += 10
+                score += min(text.count(term), 5)
+            scores.append(score)
+        return scores
+
+    def build_context(self, budget: int = CONTEXT_FILE_TOKEN_BUDGET, query: Optional[str] = None) -> str:
+        """
+        生成可放入提示词的上下文文本
+
+        Args:
+            budget: token 预算
+            query: 生成描述（用于挑选相关分块）
+
+        Returns:
+            上下文文本
+        """
+        name = os.path.basename(self.path)
+        # 说明行和代码块标记按两个省略标记的开销预留
+        selected = self.select(budget - 2 * CONTEXT_FILE_MARKER_TOKENS, query)
+        if len(selected) == len(self.chunks):
+            intro = f"以下是参考文件 {name} 的完整内容："
+        else:
+            intro = (
+                f"以下是参考文件 {name} 的部分内容（共 {self.line_count} 行，"
+                f"约 {self.total_tokens} tokens，未选中的部分只列出定义名）："
+            )
+
+        texts = list(self.read(selected))
+        fence = "````" if any("```" in text for text in texts) else "```"
+        parts = [intro, f"{fence}{fence_language(self.extension)}"]
+
+        previous_end = 0
+        for chunk, text in zip(selected, texts):
+            if chunk.start_line > previous_end + 1:
+                parts.append(self._gap_marker(previous_end + 1, chunk.start_line - 1))
+            parts.append(text.rstrip("\n"))
+            previous_end = chunk.end_line
+        if previous_end < self.line_count:
+            parts.append(self._gap_marker(previous_end + 1, self.line_count))
+
+        parts.append(fence)
+        return "\n".join(parts)
+
+    def _gap_marker(self, start_line: int, end_line: int) -> str:
+        """
+        生成省略标记，列出被省略范围内的部分定义名
+
+        Args:
+            start_line: 起始行号
+            end_line: 结束行号
+
+        Returns:
+            标记行
+        """
+        # 只保留前几个名称用于展示，其余只计入去重后的总数
+        seen = set()
+        shown = []
+        index = bisect.bisect_left(self._chunk_starts, start_line)
+        while index < len(self.chunks) and self.chunks[index].start_line <= end_line:
+            name = self.chunks[index].name
+            if name and name not in seen:
+                seen.add(name)
+                if len(shown) < CONTEXT_FILE_OUTLINE_NAMES:
+                    shown.append(name)
+            index += 1
+
+        marker = f"... [省略第 {start_line}-{end_line} 行"
+        if shown:
+            marker += f"：{', '.join(shown)}" + (f" 等 {len(seen)} 个定义" if len(seen) > len(shown) else "")
+        return marker + "] ..."
+
+
+def match_definition(line: str, patterns: list[re.Pattern]) -> Optional[tuple[int, str, str]]:
+    """
+    检查是否为定义行
+
+    Args:
+        line: 行内容
+        patterns: 定义行模式
+
+    Returns:
+        (缩进宽度, 关键字, 名称)，不是定义行时返回 None
+    """
+    for pattern in patterns:
+        match = pattern.match(line)
+        if match is None:
+            continue
+        name = match.group("name")
+        if name in _CONTROL_KEYWORDS:
+            continue
+        keyword = (match.groupdict().get("keyword") or "function").split()[0].rstrip("*").lower()
+        indent = len(match.group("indent").expandtabs(4))
+        return indent, keyword, name
+    return None
+
+
+def fence_language(extension: str) -> str:
+    """
+    根据扩展名获取代码块标记中的语言名
+
+    Args:
+        extension: 扩展名（小写，带点）
+
+    Returns:
+        语言名，未知时返回空字符串
+    """
+    for language, language_extension in LANGUAGE_EXTENSIONS.items():
+        if language_extension == extension:
+            return language
+    return ""
+
+
+def build_file_context(
+    path: str,
+    query: Optional[str] = None,
+    budget: int = CONTEXT_FILE_TOKEN_BUDGET,
+) -> str:
+    """
+    读取文件并生成上下文文本
+
+    Args:
+        path: 文件路径
+        query: 生成描述（用于挑选相关分块）
+        budget: token 预算
+
+    Returns:
+        上下文文本
+    """
+    return SourceFile(path).build_context(budget, query)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    命令行入口：显示分块结果和按预算生成的上下文
+
+    Args:
+        argv: 命令行参数（默认使用 sys.argv）
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description="按语法边界分块文件，并在 token 预算内生成上下文")
+    parser.add_argument("path", help="源文件路径")
+    parser.add_argument("--budget", type=int, default=CONTEXT_FILE_TOKEN_BUDGET, help="token 预算")
+    parser.add_argument("--query", help="生成描述（用于挑选相关分块）")
+    parser.add_argument("--chunks", action="store_true", help="只列出分块")
+    args = parser.parse_args(argv)
+
+    source = SourceFile(args.path)
+    if args.chunks:
+        for chunk in source.chunks:
+            print(f"{chunk.start_line:>7}-{chunk.end_line:<7} {chunk.tokens:>6}  {chunk.kind:<8} {chunk.name or ''}")
+        print(f"共 {len(source.chunks)} 个分块，{source.line_count} 行，约 {source.total_tokens} tokens")
+    else:
+        print(source.build_context(args.budget, args.query))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+续写拼接模块
+输出因 max_tokens 截断后自动续写时，处理前后两段在接缝处的重复内容
+"""
+
+# 判断为重复内容的最短重叠长度，过短容易误判
+MIN_OVERLAP_CHARS = 16
+
+# 接缝处最多检查的字符数
+SEAM_LOOKAHEAD_CHARS = 256
+
+
+def build_prefill(previous: str) -> str:
+    """
+    构建续写请求的助手预填充内容
+    API 不接受以空白结尾的预填充，因此去掉末尾空白
+
+    Args:
+        previous: 已生成的文本
+
+    Returns:
+        预填充文本
+    """
+    return previous.rstrip()
+
+
+def stitch_continuation(previous: str, head: str) -> str:
+    """
+    清理续写内容的开头，使其与已生成文本无缝衔接
+
+    处理三种情况：
+    - 预填充去掉的末尾空白被模型重新输出
+    - 模型重新打开了代码块标记
+    - 模型重复了已生成文本的末尾
+
+    Args:
+        previous: 已生成（并已输出）的文本
+        head: 续写内容的开头部分
+
+    Returns:
+        清理后的续写开头
+    """
+    prefill = build_prefill(previous)
+    trailing_ws = previous[len(prefill):]
+
+    # 去掉与已输出空白重复的部分
+    head = _drop_output_whitespace(head, trailing_ws)
+
+    # 已处于代码块内时，去掉重新打开的代码块标记
+    if _inside_fence(prefill) and head.lstrip().startswith("```"):
+        stripped = head.lstrip()
+        newline = stripped.find("\n")
+        head = stripped[newline + 1:] if newline >= 0 else ""
+
+    # 去掉对已生成末尾的重复
+    candidate = head.lstrip()
+    for size in range(min(len(candidate), SEAM_LOOKAHEAD_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if prefill.endswith(candidate[:size]):
+            # 剩余部分接在预填充之后，其开头同样可能重复已输出的末尾空白
+            return _drop_output_whitespace(candidate[size:], trailing_ws)
+
+    return head
+
+
+def _drop_output_whitespace(text: str, trailing_ws: str) -> str:
+    """
+    去掉文本开头与已输出的末尾空白相同的部分
+
+    Args:
+        text: 接在预填充之后的文本
+        trailing_ws: 预填充去掉、但已经输出的末尾空白
+
+    Returns:
+        去掉重复空白后的文本
+    """
+    common = 0
+    while common < min(len(trailing_ws), len(text)) and trailing_ws[common] == text[common]:
+        common += 1
+    return text[common:]
+
+
+def _inside_fence(text: str) -> bool:
+    """
+    检查文本末尾是否处于未闭合的代码块中
+
+    Args:
+        text: 文本
+
+    Returns:
+        处于代码块中返回 True
+    """
+    fence_count = sum(1 for line in text.split("\n") if line.strip().startswith("```"))
+    return fence_count % 2 == 1
+
+
+class ContinuationSeam:
+    """流式续写的接缝处理器，缓冲续写开头直到足够判断重复内容"""
+
+    def __init__(self, previous: str):
+        """
+        初始化接缝处理器
+
+        Args:
+            previous: 已生成（并已输出）的文本
+        """
+        self.previous = previous
+        self._buffer = ""
+        self._done = False
+
+    def feed(self, text: str) -> str:
+        """
+        输入续写的流式片段
+
+        Args:
+            text: 流式片段
+
+        Returns:
+            可以输出的文本（缓冲期间返回空字符串）
+        """
+        if self._done:
+            return text
+
+        self._buffer += text
+        if len(self._buffer) < SEAM_LOOKAHEAD_CHARS:
+            return ""
+
+        return self.flush()
+
+    def flush(self) -> str:
+        """
+        结束缓冲，返回清理后的续写开头
+
+        Returns:
+            可以输出的文本
+        """
+        if self._done:
+            return ""
+
+        self._done = True
+        return stitch_continuation(self.previous, self._buffer)
@@ -0,0 +1,255 @@
+"""
+对话上下文模块
+管理多轮对话历史，并在 token 预算内自动压缩
+"""
+
+import hashlib
+import re
+from typing import Optional
+
+from config.constants import (
+    CONTEXT_COMPACT_RATIO,
+    CONTEXT_KEEP_RECENT_TURNS,
+    CONTEXT_MAX_MESSAGE_TOKENS,
+    CONTEXT_SUMMARY_MAX_CHARS,
+    CONTEXT_TOKEN_BUDGET,
+)
+from utils.tokens import estimate_tokens, truncate_to_tokens
+
+# markdown 代码块
+_FENCE_PATTERN = re.compile(r"```[^\n]*\n(.*?)```", re.DOTALL)
+
+# 用于摘要的声明行（函数、类等）
+_SIGNATURE_PATTERN = re.compile(
+    r"^\s*(?:async\s+)?(?:def|class|function|func|fn|interface|struct|impl|enum|"
+    r"public|private|protected|export|CREATE)\b.*$",
+    re.MULTILINE,
+)
+
+# 小于该长度的代码块不做去重
+_DEDUPE_MIN_CHARS = 200
+
+_TRUNCATE_MARKER = "\n... [内容过长，已截断] ...\n"
+
+
+class ConversationContext:
+    """多轮对话上下文"""
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        keep_recent_turns: int = CONTEXT_KEEP_RECENT_TURNS,
+        max_message_tokens: int = CONTEXT_MAX_MESSAGE_TOKENS,
+    ):
+        """
+        初始化对话上下文
+
+        Args:
+            token_budget: 历史消息的 token 预算
+            keep_recent_turns: 始终原样保留的最近轮数
+            max_message_tokens: 单条消息的最大 token 数
+        """
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.max_message_tokens = max_message_tokens
+
+        self._turns = []
+        self._summary_lines = []
+        self._code_hashes = {}
+        self._turn_count = 0
+
+    @property
+    def turn_count(self) -> int:
+        """已进行的对话轮数（包括已被压缩的轮次）"""
+        return self._turn_count
+
+    @property
+    def total_tokens(self) -> int:
+        """当前历史的估算 token 数"""
+        summary_tokens = estimate_tokens(self._summary_text())
+        return summary_tokens + sum(turn["tokens"] for turn in self._turns)
+
+    def is_empty(self) -> bool:
+        """
+        检查上下文是否为空
+
+        Returns:
+            没有任何历史时返回 True
+        """
+        return not self._turns and not self._summary_lines
+
+    def reset(self) -> None:
+        """清空对话历史，开始新会话"""
+        self._turns = []
+        self._summary_lines = []
+        self._code_hashes = {}
+        self._turn_count = 0
+
+    def add_turn(self, user_message: str, assistant_message: str) -> None:
+        """
+        记录一轮对话
+
+        Args:
+            user_message: 用户消息
+            assistant_message: 助手回复
+        """
+        self._turn_count += 1
+        turn = {
+            "index": self._turn_count,
+            "user_raw": user_message,
+            "assistant_raw": assistant_message,
+        }
+        self._render_turn(turn)
+        self._turns.append(turn)
+
+        if self.total_tokens > self.token_budget:
+            self._compact()
+
+    def build_messages(self, prompt: Optional[str] = None) -> list[dict]:
+        """
+        构建发送给 API 的消息列表
+        历史部分只在压缩时变化，保证前缀稳定以命中提示缓存
+
+        Args:
+            prompt: 本轮用户提示词（可选）
+
+        Returns:
+            消息列表
+        """
+        messages = []
+        summary = self._summary_text()
+
+        for i, turn in enumerate(self._turns):
+            user_blocks = []
+            if i == 0 and summary:
+                user_blocks.append({"type": "text", "text": summary})
+            user_blocks.append({"type": "text", "text": turn["user"]})
+
+            messages.append({"role": "user", "content": user_blocks})
+            messages.append({
+                "role": "assistant",
+                "content": [{"type": "text", "text": turn["assistant"]}],
+            })
+
+        # 在历史末尾设置缓存断点，下一轮请求可复用整个历史前缀
+        if messages:
+            messages[-1]["content"][-1]["cache_control"] = {"type": "ephemeral"}
+
+        if prompt is not None:
+            prompt_blocks = []
+            if not self._turns and summary:
+                prompt_blocks.append({"type": "text", "text": summary})
+            prompt_blocks.append({"type": "text", "text": prompt})
+            messages.append({"role": "user", "content": prompt_blocks})
+
+        return messages
+
+    def _render_turn(self, turn: dict) -> None:
+        """
+        生成一轮对话实际发送的内容（去重并截断）
+
+        Args:
+            turn: 对话轮次
+        """
+        user = self._dedupe_code(turn["user_raw"], turn["index"], whole_is_code=False)
+        assistant = self._dedupe_code(turn["assistant_raw"], turn["index"], whole_is_code=True)
+
+        turn["user"] = truncate_to_tokens(user, self.max_message_tokens, _TRUNCATE_MARKER)
+        turn["assistant"] = truncate_to_tokens(assistant, self.max_message_tokens, _TRUNCATE_MARKER)
+        turn["tokens"] = estimate_tokens(turn["user"]) + estimate_tokens(turn["assistant"])
+
+    def _dedupe_code(self, text: str, turn_index: int, whole_is_code: bool) -> str:
+        """
+        将与之前轮次重复的代码块替换为引用
+
+        Args:
+            text: 消息文本
+            turn_index: 当前轮次编号
+            whole_is_code: 没有代码块标记时是否把整条消息视为代码
+
+        Returns:
+            去重后的文本
+        """
+        def replace(block: str) -> Optional[str]:
+            normalized = block.strip()
+            if len(normalized) < _DEDUPE_MIN_CHARS:
+                return None
+
+            digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+            seen_in = self._code_hashes.get(digest)
+            if seen_in is not None and seen_in != turn_index:
+                return f"[此代码与第 {seen_in} 轮中的代码相同，已省略]"
+
+            self._code_hashes.setdefault(digest, turn_index)
+            return None
+
+        if _FENCE_PATTERN.search(text):
+            def fence_replace(match):
+                reference = replace(match.group(1))
+                return reference if reference else match.group(0)
+
+            return _FENCE_PATTERN.sub(fence_replace, text)
+
+        if whole_is_code:
+            reference = replace(text)
+            if reference:
+                return reference
+
+        return text
+
+    def _compact(self) -> None:
+        """将最早的轮次压缩为摘要，直到历史回落到目标预算以内"""
+        target = int(self.token_budget * CONTEXT_COMPACT_RATIO)
+
+        while self.total_tokens > target and len(self._turns) > self.keep_recent_turns:
+            turn = self._turns.pop(0)
+            self._summary_lines.append(self._summarize_turn(turn))
+
+        # 被压缩轮次中的代码已不在上下文中，重新计算去重引用
+        self._code_hashes = {}
+        for turn in self._turns:
+            self._render_turn(turn)
+
+        # 仍然超出预算时，按轮次平均分配预算进行截断
+        if self.total_tokens > self.token_budget and self._turns:
+            per_message = max(target // (2 * len(self._turns)), 1)
+            for turn in self._turns:
+                turn["user"] = truncate_to_tokens(turn["user"], per_message, _TRUNCATE_MARKER)
+                turn["assistant"] = truncate_to_tokens(turn["assistant"], per_message, _TRUNCATE_MARKER)
+                turn["tokens"] = estimate_tokens(turn["user"]) + estimate_tokens(turn["assistant"])
+
+    def _summarize_turn(self, turn: dict) -> str:
+        """
+        生成单轮对话的摘要
+
+        Args:
+            turn: 对话轮次
+
+        Returns:
+            摘要文本
+        """
+        request = " ".join(turn["user_raw"].split())
+        if len(request) > CONTEXT_SUMMARY_MAX_CHARS:
+            request = request[:CONTEXT_SUMMARY_MAX_CHARS] + "..."
+
+        signatures = [
+            line.strip() for line in _SIGNATURE_PATTERN.findall(turn["assistant_raw"])
+        ][:8]
+        if signatures:
+            generated = "；".join(signatures)
+        else:
+            lines = turn["assistant_raw"].strip().splitlines()
+            generated = lines[0].strip() if lines else "（空）"
+
+        return f"- 第 {turn['index']} 轮 请求：{request}\n  生成：{generated}"
+
+    def _summary_text(self) -> str:
+        """
+        获取已压缩历史的摘要文本
+
+        Returns:
+            摘要文本，没有摘要时返回空字符串
+        """
+        if not self._summary_lines:
+            return ""
+        return "之前对话的摘要：\n" + "\n".join(self._summary_lines)
@@ -0,0 +1,279 @@
+"""
+生成任务执行器模块
+有界线程池执行生成任务：每个任务有请求 ID 和取消事件，同一来源提交新任务时取消旧任务并丢弃其结果；
+生成任务内部的分段和候选请求在共享的有界线程池中执行；
+保存和历史写入在单独的线程中按顺序执行，关闭时等待进行中的生成和写入完成
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Hashable
+
+from config.constants import (
+    GENERATION_DRAIN_TIMEOUT_S,
+    GENERATION_MAX_PENDING,
+    GENERATION_MAX_SUBTASKS,
+    SESSION_MAX_CONCURRENT_GENERATIONS,
+)
+from core.claude_api import GenerationCancelled
+from utils.event_log import get_event_log
+from utils.logger import get_logger
+
+
+class GenerationRejected(Exception):
+    """进行中和排队中的任务已达上限，或执行器已关闭"""
+
+
+class GenerationRequest:
+    """一次生成请求"""
+
+    def __init__(self, request_id: int, owner: Hashable):
+        """
+        初始化请求
+
+        Args:
+            request_id: 请求 ID（递增）
+            owner: 提交来源（如会话标签页）
+        """
+        self.request_id = request_id
+        self.owner = owner
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消"""
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """取消请求：尚未开始的任务不再执行，进行中的任务在下一次检查取消事件时停止"""
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class GenerationExecutor:
+    """生成任务执行器"""
+
+    def __init__(
+        self,
+        max_workers: int = SESSION_MAX_CONCURRENT_GENERATIONS,
+        max_pending: int = GENERATION_MAX_PENDING,
+        max_subtasks: int = GENERATION_MAX_SUBTASKS,
+    ):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 同时执行的生成任务数
+            max_pending: 进行中和排队中的任务上限
+            max_subtasks: 同时执行的子请求数（所有生成任务共享）
+        """
+        self.max_pending = max_pending
+        self.logger = get_logger()
+        self.events = get_event_log()
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Generation")
+        # 分段和候选请求共用一个线程池，多个会话同时多样本生成时流式请求数仍然有界
+        self._subtask_pool = ThreadPoolExecutor(max_workers=max_subtasks, thread_name_prefix="GenerationSubtask")
+        # 写入任务单线程执行，保证同一文件的写入顺序
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="GenerationIO")
+
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._latest = {}
+        self._active = set()
+        self._io_futures = set()
+        self._closed = False
+
+    def submit(self, owner: Hashable, task: Callable[[GenerationRequest], Any]) -> GenerationRequest:
+        """
+        提交生成任务；同一来源之前的任务会被取消
+
+        Args:
+            owner: 提交来源
+            task: 任务函数，参数为请求（通过 request.cancel_event 响应取消）
+
+        Returns:
+            生成请求
+
+        Raises:
+            GenerationRejected: 任务数已达上限或执行器已关闭
+        """
+        with self._lock:
+            if self._closed:
+                raise GenerationRejected("应用正在关闭")
+            previous = self._latest.pop(owner, None)
+
+        # 取消排队中的任务会同步调用完成回调，需在锁外进行
+        if previous is not None:
+            previous.cancel()
+
+        with self._lock:
+            if len(self._active) >= self.max_pending:
+                raise GenerationRejected(f"进行中的生成任务已达上限（{self.max_pending} 个），请稍后再试")
+
+            request = GenerationRequest(next(self._request_ids), owner)
+            self._latest[owner] = request
+            self._active.add(request)
+
+        request.future = self._pool.submit(self._run, request, task)
+        request.future.add_done_callback(lambda future: self._on_done(request))
+        return request
+
+    def _run(self, request: GenerationRequest, task: Callable[[GenerationRequest], Any]) -> Any:
+        """
+        在工作线程中执行任务（排队期间已取消的任务直接结束），期间记录的事件带有请求 ID
+
+        Args:
+            request: 生成请求
+            task: 任务函数
+
+        Returns:
+            任务返回值
+        """
+        if request.cancelled:
+            raise GenerationCancelled()
+        with self.events.context(request_id=request.request_id):
+            return task(request)
+
+    def _on_done(self, request: GenerationRequest) -> None:
+        """
+        任务结束后移出活动集合
+
+        Args:
+            request: 生成请求
+        """
+        with self._lock:
+            self._active.discard(request)
+            if self._latest.get(request.owner) is request:
+                del self._latest[request.owner]
+
+    def is_current(self, request: GenerationRequest) -> bool:
+        """
+        检查请求的结果是否仍应显示（未取消，且是同一来源最新的请求）
+
+        Args:
+            request: 生成请求
+
+        Returns:
+            是否为最新请求
+        """
+        if request.cancelled:
+            return False
+        with self._lock:
+            latest = self._latest.get(request.owner)
+        # 任务结束后已从 _latest 中移除，此时只要没有更新的请求即可
+        return latest is None or latest is request
+
+    def cancel(self, owner: Hashable) -> None:
+        """
+        取消某个来源的当前任务
+
+        Args:
+            owner: 提交来源
+        """
+        with self._lock:
+            request = self._latest.get(owner)
+        if request is not None:
+            request.cancel()
+
+    @property
+    def pending_count(self) -> int:
+        """进行中和排队中的任务数"""
+        with self._lock:
+            return len(self._active)
+
+    def submit_subtask(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        提交生成任务内部的子请求（分段生成的各部分、多样本择优的各候选）
+
+        Args:
+            func: 子请求函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Future 对象
+        """
+        return self._subtask_pool.submit(func, *args, **kwargs)
+
+    def submit_io(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        提交写入任务（保存文件、写入历史等），关闭时会等待其完成
+
+        Args:
+            func: 写入函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Future 对象
+        """
+        future = self._io_pool.submit(self._run_io, func, *args, **kwargs)
+        with self._lock:
+            self._io_futures.add(future)
+        future.add_done_callback(self._on_io_done)
+        return future
+
+    def _run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行写入任务并记录失败
+
+        Args:
+            func: 写入函数
+
+        Returns:
+            写入函数的返回值
+        """
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            self.logger.error("后台写入失败: %s", e)
+            raise
+
+    def _on_io_done(self, future: Future) -> None:
+        """
+        写入任务结束后移出跟踪集合
+
+        Args:
+            future: 写入任务
+        """
+        with self._lock:
+            self._io_futures.discard(future)
+
+    def shutdown(self, timeout: float = GENERATION_DRAIN_TIMEOUT_S) -> bool:
+        """
+        关闭执行器：拒绝新任务，取消所有生成任务并等待其结束，再等待写入任务完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否在超时前全部完成
+        """
+        with self._lock:
+            self._closed = True
+            requests = list(self._active)
+
+        for request in requests:
+            request.cancel()
+
+        # 先等生成任务结束（它们可能还会提交写入任务），再等写入任务
+        deadline = time.monotonic() + timeout
+        futures = [request.future for request in requests if request.future is not None]
+        _, not_done = wait(futures, timeout=timeout)
+        with self._lock:
+            io_futures = list(self._io_futures)
+        _, io_not_done = wait(io_futures, timeout=max(0, deadline - time.monotonic()))
+
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._subtask_pool.shutdown(wait=False, cancel_futures=True)
+        self._io_pool.shutdown(wait=False)
+
+        drained = not not_done and not io_not_done
+        if not drained:
+            self.logger.warning("关闭时仍有 %d 个生成任务和 %d 个写入任务未完成", len(not_done), len(io_not_done))
+        return drained
@@ -0,0 +1,179 @@
+"""
+生成历史模块
+以 JSON Lines 格式保存生成结果，超出条数上限时保留最近的记录
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterator, Optional
+
+from config.constants import HISTORY_FILE
+
+
+def make_history_record(
+    description: str,
+    language: str,
+    template: Optional[str],
+    mode: str,
+    model: str,
+    code: str,
+) -> dict:
+    """
+    创建一条历史记录
+
+    Args:
+        description: 代码描述（或修改要求）
+        language: 编程语言
+        template: 模板类型
+        mode: 生成模式
+        model: 模型 ID
+        code: 生成的代码
+
+    Returns:
+        历史记录字典
+    """
+    now = datetime.now()
+    return {
+        "id": now.strftime("%Y%m%d%H%M%S%f"),
+        "timestamp": now.isoformat(timespec="seconds"),
+        "description": description,
+        "language": language,
+        "template": template,
+        "mode": mode,
+        "model": model,
+        "code": code,
+    }
+
+
+class GenerationHistory:
+    """生成历史存储（可在任意线程调用）"""
+
+    def __init__(self, history_file: str = HISTORY_FILE):
+        """
+        初始化历史存储
+
+        Args:
+            history_file: 历史文件路径
+        """
+        self.history_file = history_file
+        self._lock = threading.Lock()
+        # 文件中的记录数，首次追加时统计
+        self._count = None
+
+    def append(self, record: dict, max_entries: Optional[int] = None) -> None:
+        """
+        追加一条记录
+
+        Args:
+            record: 历史记录
+            max_entries: 最多保留的记录数（可选）
+        """
+        with self._lock:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            if self._count is None:
+                self._count = len(self._read_lines())
+
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._count += 1
+
+            if max_entries and self._count > max_entries:
+                self._trim(max_entries)
+
+    def load(self, limit: Optional[int] = None) -> list[dict]:
+        """
+        读取历史记录（跳过损坏的行）
+
+        Args:
+            limit: 只返回最近的若干条（可选）
+
+        Returns:
+            按时间顺序排列的记录列表
+        """
+        with self._lock:
+            lines = self._read_lines()
+
+        if limit is not None:
+            lines = lines[-limit:]
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def iter_records(self) -> Iterator[dict]:
+        """
+        逐条读取历史记录（不把整个文件读入内存，跳过损坏的行）
+
+        读取期间追加的记录可能不会被读到；裁剪时文件被替换，已打开的旧文件仍可完整读取
+
+        Returns:
+            按时间顺序排列的记录迭代器
+        """
+        if not os.path.exists(self.history_file):
+            return
+
+        with open(self.history_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def clear(self) -> None:
+        """删除所有历史记录"""
+        with self._lock:
+            if os.path.exists(self.history_file):
+                os.remove(self.history_file)
+            self._count = 0
+
+    def _read_lines(self) -> list[str]:
+        """
+        读取文件中的非空行（调用方需持有锁）
+
+        Returns:
+            行列表
+        """
+        if not os.path.exists(self.history_file):
+            return []
+
+        with open(self.history_file, "r", encoding="utf-8") as f:
+            return [line for line in f if line.strip()]
+
+    def _trim(self, max_entries: int) -> None:
+        """
+        只保留最近的记录（先写临时文件再替换，调用方需持有锁）
+
+        Args:
+            max_entries: 保留的记录数
+        """
+        lines = self._read_lines()[-max_entries:]
+        temp_file = f"{self.history_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(temp_file, self.history_file)
+        self._count = len(lines)
+
+
+# 全局历史存储实例
+_generation_history = None
+
+
+def get_generation_history() -> GenerationHistory:
+    """
+    获取全局历史存储
+
+    Returns:
+        GenerationHistory 实例
+    """
+    global _generation_history
+    if _generation_history is None:
+        _generation_history = GenerationHistory()
+    return _generation_history
@@ -0,0 +1,358 @@
+"""
+生成历史导出模块
+把选中的历史记录批量导出为目录树或 zip / tar.gz 压缩包
+
+- 按语言分目录，文件名由时间和描述生成（经 sanitize_filename 清理），扩展名按语言确定
+- 内容相同的记录只写入一次，清单中记录其指向的文件
+- 记录逐条读取和写入，不把全部历史读入内存：导出到目录时并行写入，导出到压缩包时逐条写入压缩流
+- 压缩包先写入临时文件，完成后再替换目标文件
+
+命令行用法（在项目目录下运行）：
+    python -m core.history_export 目标路径(目录 / .zip / .tar.gz) [--language Python] [--since 2024-01-01]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+from config.constants import (
+    EXPORT_MANIFEST_NAME,
+    EXPORT_MAX_IN_FLIGHT,
+    EXPORT_NAME_MAX_CHARS,
+    EXPORT_WORKERS,
+)
+from core.history import GenerationHistory, get_generation_history
+from utils.file_handler import write_atomic
+from utils.validators import get_file_extension, sanitize_filename
+
+# 导出格式
+EXPORT_FORMAT_DIRECTORY = "directory"
+EXPORT_FORMAT_ZIP = "zip"
+EXPORT_FORMAT_TAR = "tar"
+
+
+def detect_format(target: str) -> str:
+    """
+    按目标路径的扩展名判断导出格式
+
+    Args:
+        target: 目标路径
+
+    Returns:
+        导出格式
+    """
+    lower = target.lower()
+    if lower.endswith(".zip"):
+        return EXPORT_FORMAT_ZIP
+    if lower.endswith((".tar.gz", ".tgz", ".tar")):
+        return EXPORT_FORMAT_TAR
+    return EXPORT_FORMAT_DIRECTORY
+
+
+def select_records(
+    records: Iterable[dict],
+    ids: Optional[Iterable[str]] = None,
+    language: Optional[str] = None,
+    since: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    筛选历史记录（逐条处理）
+
+    Args:
+        records: 历史记录
+        ids: 只导出这些 ID 的记录（可选）
+        language: 只导出该语言的记录（可选）
+        since: 只导出该时间（ISO 格式，可只写日期）之后的记录（可选）
+
+    Returns:
+        记录迭代器
+    """
+    ids = set(ids) if ids is not None else None
+    for record in records:
+        if not record.get("code"):
+            continue
+        if ids is not None and record.get("id") not in ids:
+            continue
+        if language and record.get("language") != language:
+            continue
+        if since and (record.get("timestamp") or "") < since:
+            continue
+        yield record
+
+
+def export_path(record: dict, index: int) -> str:
+    """
+    生成记录在导出结果中的相对路径：语言/时间_描述.扩展名
+
+    Args:
+        record: 历史记录
+        index: 记录序号（没有 ID 时使用）
+
+    Returns:
+        相对路径（使用 / 分隔）
+    """
+    language = record.get("language") or "Other"
+    # 目录名不能是 "." 或 ".."，也不生成隐藏目录
+    directory = sanitize_filename(language).lstrip(".") or "Other"
+    stamp = (record.get("id") or "")[:14] or f"{index:06d}"
+    description = " ".join((record.get("description") or "").split())[:EXPORT_NAME_MAX_CHARS]
+    name = sanitize_filename(f"{stamp}_{description}".rstrip("_ ").replace(" ", "_"))
+    return f"{directory}/{name}{get_file_extension(language)}"
+
+
+class _DirectoryWriter:
+    """把文件并行原子写入目录（限制同时排队的写入数，避免内容堆积在内存中）"""
+
+    def __init__(self, base_dir: str, max_workers: int):
+        self.base_dir = os.path.abspath(base_dir)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="HistoryExport")
+        self._slots = threading.BoundedSemaphore(EXPORT_MAX_IN_FLIGHT)
+        self._errors = []
+
+    def add(self, path: str, data: bytes) -> None:
+        full_path = os.path.abspath(os.path.join(self.base_dir, path))
+        if os.path.commonpath([self.base_dir, full_path]) != self.base_dir:
+            raise ValueError(f"导出路径超出目标目录: {path}")
+
+        self._slots.acquire()
+        future = self._pool.submit(self._write, full_path, data)
+        future.add_done_callback(lambda future: self._slots.release())
+
+    def _write(self, path: str, data: bytes) -> None:
+        try:
+            write_atomic(path, data.decode("utf-8"))
+        except OSError as e:
+            self._errors.append(f"{os.path.relpath(path, self.base_dir)}: {e}")
+
+    def close(self) -> list[str]:
+        self._pool.shutdown(wait=True)
+        return self._errors
+
+    def abort(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _ZipWriter:
+    """逐条写入 zip 压缩包（先写临时文件）"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._temp_path = _make_temp_path(target)
+        self._archive = zipfile.ZipFile(self._temp_path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, path: str, data: bytes) -> None:
+        self._archive.writestr(path, data)
+
+    def close(self) -> list[str]:
+        self._archive.close()
+        _commit_temp_file(self._temp_path, self.target)
+        return []
+
+    def abort(self) -> None:
+        self._archive.close()
+        _remove_quietly(self._temp_path)
+
+
+class _TarWriter:
+    """逐条写入 tar 包（.tar.gz / .tgz 时压缩，先写临时文件）"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._temp_path = _make_temp_path(target)
+        mode = "w" if target.lower().endswith(".tar") else "w:gz"
+        self._archive = tarfile.open(self._temp_path, mode)
+
+    def add(self, path: str, data: bytes) -> None:
+        info = tarfile.TarInfo(path)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self) -> list[str]:
+        self._archive.close()
+        _commit_temp_file(self._temp_path, self.target)
+        return []
+
+    def abort(self) -> None:
+        self._archive.close()
+        _remove_quietly(self._temp_path)
+
+
+def export_history(
+    target: str,
+    records: Optional[Iterable[dict]] = None,
+    export_format: Optional[str] = None,
+    max_workers: int = EXPORT_WORKERS,
+    on_progress: Optional[Callable[[int], None]] = None,
+    history: Optional[GenerationHistory] = None,
+    ids: Optional[Iterable[str]] = None,
+    language: Optional[str] = None,
+    since: Optional[str] = None,
+) -> dict:
+    """
+    导出历史记录
+    记录总是经过 select_records 筛选，没有代码的记录会被跳过
+
+    Args:
+        target: 目标目录或压缩包路径
+        records: 要导出的记录（默认导出全部历史）
+        export_format: 导出格式（默认按目标路径判断）
+        max_workers: 导出到目录时的写入线程数
+        on_progress: 进度回调，参数为已处理的记录数
+        history: 历史存储（默认使用全局实例）
+        ids: 只导出这些 ID 的记录（可选）
+        language: 只导出该语言的记录（可选）
+        since: 只导出该时间之后的记录（可选）
+
+    Returns:
+        {"target", "format", "records", "files", "duplicates", "errors"}
+    """
+    if records is None:
+        records = (history or get_generation_history()).iter_records()
+    records = select_records(records, ids, language, since)
+    export_format = export_format or detect_format(target)
+
+    if export_format == EXPORT_FORMAT_DIRECTORY:
+        writer = _DirectoryWriter(target, max_workers)
+    elif export_format == EXPORT_FORMAT_ZIP:
+        writer = _ZipWriter(target)
+    elif export_format == EXPORT_FORMAT_TAR:
+        writer = _TarWriter(target)
+    else:
+        raise ValueError(f"未知的导出格式: {export_format}")
+
+    written = {}       # (扩展名, 内容哈希) -> 相对路径
+    used_paths = set()
+    manifest = []
+    try:
+        for index, record in enumerate(records, start=1):
+            data = record["code"].encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+            # 内容相同但语言不同的记录扩展名不同，分别写入
+            key = (get_file_extension(record.get("language")), digest)
+            entry = {
+                "id": record.get("id"),
+                "timestamp": record.get("timestamp"),
+                "language": record.get("language"),
+                "model": record.get("model"),
+                "mode": record.get("mode"),
+                "description": record.get("description"),
+                "sha256": digest,
+            }
+
+            if key in written:
+                entry["path"] = written[key]
+                entry["duplicate"] = True
+            else:
+                path = _unique_path(export_path(record, index), used_paths)
+                writer.add(path, data)
+                written[key] = path
+                entry["path"] = path
+            manifest.append(entry)
+
+            if on_progress is not None:
+                on_progress(index)
+
+        manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        writer.add(EXPORT_MANIFEST_NAME, manifest_data)
+        errors = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    return {
+        "target": os.path.abspath(target),
+        "format": export_format,
+        "records": len(manifest),
+        "files": len(written),
+        "duplicates": len(manifest) - len(written),
+        "errors": errors,
+    }
+
+
+def _unique_path(path: str, used_paths: set) -> str:
+    """
+    文件名重复时添加序号
+
+    Args:
+        path: 相对路径
+        used_paths: 已使用的路径（会加入新路径）
+
+    Returns:
+        不重复的路径
+    """
+    stem, extension = os.path.splitext(path)
+    candidate = path
+    counter = 2
+    while candidate.lower() in used_paths:
+        candidate = f"{stem}_{counter}{extension}"
+        counter += 1
+    used_paths.add(candidate.lower())
+    return candidate
+
+
+def _make_temp_path(target: str) -> str:
+    """在目标所在目录创建临时文件，返回其路径"""
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+    os.close(fd)
+    return temp_path
+
+
+def _commit_temp_file(temp_path: str, target: str) -> None:
+    """落盘后用临时文件替换目标文件"""
+    with open(temp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, target)
+
+
+def _remove_quietly(path: str) -> None:
+    """删除文件，忽略错误"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数（默认使用 sys.argv）
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description="把生成历史导出为目录或压缩包")
+    parser.add_argument("target", help="目标目录，或 .zip / .tar.gz 文件")
+    parser.add_argument("--language", help="只导出该语言的记录")
+    parser.add_argument("--since", help="只导出该时间之后的记录（如 2024-01-01）")
+    parser.add_argument("--id", action="append", dest="ids", help="只导出指定 ID 的记录（可重复）")
+    args = parser.parse_args(argv)
+
+    result = export_history(args.target, ids=args.ids, language=args.language, since=args.since)
+    print(
+        f"已导出 {result['records']} 条记录到 {result['target']}："
+        f"{result['files']} 个文件，{result['duplicates']} 条重复内容"
+    )
+    for error in result["errors"]:
+        print(f"失败: {error}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
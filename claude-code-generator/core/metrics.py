@@ -0,0 +1,287 @@
+"""
+生成指标模块
+记录单次生成的首 token 时间、吞吐量、总耗时、token 用量和估算费用，并维护模型对比日志
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from config.constants import (
+    CACHE_READ_PRICE_RATIO,
+    CACHE_WRITE_PRICE_RATIO,
+    COMPARISON_LOG_FILE,
+    MODEL_PRICING,
+)
+from utils.tokens import estimate_tokens
+
+
+class GenerationMetrics:
+    """
+    单次生成的指标
+
+    流式生成过程中由工作线程更新，UI 线程可随时读取当前值
+    """
+
+    def __init__(self, model: str):
+        """
+        初始化指标
+
+        Args:
+            model: 模型 ID
+        """
+        self.model = model
+        self.start_time = time.perf_counter()
+        self.first_token_time = None
+        self.end_time = None
+
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_creation_input_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.error = None
+
+        # 流式过程中按已收到的文本估算输出 token 数
+        self._streamed_tokens = 0
+
+    def start(self) -> None:
+        """重新开始计时（请求实际发出前调用，排除排队时间）"""
+        self.start_time = time.perf_counter()
+
+    @property
+    def finished(self) -> bool:
+        """生成是否已结束"""
+        return self.end_time is not None
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """首 token 时间（毫秒），尚未收到时为 None"""
+        if self.first_token_time is None:
+            return None
+        return (self.first_token_time - self.start_time) * 1000
+
+    @property
+    def latency_ms(self) -> float:
+        """总耗时（毫秒），进行中时为已用时间"""
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return (end - self.start_time) * 1000
+
+    @property
+    def tokens_per_second(self) -> float:
+        """输出吞吐量（从首 token 起计算），进行中时使用估算的 token 数"""
+        if self.first_token_time is None:
+            return 0.0
+
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        elapsed = end - self.first_token_time
+        tokens = self.output_tokens if self.finished and self.output_tokens else self._streamed_tokens
+        return tokens / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def cost(self) -> Optional[float]:
+        """估算费用（美元），模型没有价格信息时为 None"""
+        return estimate_cost(
+            self.model,
+            self.input_tokens,
+            self.output_tokens,
+            self.cache_creation_input_tokens,
+            self.cache_read_input_tokens,
+        )
+
+    def add_text(self, text: str) -> None:
+        """
+        记录收到的流式文本
+
+        Args:
+            text: 文本片段
+        """
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        self._streamed_tokens += estimate_tokens(text)
+
+    def add_usage(self, usage: Any) -> None:
+        """
+        累加一次 API 响应的用量（续写时每轮调用一次）
+
+        Args:
+            usage: 响应中的 usage 对象
+        """
+        self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+        self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+        self.cache_creation_input_tokens += getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.cache_read_input_tokens += getattr(usage, "cache_read_input_tokens", 0) or 0
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """
+        标记生成结束
+
+        Args:
+            error: 错误消息（成功时为 None）
+        """
+        self.end_time = time.perf_counter()
+        self.error = error
+
+    def summary(self) -> str:
+        """
+        生成简短的指标文本
+
+        Returns:
+            指标文本
+        """
+        parts = []
+        ttft = self.ttft_ms
+        parts.append(f"首字 {ttft:.0f}ms" if ttft is not None else "首字 -")
+        parts.append(f"{self.tokens_per_second:.0f} tok/s")
+        parts.append(f"耗时 {self.latency_ms / 1000:.1f}s")
+        if self.finished:
+            parts.append(f"输入 {self.input_tokens} / 输出 {self.output_tokens} tok")
+            cost = self.cost
+            if cost is not None:
+                parts.append(f"${cost:.4f}")
+        return " · ".join(parts)
+
+    def to_dict(self) -> dict:
+        """
+        转换为可序列化的字典
+
+        Returns:
+            指标字典
+        """
+        return {
+            "model": self.model,
+            "ttft_ms": self.ttft_ms,
+            "latency_ms": self.latency_ms,
+            "tokens_per_second": self.tokens_per_second,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cost": self.cost,
+            "error": self.error,
+        }
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0,
+) -> Optional[float]:
+    """
+    按 MODEL_PRICING 估算费用
+
+    Args:
+        model: 模型 ID
+        input_tokens: 未命中缓存的输入 token 数
+        output_tokens: 输出 token 数
+        cache_creation_input_tokens: 写入缓存的输入 token 数
+        cache_read_input_tokens: 命中缓存的输入 token 数
+
+    Returns:
+        费用（美元），模型没有价格信息时返回 None
+    """
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return None
+
+    input_price, output_price = pricing
+    input_cost = (
+        input_tokens
+        + cache_creation_input_tokens * CACHE_WRITE_PRICE_RATIO
+        + cache_read_input_tokens * CACHE_READ_PRICE_RATIO
+    ) * input_price
+    return (input_cost + output_tokens * output_price) / 1_000_000
+
+
+# 对比日志写入锁（同一次对比的多个模型可能同时完成）
+_log_lock = threading.Lock()
+
+
+def append_comparison_log(
+    comparison_id: str,
+    language: str,
+    template: Optional[str],
+    metrics: GenerationMetrics,
+    log_file: str = COMPARISON_LOG_FILE,
+) -> None:
+    """
+    追加一条对比记录（JSON Lines，每个模型一行）
+
+    Args:
+        comparison_id: 对比批次 ID（同一次对比的各模型相同）
+        language: 编程语言
+        template: 模板类型
+        metrics: 生成指标
+        log_file: 日志文件路径
+    """
+    record = {
+        "comparison_id": comparison_id,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "language": language,
+        "template": template,
+    }
+    record.update(metrics.to_dict())
+
+    with _log_lock:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_comparison_log(log_file: str = COMPARISON_LOG_FILE) -> list[dict]:
+    """
+    读取对比日志（跳过损坏的行）
+
+    Args:
+        log_file: 日志文件路径
+
+    Returns:
+        记录列表
+    """
+    if not os.path.exists(log_file):
+        return []
+
+    records = []
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def summarize_comparisons(records: list[dict], language: Optional[str] = None) -> dict[str, dict]:
+    """
+    按模型汇总成功的对比记录
+
+    Args:
+        records: 对比记录
+        language: 只统计该语言（可选）
+
+    Returns:
+        模型 ID -> {runs, median_ttft_ms, median_latency_ms, avg_tokens_per_second, avg_cost}
+    """
+    grouped = {}
+    for record in records:
+        if record.get("error") or (language and record.get("language") != language):
+            continue
+        grouped.setdefault(record["model"], []).append(record)
+
+    summary = {}
+    for model, runs in grouped.items():
+        ttfts = [r["ttft_ms"] for r in runs if r.get("ttft_ms") is not None]
+        costs = [r["cost"] for r in runs if r.get("cost") is not None]
+        summary[model] = {
+            "runs": len(runs),
+            "median_ttft_ms": statistics.median(ttfts) if ttfts else None,
+            "median_latency_ms": statistics.median(r["latency_ms"] for r in runs),
+            "avg_tokens_per_second": statistics.fmean(r["tokens_per_second"] for r in runs),
+            "avg_cost": statistics.fmean(costs) if costs else None,
+        }
+    return summary
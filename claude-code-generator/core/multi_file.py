@@ -0,0 +1,291 @@
+"""
+多文件输出模块
+请求生成小型项目时，模型会输出多个带文件名的代码块。MultiFileDemultiplexer 在流式输出过程中
+逐行识别每个文件的代码块和文件名，把各文件的内容分别写入各自的缓冲区或文件写入器
+
+可识别的文件名写法：
+- 代码块标记中：```python src/app.py、```src/app.py、```python title="src/app.py"
+- 代码块前的标题行：### src/app.py、**src/app.py**、`src/app.py`、文件：src/app.py、File: src/app.py
+"""
+
+import re
+from typing import Callable, Optional, Protocol
+
+from config.constants import LANGUAGE_EXTENSIONS, MULTI_FILE_HEADER_LOOKBACK
+from utils.validators import get_file_extension, sanitize_relative_path
+
+_FENCE_PATTERN = re.compile(r"^\s*(`{3,}|~{3,})\s*(.*?)\s*$")
+_ATTRIBUTE_PATTERN = re.compile(r"""(?:title|file|filename|path)\s*=\s*["']?([^"'\s]+)""", re.IGNORECASE)
+_HEADER_PATTERNS = [
+    re.compile(r"^#{1,6}\s+(.+?)\s*:?$"),
+    re.compile(r"^\*\*(.+?)\*\*\s*:?$"),
+    re.compile(r"^`([^`]+)`\s*:?$"),
+    re.compile(r"^(?:file(?:name)?|path|文件名?|路径)\s*[:：]\s*(.+)$", re.IGNORECASE),
+]
+_HEADER_PREFIX_PATTERN = re.compile(r"^(?:file(?:name)?|path|文件名?|路径)\s*[:：]\s*", re.IGNORECASE)
+_PATH_PATTERN = re.compile(
+    r"^(?:[\w.\-]+/)*(?:[\w\-][\w.\-]*\.[A-Za-z0-9]{1,10}|Dockerfile|Makefile|LICENSE|README|Procfile)$"
+)
+
+
+class FileWriter(Protocol):
+    """文件内容的接收方（如 FileSink）"""
+
+    def write(self, text: str) -> None: ...
+
+    def commit(self): ...
+
+    def abort(self) -> None: ...
+
+
+class BufferWriter:
+    """在内存中收集文件内容"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+
+    def commit(self) -> str:
+        return self.getvalue()
+
+    def abort(self) -> None:
+        self._parts = []
+
+    def getvalue(self) -> str:
+        """
+        获取已写入的内容
+
+        Returns:
+            文件内容
+        """
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+
+class DemuxFile:
+    """识别出的一个文件"""
+
+    def __init__(self, path: str, language: str, writer: FileWriter, named: bool):
+        """
+        初始化
+
+        Args:
+            path: 相对路径
+            language: 代码块标记中的语言（可能为空）
+            writer: 内容接收方
+            named: 文件名是否来自模型输出（否则为自动生成的名称）
+        """
+        self.path = path
+        self.language = language
+        self.writer = writer
+        self.named = named
+        self.complete = False
+
+    @property
+    def content(self) -> str:
+        """文件内容（仅内存缓冲区可用）"""
+        if isinstance(self.writer, BufferWriter):
+            return self.writer.getvalue()
+        raise TypeError("文件内容已直接写入磁盘")
+
+
+def parse_filename(text: str) -> Optional[str]:
+    """
+    从标题行或代码块标记中的片段解析文件路径
+
+    Args:
+        text: 片段（可带反引号、星号和“文件：”等前缀）
+
+    Returns:
+        清理后的相对路径，不像文件路径时返回 None
+    """
+    text = _HEADER_PREFIX_PATTERN.sub("", text.strip().strip("*_").strip())
+    text = text.strip("`'\" ").rstrip(":：")
+    if not _PATH_PATTERN.match(text):
+        return None
+    return sanitize_relative_path(text)
+
+
+def _parse_fence_info(info: str) -> tuple[str, Optional[str]]:
+    """
+    解析代码块标记后的信息
+
+    Args:
+        info: ``` 之后的文本
+
+    Returns:
+        (语言, 文件路径或 None)
+    """
+    attribute = _ATTRIBUTE_PATTERN.search(info)
+    if attribute:
+        info = info[:attribute.start()]
+
+    language = ""
+    path = parse_filename(attribute.group(1)) if attribute else None
+    for token in info.split():
+        candidate = None if token.lower() in LANGUAGE_EXTENSIONS else parse_filename(token)
+        if candidate:
+            path = path or candidate
+        elif not language:
+            language = token.strip("{}.").lower()
+
+    return language, path
+
+
+class MultiFileDemultiplexer:
+    """
+    多文件流式分拣器
+
+    feed 可直接作为生成回调；每个代码块在结束标记出现时提交，流结束时提交未闭合的代码块
+    """
+
+    def __init__(
+        self,
+        writer_factory: Optional[Callable[[str], FileWriter]] = None,
+        header_lookback: int = MULTI_FILE_HEADER_LOOKBACK,
+    ):
+        """
+        初始化
+
+        Args:
+            writer_factory: 根据相对路径创建内容接收方的函数，默认写入内存缓冲区
+            header_lookback: 文件名标题行与代码块之间允许间隔的非空行数
+        """
+        self.writer_factory = writer_factory or (lambda path: BufferWriter())
+        self.header_lookback = header_lookback
+
+        self._files = {}
+        self._partial = ""
+        self._current = None
+        self._fence = ""
+        self._pending_name = None
+        self._pending_age = 0
+        self._untitled_count = 0
+
+    @property
+    def files(self) -> list[DemuxFile]:
+        """已识别的文件（同名文件以最后一次出现为准）"""
+        return list(self._files.values())
+
+    def feed(self, text: str) -> None:
+        """
+        处理一段流式文本
+
+        Args:
+            text: 文本片段
+        """
+        if "\n" not in text:
+            self._partial += text
+            return
+
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._feed_line(line)
+
+    def finish(self) -> list[DemuxFile]:
+        """
+        处理剩余内容并提交未闭合的代码块（流结束时调用一次）
+
+        Returns:
+            识别出的文件列表
+        """
+        if self._partial:
+            self._feed_line(self._partial)
+            self._partial = ""
+        if self._current is not None:
+            # 输出被截断：保留已收到的内容
+            self._current.writer.commit()
+            self._current = None
+        return self.files
+
+    def abort(self) -> None:
+        """放弃所有文件（生成失败或取消时调用）"""
+        for demux_file in self._files.values():
+            demux_file.writer.abort()
+        self._files = {}
+        self._current = None
+
+    def _feed_line(self, line: str) -> None:
+        """
+        处理一个完整的行
+
+        Args:
+            line: 行内容（不含换行符）
+        """
+        if self._current is not None:
+            stripped = line.strip()
+            # 结束标记：与开始标记相同的字符，长度不少于开始标记，且没有其他内容
+            if stripped and stripped[0] == self._fence[0] and len(stripped) >= len(self._fence) \
+                    and stripped == stripped[0] * len(stripped):
+                self._current.writer.commit()
+                self._current.complete = True
+                self._current = None
+            else:
+                self._current.writer.write(line + "\n")
+            return
+
+        match = _FENCE_PATTERN.match(line)
+        if match:
+            self._open(match.group(1), match.group(2))
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            return
+
+        name = self._match_header(stripped)
+        if name:
+            self._pending_name = name
+            self._pending_age = 0
+        elif self._pending_name is not None:
+            self._pending_age += 1
+            if self._pending_age > self.header_lookback:
+                self._pending_name = None
+
+    def _match_header(self, line: str) -> Optional[str]:
+        """
+        检查是否为文件名标题行
+
+        Args:
+            line: 去掉首尾空白的行
+
+        Returns:
+            文件路径，不是标题行时返回 None
+        """
+        for pattern in _HEADER_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                name = parse_filename(match.group(1))
+                if name:
+                    return name
+        return None
+
+    def _open(self, fence: str, info: str) -> None:
+        """
+        开始一个代码块
+
+        Args:
+            fence: 开始标记（``` 或 ~~~，可能更长）
+            info: 标记后的信息
+        """
+        language, path = _parse_fence_info(info)
+        named = True
+        if path is None:
+            path = self._pending_name
+        if path is None:
+            named = False
+            self._untitled_count += 1
+            path = f"untitled_{self._untitled_count}{get_file_extension(language)}"
+        self._pending_name = None
+
+        previous = self._files.pop(path, None)
+        if previous is not None and isinstance(previous.writer, BufferWriter):
+            previous.writer.abort()
+
+        self._fence = fence
+        self._current = DemuxFile(path, language, self.writer_factory(path), named)
+        self._files[path] = self._current
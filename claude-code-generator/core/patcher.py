@@ -0,0 +1,264 @@
+"""
+补丁应用模块
+解析并应用模型返回的 SEARCH/REPLACE 块或 unified diff
+"""
+
+import re
+
+# SEARCH/REPLACE 块
+_SEARCH_REPLACE_PATTERN = re.compile(
+    r"^<{5,9} SEARCH[ \t]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[ \t]*$",
+    re.DOTALL | re.MULTILINE,
+)
+
+# unified diff 的 hunk 头
+_HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def parse_search_replace(text: str) -> list[tuple[str, str]]:
+    """
+    解析 SEARCH/REPLACE 块
+
+    Args:
+        text: 模型返回的补丁文本
+
+    Returns:
+        (查找文本, 替换文本) 列表
+    """
+    return [
+        (search, replace)
+        for search, replace in _SEARCH_REPLACE_PATTERN.findall(text)
+    ]
+
+
+def parse_unified_diff(text: str) -> list[dict]:
+    """
+    解析 unified diff
+
+    Args:
+        text: diff 文本
+
+    Returns:
+        hunk 列表，每个 hunk 包含 old_start、old_lines 和 new_lines
+    """
+    hunks = []
+    current = None
+
+    for line in text.splitlines():
+        match = _HUNK_HEADER_PATTERN.match(line)
+        if match:
+            current = {
+                "old_start": int(match.group(1)),
+                "old_lines": [],
+                "new_lines": [],
+            }
+            hunks.append(current)
+            continue
+
+        if current is None or line.startswith(("---", "+++", "\\")):
+            continue
+
+        if line.startswith("```"):
+            current = None
+            continue
+
+        if line.startswith("-"):
+            current["old_lines"].append(line[1:])
+        elif line.startswith("+"):
+            current["new_lines"].append(line[1:])
+        elif line.startswith(" ") or line == "":
+            # 上下文行（部分模型会省略空行前的空格）
+            current["old_lines"].append(line[1:])
+            current["new_lines"].append(line[1:])
+        else:
+            current = None
+
+    return hunks
+
+
+def apply_patch(code: str, patch_text: str) -> tuple[bool, str]:
+    """
+    将补丁应用到代码
+    自动识别 SEARCH/REPLACE 块和 unified diff 两种格式
+
+    Args:
+        code: 原始代码
+        patch_text: 补丁文本
+
+    Returns:
+        (是否成功, 修改后的代码或错误消息)
+    """
+    blocks = parse_search_replace(patch_text)
+    if blocks:
+        return apply_search_replace(code, blocks)
+
+    hunks = parse_unified_diff(patch_text)
+    if hunks:
+        return apply_unified_diff(code, hunks)
+
+    return False, "未识别的补丁格式"
+
+
+def apply_search_replace(code: str, blocks: list[tuple[str, str]]) -> tuple[bool, str]:
+    """
+    依次应用 SEARCH/REPLACE 块
+    每个查找文本必须在代码中唯一匹配
+
+    Args:
+        code: 原始代码
+        blocks: (查找文本, 替换文本) 列表
+
+    Returns:
+        (是否成功, 修改后的代码或错误消息)
+    """
+    for i, (search, replace) in enumerate(blocks, start=1):
+        if not search.strip():
+            return False, f"第 {i} 个修改块的查找内容为空"
+
+        count = code.count(search)
+        if count == 1:
+            code = code.replace(search, replace, 1)
+            continue
+
+        if count > 1:
+            return False, f"第 {i} 个修改块在代码中匹配了 {count} 处"
+
+        # 精确匹配失败时，忽略行尾和缩进差异再按行匹配，同样要求唯一
+        lines = code.split("\n")
+        search_lines = search.rstrip("\n").split("\n")
+        matches = _match_lines(lines, search_lines)
+        if not matches:
+            return False, f"第 {i} 个修改块在代码中找不到匹配位置"
+        if len(matches) > 1:
+            return False, f"第 {i} 个修改块在代码中匹配了 {len(matches)} 处"
+
+        position, shift = matches[0]
+
+        replace_lines = replace.rstrip("\n").split("\n") if replace else []
+        replace_lines = [_reindent(line, shift) for line in replace_lines]
+        lines[position:position + len(search_lines)] = replace_lines
+        code = "\n".join(lines)
+
+    return True, code
+
+
+def apply_unified_diff(code: str, hunks: list[dict]) -> tuple[bool, str]:
+    """
+    应用 unified diff
+    行号仅作为定位提示，实际位置按上下文搜索
+
+    Args:
+        code: 原始代码
+        hunks: parse_unified_diff 返回的 hunk 列表
+
+    Returns:
+        (是否成功, 修改后的代码或错误消息)
+    """
+    lines = code.split("\n")
+    offset = 0
+
+    for i, hunk in enumerate(hunks, start=1):
+        old_lines = hunk["old_lines"]
+        new_lines = hunk["new_lines"]
+        expected = max(hunk["old_start"] - 1 + offset, 0)
+
+        if old_lines:
+            position, shift = _find_lines(lines, old_lines, near=expected)
+            if position < 0:
+                return False, f"第 {i} 个 hunk 在代码中找不到匹配位置"
+            new_lines = [_reindent(line, shift) for line in new_lines]
+        else:
+            position = min(expected, len(lines))
+
+        lines[position:position + len(old_lines)] = new_lines
+        offset += len(new_lines) - len(old_lines)
+
+    return True, "\n".join(lines)
+
+
+def _find_lines(lines: list[str], target: list[str], near: int = 0) -> tuple[int, tuple[str, str]]:
+    """
+    在代码行中查找目标行序列，多处匹配时取离 near 最近的位置
+
+    Args:
+        lines: 代码行
+        target: 目标行序列
+        near: 期望位置
+
+    Returns:
+        (匹配位置, 缩进调整)，找不到时位置为 -1
+    """
+    matches = _match_lines(lines, target)
+    if not matches:
+        return -1, ("", "")
+    return min(matches, key=lambda match: abs(match[0] - near))
+
+
+def _match_lines(lines: list[str], target: list[str]) -> list[tuple[int, tuple[str, str]]]:
+    """
+    在代码行中查找目标行序列的所有匹配
+    先忽略行尾空白匹配，都不匹配时再忽略统一的缩进差异匹配
+
+    Args:
+        lines: 代码行
+        target: 目标行序列
+
+    Returns:
+        (匹配位置, 缩进调整) 列表，按位置排序；缩进调整为 (需要补充的缩进, 需要去掉的缩进)
+    """
+    if not target or len(target) > len(lines):
+        return []
+
+    starts = range(len(lines) - len(target) + 1)
+    stripped_lines = [line.rstrip() for line in lines]
+    stripped_target = [line.rstrip() for line in target]
+    matches = [
+        (start, ("", "")) for start in starts
+        if stripped_lines[start:start + len(target)] == stripped_target
+    ]
+    if matches:
+        return matches
+
+    # 忽略缩进后匹配，按第一行非空行的缩进差补充或去掉缩进
+    dedented_lines = [line.strip() for line in stripped_lines]
+    dedented_target = [line.strip() for line in target]
+    for start in starts:
+        if dedented_lines[start:start + len(target)] != dedented_target:
+            continue
+
+        shift = ("", "")
+        for original, wanted in zip(lines[start:start + len(target)], target):
+            if original.strip():
+                original_indent = original[:len(original) - len(original.lstrip())]
+                wanted_indent = wanted[:len(wanted) - len(wanted.lstrip())]
+                if original_indent.startswith(wanted_indent):
+                    shift = (original_indent[len(wanted_indent):], "")
+                elif wanted_indent.startswith(original_indent):
+                    shift = ("", wanted_indent[len(original_indent):])
+                else:
+                    # 缩进字符不同（如制表符和空格），无法换算缩进，不算匹配
+                    shift = None
+                break
+        if shift is not None:
+            matches.append((start, shift))
+
+    return matches
+
+
+def _reindent(line: str, shift: tuple[str, str]) -> str:
+    """
+    按匹配时的缩进差调整替换行的缩进
+
+    Args:
+        line: 替换行
+        shift: (需要补充的缩进, 需要去掉的缩进)
+
+    Returns:
+        调整缩进后的行
+    """
+    add, remove = shift
+    if not line.strip():
+        return line
+    if remove and line.startswith(remove):
+        line = line[len(remove):]
+    return add + line
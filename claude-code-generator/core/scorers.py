@@ -0,0 +1,318 @@
+"""
+候选代码评分模块
+为多样本择优提供可插拔的评分器
+"""
+
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Optional
+
+from config.constants import (
+    BEST_OF_BREVITY_SCALE,
+    BEST_OF_TEST_TIMEOUT,
+)
+
+# 括号配对
+_BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+
+# 使用 # 作为行注释的语言
+_HASH_COMMENT_LANGUAGES = {"Python", "Ruby", "Shell", "PHP"}
+
+# 运行测试的子进程只继承这些环境变量（不传递 API 密钥等敏感信息）
+_TEST_ENV_KEYS = ("PATH", "SYSTEMROOT", "LANG", "LC_ALL")
+
+
+class Scorer:
+    """
+    评分器基类
+
+    score 返回 0 到 1 之间的分数，分数越高越好；
+    upper_bound 根据尚未生成完的部分代码给出最终分数的上界，用于提前取消不可能胜出的候选
+    """
+
+    name = "base"
+
+    def __init__(self, weight: float = 1.0):
+        """
+        初始化评分器
+
+        Args:
+            weight: 权重
+        """
+        self.weight = weight
+
+    def score(self, code: str, language: str) -> float:
+        """
+        为完整代码评分
+
+        Args:
+            code: 代码
+            language: 编程语言
+
+        Returns:
+            0 到 1 之间的分数
+        """
+        raise NotImplementedError
+
+    def upper_bound(self, partial_code: str, language: str) -> float:
+        """
+        估算仍在生成的代码最终能得到的最高分
+
+        Args:
+            partial_code: 目前已生成的代码
+            language: 编程语言
+
+        Returns:
+            分数上界
+        """
+        return 1.0
+
+
+class SyntaxScorer(Scorer):
+    """语法评分：Python 使用编译检查，其他语言检查括号是否配对"""
+
+    name = "syntax"
+
+    def score(self, code: str, language: str) -> float:
+        if language == "Python":
+            try:
+                compile(code, "<candidate>", "exec")
+                return 1.0
+            except (SyntaxError, ValueError):
+                return 0.0
+
+        return 1.0 if _brackets_balanced(code, language) else 0.0
+
+
+class QuickTestScorer(Scorer):
+    """
+    快速测试评分：在子进程中运行用户提供的测试代码（仅 Python）
+
+    子进程以隔离模式运行在临时目录中，只继承少量环境变量，
+    生成的代码无法通过相对路径读取应用数据目录或从环境变量读取 API 密钥
+    """
+
+    name = "tests"
+
+    def __init__(self, test_code: str, weight: float = 2.0, timeout: float = BEST_OF_TEST_TIMEOUT):
+        """
+        初始化测试评分器
+
+        Args:
+            test_code: 测试代码（可使用 assert）
+            weight: 权重
+            timeout: 运行超时时间（秒）
+        """
+        super().__init__(weight)
+        self.test_code = test_code
+        self.timeout = timeout
+
+    def score(self, code: str, language: str) -> float:
+        if language != "Python" or not self.test_code.strip():
+            return 0.0
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            script_path = os.path.join(work_dir, "candidate.py")
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(code + "\n\n" + self.test_code + "\n")
+
+            env = {key: os.environ[key] for key in _TEST_ENV_KEYS if key in os.environ}
+            env["HOME"] = work_dir
+
+            try:
+                result = subprocess.run(
+                    [sys.executable, "-I", script_path],
+                    cwd=work_dir,
+                    env=env,
+                    capture_output=True,
+                    timeout=self.timeout,
+                )
+                return 1.0 if result.returncode == 0 else 0.0
+            except subprocess.TimeoutExpired:
+                return 0.0
+
+    def upper_bound(self, partial_code: str, language: str) -> float:
+        return 1.0 if language == "Python" and self.test_code.strip() else 0.0
+
+
+class BrevityScorer(Scorer):
+    """简洁度评分：代码越短分数越高"""
+
+    name = "brevity"
+
+    def score(self, code: str, language: str) -> float:
+        return _brevity(len(code.strip()))
+
+    def upper_bound(self, partial_code: str, language: str) -> float:
+        # 流式文本包含代码块标记，扣除少量字符作为余量
+        return _brevity(max(len(partial_code.strip()) - 32, 0))
+
+
+class LintScorer(Scorer):
+    """静态检查评分：问题越少分数越高（Python 检查未使用的导入、裸 except 和星号导入）"""
+
+    name = "lint"
+
+    def score(self, code: str, language: str) -> float:
+        if language != "Python":
+            return 1.0
+
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            return 0.0
+
+        return 1.0 / (1 + _count_lint_issues(tree))
+
+
+# 可用的评分器
+SCORERS = {
+    SyntaxScorer.name: SyntaxScorer,
+    BrevityScorer.name: BrevityScorer,
+    LintScorer.name: LintScorer,
+    QuickTestScorer.name: QuickTestScorer,
+}
+
+
+def create_scorers(names: list[str], test_code: Optional[str] = None) -> list[Scorer]:
+    """
+    按名称创建评分器
+
+    Args:
+        names: 评分器名称列表
+        test_code: 快速测试代码（可选，未提供时跳过 "tests" 评分器）
+
+    Returns:
+        评分器列表（忽略未知名称）
+    """
+    scorers = []
+    for name in names:
+        if name == QuickTestScorer.name:
+            if test_code and test_code.strip():
+                scorers.append(QuickTestScorer(test_code))
+        elif name in SCORERS:
+            scorers.append(SCORERS[name]())
+    return scorers
+
+
+def total_score(code: str, language: str, scorers: list[Scorer]) -> float:
+    """
+    计算加权总分
+
+    Args:
+        code: 代码
+        language: 编程语言
+        scorers: 评分器列表
+
+    Returns:
+        加权总分
+    """
+    return sum(scorer.weight * scorer.score(code, language) for scorer in scorers)
+
+
+def total_upper_bound(partial_code: str, language: str, scorers: list[Scorer]) -> float:
+    """
+    计算仍在生成的候选的加权总分上界
+
+    Args:
+        partial_code: 目前已生成的代码
+        language: 编程语言
+        scorers: 评分器列表
+
+    Returns:
+        加权总分上界
+    """
+    return sum(scorer.weight * scorer.upper_bound(partial_code, language) for scorer in scorers)
+
+
+def _brevity(length: int) -> float:
+    """
+    根据代码长度计算简洁度分数
+
+    Args:
+        length: 代码字符数
+
+    Returns:
+        0 到 1 之间的分数
+    """
+    return 1.0 / (1 + length / BEST_OF_BREVITY_SCALE)
+
+
+def _brackets_balanced(code: str, language: str) -> bool:
+    """
+    检查括号是否配对（跳过字符串和行注释中的括号）
+
+    Args:
+        code: 代码
+        language: 编程语言
+
+    Returns:
+        配对返回 True
+    """
+    hash_comments = language in _HASH_COMMENT_LANGUAGES
+    # Rust 的生命周期标注使用单引号，不作为字符串处理
+    quotes = "\"`" if language == "Rust" else "\"'`"
+    stack = []
+    quote = None
+    i = 0
+
+    while i < len(code):
+        char = code[i]
+
+        if quote:
+            if char == "\\":
+                i += 2
+                continue
+            if char == quote:
+                quote = None
+        elif char in quotes:
+            quote = char
+        elif code.startswith("//", i) or (hash_comments and char == "#"):
+            newline = code.find("\n", i)
+            i = len(code) if newline < 0 else newline
+            continue
+        elif char in "([{":
+            stack.append(char)
+        elif char in _BRACKET_PAIRS:
+            if not stack or stack.pop() != _BRACKET_PAIRS[char]:
+                return False
+
+        i += 1
+
+    return not stack
+
+
+def _count_lint_issues(tree: ast.AST) -> int:
+    """
+    统计 Python 代码中的常见问题
+
+    Args:
+        tree: 语法树
+
+    Returns:
+        问题数量
+    """
+    imported = {}
+    used = set()
+    issues = 0
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imported[(alias.asname or alias.name).split(".")[0]] = node
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name == "*":
+                    issues += 1
+                else:
+                    imported[alias.asname or alias.name] = node
+        elif isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.ExceptHandler) and node.type is None:
+            issues += 1
+
+    issues += sum(1 for name in imported if name not in used)
+    return issues
@@ -0,0 +1,132 @@
+"""
+分段生成模块
+解析大纲并把并行生成的各部分代码按顺序组装
+"""
+
+import json
+import re
+
+# 各语言顶层导入语句的第一行（组装时去重并移到文件开头；括号未闭合或以反斜杠结尾时包含后续行）
+_IMPORT_PATTERNS = {
+    "Python": re.compile(r"^(?:import\s+\S.*|from\s+\S+\s+import\s+.+)$"),
+    "JavaScript": re.compile(r"^import\s.+;?$"),
+    "TypeScript": re.compile(r"^import\s.+;?$"),
+    "Java": re.compile(r"^import\s+[\w.*]+\s*;$"),
+    "Kotlin": re.compile(r"^import\s+[\w.*]+$"),
+    "C++": re.compile(r"^#include\s*[<\"].+[>\"]$"),
+    "C#": re.compile(r"^using\s+[\w.]+\s*;$"),
+    "Rust": re.compile(r"^use\s+\S.*$"),
+    "Swift": re.compile(r"^import\s+\w+$"),
+    "PHP": re.compile(r"^use\s+[\w\\\\]+\s*;$"),
+}
+
+_OPEN_BRACKETS = "([{"
+_CLOSE_BRACKETS = ")]}"
+
+
+def parse_outline(text: str, max_sections: int) -> list[dict]:
+    """
+    解析模型返回的大纲
+
+    Args:
+        text: 大纲文本（JSON，可能包含代码块标记或说明文字）
+        max_sections: 最多保留的部分数
+
+    Returns:
+        部分列表，每项包含 title 和 description；无法解析时返回空列表
+    """
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    end = max(text.rfind("}"), text.rfind("]"))
+    if start < 0 or end <= start:
+        return []
+
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return []
+
+    if isinstance(data, dict):
+        data = data.get("sections", [])
+    if not isinstance(data, list):
+        return []
+
+    sections = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        title = str(item.get("title", "")).strip()
+        description = str(item.get("description", "")).strip()
+        if title:
+            sections.append({"title": title, "description": description})
+
+    return sections[:max_sections]
+
+
+def assemble_sections(sections: list[str], language: str) -> str:
+    """
+    按顺序组装各部分代码
+    一致性处理：顶层导入语句去重并统一放到开头
+
+    Args:
+        sections: 各部分代码（按大纲顺序）
+        language: 编程语言
+
+    Returns:
+        组装后的代码
+    """
+    pattern = _IMPORT_PATTERNS.get(language)
+    if pattern is None:
+        return "\n\n".join(section.strip() for section in sections if section.strip())
+
+    imports = []
+    seen = set()
+    bodies = []
+
+    for section in sections:
+        body_lines = []
+        lines = section.split("\n")
+        i = 0
+        while i < len(lines):
+            end = _statement_end(lines, i) if pattern.match(lines[i]) else None
+            if end is None:
+                body_lines.append(lines[i])
+                i += 1
+                continue
+
+            statement = "\n".join(lines[i:end + 1])
+            if statement not in seen:
+                seen.add(statement)
+                imports.append(statement)
+            i = end + 1
+
+        body = "\n".join(body_lines).strip()
+        if body:
+            bodies.append(body)
+
+    parts = []
+    if imports:
+        parts.append("\n".join(imports))
+    parts.extend(bodies)
+
+    return "\n\n\n".join(parts) if language == "Python" else "\n\n".join(parts)
+
+
+def _statement_end(lines: list[str], start: int) -> int | None:
+    """
+    查找从 start 行开始的语句的最后一行（括号配平且不以反斜杠结尾）
+
+    Args:
+        lines: 代码行
+        start: 语句第一行
+
+    Returns:
+        最后一行的下标，直到结尾都未结束时返回 None（保持原样）
+    """
+    depth = 0
+    for index in range(start, len(lines)):
+        line = lines[index]
+        depth += sum(line.count(char) for char in _OPEN_BRACKETS)
+        depth -= sum(line.count(char) for char in _CLOSE_BRACKETS)
+        if depth <= 0 and not line.rstrip().endswith("\\"):
+            return index
+    return None
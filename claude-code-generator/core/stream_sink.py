@@ -0,0 +1,335 @@
+"""
+流式输出模块
+在生成过程中逐块处理模型输出：去掉 markdown 代码块标记，并直接写入磁盘文件
+
+- FenceStripper: 增量去除代码块标记，结果与一次性处理完整文本（strip_fences）相同
+- FileSink: 把代码经缓冲写入临时文件，完成时落盘并原子替换目标文件
+- tee: 把同一份流式数据同时交给多个接收方（如界面和文件），不需要二次遍历文本
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Callable, Optional
+
+from config.constants import FENCE_PREAMBLE_MAX_LINES, STREAM_SAVE_BUFFER_SIZE
+
+
+class FenceStripper:
+    """
+    增量去除 markdown 代码块标记
+
+    规则：
+    - 开头（FENCE_PREAMBLE_MAX_LINES 行以内）出现的第一个 ``` 行及其之前的内容被丢弃
+    - 最后一个 ``` 行及其之后的内容被丢弃
+    - 去掉首尾空白
+    - 只有一个 ``` 行且其后没有代码时，该行视为结尾标记
+
+    只有可能属于结尾标记之后的内容会被暂存，其余内容按行尽快输出
+    """
+
+    def __init__(self, preamble_max_lines: int = FENCE_PREAMBLE_MAX_LINES):
+        """
+        初始化
+
+        Args:
+            preamble_max_lines: 查找开头标记的最大行数，超过后视为没有开头标记
+        """
+        self.preamble_max_lines = preamble_max_lines
+        self._partial = ""        # 尚未结束的行
+        self._preamble = []       # 尚未确定是否位于开头标记之前的行
+        self._discarded = []      # 开头标记之前被丢弃的行（标记之后没有内容时改为输出这些行）
+        self._in_body = False
+        self._held = []           # 从最近一个 ``` 行开始暂存的行（可能是结尾标记）
+        self._started = False     # 是否已输出非空白内容
+        self._whitespace = ""     # 暂存的尾部空白（后面还有内容时才输出）
+
+    @staticmethod
+    def _is_fence(line: str) -> bool:
+        return line.strip().startswith("```")
+
+    def feed(self, text: str) -> str:
+        """
+        处理一段流式文本
+
+        Args:
+            text: 文本片段
+
+        Returns:
+            可以确定属于代码的部分（可能为空）
+        """
+        if "\n" not in text:
+            self._partial += text
+            return ""
+
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        return self._emit("".join(self._feed_line(line) for line in lines))
+
+    def finish(self) -> str:
+        """
+        处理剩余内容（流结束时调用一次）
+
+        Returns:
+            剩余的代码部分
+        """
+        output = []
+        if self._partial:
+            output.append(self._feed_line(self._partial, final=True))
+            self._partial = ""
+
+        # 没有找到开头标记：暂存的开头部分也是代码
+        if not self._in_body:
+            output.append(self._release_preamble())
+
+        # 暂存的内容位于最后一个 ``` 行之后，丢弃
+        self._held = []
+        text = self._emit("".join(output))
+        # 之前暂存的空白在后面还有内容时已随之输出，剩下的是结尾空白
+        self._whitespace = ""
+
+        # 唯一的 ``` 行之后没有代码：它实际是结尾标记，之前的内容才是代码
+        if not self._started and self._discarded:
+            text = self._emit("".join(self._discarded))
+            self._whitespace = ""
+        self._discarded = []
+        return text
+
+    def _feed_line(self, line: str, final: bool = False) -> str:
+        """
+        处理一个完整的行
+
+        Args:
+            line: 行内容（不含换行符）
+            final: 是否为没有换行符的最后一行
+
+        Returns:
+            可以输出的文本
+        """
+        text = line if final else line + "\n"
+
+        if not self._in_body:
+            if self._is_fence(line):
+                # 开头标记：丢弃之前的内容
+                self._discarded = self._preamble
+                self._preamble = []
+                self._in_body = True
+                return ""
+            self._preamble.append(text)
+            if len(self._preamble) > self.preamble_max_lines:
+                return self._release_preamble()
+            return ""
+
+        if self._is_fence(line):
+            # 新的 ``` 行：之前暂存的内容不在最后一个标记之后，可以输出
+            released = "".join(self._held)
+            self._held = [text]
+            return released
+
+        if self._held:
+            self._held.append(text)
+            return ""
+        return text
+
+    def _release_preamble(self) -> str:
+        """视为没有开头标记，输出暂存的开头部分"""
+        self._in_body = True
+        released = "".join(self._preamble)
+        self._preamble = []
+        return released
+
+    def _emit(self, text: str) -> str:
+        """
+        去掉首尾空白：开头的空白直接丢弃，尾部空白暂存到后面出现内容时再输出
+
+        Args:
+            text: 待输出文本
+
+        Returns:
+            实际输出的文本
+        """
+        if not text:
+            return ""
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+
+        text = self._whitespace + text
+        end = len(text.rstrip())
+        self._whitespace = text[end:]
+        return text[:end]
+
+
+def strip_fences(text: str) -> str:
+    """
+    一次性去除完整文本的代码块标记
+
+    Args:
+        text: 模型输出
+
+    Returns:
+        代码
+    """
+    stripper = FenceStripper()
+    return stripper.feed(text) + stripper.finish()
+
+
+class FileSink:
+    """
+    流式写入文件
+
+    代码写入目标文件所在目录的临时文件，commit 时刷新缓冲、fsync 并原子替换目标文件；
+    abort 或未提交时删除临时文件，目标文件保持原样。write 和 commit 可在工作线程中调用
+    """
+
+    def __init__(
+        self,
+        path: str,
+        strip_fences: bool = True,
+        buffer_size: int = STREAM_SAVE_BUFFER_SIZE,
+    ):
+        """
+        创建临时文件
+
+        Args:
+            path: 目标文件路径
+            strip_fences: 是否去除代码块标记（写入的是已提取的代码时为 False）
+            buffer_size: 写入缓冲区大小（字节）
+        """
+        self.path = os.path.abspath(path)
+        self.chars_written = 0
+        self._stripper = FenceStripper() if strip_fences else None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp"
+        )
+        self._file = open(fd, "w", encoding="utf-8", buffering=buffer_size)
+
+    @property
+    def closed(self) -> bool:
+        """是否已提交或放弃"""
+        return self._file is None
+
+    def write(self, text: str) -> None:
+        """
+        写入一段流式文本（可直接作为生成回调）
+
+        Args:
+            text: 文本片段
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if self._stripper is not None:
+                text = self._stripper.feed(text)
+            if text:
+                self._file.write(text)
+                self.chars_written += len(text)
+
+    def commit(self) -> str:
+        """
+        完成写入：落盘后原子替换目标文件
+
+        Returns:
+            目标文件路径
+        """
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("文件已关闭")
+
+            f, self._file = self._file, None
+            try:
+                if self._stripper is not None:
+                    tail = self._stripper.finish()
+                    f.write(tail)
+                    self.chars_written += len(tail)
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+                # mkstemp 创建的文件只有当前用户可读写：沿用目标文件原有的权限，新文件使用常规权限
+                if os.path.exists(self.path):
+                    shutil.copymode(self.path, self._temp_path)
+                else:
+                    os.chmod(self._temp_path, 0o644)
+                os.replace(self._temp_path, self.path)
+            except BaseException:
+                f.close()
+                _remove_quietly(self._temp_path)
+                raise
+
+            _fsync_directory(os.path.dirname(self.path))
+            return self.path
+
+    def abort(self) -> None:
+        """放弃写入并删除临时文件（已提交或已放弃时忽略）"""
+        with self._lock:
+            if self._file is None:
+                return
+            f, self._file = self._file, None
+            f.close()
+            _remove_quietly(self._temp_path)
+
+    def __enter__(self) -> "FileSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def tee(*sinks: Optional[Callable[[str], None]]) -> Callable[[str], None]:
+    """
+    把流式数据依次交给多个接收方
+
+    Args:
+        *sinks: 接收函数（None 会被忽略）
+
+    Returns:
+        组合后的回调函数
+    """
+    targets = [sink for sink in sinks if sink is not None]
+    if len(targets) == 1:
+        return targets[0]
+
+    def callback(text: str) -> None:
+        for target in targets:
+            target(text)
+
+    return callback
+
+
+def _remove_quietly(path: str) -> None:
+    """删除文件，忽略错误"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    同步目录项，使替换在断电后仍然有效（不支持的平台忽略）
+
+    Args:
+        directory: 目录路径
+    """
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
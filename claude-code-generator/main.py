@@ -7,7 +7,8 @@ Claude Code Generator
 
 import sys
 
-import customtkinter as ctk
+# 最先导入，作为启动计时起点
+from utils.startup_profiler import get_startup_profiler
 
 import config.constants as constants
 from ui.main_window import MainWindow
@@ -17,10 +18,13 @@ from utils.logger import get_logger
 
 def main():
     """应用主函数"""
+    profiler = get_startup_profiler()
+    profiler.mark("导入完成")
+
     # 初始化日志
     logger = get_logger()
     logger.info("=" * 50)
-    logger.info(f"启动 {constants.APP_NAME} v{constants.APP_VERSION}")
+    logger.info("启动 %s v%s", constants.APP_NAME, constants.APP_VERSION)
     logger.info("=" * 50)
 
     try:
@@ -29,6 +33,7 @@ def main():
 
         # 创建应用
         app = MainWindow()
+        profiler.mark("窗口已创建")
 
         # 设置关闭事件
         app.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -45,7 +50,7 @@ def main():
         return 0
 
     except Exception as e:
-        logger.critical(f"应用崩溃: {str(e)}", exc_info=True)
+        logger.critical("应用崩溃: %s", e, exc_info=True)
         return 1
 
 
@@ -0,0 +1,155 @@
+"""
+代码生成器取消测试（使用模拟的 API 客户端）
+"""
+
+import json
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from core.claude_api import GenerationCancelled
+from core.code_generator import CodeGenerator
+from utils.event_log import _context_fields, get_event_log
+
+
+class FakeClient:
+    """模拟 ClaudeAPIClient：流式生成逐块输出，每块之前检查取消事件"""
+
+    model = "fake"
+
+    def __init__(self, chunks: int = 5, on_chunk=None):
+        self.chunks = chunks
+        self.on_chunk = on_chunk
+        self.stream_calls = []
+
+    def generate_outline(self, prompt, language, **kwargs):
+        return json.dumps({"sections": [{"title": "A"}, {"title": "B"}]})
+
+    def generate_patch(self, prompt, language, **kwargs):
+        return "no patch"
+
+    def generate_code(self, prompt, language, **kwargs):
+        return "x = 1"
+
+    def generate_code_stream(self, prompt, language, callback, cancel_event=None, **kwargs):
+        self.stream_calls.append(cancel_event)
+        for i in range(self.chunks):
+            if cancel_event is not None and cancel_event.is_set():
+                raise GenerationCancelled("生成已取消")
+            if self.on_chunk:
+                self.on_chunk(i)
+            callback("x")
+        return "x" * self.chunks
+
+
+class CancellationTest(unittest.TestCase):
+    def setUp(self):
+        self.cancel_event = threading.Event()
+
+    def test_sectioned_passes_cancel_event_to_sections(self):
+        client = FakeClient(on_chunk=lambda i: self.cancel_event.set())
+        generator = CodeGenerator(client)
+        with self.assertRaises(GenerationCancelled):
+            generator.generate_sectioned("d", "Python", cancel_event=self.cancel_event)
+        self.assertTrue(all(event.is_set() for event in client.stream_calls))
+
+    def test_sectioned_failure_stops_other_sections(self):
+        client = FakeClient()
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def stream(prompt, language, callback, cancel_event=None, **kwargs):
+            if "第 1 部分" in prompt:
+                started.wait(5)
+                raise ValueError("boom")
+            # 第 2 部分一直生成，直到被取消
+            started.set()
+            while not cancel_event.wait(0.01):
+                callback("x")
+            stopped.set()
+            raise GenerationCancelled("生成已取消")
+
+        client.generate_code_stream = stream
+        generator = CodeGenerator(client)
+        with self.assertRaises(ValueError):
+            generator.generate_sectioned("d", "Python", cancel_event=self.cancel_event)
+        self.assertTrue(stopped.is_set())
+
+    def test_best_of_raises_when_cancelled(self):
+        client = FakeClient(on_chunk=lambda i: self.cancel_event.set())
+        generator = CodeGenerator(client)
+        with self.assertRaises(GenerationCancelled):
+            generator.generate_best_of("d", "Python", samples=2, scorers=[], cancel_event=self.cancel_event)
+
+    def test_best_of_without_cancel_returns_code(self):
+        generator = CodeGenerator(FakeClient())
+        code, results = generator.generate_best_of("d", "Python", samples=2, scorers=[], cancel_event=self.cancel_event)
+        self.assertEqual(code, "xxxxx")
+        # 没有评分器时分数上界为 0，后完成的候选会被提前取消
+        self.assertIn("done", [r["status"] for r in results])
+
+    def test_best_of_marks_unexpected_errors_as_failed(self):
+        client = FakeClient()
+        calls = []
+
+        def flaky_stream(prompt, language, callback, cancel_event=None, **kwargs):
+            calls.append(cancel_event)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            return FakeClient.generate_code_stream(client, prompt, language, callback, cancel_event)
+
+        client.generate_code_stream = flaky_stream
+        generator = CodeGenerator(client)
+        code, results = generator.generate_best_of("d", "Python", samples=2, scorers=[])
+        self.assertEqual(code, "xxxxx")
+        self.assertEqual(sorted(r["status"] for r in results), ["done", "failed"])
+
+    def test_context_is_not_recorded_in_history(self):
+        generator = CodeGenerator(FakeClient())
+        generator.generate("写一个函数", "Python", context="# 参考文件 a.py")
+        generator.generate_best_of("再改一下", "Python", samples=1, scorers=[], context="# 参考文件 b.py")
+        history = str(generator.conversation.build_messages())
+        self.assertIn("写一个函数", history)
+        self.assertIn("再改一下", history)
+        self.assertNotIn("参考文件", history)
+
+    def test_subtasks_use_shared_pool(self):
+        pool = ThreadPoolExecutor(max_workers=1)
+        submitted = []
+
+        def submit(func, *args, **kwargs):
+            submitted.append(func)
+            return pool.submit(func, *args, **kwargs)
+
+        generator = CodeGenerator(FakeClient(), submit)
+        generator.generate_sectioned("d", "Python")
+        generator.generate_best_of("d", "Python", samples=3, scorers=[])
+        pool.shutdown()
+        self.assertEqual(len(submitted), 5)
+
+    def test_subtasks_inherit_event_context(self):
+        client = FakeClient()
+        fields = []
+
+        def stream(prompt, language, callback, cancel_event=None, **kwargs):
+            fields.append(_context_fields.get().get("request_id"))
+            return "x"
+
+        client.generate_code_stream = stream
+        generator = CodeGenerator(client)
+        with get_event_log().context(request_id=7):
+            generator.generate_sectioned("d", "Python")
+            generator.generate_best_of("d", "Python", samples=2, scorers=[])
+        self.assertEqual(fields, [7, 7, 7, 7])
+
+    def test_edit_fallback_honors_cancel_event(self):
+        client = FakeClient()
+        generator = CodeGenerator(client)
+        self.cancel_event.set()
+        with self.assertRaises(GenerationCancelled):
+            generator.edit("x = 1", "改一下", "Python", callback=lambda text: None, cancel_event=self.cancel_event)
+        self.assertEqual(client.stream_calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+项目代码索引模块测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from core.code_index import CodeIndex, extract_symbols
+
+
+class ExtractSymbolsTest(unittest.TestCase):
+    def test_qualified_names(self):
+        text = (
+            '"""模块说明"""\n\n'
+            "class Parser:\n"
+            '    """解析器"""\n\n'
+            "    def parse(self, text):\n"
+            "        return text\n\n"
+            "if __name__ == '__main__':\n"
+            "    def helper():\n"
+            "        pass\n"
+        )
+        symbols = {name: (kind, doc) for name, kind, _, doc, _, _ in extract_symbols(text, ".py", "pkg/parser.py")}
+        self.assertEqual(symbols["parser"][1], "模块说明")
+        self.assertEqual(symbols["Parser"][1], "解析器")
+        self.assertIn("Parser.parse", symbols)
+        self.assertIn("helper", symbols)
+        self.assertFalse(any(name.startswith("None.") for name in symbols))
+
+
+class CodeIndexUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.directory.name, "project")
+        os.makedirs(os.path.join(self.root, "pkg"))
+        self.write("pkg/math_utils.py", "def add_numbers(a, b):\n    return a + b\n")
+        self.write("pkg/text.py", "def slugify(text):\n    return text.lower()\n")
+        self.index = CodeIndex(self.root, os.path.join(self.directory.name, "index"))
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def write(self, path: str, text: str, mtime_ns: int = None) -> None:
+        full_path = os.path.join(self.root, path)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(full_path, ns=(mtime_ns, mtime_ns))
+
+    def names(self, query: str) -> list[str]:
+        return [result["name"] for result in self.index.search(query)]
+
+    def test_incremental_update(self):
+        first = self.index.update()
+        self.assertEqual((first["files"], first["added"], first["updated"], first["removed"]), (2, 2, 0, 0))
+        self.assertIn("add_numbers", self.names("add numbers"))
+
+        # 没有变化时不重新索引
+        second = self.index.update()
+        self.assertEqual((second["added"], second["updated"], second["removed"]), (0, 0, 0))
+
+        # 只改修改时间、内容不变：不算作修改
+        os.utime(os.path.join(self.root, "pkg/text.py"), ns=(10 ** 18, 10 ** 18))
+        self.assertEqual(self.index.update()["updated"], 0)
+
+        # 修改内容：旧符号从全文索引中删除，新符号可被检索
+        self.write("pkg/math_utils.py", "def multiply_numbers(a, b):\n    return a * b\n", mtime_ns=2 * 10 ** 18)
+        self.assertEqual(self.index.update()["updated"], 1)
+        self.assertNotIn("add_numbers", self.names("add numbers"))
+        self.assertIn("multiply_numbers", self.names("multiply numbers"))
+
+        # 删除文件
+        os.remove(os.path.join(self.root, "pkg/text.py"))
+        result = self.index.update()
+        self.assertEqual((result["files"], result["removed"]), (1, 1))
+        self.assertEqual(self.names("slugify"), [])
+
+    def test_reopened_index_keeps_symbols(self):
+        self.index.update()
+        self.index.close()
+        self.index = CodeIndex(self.root, os.path.join(self.directory.name, "index"))
+        self.assertEqual(self.index.update()["added"], 0)
+        self.assertIn("slugify", self.names("slugify text"))
+
+
+if __name__ == "__main__":
+    unittest.main()
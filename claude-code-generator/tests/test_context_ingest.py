@@ -0,0 +1,37 @@
+"""
+大文件上下文模块测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from config.constants import CONTEXT_FILE_OUTLINE_NAMES
+from core.context_ingest import SourceFile
+
+
+class GapMarkerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "big.py")
+        with open(self.path, "w", encoding="utf-8") as f:
+            for i in range(2000):
+                f.write(f"def function_{i}(a, b):\n    return a + b + {i}\n\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_marker_lists_first_names_and_distinct_count(self):
+        source = SourceFile(self.path)
+        marker = source._gap_marker(1, source.line_count)
+        shown = ", ".join(f"function_{i}" for i in range(CONTEXT_FILE_OUTLINE_NAMES))
+        self.assertEqual(marker, f"... [省略第 1-{source.line_count} 行：{shown} 等 2000 个定义] ...")
+
+    def test_context_fits_budget_and_marks_gaps(self):
+        context = SourceFile(self.path).build_context(budget=500, query="function_1000")
+        self.assertIn("def function_1000(", context)
+        self.assertIn("个定义] ...", context)
+
+
+if __name__ == "__main__":
+    unittest.main()
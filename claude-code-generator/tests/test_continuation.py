@@ -0,0 +1,59 @@
+"""
+续写拼接模块测试
+"""
+
+import unittest
+
+from core.continuation import ContinuationSeam, build_prefill, stitch_continuation
+
+
+class StitchContinuationTest(unittest.TestCase):
+    def test_prefill_drops_trailing_whitespace(self):
+        self.assertEqual(build_prefill("def f():\n    "), "def f():")
+
+    def test_repeated_trailing_whitespace_is_removed(self):
+        previous = "def f():\n    "
+        self.assertEqual(previous + stitch_continuation(previous, "\n    return 1"), "def f():\n    return 1")
+
+    def test_reopened_fence_is_removed(self):
+        previous = "```python\nx = 1\n"
+        self.assertEqual(stitch_continuation(previous, "```python\ny = 2\n"), "y = 2\n")
+
+    def test_fence_is_kept_outside_code_block(self):
+        previous = "```python\nx = 1\n```\n"
+        self.assertEqual(stitch_continuation(previous, "```js\nlet y;\n"), "```js\nlet y;\n")
+
+    def test_repeated_tail_is_removed(self):
+        previous = "def compute_total(items):\n    total = sum(item.price for item in items)\n"
+        head = "    total = sum(item.price for item in items)\n    return total\n"
+        self.assertEqual(previous + stitch_continuation(previous, head), previous + "    return total\n")
+
+    def test_short_overlap_is_kept(self):
+        previous = "x = 1\n"
+        self.assertEqual(stitch_continuation(previous, "x = 1\ny = 2"), "x = 1\ny = 2")
+
+
+class ContinuationSeamTest(unittest.TestCase):
+    def test_stream_matches_one_shot(self):
+        previous = "class Store:\n    def load(self, path):\n        with open(path) as f:\n"
+        head = "        with open(path) as f:\n" + "".join(f"            line_{i} = f.readline()\n" for i in range(20))
+        expected = stitch_continuation(previous, head)
+
+        for size in (1, 7, 50, len(head)):
+            with self.subTest(size=size):
+                seam = ContinuationSeam(previous)
+                output = "".join(seam.feed(head[i:i + size]) for i in range(0, len(head), size))
+                output += seam.flush()
+                self.assertEqual(output, expected)
+                self.assertFalse(output.startswith("        with open"))
+
+    def test_short_continuation_is_released_on_flush(self):
+        seam = ContinuationSeam("x = 1\n")
+        self.assertEqual(seam.feed("y = 2\n"), "")
+        self.assertEqual(seam.flush(), "y = 2\n")
+        self.assertEqual(seam.flush(), "")
+        self.assertEqual(seam.feed("z"), "z")
+
+
+if __name__ == "__main__":
+    unittest.main()
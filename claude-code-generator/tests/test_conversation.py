@@ -0,0 +1,71 @@
+"""
+对话上下文模块测试
+"""
+
+import unittest
+
+from core.conversation import ConversationContext
+from utils.tokens import estimate_tokens
+
+
+def make_code(name: str, lines: int = 40) -> str:
+    """生成指定行数的示例代码"""
+    body = "\n".join(f"    value_{i} = compute_{name}({i})" for i in range(lines))
+    return f"def {name}():\n{body}\n    return value_0"
+
+
+class ConversationContextTest(unittest.TestCase):
+    def test_messages_alternate_and_end_with_cache_breakpoint(self):
+        context = ConversationContext()
+        context.add_turn("写一个函数", "def a():\n    pass")
+        context.add_turn("再改一下", "def a():\n    return 1")
+
+        messages = context.build_messages("第三轮")
+        self.assertEqual([m["role"] for m in messages], ["user", "assistant", "user", "assistant", "user"])
+        self.assertEqual(messages[3]["content"][-1]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(messages[-1]["content"][-1]["text"], "第三轮")
+        self.assertEqual(context.turn_count, 2)
+
+    def test_history_stays_within_budget(self):
+        context = ConversationContext(token_budget=1500, keep_recent_turns=2, max_message_tokens=600)
+        for i in range(12):
+            context.add_turn(f"第 {i} 个需求", make_code(f"func_{i}"))
+            self.assertLessEqual(context.total_tokens, context.token_budget)
+
+        messages = context.build_messages()
+        self.assertEqual(context.turn_count, 12)
+        self.assertGreaterEqual(len(messages), 4)
+        # 被压缩的轮次以摘要形式放在第一条用户消息中，保留函数签名
+        summary = messages[0]["content"][0]["text"]
+        self.assertTrue(summary.startswith("之前对话的摘要："))
+        self.assertIn("def func_0():", summary)
+        # 最近的轮次原样保留
+        self.assertIn("def func_11():", messages[-1]["content"][0]["text"])
+
+    def test_long_message_is_truncated(self):
+        context = ConversationContext(max_message_tokens=200)
+        context.add_turn("需求", make_code("big", lines=400))
+        text = context.build_messages()[1]["content"][0]["text"]
+        self.assertIn("已截断", text)
+        self.assertLessEqual(estimate_tokens(text), 260)
+
+    def test_repeated_code_is_replaced_by_reference(self):
+        context = ConversationContext()
+        code = make_code("same")
+        context.add_turn("第一轮", code)
+        context.add_turn(f"基于这段代码修改：\n```python\n{code}\n```", "def other():\n    pass")
+
+        user_text = context.build_messages()[2]["content"][0]["text"]
+        self.assertIn("第 1 轮中的代码相同", user_text)
+        self.assertNotIn("compute_same(5)", user_text)
+
+    def test_reset(self):
+        context = ConversationContext()
+        context.add_turn("a", "b")
+        context.reset()
+        self.assertTrue(context.is_empty())
+        self.assertEqual(context.build_messages(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
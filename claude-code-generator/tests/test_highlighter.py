@@ -0,0 +1,102 @@
+"""
+语法高亮模块测试（只测试后台分析，不创建 Tk 控件）
+"""
+
+import time
+import unittest
+from unittest import mock
+
+from ui.highlighter import HighlightWorker, IncrementalLexer, get_lexer
+
+# 各语言的示例代码（包含跨行字符串和注释）
+SAMPLES = {
+    "Python": 'import os\n\nclass A(B):\n    """doc\n    string"""\n    def f(self, x=1):\n        return f"{x}" + \'s\'  # c\n',
+    "JavaScript": "const a = `x ${b}\ny`;\nfunction f() { return /re/g; }\n",
+    "C++": "#include <vector>\nint main() {\n  std::vector<int> v; size_t n = 0;\n  /* multi\n  line */ return 0;\n}\n",
+    "PHP": "function f($a) {\n  return strlen($a);\n}\n",
+    "Swift": "import Foundation\nlet s: String = \"a\"\nprint(s.count)\n",
+    "Ruby": "def f(a)\n  puts \"#{a}\"\nend\n",
+}
+
+
+def wait_results(worker: HighlightWorker, timeout: float = 5.0) -> list:
+    """
+    等待后台线程处理完所有请求
+
+    Args:
+        worker: 高亮线程
+        timeout: 最长等待时间（秒）
+
+    Returns:
+        取出的结果列表
+    """
+    deadline = time.monotonic() + timeout
+    results = []
+    while time.monotonic() < deadline:
+        results.extend(worker.poll())
+        if not worker.busy():
+            return results
+        time.sleep(0.01)
+    raise AssertionError("高亮线程未在超时前完成")
+
+
+class IncrementalLexerTest(unittest.TestCase):
+    def test_streamed_ranges_match_full_lexing(self):
+        for language, text in SAMPLES.items():
+            lexer = get_lexer(language)
+            expected = IncrementalLexer(lexer)._merge_ranges(lexer.get_tokens_unprocessed(text))
+            for step in (1, 3, 7):
+                with self.subTest(language=language, step=step):
+                    incremental = IncrementalLexer(lexer)
+                    incremental.update(text[:step])
+                    for end in range(step, len(text) - step, step):
+                        incremental.append(text[end:end + step])
+                    start, ranges = incremental.append(text[end + step:])
+                    self.assertEqual(ranges, [r for r in expected if r[0] >= start])
+                    self.assertFalse(any(r[0] < start < r[1] for r in expected))
+
+    def test_post_processing_lexers_are_not_incremental(self):
+        self.assertTrue(IncrementalLexer(get_lexer("Python")).supports_incremental)
+        for language in ("C++", "PHP", "Ruby"):
+            with self.subTest(language=language):
+                self.assertFalse(IncrementalLexer(get_lexer(language)).supports_incremental)
+
+
+class HighlightWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.worker = HighlightWorker()
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_worker_survives_errors(self):
+        with mock.patch.object(self.worker, "_process", side_effect=ValueError("boom")):
+            self.worker.submit(1, "x = 1\n", "Python")
+            self.assertEqual(wait_results(self.worker), [])
+
+        self.worker.submit(1, "x = 1\n", "Python")
+        results = wait_results(self.worker)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].start, 0)
+        self.assertTrue(len(results[0].starts))
+
+    def test_appended_text_matches_full_text(self):
+        text = SAMPLES["Python"]
+        self.worker.submit(1, text, "Python")
+        expected = wait_results(self.worker)[-1]
+
+        self.worker.submit(2, text[:10], "Python", streaming=True)
+        wait_results(self.worker)
+        self.worker.append(2, text[10:30], "Python")
+        self.worker.append(2, text[30:], "Python")
+        result = wait_results(self.worker)[-1]
+        self.assertEqual(list(result.starts), [s for s in expected.starts if s >= result.start])
+        self.assertEqual(list(result.ends), list(expected.ends)[-len(result.ends):])
+
+    def test_append_without_base_text_is_ignored(self):
+        self.worker.append(1, "x = 1\n", "Python")
+        self.assertEqual(wait_results(self.worker), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+生成历史导出模块测试
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+
+from config.constants import EXPORT_MANIFEST_NAME
+from core.history_export import _DirectoryWriter, export_history, export_path
+
+RECORDS = [
+    {"id": "20240101120000_a", "language": "Python", "description": "加法 函数", "code": "def add(a, b):\n    return a + b\n"},
+    {"id": "20240102120000_b", "language": "Python", "description": "重复", "code": "def add(a, b):\n    return a + b\n"},
+    {"id": "20240103120000_c", "language": "Ruby", "description": "同样的内容", "code": "def add(a, b):\n    return a + b\n"},
+    {"id": "20240104120000_d", "language": "Python", "description": "失败的生成"},
+    {"id": "20240105120000_e", "language": "..", "description": "x", "code": "print(1)\n"},
+]
+
+
+class ExportHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.target = os.path.join(self.directory.name, "export")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_manifest(self) -> list[dict]:
+        with open(os.path.join(self.target, EXPORT_MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_directory_export_skips_records_without_code(self):
+        result = export_history(self.target, RECORDS)
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["records"], 4)
+        self.assertNotIn("20240104120000_d", [entry["id"] for entry in self.read_manifest()])
+
+    def test_duplicates_are_keyed_by_extension_and_content(self):
+        result = export_history(self.target, RECORDS)
+        self.assertEqual(result["files"], 3)
+        self.assertEqual(result["duplicates"], 1)
+
+        paths = {entry["id"]: entry["path"] for entry in self.read_manifest()}
+        self.assertEqual(paths["20240101120000_a"], paths["20240102120000_b"])
+        self.assertTrue(paths["20240103120000_c"].endswith(".rb"))
+        self.assertTrue(os.path.isfile(os.path.join(self.target, paths["20240103120000_c"])))
+
+    def test_filters_are_applied(self):
+        result = export_history(self.target, RECORDS, language="Ruby")
+        self.assertEqual(result["records"], 1)
+
+    def test_zip_export(self):
+        target = os.path.join(self.directory.name, "export.zip")
+        result = export_history(target, RECORDS)
+        self.assertEqual(result["errors"], [])
+        with zipfile.ZipFile(target) as archive:
+            names = archive.namelist()
+        self.assertIn(EXPORT_MANIFEST_NAME, names)
+        self.assertFalse(any(name.startswith(("/", "..")) for name in names))
+
+
+class ExportPathTest(unittest.TestCase):
+    def test_language_cannot_escape_target(self):
+        for language in ("..", ".", "../..", "a/../.."):
+            with self.subTest(language=language):
+                path = export_path({"language": language, "id": "20240101120000"}, 1)
+                self.assertNotIn("..", path.split("/"))
+                self.assertFalse(path.startswith((".", "/")))
+
+    def test_directory_writer_rejects_escaping_paths(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writer = _DirectoryWriter(directory, 1)
+            try:
+                with self.assertRaises(ValueError):
+                    writer.add("../x_d.txt", b"x")
+            finally:
+                writer.abort()
+
+
+if __name__ == "__main__":
+    unittest.main()
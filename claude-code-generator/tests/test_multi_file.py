@@ -0,0 +1,127 @@
+"""
+多文件输出模块测试
+"""
+
+import random
+import unittest
+
+from core.multi_file import MultiFileDemultiplexer, parse_filename
+
+OUTPUT = """下面是项目的代码。
+
+### src/app.py
+
+说明：入口文件
+
+```python
+from src.util import helper
+
+
+def main():
+    helper()
+```
+
+**src/util.py**
+```python
+def helper():
+    return "```"
+```
+
+```javascript web/index.js
+console.log(1);
+```
+
+```toml title="pyproject.toml"
+[project]
+name = "demo"
+```
+
+````markdown
+README 里的示例：
+```bash
+pip install demo
+```
+````
+
+```python
+print("未命名")
+```
+"""
+
+
+def demultiplex(text: str, sizes: list[int]) -> dict:
+    """
+    按给定的分块大小把文本交给分拣器
+
+    Args:
+        text: 模型输出
+        sizes: 分块大小（循环使用）
+
+    Returns:
+        {路径: (内容, 是否完整, 是否来自模型输出的文件名)}
+    """
+    demux = MultiFileDemultiplexer()
+    position = 0
+    index = 0
+    while position < len(text):
+        size = sizes[index % len(sizes)]
+        demux.feed(text[position:position + size])
+        position += size
+        index += 1
+    return {f.path: (f.content, f.complete, f.named) for f in demux.finish()}
+
+
+class MultiFileDemultiplexerTest(unittest.TestCase):
+    def test_recognizes_file_names(self):
+        files = demultiplex(OUTPUT, [len(OUTPUT)])
+        self.assertEqual(
+            list(files),
+            ["src/app.py", "src/util.py", "web/index.js", "pyproject.toml", "untitled_1.md", "untitled_2.py"],
+        )
+        self.assertTrue(files["src/app.py"][0].startswith("from src.util import helper\n"))
+        self.assertEqual(files["src/util.py"][0], 'def helper():\n    return "```"\n')
+        self.assertEqual(files["web/index.js"][0], "console.log(1);\n")
+        self.assertIn("```bash\npip install demo\n```\n", files["untitled_1.md"][0])
+        self.assertFalse(files["untitled_2.py"][2])
+        self.assertTrue(all(complete for _, complete, _ in files.values()))
+
+    def test_stream_matches_one_shot(self):
+        expected = demultiplex(OUTPUT, [len(OUTPUT)])
+        rng = random.Random(0)
+        for sizes in ([1], [2, 5], *([rng.randint(1, 12) for _ in range(6)] for _ in range(20))):
+            with self.subTest(sizes=sizes):
+                self.assertEqual(demultiplex(OUTPUT, sizes), expected)
+
+    def test_unclosed_block_is_kept(self):
+        files = demultiplex("`main.go`\n```go\npackage main\nfunc main() {", [3])
+        self.assertEqual(files, {"main.go": ("package main\nfunc main() {\n", False, True)})
+
+    def test_repeated_file_keeps_last_version(self):
+        text = "```python a.py\nx = 1\n```\n\n```python a.py\nx = 2\n```\n"
+        self.assertEqual(demultiplex(text, [4]), {"a.py": ("x = 2\n", True, True)})
+
+    def test_stale_header_is_ignored(self):
+        text = "### a.py\n第一行\n第二行\n第三行\n第四行\n\n```python\nx = 1\n```\n"
+        demux = MultiFileDemultiplexer(header_lookback=2)
+        demux.feed(text)
+        self.assertEqual([f.path for f in demux.finish()], ["untitled_1.py"])
+
+    def test_abort_discards_files(self):
+        demux = MultiFileDemultiplexer()
+        demux.feed("```python a.py\nx = 1\n")
+        demux.abort()
+        self.assertEqual(demux.finish(), [])
+
+
+class ParseFilenameTest(unittest.TestCase):
+    def test_parse_filename(self):
+        self.assertEqual(parse_filename("**src/app.py**"), "src/app.py")
+        self.assertEqual(parse_filename("文件：src/a.py"), "src/a.py")
+        self.assertEqual(parse_filename("`Dockerfile`"), "Dockerfile")
+        for text in ("../x.py", "a/../../x.py", "/abs/x.py", "hello world"):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_filename(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Myers 差异算法模块测试
+"""
+
+import random
+import unittest
+
+from utils.myers_diff import EQUAL, REPLACE, IncrementalDiff, diff_lines
+
+
+def lcs_length(a: list[str], b: list[str]) -> int:
+    """动态规划计算最长公共子序列长度（用于校验结果最优）"""
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+class DiffLinesTest(unittest.TestCase):
+    def check_opcodes(self, a: list[str], b: list[str], opcodes: list[tuple], a_end: int = None) -> None:
+        """检查操作列表连续覆盖两侧文本，且按操作可以由旧文本得到新文本"""
+        a_end = len(a) if a_end is None else a_end
+        i = j = 0
+        rebuilt = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            self.assertEqual((i1, j1), (i, j))
+            if tag == EQUAL:
+                self.assertEqual(a[i1:i2], b[j1:j2])
+            rebuilt.extend(b[j1:j2])
+            i, j = i2, j2
+        self.assertEqual((i, j), (a_end, len(b)))
+        self.assertEqual(rebuilt, b)
+
+    def test_simple_cases(self):
+        self.assertEqual(diff_lines([], []), [])
+        self.assertEqual(diff_lines(["a"], ["a"]), [(EQUAL, 0, 1, 0, 1)])
+        self.assertEqual(diff_lines(["a", "b", "c"], ["a", "x", "c"])[1], (REPLACE, 1, 2, 1, 2))
+
+    def test_random_diffs_are_minimal(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            a = [rng.choice("abcd") for _ in range(rng.randint(0, 30))]
+            b = [rng.choice("abcd") for _ in range(rng.randint(0, 30))]
+            opcodes = diff_lines(a, b)
+            self.check_opcodes(a, b, opcodes)
+            equal = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == EQUAL)
+            self.assertEqual(equal, lcs_length(a, b), (a, b))
+
+    def test_edit_cost_limit(self):
+        a = [f"old {i}" for i in range(50)]
+        b = [f"new {i}" for i in range(50)]
+        self.assertEqual(diff_lines(a, b, max_cost=10), [(REPLACE, 0, 50, 0, 50)])
+
+    def test_incremental_diff_matches_final_text(self):
+        rng = random.Random(2)
+        for _ in range(50):
+            old = [f"line {rng.randint(0, 15)}" for _ in range(rng.randint(0, 40))]
+            new = [f"line {rng.randint(0, 15)}" for _ in range(rng.randint(0, 40))]
+            incremental = IncrementalDiff(old, stable_lines=3)
+            for end in range(len(new) + 1):
+                opcodes = incremental.update(new[:end])
+                self.check_opcodes(old, new[:end], opcodes, incremental.pending_old_start)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+补丁应用模块测试
+"""
+
+import unittest
+
+from core.patcher import apply_patch, apply_search_replace, apply_unified_diff, parse_unified_diff
+
+CODE = """class A:
+    def f(self):
+        return 1
+
+    def g(self):
+        return 2
+"""
+
+
+class SearchReplaceTest(unittest.TestCase):
+    def test_exact_match(self):
+        ok, code = apply_search_replace(CODE, [("        return 2\n", "        return 3\n")])
+        self.assertTrue(ok)
+        self.assertIn("return 3", code)
+        self.assertIn("return 1", code)
+
+    def test_exact_ambiguous_match_fails(self):
+        code = "x = 1\nx = 1\n"
+        ok, message = apply_search_replace(code, [("x = 1", "x = 2")])
+        self.assertFalse(ok)
+        self.assertIn("2 处", message)
+
+    def test_fuzzy_match_reindents_replacement(self):
+        ok, code = apply_search_replace(CODE, [("def g(self):\n    return 2\n", "def g(self):\n    return 3\n")])
+        self.assertTrue(ok)
+        self.assertIn("    def g(self):\n        return 3", code)
+
+    def test_fuzzy_match_dedents_replacement(self):
+        search = "            def g(self):\n                return 2\n"
+        replace = "            def g(self):\n                return 3\n"
+        ok, code = apply_search_replace(CODE, [(search, replace)])
+        self.assertTrue(ok)
+        self.assertIn("\n    def g(self):\n        return 3\n", code)
+
+    def test_fuzzy_match_with_mixed_indent_fails(self):
+        ok, _ = apply_search_replace(CODE, [("\tdef g(self):\n\t\treturn 2\n", "\tdef g(self):\n\t\treturn 3\n")])
+        self.assertFalse(ok)
+
+    def test_fuzzy_match_ignores_trailing_whitespace(self):
+        ok, code = apply_search_replace(CODE, [("    def f(self):   \n        return 1  ", "    def f(self):\n        return 0")])
+        self.assertTrue(ok)
+        self.assertIn("return 0", code)
+
+    def test_fuzzy_ambiguous_match_fails(self):
+        code = "def a():\n    pass\n\nclass B:\n    def a():\n        pass\n"
+        ok, message = apply_search_replace(code, [("  def a():\n      pass", "def a():\n    return 1")])
+        self.assertFalse(ok)
+        self.assertIn("2 处", message)
+        self.assertEqual(code.count("pass"), 2)
+
+    def test_missing_match_fails(self):
+        ok, message = apply_search_replace(CODE, [("return 42", "return 0")])
+        self.assertFalse(ok)
+        self.assertIn("找不到", message)
+
+    def test_apply_patch_parses_blocks(self):
+        patch = "<<<<<<< SEARCH\n        return 1\n=======\n        return 10\n>>>>>>> REPLACE"
+        ok, code = apply_patch(CODE, patch)
+        self.assertTrue(ok)
+        self.assertIn("return 10", code)
+
+
+class UnifiedDiffTest(unittest.TestCase):
+    def test_repeated_context_uses_nearest_position(self):
+        code = "x = 1\ny = 0\nx = 1\ny = 0\n"
+        diff = "@@ -3,2 +3,2 @@\n x = 1\n-y = 0\n+y = 5\n"
+        ok, patched = apply_unified_diff(code, parse_unified_diff(diff))
+        self.assertTrue(ok)
+        self.assertEqual(patched, "x = 1\ny = 0\nx = 1\ny = 5\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+候选代码评分模块测试
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from config.constants import BEST_OF_DEFAULT_SCORERS
+from core.scorers import (
+    BrevityScorer,
+    QuickTestScorer,
+    SyntaxScorer,
+    create_scorers,
+    total_score,
+    total_upper_bound,
+)
+
+
+class CreateScorersTest(unittest.TestCase):
+    def test_tests_scorer_requires_test_code(self):
+        names = [scorer.name for scorer in create_scorers(BEST_OF_DEFAULT_SCORERS)]
+        self.assertNotIn(QuickTestScorer.name, names)
+
+        scorers = create_scorers(BEST_OF_DEFAULT_SCORERS, "assert add(1, 2) == 3")
+        self.assertIn(QuickTestScorer.name, [scorer.name for scorer in scorers])
+
+    def test_unknown_names_are_ignored(self):
+        self.assertEqual([s.name for s in create_scorers(["syntax", "missing"])], ["syntax"])
+
+
+class ScorerTest(unittest.TestCase):
+    def test_quick_test_scorer_runs_tests(self):
+        scorer = QuickTestScorer("assert add(1, 2) == 3")
+        self.assertEqual(scorer.score("def add(a, b):\n    return a + b", "Python"), 1.0)
+        self.assertEqual(scorer.score("def add(a, b):\n    return a - b", "Python"), 0.0)
+        self.assertEqual(scorer.score("function add() {}", "JavaScript"), 0.0)
+
+    def test_quick_test_scorer_is_isolated(self):
+        scorer = QuickTestScorer("assert check()")
+        code = (
+            "import os\n"
+            "def check():\n"
+            "    return 'ANTHROPIC_API_KEY' not in os.environ and not os.path.exists('data')\n"
+        )
+        with mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "secret"}):
+            self.assertEqual(scorer.score(code, "Python"), 1.0)
+
+    def test_syntax_scorer(self):
+        scorer = SyntaxScorer()
+        self.assertEqual(scorer.score("x = (1,", "Python"), 0.0)
+        self.assertEqual(scorer.score("f(a[0], '}')", "JavaScript"), 1.0)
+        self.assertEqual(scorer.score("f(a[0}", "JavaScript"), 0.0)
+
+    def test_upper_bound_is_not_below_final_score(self):
+        scorers = [SyntaxScorer(), BrevityScorer()]
+        code = "def f():\n    return 1\n"
+        for end in range(0, len(code) + 1, 5):
+            self.assertGreaterEqual(
+                total_upper_bound(code[:end], "Python", scorers), total_score(code, "Python", scorers)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+分段生成模块测试
+"""
+
+import ast
+import unittest
+
+from core.sections import assemble_sections, parse_outline
+
+
+class AssembleSectionsTest(unittest.TestCase):
+    def test_single_line_imports_are_hoisted_and_deduplicated(self):
+        code = assemble_sections(
+            ["import os\n\ndef a():\n    return os.sep", "import os\nimport sys\n\ndef b():\n    return sys.argv"],
+            "Python",
+        )
+        self.assertTrue(code.startswith("import os\nimport sys\n"))
+        self.assertEqual(code.count("import os"), 1)
+        ast.parse(code)
+
+    def test_multi_line_python_imports_are_hoisted_whole(self):
+        sections = [
+            "from typing import (\n    Any,\n    Optional,\n)\n\ndef a(x: Optional[Any]):\n    return x",
+            "from os.path import \\\n    join\n\ndef b():\n    return join('a', 'b')",
+            "from typing import (\n    Any,\n    Optional,\n)\n\ndef c():\n    pass",
+        ]
+        code = assemble_sections(sections, "Python")
+        ast.parse(code)
+        self.assertEqual(code.count("from typing import ("), 1)
+        header = code.split("\n\n\n")[0]
+        self.assertIn("    Optional,\n)", header)
+        self.assertIn("from os.path import \\\n    join", header)
+
+    def test_multi_line_javascript_imports_are_hoisted_whole(self):
+        sections = [
+            "import {\n  a,\n  b,\n} from './lib';\n\nexport function f() {\n  return a + b;\n}",
+            "import React from 'react';\n\nexport function g() {\n  return React;\n}",
+        ]
+        code = assemble_sections(sections, "JavaScript")
+        header = code.split("\n\n")[0]
+        self.assertEqual(header, "import {\n  a,\n  b,\n} from './lib';\nimport React from 'react';")
+        self.assertNotIn("} from './lib'", code[len(header):])
+
+    def test_unclosed_import_is_left_in_place(self):
+        code = assemble_sections(["def a():\n    pass\nfrom x import (\n    y"], "Python")
+        self.assertTrue(code.startswith("def a():"))
+        self.assertIn("from x import (\n    y", code)
+
+    def test_unknown_language_joins_sections(self):
+        self.assertEqual(assemble_sections(["a", " ", "b"], "Other"), "a\n\nb")
+
+
+class ParseOutlineTest(unittest.TestCase):
+    def test_parses_json_inside_text(self):
+        text = '大纲如下：\n```json\n{"sections": [{"title": "A", "description": "x"}, {"title": ""}, {"title": "B"}]}\n```'
+        self.assertEqual(
+            parse_outline(text, 5),
+            [{"title": "A", "description": "x"}, {"title": "B", "description": ""}],
+        )
+
+    def test_invalid_outline_returns_empty_list(self):
+        self.assertEqual(parse_outline("no json here", 5), [])
+        self.assertEqual(parse_outline("{broken", 5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+安全模块测试
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.security import EnvironmentSecretProvider, KeyFileSecretProvider
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class KeyFileSecretProviderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.key_file = os.path.join(self.directory.name, "keys", "secret.key")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        provider = KeyFileSecretProvider(self.key_file)
+        payload = provider.encrypt("sk-测试-123")
+        self.assertNotIn("sk-", payload)
+        self.assertEqual(KeyFileSecretProvider(self.key_file).decrypt(payload), "sk-测试-123")
+
+    def test_tampered_payload_is_rejected(self):
+        provider = KeyFileSecretProvider(self.key_file)
+        payload = provider.encrypt("secret")
+        tampered = ("A" if payload[0] != "A" else "B") + payload[1:]
+        with self.assertRaises(ValueError):
+            provider.decrypt(tampered)
+
+
+class EnvironmentSecretProviderTest(unittest.TestCase):
+    def test_encrypt_requires_matching_variable(self):
+        provider = EnvironmentSecretProvider("TEST_SECRET_VAR")
+        with mock.patch.dict(os.environ, {"TEST_SECRET_VAR": "sk-1"}):
+            self.assertEqual(provider.encrypt("sk-1"), "TEST_SECRET_VAR")
+            self.assertEqual(provider.decrypt("TEST_SECRET_VAR"), "sk-1")
+            with self.assertRaises(ValueError):
+                provider.encrypt("sk-2")
+
+        with mock.patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                provider.encrypt("sk-1")
+
+
+class ImportTest(unittest.TestCase):
+    def test_settings_import_loads_no_crypto_modules(self):
+        code = (
+            "import sys, config.settings; "
+            "print(','.join(m for m in ('hashlib', 'hmac', 'secrets') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+设置管理模块测试
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config.constants import CONFIG_API_KEY, CONFIG_TEMPERATURE, CONFIG_THEME, DEFAULT_CONFIG
+from config.settings import SettingsManager
+from utils.security import KeyFileSecretProvider
+
+
+class SettingsManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.directory.name, "config", "settings.json")
+
+        # 使用临时密钥文件，不读写真实的密钥
+        provider = KeyFileSecretProvider(os.path.join(self.directory.name, "secret.key"))
+        patches = [
+            mock.patch("utils.security._default_provider", provider),
+            mock.patch.dict("utils.security._providers", {KeyFileSecretProvider.name: provider}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_file(self) -> dict:
+        with open(self.config_file, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_creates_default_config(self):
+        settings = SettingsManager(self.config_file)
+        self.assertEqual(settings.get(CONFIG_THEME), DEFAULT_CONFIG[CONFIG_THEME])
+        self.assertEqual(self.read_file()[CONFIG_THEME], DEFAULT_CONFIG[CONFIG_THEME])
+
+    def test_save_is_debounced_and_atomic(self):
+        settings = SettingsManager(self.config_file)
+        settings.set(CONFIG_TEMPERATURE, 0.3)
+        settings.set(CONFIG_API_KEY, "sk-test-key")
+        # 延迟保存：flush 之前文件不变
+        self.assertEqual(self.read_file()[CONFIG_TEMPERATURE], DEFAULT_CONFIG[CONFIG_TEMPERATURE])
+
+        settings.flush()
+        saved = self.read_file()
+        self.assertEqual(saved[CONFIG_TEMPERATURE], 0.3)
+        self.assertTrue(saved[CONFIG_API_KEY].startswith("file:"))
+        self.assertNotIn("sk-test-key", json.dumps(saved))
+        self.assertEqual(os.listdir(os.path.dirname(self.config_file)), ["settings.json"])
+
+        reopened = SettingsManager(self.config_file)
+        self.assertEqual(reopened.get(CONFIG_TEMPERATURE), 0.3)
+        self.assertEqual(reopened.get(CONFIG_API_KEY), "sk-test-key")
+
+    def test_failed_save_keeps_previous_file(self):
+        settings = SettingsManager(self.config_file)
+        before = self.read_file()
+        settings.set("unserializable", object())
+        with self.assertRaises(RuntimeError):
+            settings.save_config()
+        self.assertEqual(self.read_file(), before)
+
+    def test_reload_applies_external_changes_only(self):
+        settings = SettingsManager(self.config_file)
+        settings.set(CONFIG_TEMPERATURE, 0.2)
+
+        external = self.read_file()
+        external[CONFIG_THEME] = "light"
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            json.dump(external, f)
+
+        self.assertEqual(settings.reload(), {CONFIG_THEME})
+        self.assertEqual(settings.get(CONFIG_THEME), "light")
+        # 未被外部修改的本地修改保持不变，随后保存时写入
+        self.assertEqual(settings.get(CONFIG_TEMPERATURE), 0.2)
+        settings.flush()
+        self.assertEqual(self.read_file()[CONFIG_TEMPERATURE], 0.2)
+        self.assertEqual(self.read_file()[CONFIG_THEME], "light")
+        self.assertEqual(settings.reload(), set())
+
+    def test_corrupt_file_is_backed_up(self):
+        os.makedirs(os.path.dirname(self.config_file))
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write("{broken")
+
+        with mock.patch("builtins.print"):
+            settings = SettingsManager(self.config_file)
+        self.assertEqual(settings.get(CONFIG_THEME), DEFAULT_CONFIG[CONFIG_THEME])
+        with open(f"{self.config_file}.corrupt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "{broken")
+
+
+if __name__ == "__main__":
+    unittest.main()
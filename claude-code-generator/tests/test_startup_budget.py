@@ -0,0 +1,88 @@
+"""
+启动预算测试
+导入和首次绘制的耗时受机器负载影响，较慢的机器上可通过环境变量 CODEGEN_STARTUP_BUDGET_SCALE 放宽预算
+"""
+
+import os
+import subprocess
+import sys
+import tkinter
+import unittest
+
+from config.constants import STARTUP_FIRST_PAINT_BUDGET_MS
+from utils.startup_profiler import check_import_budget, parse_importtime, profile_imports, scaled_budget
+
+# 在子进程中按 main.py 的顺序导入并创建隐藏的主窗口，输出首次绘制耗时（毫秒）
+_FIRST_PAINT_SCRIPT = """
+import os
+import time
+
+from utils.startup_profiler import get_startup_profiler
+from ui.main_window import MainWindow
+
+profiler = get_startup_profiler()
+window = MainWindow()
+window.withdraw()
+deadline = time.monotonic() + 30
+while profiler.elapsed("首次绘制") is None and time.monotonic() < deadline:
+    window.update()
+print(profiler.elapsed("首次绘制"), flush=True)
+os._exit(0)
+"""
+
+
+def has_display() -> bool:
+    """
+    检查是否可以创建 Tk 窗口
+
+    Returns:
+        可以创建时返回 True
+    """
+    try:
+        tkinter.Tk().destroy()
+        return True
+    except tkinter.TclError:
+        return False
+
+
+class StartupBudgetTest(unittest.TestCase):
+    def test_main_import_within_budget(self):
+        # 单次测量受磁盘缓存和机器负载影响，超时最多重测两次；延迟导入问题每次都会出现，不受重测影响
+        for _ in range(3):
+            entries, error = profile_imports()
+            self.assertEqual(error, "")
+            problems = check_import_budget(entries)
+            if not problems:
+                break
+        self.assertEqual(problems, [])
+
+    def test_deferred_module_import_is_reported(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   anthropic\n"
+            "import time:       200 |        300 | main\n"
+        )
+        entries = parse_importtime(output)
+        self.assertEqual(check_import_budget(entries, budget_ms=1), ["anthropic 应延迟导入，但在启动时被导入"])
+        self.assertEqual(len(check_import_budget(entries, budget_ms=0.1)), 2)
+
+    def test_first_paint_within_budget(self):
+        if not has_display():
+            self.skipTest("没有可用的显示")
+
+        result = subprocess.run(
+            [sys.executable, "-c", _FIRST_PAINT_SCRIPT],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        last_line = result.stdout.strip().splitlines()[-1]
+        self.assertNotEqual(last_line, "None", "窗口未在超时前完成首次绘制")
+        elapsed_ms = float(last_line)
+        self.assertLessEqual(elapsed_ms, scaled_budget(STARTUP_FIRST_PAINT_BUDGET_MS))
+
+
+if __name__ == "__main__":
+    unittest.main()
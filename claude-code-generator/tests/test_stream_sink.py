@@ -0,0 +1,98 @@
+"""
+流式输出模块测试
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from core.stream_sink import FenceStripper, FileSink, strip_fences
+
+# (模型输出, 期望的代码)
+CASES = [
+    ("```python\ndef f():\n    pass\n```", "def f():\n    pass"),
+    ("下面是代码：\n\n```python\nx = 1\n```\n\n说明文字", "x = 1"),
+    ("def f():\n    pass\n", "def f():\n    pass"),
+    # 未闭合的代码块：最后一行之前有空行
+    ("```python\ndef f():\n    pass\n\nx = 1", "def f():\n    pass\n\nx = 1"),
+    ("```python\na\n\n\nb\n", "a\n\n\nb"),
+    # 中间的代码块标记保留，只去掉第一个和最后一个
+    ("```python\na\n```\n\n```js\nb\n```", "a\n```\n\n```js\nb"),
+    # 只有一个 ``` 行且其后没有代码：视为结尾标记
+    ("x\n```", "x"),
+    ("```python\na\n\n```\n结尾  \n", "a"),
+    ("", ""),
+]
+
+
+def stream(text: str, sizes: list[int]) -> str:
+    """
+    按给定的分块大小把文本交给 FenceStripper
+
+    Args:
+        text: 模型输出
+        sizes: 分块大小（循环使用）
+
+    Returns:
+        拼接后的输出
+    """
+    stripper = FenceStripper()
+    parts = []
+    position = 0
+    index = 0
+    while position < len(text):
+        size = sizes[index % len(sizes)]
+        parts.append(stripper.feed(text[position:position + size]))
+        position += size
+        index += 1
+    parts.append(stripper.finish())
+    return "".join(parts)
+
+
+class StripFencesTest(unittest.TestCase):
+    def test_one_shot(self):
+        for text, expected in CASES:
+            with self.subTest(text=text):
+                self.assertEqual(strip_fences(text), expected)
+
+    def test_stream_matches_one_shot(self):
+        rng = random.Random(0)
+        for text, expected in CASES:
+            for sizes in ([1], [2], [3, 7], [len(text) or 1]):
+                with self.subTest(text=text, sizes=sizes):
+                    self.assertEqual(stream(text, sizes), expected)
+            for _ in range(50):
+                sizes = [rng.randint(1, 8) for _ in range(5)]
+                self.assertEqual(stream(text, sizes), expected)
+
+
+class FileSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "out.py")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_commit_writes_stripped_code(self):
+        with FileSink(self.path) as sink:
+            for chunk in ("```py", "thon\na = 1\n\n", "b = 2", "\n```\n"):
+                sink.write(chunk)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "a = 1\n\nb = 2")
+        self.assertEqual(os.listdir(self.directory.name), ["out.py"])
+
+    def test_abort_keeps_original_file(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("original")
+        sink = FileSink(self.path)
+        sink.write("new content\n")
+        sink.abort()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "original")
+        self.assertEqual(os.listdir(self.directory.name), ["out.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+界面响应监控模块测试
+"""
+
+import threading
+import time
+import unittest
+
+from utils.ui_watchdog import UIWatchdog
+
+
+class BlockingRoot:
+    """模拟线程化 Tcl：从其他线程调用 after 会阻塞到主线程处理完回调为止"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def after(self, ms, callback):
+        time.sleep(self.delay)
+        callback()
+
+
+def busy_main_thread(seconds: float) -> None:
+    """在主线程中模拟一次长时间操作"""
+    time.sleep(seconds)
+
+
+class UIWatchdogTest(unittest.TestCase):
+    def test_stack_is_sampled_while_after_blocks(self):
+        self.assertIs(threading.current_thread(), threading.main_thread())
+        watchdog = UIWatchdog(BlockingRoot(0.15), interval_ms=10, threshold_ms=50)
+        watchdog.start()
+        try:
+            busy_main_thread(0.5)
+        finally:
+            watchdog.stop()
+
+        report = watchdog.get_report()
+        self.assertGreaterEqual(report["stall_count"], 1)
+        self.assertTrue(report["top_stacks"])
+        self.assertTrue(any("busy_main_thread" in frame for frame in report["top_stacks"][0]["stack"]))
+
+    def test_stall_without_stack_is_counted(self):
+        watchdog = UIWatchdog(BlockingRoot(0), threshold_ms=50)
+        watchdog._record(80, None)
+        watchdog._record(10, None)
+
+        report = watchdog.get_report()
+        self.assertEqual(report["beats"], 2)
+        self.assertEqual(report["stall_count"], 1)
+        self.assertEqual(report["stall_total_ms"], 80)
+        self.assertEqual(report["top_stacks"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
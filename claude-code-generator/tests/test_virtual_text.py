@@ -0,0 +1,37 @@
+"""
+按行索引的文本缓冲区测试
+"""
+
+import unittest
+
+from ui.virtual_text import LineBuffer
+
+
+class LineBufferTest(unittest.TestCase):
+    def test_appended_chunks_match_whole_text(self):
+        text = "def f():\n    return 1\n\n\nclass A:\n    pass"
+        for step in (1, 4, 9):
+            with self.subTest(step=step):
+                buffer = LineBuffer()
+                for start in range(0, len(text), step):
+                    buffer.append(text[start:start + step])
+                lines = text.split("\n")
+                self.assertEqual(len(buffer), len(text))
+                self.assertEqual(buffer.line_count, len(lines))
+                for first in range(len(lines)):
+                    for last in range(first + 1, len(lines) + 1):
+                        self.assertEqual(buffer.get_lines(first, last), "\n".join(lines[first:last]))
+                self.assertEqual(buffer.get_text(), text)
+
+    def test_append_after_get_text(self):
+        buffer = LineBuffer()
+        buffer.set_text("a\nb")
+        buffer.append("c\n")
+        self.assertEqual(buffer.get_text(), "a\nbc\n")
+        buffer.append("d")
+        self.assertEqual(buffer.get_lines(1, 3), "bc\nd")
+        self.assertEqual(buffer.to_line_col(5), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
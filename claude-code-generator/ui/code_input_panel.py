@@ -3,6 +3,8 @@
 提供用户输入代码描述的界面
 """
 
+import os
+
 import customtkinter as ctk
 
 import config.constants as constants
@@ -24,6 +26,9 @@ class CodeInputPanel(ctk.CTkFrame):
         self.current_theme = "dark"
         self.selected_language = constants.DEFAULT_LANGUAGE
         self.selected_template = None
+        self.selected_mode = constants.GENERATION_MODE_STANDARD
+        self.context_path = None
+        self.test_path = None
 
         self._setup_ui()
 
@@ -38,6 +43,9 @@ class CodeInputPanel(ctk.CTkFrame):
         # 标题
         self._create_header()
 
+        # 生成模式选择
+        self._create_mode_selector()
+
         # 语言选择
         self._create_language_selector()
 
@@ -58,7 +66,20 @@ class CodeInputPanel(ctk.CTkFrame):
             font=Styles.FONTS["subheading"],
             anchor="w"
         )
-        header.grid(row=0, column=0, columnspan=2, sticky="ew", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], Styles.SPACING["xs"]))
+        header.grid(row=0, column=0, sticky="ew", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], Styles.SPACING["xs"]))
+
+    def _create_mode_selector(self):
+        """创建生成模式选择器"""
+        self.mode_combo = ctk.CTkOptionMenu(
+            self,
+            values=constants.GENERATION_MODES,
+            command=self._on_mode_change,
+            font=Styles.FONTS["body"],
+            dropdown_font=Styles.FONTS["body"],
+            width=150,
+        )
+        self.mode_combo.set(self.selected_mode)
+        self.mode_combo.grid(row=0, column=1, sticky="e", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], Styles.SPACING["xs"]))
 
     def _create_language_selector(self):
         """创建语言选择器"""
@@ -150,9 +171,133 @@ class CodeInputPanel(ctk.CTkFrame):
         )
         self.clear_btn.grid(row=0, column=1, sticky="ew")
 
+        # 边生成边保存：生成开始前选择文件，代码随流式输出直接写入
+        self.stream_save_var = ctk.BooleanVar(value=False)
+        self.stream_save_check = ctk.CTkCheckBox(
+            button_frame,
+            text="边生成边保存到文件",
+            font=Styles.FONTS["small"],
+            variable=self.stream_save_var,
+        )
+        self.stream_save_check.grid(row=1, column=0, columnspan=2, sticky="w", pady=(Styles.SPACING["sm"], 0))
+
+        # 参考文件：按语法边界分块后，在 token 预算内选取相关部分放入提示词
+        context_frame = ctk.CTkFrame(button_frame, fg_color="transparent")
+        context_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(Styles.SPACING["sm"], 0))
+        context_frame.grid_columnconfigure(1, weight=1)
+
+        self.context_btn = ctk.CTkButton(
+            context_frame,
+            text="附加参考文件...",
+            font=Styles.FONTS["small"],
+            height=28,
+            width=110,
+            fg_color="transparent",
+            border_width=1,
+            command=self._choose_context_file,
+        )
+        self.context_btn.grid(row=0, column=0, sticky="w")
+
+        self.context_label = ctk.CTkLabel(context_frame, text="", font=Styles.FONTS["small"], anchor="w")
+        self.context_label.grid(row=0, column=1, sticky="ew", padx=Styles.SPACING["xs"])
+
+        self.context_clear_btn = ctk.CTkButton(
+            context_frame,
+            text="移除",
+            font=Styles.FONTS["small"],
+            height=28,
+            width=50,
+            fg_color="transparent",
+            command=lambda: self.set_context_path(None),
+        )
+
+        # 快速测试文件：多样本择优时在子进程中运行，通过测试的候选得分更高（仅 Python）
+        self.test_frame = ctk.CTkFrame(button_frame, fg_color="transparent")
+        self.test_frame.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(Styles.SPACING["sm"], 0))
+        self.test_frame.grid_columnconfigure(1, weight=1)
+
+        self.test_btn = ctk.CTkButton(
+            self.test_frame,
+            text="择优测试文件...",
+            font=Styles.FONTS["small"],
+            height=28,
+            width=110,
+            fg_color="transparent",
+            border_width=1,
+            command=self._choose_test_file,
+        )
+        self.test_btn.grid(row=0, column=0, sticky="w")
+
+        self.test_label = ctk.CTkLabel(self.test_frame, text="", font=Styles.FONTS["small"], anchor="w")
+        self.test_label.grid(row=0, column=1, sticky="ew", padx=Styles.SPACING["xs"])
+
+        self.test_clear_btn = ctk.CTkButton(
+            self.test_frame,
+            text="移除",
+            font=Styles.FONTS["small"],
+            height=28,
+            width=50,
+            fg_color="transparent",
+            command=lambda: self.set_test_path(None),
+        )
+        self._update_test_visibility()
+
         button_frame.grid_columnconfigure(0, weight=1)
         button_frame.grid_columnconfigure(1, weight=1)
 
+    def _choose_context_file(self):
+        """选择参考文件"""
+        from utils.file_handler import FileHandler
+
+        path = FileHandler(self.winfo_toplevel()).ask_open_path("选择参考文件")
+        if path:
+            self.set_context_path(path)
+
+    def set_context_path(self, path: str | None):
+        """
+        设置参考文件
+
+        Args:
+            path: 文件路径，None 表示移除
+        """
+        self.context_path = path
+        if path:
+            self.context_label.configure(text=os.path.basename(path))
+            self.context_clear_btn.grid(row=0, column=2, sticky="e")
+        else:
+            self.context_label.configure(text="")
+            self.context_clear_btn.grid_remove()
+
+    def _choose_test_file(self):
+        """选择快速测试文件"""
+        from utils.file_handler import FileHandler
+
+        path = FileHandler(self.winfo_toplevel()).ask_open_path("选择测试文件（Python，可使用 assert）")
+        if path:
+            self.set_test_path(path)
+
+    def set_test_path(self, path: str | None):
+        """
+        设置快速测试文件
+
+        Args:
+            path: 文件路径，None 表示移除
+        """
+        self.test_path = path
+        if path:
+            self.test_label.configure(text=os.path.basename(path))
+            self.test_clear_btn.grid(row=0, column=2, sticky="e")
+        else:
+            self.test_label.configure(text="")
+            self.test_clear_btn.grid_remove()
+
+    def _update_test_visibility(self):
+        """只在多样本择优模式下显示测试文件选择"""
+        if self.selected_mode == constants.GENERATION_MODE_BEST_OF:
+            self.test_frame.grid()
+        else:
+            self.test_frame.grid_remove()
+
     def _on_language_change(self, choice: str):
         """
         语言改变回调
@@ -162,6 +307,16 @@ class CodeInputPanel(ctk.CTkFrame):
         """
         self.selected_language = choice
 
+    def _on_mode_change(self, choice: str):
+        """
+        生成模式改变回调
+
+        Args:
+            choice: 选择的模式
+        """
+        self.selected_mode = choice
+        self._update_test_visibility()
+
     def _on_template_click(self, template: str):
         """
         模板按钮点击回调
@@ -195,6 +350,15 @@ class CodeInputPanel(ctk.CTkFrame):
         """
         return self.language_combo.get()
 
+    def get_mode(self) -> str:
+        """
+        获取选择的生成模式
+
+        Returns:
+            生成模式
+        """
+        return self.mode_combo.get()
+
     def get_template(self) -> str | None:
         """
         获取选择的模板
@@ -204,6 +368,35 @@ class CodeInputPanel(ctk.CTkFrame):
         """
         return self.selected_template
 
+    def get_stream_save(self) -> bool:
+        """
+        获取是否边生成边保存
+
+        Returns:
+            是否启用
+        """
+        return self.stream_save_var.get()
+
+    def get_context_path(self) -> str | None:
+        """
+        获取参考文件路径
+
+        Returns:
+            文件路径或 None
+        """
+        return self.context_path
+
+    def get_test_path(self) -> str | None:
+        """
+        获取快速测试文件路径（仅多样本择优模式有效）
+
+        Returns:
+            文件路径或 None
+        """
+        if self.selected_mode != constants.GENERATION_MODE_BEST_OF:
+            return None
+        return self.test_path
+
     def clear(self):
         """清除输入"""
         self.textbox.delete("1.0", "end")
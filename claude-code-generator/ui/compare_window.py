@@ -0,0 +1,340 @@
+"""
+模型对比窗口模块
+把同一个请求同时发送给多个模型，在并排的面板中流式显示结果和实时指标
+"""
+
+from datetime import datetime
+from typing import Callable, Optional
+
+import customtkinter as ctk
+
+import config.constants as constants
+from config.settings import get_settings_manager
+from core.claude_api import ClaudeAPIClient, GenerationCancelled
+from core.code_generator import CodeGenerator
+from core.generation_executor import GenerationExecutor, GenerationRejected, GenerationRequest
+from core.metrics import (
+    GenerationMetrics,
+    append_comparison_log,
+    load_comparison_log,
+    summarize_comparisons,
+)
+from ui.output_panel import OutputPanel
+from ui.stream_renderer import StreamRenderer
+from ui.styles import Styles
+from utils.event_log import get_event_log
+from utils.logger import get_logger
+
+
+class _ComparePane:
+    """单个模型的对比面板"""
+
+    def __init__(self, master, column: int, model_name: str, model: str):
+        """
+        创建对比面板
+
+        Args:
+            master: 父容器
+            column: 所在列
+            model_name: 模型显示名称
+            model: 模型 ID
+        """
+        self.model_name = model_name
+        self.model = model
+        self.metrics = GenerationMetrics(model)
+
+        self.frame = ctk.CTkFrame(master)
+        self.frame.grid(row=0, column=column, sticky="nsew", padx=Styles.SPACING["xs"])
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+
+        label = ctk.CTkLabel(self.frame, text=model_name, font=Styles.FONTS["subheading"], anchor="w")
+        label.grid(row=0, column=0, sticky="ew", padx=Styles.SPACING["md"], pady=(Styles.SPACING["sm"], 0))
+
+        self.output_panel = OutputPanel(self.frame)
+        self.output_panel.grid(row=1, column=0, sticky="nsew")
+        self.output_panel.set_copy_command(self.output_panel.copy_to_clipboard)
+        self.output_panel.set_save_command(lambda: self.output_panel.save_to_file(self.frame.winfo_toplevel()))
+        self.output_panel.set_clear_command(self.output_panel.clear)
+        self.output_panel.set_diff_command(self.output_panel.show_diff)
+
+        self.renderer = StreamRenderer(self.frame, lambda text: self.output_panel.set_code(text, append=True))
+
+    def destroy(self):
+        """销毁面板"""
+        self.renderer.stop()
+        self.frame.destroy()
+
+
+class CompareWindow(ctk.CTkToplevel):
+    """模型对比窗口"""
+
+    def __init__(
+        self,
+        master,
+        executor: GenerationExecutor,
+        api_client: ClaudeAPIClient,
+        description: str,
+        language: str,
+        template: Optional[str] = None,
+    ):
+        """
+        初始化对比窗口
+
+        Args:
+            master: 父窗口
+            executor: 共享的生成任务执行器
+            api_client: 共享的 API 客户端
+            description: 代码描述
+            language: 编程语言
+            template: 模板类型
+        """
+        super().__init__(master)
+
+        self.logger = get_logger()
+        self.settings = get_settings_manager()
+        self.executor = executor
+        # 对比请求不携带会话上下文，单独使用一个代码生成器
+        self.code_generator = CodeGenerator(api_client)
+
+        self.description = description
+        self.language = language
+        self.template = template
+
+        self.panes = []
+        self._refresh_id = None
+
+        self._setup_window()
+        self._setup_ui()
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _setup_window(self):
+        """设置窗口"""
+        self.title("模型对比")
+        self.geometry("1400x800")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+    def _setup_ui(self):
+        """设置用户界面"""
+        # 控制栏
+        control_frame = ctk.CTkFrame(self, fg_color="transparent")
+        control_frame.grid(row=0, column=0, sticky="ew", padx=Styles.SPACING["md"], pady=Styles.SPACING["sm"])
+
+        label = ctk.CTkLabel(control_frame, text="对比模型：", font=Styles.FONTS["body"])
+        label.grid(row=0, column=0, padx=(0, Styles.SPACING["xs"]))
+
+        # 模型选择（默认选中默认模型和大纲使用的快速模型）
+        self.model_vars = {}
+        for column, (name, model) in enumerate(constants.CLAUDE_MODELS.items(), start=1):
+            var = ctk.BooleanVar(value=model in (constants.DEFAULT_MODEL, constants.OUTLINE_MODEL))
+            checkbox = ctk.CTkCheckBox(control_frame, text=name, variable=var, font=Styles.FONTS["body"])
+            checkbox.grid(row=0, column=column, padx=Styles.SPACING["xs"])
+            self.model_vars[model] = (name, var)
+
+        self.start_btn = ctk.CTkButton(
+            control_frame,
+            text="开始对比",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            command=self._start,
+        )
+        self.start_btn.grid(row=0, column=len(self.model_vars) + 1, padx=Styles.SPACING["md"])
+
+        # 请求摘要和历史统计
+        self.summary_label = ctk.CTkLabel(
+            control_frame,
+            text=f"语言: {self.language}    描述: {self.description[:60]}",
+            font=Styles.FONTS["small"],
+            anchor="w",
+            justify="left",
+        )
+        self.summary_label.grid(row=1, column=0, columnspan=len(self.model_vars) + 2, sticky="ew", pady=(Styles.SPACING["xs"], 0))
+
+        # 对比面板容器
+        self.panes_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.panes_frame.grid(row=1, column=0, sticky="nsew", padx=Styles.SPACING["md"], pady=(0, Styles.SPACING["md"]))
+        self.panes_frame.grid_rowconfigure(0, weight=1)
+
+    def _start(self):
+        """开始对比：为每个选中的模型创建面板并并发生成"""
+        models = [(name, model) for model, (name, var) in self.model_vars.items() if var.get()]
+        if not models:
+            return
+
+        self._clear_panes()
+        comparison_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+        for column, (name, model) in enumerate(models):
+            self.panes_frame.grid_columnconfigure(column, weight=1, uniform="pane")
+            pane = _ComparePane(self.panes_frame, column, name, model)
+            pane.output_panel.set_language(self.language)
+            pane.renderer.start()
+            self.panes.append(pane)
+            # 每个面板作为独立来源提交，可单独取消
+            try:
+                self.executor.submit(pane, lambda request, pane=pane: self._run_pane(pane, comparison_id, request))
+            except GenerationRejected as e:
+                pane.metrics.finish(str(e))
+                self._on_pane_error(pane, str(e))
+
+        self.start_btn.configure(state="disabled")
+        self._schedule_refresh()
+
+    def _run_pane(self, pane: _ComparePane, comparison_id: str, request: GenerationRequest):
+        """
+        在工作线程中为一个模型生成代码并记录指标
+
+        Args:
+            pane: 对比面板
+            comparison_id: 对比批次 ID
+            request: 生成请求
+        """
+        metrics = pane.metrics
+        # 排队等待线程池的时间不计入指标
+        metrics.start()
+        status = "ok"
+
+        try:
+            code = self.code_generator.generate(
+                description=self.description,
+                language=self.language,
+                template_type=self.template,
+                temperature=self.settings.get(constants.CONFIG_TEMPERATURE, constants.DEFAULT_TEMPERATURE),
+                max_tokens=self.settings.get(constants.CONFIG_MAX_TOKENS, constants.DEFAULT_MAX_TOKENS),
+                use_stream=True,
+                callback=pane.renderer.push,
+                use_context=False,
+                cancel_event=request.cancel_event,
+                model=pane.model,
+                metrics=metrics,
+            )
+            metrics.finish()
+            self._post(lambda: self._on_pane_complete(pane, code), request)
+        except GenerationCancelled:
+            metrics.finish("已取消")
+            status = "cancelled"
+        except Exception as e:
+            metrics.finish(str(e))
+            status = "error"
+            self._post(lambda: self._on_pane_error(pane, str(e)), request)
+
+        get_event_log().event(
+            "generation.finished",
+            "error" if status == "error" else "info",
+            lazy_fields=metrics.to_dict,
+            source="compare",
+            comparison_id=comparison_id,
+            language=self.language,
+            template=self.template,
+            status=status,
+        )
+        if status == "cancelled":
+            return
+
+        self.executor.submit_io(append_comparison_log, comparison_id, self.language, self.template, metrics)
+
+    def _post(self, callback: Callable[[], None], request: GenerationRequest):
+        """
+        从工作线程把回调交给 UI 线程执行（请求已取消时忽略）
+
+        Args:
+            callback: 回调函数
+            request: 回调所属的生成请求
+        """
+        if request.cancelled:
+            return
+        try:
+            self.after(0, callback)
+        except RuntimeError:
+            # 窗口或主循环已关闭
+            pass
+
+    def _on_pane_complete(self, pane: _ComparePane, code: str):
+        """
+        单个模型生成完成
+
+        Args:
+            pane: 对比面板
+            code: 生成的代码
+        """
+        if pane not in self.panes:
+            return
+        pane.renderer.stop()
+        pane.output_panel.set_code(code)
+        pane.output_panel.set_status(pane.metrics.summary())
+        self._check_all_finished()
+
+    def _on_pane_error(self, pane: _ComparePane, error_msg: str):
+        """
+        单个模型生成失败
+
+        Args:
+            pane: 对比面板
+            error_msg: 错误消息
+        """
+        if pane not in self.panes:
+            return
+        pane.renderer.stop()
+        pane.output_panel.set_status(f"生成失败: {error_msg}", is_error=True)
+        self._check_all_finished()
+
+    def _check_all_finished(self):
+        """全部模型结束后恢复按钮并显示历史统计"""
+        if not all(pane.metrics.finished for pane in self.panes):
+            return
+
+        self.start_btn.configure(state="normal")
+        self._show_history()
+
+    def _show_history(self):
+        """显示当前语言的历史对比统计"""
+        summary = summarize_comparisons(load_comparison_log(), self.language)
+        if not summary:
+            return
+
+        names = {model: name for name, model in constants.CLAUDE_MODELS.items()}
+        parts = []
+        for model, stats in sorted(summary.items(), key=lambda item: item[1]["median_latency_ms"]):
+            text = f"{names.get(model, model)}: {stats['runs']} 次, 中位耗时 {stats['median_latency_ms'] / 1000:.1f}s"
+            text += f", {stats['avg_tokens_per_second']:.0f} tok/s"
+            if stats["avg_cost"] is not None:
+                text += f", 平均 ${stats['avg_cost']:.4f}"
+            parts.append(text)
+
+        self.summary_label.configure(text=f"{self.language} 历史对比 — " + "；".join(parts))
+
+    def _schedule_refresh(self):
+        """安排下一次实时指标刷新"""
+        self._refresh_id = self.after(constants.COMPARE_REFRESH_MS, self._refresh_metrics)
+
+    def _refresh_metrics(self):
+        """刷新进行中面板的实时指标"""
+        self._refresh_id = None
+        running = [pane for pane in self.panes if not pane.metrics.finished]
+        for pane in running:
+            pane.output_panel.set_status(pane.metrics.summary())
+
+        if running:
+            self._schedule_refresh()
+
+    def _clear_panes(self):
+        """取消进行中的生成并移除所有面板"""
+        for pane in self.panes:
+            self.executor.cancel(pane)
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+
+        for pane in self.panes:
+            pane.destroy()
+        for column in range(len(self.panes)):
+            self.panes_frame.grid_columnconfigure(column, weight=0, uniform="")
+        self.panes = []
+
+    def _on_close(self):
+        """关闭窗口"""
+        self._clear_panes()
+        self.destroy()
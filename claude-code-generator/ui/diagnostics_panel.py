@@ -0,0 +1,97 @@
+"""
+诊断面板模块
+显示界面响应监控的延迟分布和主要卡顿位置
+"""
+
+import customtkinter as ctk
+
+from config.constants import DIAGNOSTICS_REFRESH_MS
+from ui.styles import Styles
+from utils.ui_watchdog import UIWatchdog
+
+
+class DiagnosticsPanel(ctk.CTkToplevel):
+    """诊断面板窗口"""
+
+    def __init__(self, master, watchdog: UIWatchdog):
+        """
+        初始化诊断面板
+
+        Args:
+            master: 父窗口
+            watchdog: 界面响应监控
+        """
+        super().__init__(master)
+
+        self.watchdog = watchdog
+        self._refresh_id = None
+
+        self.title("界面响应诊断")
+        self.geometry("700x600")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self._setup_ui()
+        self._refresh()
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _setup_ui(self):
+        """设置用户界面"""
+        self.report_textbox = ctk.CTkTextbox(self, font=Styles.FONTS["code"], wrap="none")
+        self.report_textbox.grid(row=0, column=0, sticky="nsew", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], 0))
+
+        button_frame = ctk.CTkFrame(self, fg_color="transparent")
+        button_frame.grid(row=1, column=0, sticky="ew", padx=Styles.SPACING["md"], pady=Styles.SPACING["md"])
+
+        reset_btn = ctk.CTkButton(
+            button_frame,
+            text="重置",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            fg_color="transparent",
+            border_width=2,
+            command=self._reset,
+        )
+        reset_btn.grid(row=0, column=0, padx=(0, Styles.SPACING["xs"]))
+
+        log_btn = ctk.CTkButton(
+            button_frame,
+            text="写入日志",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            command=self.watchdog.log_summary,
+        )
+        log_btn.grid(row=0, column=1, padx=Styles.SPACING["xs"])
+
+        # 监控未运行时提示
+        self.status_label = ctk.CTkLabel(button_frame, text="", font=Styles.FONTS["small"], text_color="gray")
+        self.status_label.grid(row=0, column=2, padx=Styles.SPACING["md"])
+
+    def _refresh(self):
+        """刷新报告（保持当前滚动位置）"""
+        top = self.report_textbox.yview()[0]
+        self.report_textbox.configure(state="normal")
+        self.report_textbox.delete("1.0", "end")
+        self.report_textbox.insert("1.0", self.watchdog.format_report())
+        self.report_textbox.configure(state="disabled")
+        self.report_textbox.yview_moveto(top)
+
+        self.status_label.configure(text="" if self.watchdog.running else "监控未运行")
+        self._refresh_id = self.after(DIAGNOSTICS_REFRESH_MS, self._refresh)
+
+    def _reset(self):
+        """清空统计数据"""
+        self.watchdog.reset()
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+        self._refresh()
+
+    def _on_close(self):
+        """关闭窗口"""
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        self.destroy()
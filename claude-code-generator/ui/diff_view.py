@@ -0,0 +1,402 @@
+"""
+差异视图模块
+比较输出面板的当前内容与某个历史版本。差异在后台线程计算，流式生成时增量更新；
+较长的未改动区域折叠显示，展开时才写入文本组件
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import customtkinter as ctk
+
+from config.constants import DIFF_CONTEXT_LINES
+from core.stream_sink import FenceStripper
+from ui.styles import Styles
+from utils.logger import get_logger
+from utils.myers_diff import DELETE, EQUAL, INSERT, REPLACE, IncrementalDiff, diff_lines
+
+# 流式比较时末尾尚未比较的旧行
+PENDING = "pending"
+
+
+def _split_lines(text: str) -> list[str]:
+    """
+    按换行拆分文本（忽略末尾换行产生的空行）
+
+    Args:
+        text: 文本
+
+    Returns:
+        行列表
+    """
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+class DiffView(ctk.CTkToplevel):
+    """
+    差异视图窗口
+
+    监听输出面板的内容变化：追加时用增量差异只比较尚未稳定的末尾部分，整体替换时重新完整比较。
+    流式追加的内容先去掉代码块标记和前言，再与基准版本比较。
+    同一时间只有一个计算任务，计算期间的变化合并为一次后续计算
+    """
+
+    def __init__(self, master, output_panel):
+        """
+        初始化差异视图
+
+        Args:
+            master: 父窗口
+            output_panel: 要比较的输出面板
+        """
+        super().__init__(master)
+
+        self.logger = get_logger()
+        self.output_panel = output_panel
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Diff")
+
+        self._base = None
+        self._base_lines = []
+        self._version = 0
+        self._incremental = None
+        self._stripper = None
+        self._stream_code = []
+        self._future = None
+        self._dirty = False
+        self._closed = False
+
+        # 当前显示的内容
+        self._lines = []
+        self._ops = []
+        self._op_lines = []
+        self._expanded = set()
+
+        self._setup_window()
+        self._setup_ui()
+        self._refresh_history()
+        self._restart()
+
+        self.output_panel.add_change_listener(self._on_output_change)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def _setup_window(self):
+        """设置窗口"""
+        self.title("差异对比")
+        self.geometry("900x700")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+    def _setup_ui(self):
+        """设置用户界面"""
+        # 控制栏
+        control_frame = ctk.CTkFrame(self, fg_color="transparent")
+        control_frame.grid(row=0, column=0, sticky="ew", padx=Styles.SPACING["md"], pady=Styles.SPACING["sm"])
+        control_frame.grid_columnconfigure(2, weight=1)
+
+        label = ctk.CTkLabel(control_frame, text="比较基准：", font=Styles.FONTS["body"])
+        label.grid(row=0, column=0, padx=(0, Styles.SPACING["xs"]))
+
+        self.base_menu = ctk.CTkOptionMenu(
+            control_frame,
+            values=[""],
+            font=Styles.FONTS["body"],
+            width=200,
+            command=self._on_base_selected,
+        )
+        self.base_menu.grid(row=0, column=1)
+
+        self.stats_label = ctk.CTkLabel(control_frame, text="", font=Styles.FONTS["small"], anchor="e")
+        self.stats_label.grid(row=0, column=2, sticky="e")
+
+        # 差异文本
+        self.textbox = ctk.CTkTextbox(self, font=Styles.FONTS["code"], wrap="none")
+        self.textbox.grid(row=1, column=0, sticky="nsew", padx=Styles.SPACING["md"], pady=(0, Styles.SPACING["md"]))
+        self.text = self.textbox._textbox
+        self.text.configure(state="disabled")
+
+        colors = Styles.get_colors(ctk.get_appearance_mode().lower())
+        self.text.tag_configure(INSERT, background=colors["diff_insert"])
+        self.text.tag_configure(DELETE, background=colors["diff_delete"])
+        self.text.tag_configure("fold", foreground=colors["primary"], underline=True)
+        self.text.tag_configure(PENDING, foreground=colors["text_dim"])
+        self.text.tag_bind("fold", "<Enter>", lambda event: self.text.configure(cursor="hand2"))
+        self.text.tag_bind("fold", "<Leave>", lambda event: self.text.configure(cursor=""))
+
+    def _refresh_history(self):
+        """刷新比较基准列表；首次打开时选中与当前内容不同的最近版本"""
+        history = list(self.output_panel.history)
+        self._history = {self._format_entry(entry): entry for entry in history}
+        self.base_menu.configure(values=list(self._history) or [""])
+
+        if self._base is not None and self._base in history:
+            return
+
+        current = self.output_panel.buffer.get_text()
+        candidates = [entry for entry in history if entry[2] != current] or history
+        if candidates:
+            entry = candidates[-1]
+            self.base_menu.set(self._format_entry(entry))
+            self._set_base(entry)
+
+    @staticmethod
+    def _format_entry(entry: tuple) -> str:
+        """
+        生成历史版本的显示名称
+
+        Args:
+            entry: (序号, 时间, 代码)
+
+        Returns:
+            显示名称
+        """
+        serial, timestamp, _ = entry
+        return f"版本 {serial}（{timestamp}）"
+
+    def _on_base_selected(self, name: str):
+        """
+        选择比较基准
+
+        Args:
+            name: 历史版本的显示名称
+        """
+        entry = self._history.get(name)
+        if entry is not None and entry is not self._base:
+            self._set_base(entry)
+            self._restart()
+
+    def _set_base(self, entry: tuple):
+        """
+        设置比较基准
+
+        Args:
+            entry: 历史版本
+        """
+        self._base = entry
+        self._base_lines = _split_lines(entry[2])
+        self._expanded.clear()
+
+    def _on_output_change(self, appended: Optional[str]):
+        """
+        输出面板内容变化回调
+
+        Args:
+            appended: 追加的文本；整体替换或清空时为 None
+        """
+        if appended is None:
+            self._refresh_history()
+            self._restart()
+            return
+
+        if self._incremental is None:
+            # 打开视图或切换基准时流式输出可能已开始，从缓冲区的完整内容开始去除代码块标记
+            self._version += 1
+            self._incremental = IncrementalDiff(self._base_lines)
+            self._stripper = FenceStripper()
+            self._stream_code = []
+            appended = self.output_panel.buffer.get_text()
+        self._stream_code.append(self._stripper.feed(appended))
+        self._request_diff()
+
+    def _restart(self):
+        """丢弃进行中的结果和增量状态，重新完整比较"""
+        self._version += 1
+        self._incremental = None
+        self._request_diff()
+
+    def _request_diff(self):
+        """提交差异计算；已有任务在计算时只标记，等任务完成后再计算一次"""
+        if self._closed or self._base is None:
+            return
+
+        if self._future is not None:
+            self._dirty = True
+            return
+
+        self._dirty = False
+        if self._incremental is not None:
+            text = "".join(self._stream_code)
+            self._stream_code = [text]
+        else:
+            text = self.output_panel.buffer.get_text()
+        self._future = self.executor.submit(self._compute, self._version, self._base_lines, text, self._incremental)
+        self._future.add_done_callback(self._on_future_done)
+
+    @staticmethod
+    def _compute(version: int, base_lines: list[str], text: str, incremental: Optional[IncrementalDiff]) -> tuple:
+        """
+        在后台线程中计算差异
+
+        Args:
+            version: 请求版本号
+            base_lines: 基准版本的行
+            text: 当前内容
+            incremental: 增量差异（流式追加时），None 表示完整比较
+
+        Returns:
+            (版本号, 当前内容的行, 操作列表)
+        """
+        if incremental is None:
+            lines = _split_lines(text)
+            return version, lines, diff_lines(base_lines, lines)
+
+        # 最后一行可能尚未写完，只比较已完成的行
+        lines = text.split("\n")[:-1]
+        ops = incremental.update(lines)
+        if incremental.pending_old_start < len(base_lines):
+            ops = ops + [(PENDING, incremental.pending_old_start, len(base_lines), len(lines), len(lines))]
+        return version, lines, ops
+
+    def _on_future_done(self, future: Future):
+        """
+        计算完成（在工作线程中调用），把结果交给 UI 线程
+
+        Args:
+            future: 计算任务
+        """
+        if self._closed:
+            return
+        try:
+            self.after(0, lambda: self._apply_result(future))
+        except RuntimeError:
+            # 窗口或主循环已关闭
+            pass
+
+    def _apply_result(self, future: Future):
+        """
+        应用计算结果（只应用当前版本的结果），有积压的变化时继续计算
+
+        Args:
+            future: 计算任务
+        """
+        if self._closed:
+            return
+        self._future = None
+
+        try:
+            version, lines, ops = future.result()
+        except Exception as e:
+            self.logger.error("差异计算失败: %s", e)
+            return
+
+        if version == self._version:
+            self._render(lines, ops)
+
+        if self._dirty:
+            self._request_diff()
+
+    def _render(self, lines: list[str], ops: list[tuple]):
+        """
+        渲染差异：保留与上次相同的开头操作，只重写之后的部分
+
+        Args:
+            lines: 当前内容的行
+            ops: 操作列表
+        """
+        first = 0
+        limit = min(len(ops), len(self._ops))
+        while first < limit and ops[first] == self._ops[first]:
+            first += 1
+        # 相同区段的折叠方式取决于它是否为最后一个操作，这一点变化时也要重写
+        if first > 0 and (first == len(ops)) != (first == len(self._ops)):
+            first -= 1
+
+        self._lines = lines
+        self._ops = ops
+        self._render_from(first)
+        self._update_stats()
+
+    def _render_from(self, first: int):
+        """
+        从第 first 个操作起重新写入文本组件
+
+        Args:
+            first: 操作序号
+        """
+        self.text.configure(state="normal")
+
+        if first < len(self._op_lines):
+            self.text.delete(f"{self._op_lines[first]}.0", "end")
+        del self._op_lines[first:]
+
+        for index in range(first, len(self._ops)):
+            self._op_lines.append(int(self.text.index("end-1c").split(".")[0]))
+            self._render_op(index)
+
+        self.text.configure(state="disabled")
+
+    def _render_op(self, index: int):
+        """
+        写入一个操作
+
+        Args:
+            index: 操作序号
+        """
+        tag, i1, i2, j1, j2 = self._ops[index]
+        old_lines = self._base_lines
+        new_lines = self._lines
+
+        if tag in (DELETE, REPLACE):
+            self._insert_lines(old_lines[i1:i2], "- ", DELETE)
+        if tag in (INSERT, REPLACE):
+            self._insert_lines(new_lines[j1:j2], "+ ", INSERT)
+        if tag == PENDING:
+            self.text.insert("end", f"… 基准版本剩余 {i2 - i1} 行等待比较 …\n", PENDING)
+        if tag != EQUAL:
+            return
+
+        # 较长的未改动区域只保留上下文，其余部分折叠
+        head = DIFF_CONTEXT_LINES if index > 0 else 0
+        tail = DIFF_CONTEXT_LINES if index < len(self._ops) - 1 else 0
+        hidden = (j2 - j1) - head - tail
+        if (i1, j1) in self._expanded or hidden <= DIFF_CONTEXT_LINES:
+            self._insert_lines(new_lines[j1:j2], "  ")
+            return
+
+        self._insert_lines(new_lines[j1:j1 + head], "  ")
+        fold_tag = f"fold-{index}"
+        self.text.insert("end", f"… 展开 {hidden} 行未改动的内容 …\n", ("fold", fold_tag))
+        self.text.tag_bind(fold_tag, "<Button-1>", lambda event, key=(i1, j1): self._expand(key))
+        self._insert_lines(new_lines[j2 - tail:j2], "  ")
+
+    def _insert_lines(self, lines: list[str], prefix: str, tag: Optional[str] = None):
+        """
+        写入多行
+
+        Args:
+            lines: 行列表
+            prefix: 行首标记
+            tag: 文本标签
+        """
+        if lines:
+            self.text.insert("end", "".join(f"{prefix}{line}\n" for line in lines), tag or ())
+
+    def _expand(self, key: tuple[int, int]):
+        """
+        展开折叠的未改动区域
+
+        Args:
+            key: 相同区段的 (旧起点, 新起点)
+        """
+        self._expanded.add(key)
+        for index, (tag, i1, _, j1, _) in enumerate(self._ops):
+            if tag == EQUAL and (i1, j1) == key:
+                top = self.text.yview()[0]
+                self._render_from(index)
+                self.text.yview_moveto(top)
+                return
+
+    def _update_stats(self):
+        """更新增删行数统计"""
+        added = sum(j2 - j1 for tag, _, _, j1, j2 in self._ops if tag in (INSERT, REPLACE))
+        removed = sum(i2 - i1 for tag, i1, i2, _, _ in self._ops if tag in (DELETE, REPLACE))
+        self.stats_label.configure(text=f"+{added}  -{removed}")
+
+    def close(self):
+        """关闭窗口并停止后台计算"""
+        self._closed = True
+        self.output_panel.remove_change_listener(self._on_output_change)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
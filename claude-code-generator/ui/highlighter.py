@@ -0,0 +1,687 @@
+"""
+语法高亮模块
+基于 Pygments 的增量语法高亮：在行首记录词法分析器状态，新数据到达时只重新分析末尾的脏区域。
+词法分析在后台线程中进行，UI 线程只负责应用标签区间
+"""
+
+import bisect
+import collections
+import threading
+from array import array
+from typing import Optional
+
+from pygments.lexer import RegexLexer
+from pygments.lexers import get_lexer_by_name
+from pygments.styles import get_style_by_name
+from pygments.token import Error, Text, Whitespace, _TokenType
+from pygments.util import ClassNotFound
+
+from config.constants import HIGHLIGHT_STYLES, LANGUAGE_LEXERS, PROGRAMMING_LANGUAGES
+from utils.logger import get_logger
+
+# 不需要着色的 token 类型
+_PLAIN_TOKENS = (Text, Whitespace, Error)
+
+# 一次 Tk 调用中最多添加的区间数
+_TAG_BATCH_SIZE = 500
+
+# 按语言缓存的词法分析器（RegexLexer 不保存分析状态，可在线程间共享）
+_lexer_cache = {}
+_lexer_cache_lock = threading.Lock()
+
+# token 类型编号表，用于在高亮结果中以整数数组传递 token 类型
+_token_types = []
+_token_type_ids = {}
+_token_types_lock = threading.Lock()
+
+
+def get_cached_lexer(language: str):
+    """
+    获取语言对应的词法分析器（按语言缓存）
+
+    Args:
+        language: 编程语言
+
+    Returns:
+        词法分析器，不支持高亮时返回 None
+    """
+    with _lexer_cache_lock:
+        if language not in _lexer_cache:
+            _lexer_cache[language] = get_lexer(language)
+        return _lexer_cache[language]
+
+
+def warm_lexer_cache() -> None:
+    """预先创建所有语言的词法分析器（首次创建时需要编译正则表达式）"""
+    for language in PROGRAMMING_LANGUAGES:
+        get_cached_lexer(language)
+
+
+def _token_type_id(token_type: _TokenType) -> int:
+    """
+    获取 token 类型的编号
+
+    Args:
+        token_type: token 类型
+
+    Returns:
+        编号
+    """
+    type_id = _token_type_ids.get(token_type)
+    if type_id is None:
+        with _token_types_lock:
+            type_id = _token_type_ids.get(token_type)
+            if type_id is None:
+                type_id = len(_token_types)
+                _token_types.append(token_type)
+                _token_type_ids[token_type] = type_id
+    return type_id
+
+
+def get_lexer(language: str):
+    """
+    获取语言对应的 Pygments 词法分析器
+
+    Args:
+        language: 编程语言（PROGRAMMING_LANGUAGES 中的名称）
+
+    Returns:
+        词法分析器，不支持高亮时返回 None
+    """
+    alias = LANGUAGE_LEXERS.get(language)
+    if not alias:
+        return None
+
+    try:
+        # PHP 生成的代码通常不带 <?php 开头
+        return get_lexer_by_name(alias, startinline=True, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return None
+
+
+def is_plain_regex_lexer(lexer) -> bool:
+    """
+    检查词法分析器是否完全由 RegexLexer 的状态表驱动（可从任意检查点恢复分析）
+
+    Args:
+        lexer: Pygments 词法分析器
+
+    Returns:
+        未重写 get_tokens_unprocessed 的 RegexLexer 返回 True
+    """
+    return (
+        isinstance(lexer, RegexLexer)
+        and type(lexer).get_tokens_unprocessed is RegexLexer.get_tokens_unprocessed
+        and isinstance(getattr(lexer, "_tokens", None), dict)
+    )
+
+
+class IncrementalLexer:
+    """
+    增量词法分析器
+
+    在 token 边界恰好位于行首的位置记录检查点（偏移量和状态栈）。
+    文本在末尾追加时，从倒数第二行之前的最后一个检查点继续分析，而不是从头开始；
+    只保留该检查点之后的文本，追加时无需传入完整文本。
+    增量分析直接使用 RegexLexer 的状态表，只适用于未重写 get_tokens_unprocessed 的分析器；
+    ExtendedRegexLexer（如 Ruby）和对结果做后处理的分析器（如 C++、PHP）会退化为整体重新分析。
+    """
+
+    def __init__(self, lexer):
+        """
+        初始化增量词法分析器
+
+        Args:
+            lexer: Pygments 词法分析器
+        """
+        self.lexer = lexer
+        self.supports_incremental = is_plain_regex_lexer(lexer)
+        self._initial_stack = ("root",)
+
+        # 保留的文本从偏移量 _base 开始
+        self._base = 0
+        self._tail = ""
+        self._checkpoints = []
+
+    def reset(self) -> None:
+        """清空分析状态"""
+        self._base = 0
+        self._tail = ""
+        self._checkpoints = []
+
+    def update(self, text: str) -> tuple[int, list[tuple[int, int, _TokenType]]]:
+        """
+        从头分析新的完整文本
+
+        Args:
+            text: 完整文本
+
+        Returns:
+            (起始偏移量, 区间列表)；区间为 (起始偏移, 结束偏移, token 类型)，
+            覆盖从起始偏移量到文本末尾的全部着色区间
+        """
+        self.reset()
+        self._tail = text
+        return self._analyze(0, self._initial_stack)
+
+    def append(self, text: str) -> tuple[int, list[tuple[int, int, _TokenType]]]:
+        """
+        分析末尾追加的文本（不支持增量分析时重新分析全部文本）
+
+        Args:
+            text: 追加的文本
+
+        Returns:
+            (起始偏移量, 区间列表)，同 update
+        """
+        if self.supports_incremental:
+            start, stack = self._restart_point()
+        else:
+            start, stack = 0, self._initial_stack
+        self._tail += text
+        return self._analyze(start, stack)
+
+    def _analyze(self, start: int, stack: tuple) -> tuple[int, list[tuple[int, int, _TokenType]]]:
+        """
+        从指定位置和状态分析到文本末尾，并丢弃之后不再需要的文本
+
+        Args:
+            start: 起始偏移量
+            stack: 起始状态栈
+
+        Returns:
+            (起始偏移量, 区间列表)
+        """
+        if self.supports_incremental:
+            tokens = self._lex_from(self._tail, start - self._base, stack)
+        else:
+            tokens = self.lexer.get_tokens_unprocessed(self._tail)
+        ranges = self._merge_ranges(tokens, self._base)
+
+        if self.supports_incremental:
+            self._trim()
+        return start, ranges
+
+    def _restart_limit(self) -> int:
+        """
+        重新分析的最晚起点：末尾一行可能尚不完整，取其上一行的行首
+
+        Returns:
+            偏移量
+        """
+        tail = self._tail
+        last_line_start = tail.rfind("\n", 0, max(len(tail) - 1, 0)) + 1
+        return self._base + tail.rfind("\n", 0, max(last_line_start - 1, 0)) + 1
+
+    def _restart_point(self) -> tuple[int, tuple]:
+        """
+        选择重新分析的起点（最晚起点之前的最后一个检查点）
+
+        Returns:
+            (起始偏移量, 状态栈)
+        """
+        offsets = [offset for offset, _ in self._checkpoints]
+        index = bisect.bisect_right(offsets, self._restart_limit())
+        del self._checkpoints[index:]
+
+        if not self._checkpoints:
+            return 0, self._initial_stack
+        return self._checkpoints[-1]
+
+    def _trim(self) -> None:
+        """丢弃下次追加时的重新分析起点之前的文本和检查点（追加只会使起点后移）"""
+        offsets = [offset for offset, _ in self._checkpoints]
+        index = bisect.bisect_right(offsets, self._restart_limit())
+        if not index:
+            return
+
+        offset = offsets[index - 1]
+        del self._checkpoints[:index - 1]
+        self._tail = self._tail[offset - self._base:]
+        self._base = offset
+
+    def _lex_from(self, text: str, pos: int, stack: tuple):
+        """
+        从指定位置和状态开始分析（与 RegexLexer.get_tokens_unprocessed 的算法一致，
+        额外在行首记录检查点）
+
+        Args:
+            text: 保留的文本（从偏移量 _base 开始，且 _base 位于行首）
+            pos: 起始偏移量（相对于 text）
+            stack: 起始状态栈
+
+        Yields:
+            (相对于 text 的偏移量, token 类型, 文本)
+        """
+        lexer = self.lexer
+        tokendefs = lexer._tokens
+        statestack = list(stack)
+        statetokens = tokendefs[statestack[-1]]
+
+        while True:
+            if pos == 0 or text[pos - 1] == "\n":
+                # 流式输出中的 markdown 代码块标记行不参与分析
+                if text.startswith("```", pos):
+                    end = text.find("\n", pos)
+                    if end < 0:
+                        break
+                    pos = end + 1
+                    statestack = list(self._initial_stack)
+                    statetokens = tokendefs[statestack[-1]]
+                    continue
+
+                offset = self._base + pos
+                if offset and (not self._checkpoints or self._checkpoints[-1][0] < offset):
+                    self._checkpoints.append((offset, tuple(statestack)))
+
+            for rexmatch, action, new_state in statetokens:
+                m = rexmatch(text, pos)
+                if not m:
+                    continue
+
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group()
+                    else:
+                        yield from action(lexer, m)
+
+                pos = m.end()
+                if new_state is not None:
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == "#pop":
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == "#push":
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == "#push":
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+                break
+            else:
+                if pos >= len(text):
+                    break
+                if text[pos] == "\n":
+                    statestack = ["root"]
+                    statetokens = tokendefs["root"]
+                    pos += 1
+                    continue
+                yield pos, Error, text[pos]
+                pos += 1
+
+    def _merge_ranges(self, tokens, base: int = 0) -> list[tuple[int, int, _TokenType]]:
+        """
+        将 token 序列合并为着色区间（跳过无需着色的 token，合并相邻的同类 token）
+
+        Args:
+            tokens: (偏移量, token 类型, 文本) 序列
+            base: 加到偏移量上的基准偏移量
+
+        Returns:
+            区间列表
+        """
+        ranges = []
+        for offset, token_type, value in tokens:
+            if not value or token_type in _PLAIN_TOKENS:
+                continue
+
+            offset += base
+            end = offset + len(value)
+            if ranges and ranges[-1][2] is token_type and ranges[-1][1] == offset:
+                ranges[-1] = (ranges[-1][0], end, token_type)
+            else:
+                ranges.append((offset, end, token_type))
+
+        return ranges
+
+
+class HighlightResult:
+    """高亮结果：从起始偏移量开始的紧凑区间数组，带缓冲区版本号"""
+
+    __slots__ = ("version", "start", "starts", "ends", "types")
+
+    def __init__(self, version: int, start: int, ranges: list[tuple[int, int, _TokenType]]):
+        """
+        初始化高亮结果
+
+        Args:
+            version: 文本缓冲区版本号
+            start: 起始偏移量（该位置之后的旧标签应被替换）
+            ranges: 区间列表
+        """
+        self.version = version
+        self.start = start
+        self.starts = array("I", (r[0] for r in ranges))
+        self.ends = array("I", (r[1] for r in ranges))
+        self.types = array("H", (_token_type_id(r[2]) for r in ranges))
+
+
+class _HighlightRequest:
+    """待处理的高亮请求（整体文本或流式追加的文本）"""
+
+    __slots__ = ("version", "language", "streaming", "append", "chunks")
+
+    def __init__(self, version: int, language: str, streaming: bool, append: bool, text: str):
+        self.version = version
+        self.language = language
+        self.streaming = streaming
+        self.append = append
+        self.chunks = [text]
+
+
+class HighlightWorker:
+    """
+    后台高亮线程
+
+    只保留最新的请求：UI 在分析进行中多次提交时，中间的快照会被跳过，
+    流式追加的文本合并到同一版本尚未处理的请求中。
+    缓冲区版本号变化（整体替换或清空）时重新开始分析
+    """
+
+    def __init__(self):
+        """初始化并启动后台高亮线程"""
+        self._pending = None
+        self._results = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._working = False
+        self._stopped = False
+
+        self._version = None
+        self._language = None
+        self._incremental_lexer = None
+
+        self._thread = threading.Thread(target=self._run, name="HighlightWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, version: int, text: str, language: str, streaming: bool = False) -> None:
+        """
+        提交高亮请求（UI 线程调用）
+
+        Args:
+            version: 文本缓冲区版本号
+            text: 文本快照
+            language: 编程语言
+            streaming: 是否处于流式追加中（不支持增量分析的语言在流式过程中跳过高亮）
+        """
+        with self._lock:
+            self._pending = _HighlightRequest(version, language, streaming, False, text)
+        self._wakeup.set()
+
+    def append(self, version: int, text: str, language: str) -> None:
+        """
+        提交流式追加的文本（UI 线程调用，只传递新增部分）
+
+        Args:
+            version: 文本缓冲区版本号
+            text: 追加的文本
+            language: 编程语言
+        """
+        with self._lock:
+            pending = self._pending
+            if pending is not None and pending.version == version and pending.language == language:
+                pending.chunks.append(text)
+                pending.streaming = True
+            else:
+                self._pending = _HighlightRequest(version, language, True, True, text)
+        self._wakeup.set()
+
+    def poll(self) -> list[HighlightResult]:
+        """
+        取出已完成的高亮结果（UI 线程调用）
+
+        Returns:
+            按完成顺序排列的结果列表
+        """
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
+
+    def busy(self) -> bool:
+        """
+        是否仍有待处理的请求或未取出的结果
+
+        Returns:
+            忙碌时返回 True
+        """
+        return self._pending is not None or self._working or bool(self._results)
+
+    def stop(self) -> None:
+        """停止后台线程"""
+        self._stopped = True
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        warm_lexer_cache()
+
+        while not self._stopped:
+            self._wakeup.wait()
+            with self._lock:
+                request = self._pending
+                self._pending = None
+                self._wakeup.clear()
+                self._working = request is not None
+
+            if request is None or self._stopped:
+                continue
+
+            try:
+                self._process(request)
+            except Exception as e:
+                # 单个请求出错不能让线程退出，否则之后的高亮全部停止；下次请求从头分析
+                get_logger().error("语法高亮失败: %s", e, exc_info=True)
+                self._version = None
+            finally:
+                self._working = False
+
+    def _process(self, request: _HighlightRequest) -> None:
+        """
+        处理一个高亮请求
+
+        Args:
+            request: 高亮请求
+        """
+        if request.version != self._version or request.language != self._language:
+            # 追加的文本缺少之前的内容，等待下一次整体提交
+            if request.append:
+                return
+            lexer = get_cached_lexer(request.language)
+            self._incremental_lexer = IncrementalLexer(lexer) if lexer else None
+            self._version = request.version
+            self._language = request.language
+
+        if self._incremental_lexer is None:
+            return
+        if request.streaming and not self._incremental_lexer.supports_incremental:
+            return
+
+        text = "".join(request.chunks)
+        if request.append:
+            start, ranges = self._incremental_lexer.append(text)
+        else:
+            start, ranges = self._incremental_lexer.update(text)
+        self._results.append(HighlightResult(request.version, start, ranges))
+
+
+class HighlightSpans:
+    """
+    按全文偏移量保存的着色区间（区间互不重叠且按起点排序）
+    虚拟化视图重新填充窗口时从这里取出窗口内的区间，无需重新分析
+    """
+
+    def __init__(self):
+        """初始化区间存储"""
+        self.clear()
+
+    def clear(self) -> None:
+        """清空所有区间"""
+        self.starts = array("I")
+        self.ends = array("I")
+        self.types = array("H")
+
+    def merge(self, result: HighlightResult) -> None:
+        """
+        合并高亮结果：替换起始偏移量之后的全部区间
+
+        Args:
+            result: 高亮结果
+        """
+        cut = bisect.bisect_left(self.starts, result.start)
+        del self.starts[cut:]
+        del self.ends[cut:]
+        del self.types[cut:]
+
+        # 跨越起始偏移量的区间截断到起始偏移量
+        if cut and self.ends[cut - 1] > result.start:
+            self.ends[cut - 1] = result.start
+
+        self.starts.extend(result.starts)
+        self.ends.extend(result.ends)
+        self.types.extend(result.types)
+
+    def query(self, start: int, end: int) -> range:
+        """
+        查找与 [start, end) 相交的区间
+
+        Args:
+            start: 起始偏移量
+            end: 结束偏移量
+
+        Returns:
+            区间下标范围
+        """
+        return range(bisect.bisect_right(self.ends, start), bisect.bisect_left(self.starts, end))
+
+
+class TextHighlighter:
+    """将高亮区间以批量标签的形式应用到虚拟化视图当前显示的窗口"""
+
+    def __init__(self, view):
+        """
+        初始化文本高亮器
+
+        Args:
+            view: 虚拟化文本视图（VirtualTextView）
+        """
+        self.view = view
+        self.text_widget = view.text_widget
+        self.buffer = view.buffer
+        self.spans = HighlightSpans()
+        self._style = None
+        self._configured_tags = {}
+
+    def set_style(self, appearance_mode: str) -> None:
+        """
+        根据外观模式设置配色
+
+        Args:
+            appearance_mode: "Dark" 或 "Light"
+        """
+        style_name = HIGHLIGHT_STYLES.get(appearance_mode, HIGHLIGHT_STYLES["Light"])
+        self._style = get_style_by_name(style_name)
+
+        # 重新配置已使用的标签颜色
+        for tag, token_type in list(self._configured_tags.items()):
+            self._configure_tag(tag, token_type)
+
+    def reset(self) -> None:
+        """清空区间并移除所有已应用的标签"""
+        self.spans.clear()
+        self._remove_tags("1.0")
+
+    def apply(self, result: HighlightResult) -> None:
+        """
+        应用高亮结果：合并区间，再重绘窗口中起始偏移量之后的部分
+
+        Args:
+            result: 高亮结果（调用方需确认版本号与当前缓冲区一致）
+        """
+        self.spans.merge(result)
+        self._paint(result.start)
+
+    def repaint(self) -> None:
+        """重绘整个窗口（视图重新填充窗口后调用）"""
+        self._paint(0)
+
+    def _paint(self, start: int) -> None:
+        """
+        移除窗口中 start 之后的标签，并按标签分组批量添加区间
+
+        Args:
+            start: 全文起始偏移量
+        """
+        window_start = self.buffer.line_start(self.view.first_line)
+        window_end = self.buffer.line_start(self.view.last_line)
+        if self.view.last_line >= self.buffer.line_count:
+            window_end = len(self.buffer)
+
+        start = max(start, window_start)
+        if start > window_end:
+            return
+
+        to_index = self._to_index
+        self._remove_tags(to_index(start))
+
+        grouped = {}
+        spans = self.spans
+        for i in spans.query(start, window_end):
+            range_start = max(spans.starts[i], start)
+            range_end = min(spans.ends[i], window_end)
+            grouped.setdefault(spans.types[i], []).extend((to_index(range_start), to_index(range_end)))
+
+        widget_path = str(self.text_widget)
+        for type_id, indices in grouped.items():
+            token_type = _token_types[type_id]
+            tag = str(token_type)
+            if tag not in self._configured_tags:
+                self._configure_tag(tag, token_type)
+
+            for i in range(0, len(indices), _TAG_BATCH_SIZE * 2):
+                self.text_widget.tk.call(widget_path, "tag", "add", tag, *indices[i:i + _TAG_BATCH_SIZE * 2])
+
+    def _to_index(self, offset: int) -> str:
+        """
+        将全文偏移量转换为窗口内的 Tk 文本索引
+
+        Args:
+            offset: 全文偏移量
+
+        Returns:
+            "行.列" 格式的索引
+        """
+        line, column = self.buffer.to_line_col(offset)
+        return f"{line - self.view.first_line + 1}.{column}"
+
+    def _remove_tags(self, start_index: str) -> None:
+        """
+        移除指定位置之后的所有高亮标签
+
+        Args:
+            start_index: 起始 Tk 索引
+        """
+        for tag in self._configured_tags:
+            self.text_widget.tag_remove(tag, start_index, "end")
+
+    def _configure_tag(self, tag: str, token_type: _TokenType) -> None:
+        """
+        配置标签颜色
+
+        Args:
+            tag: 标签名
+            token_type: token 类型
+        """
+        color: Optional[str] = None
+        if self._style is not None:
+            color = self._style.style_for_token(token_type).get("color")
+
+        self.text_widget.tag_configure(tag, foreground=f"#{color}" if color else "")
+        self._configured_tags[tag] = token_type
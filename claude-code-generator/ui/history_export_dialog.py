@@ -0,0 +1,187 @@
+"""
+历史导出对话框模块
+按语言和时间筛选生成历史，导出为目录或压缩包
+"""
+
+from datetime import datetime, timedelta
+
+import customtkinter as ctk
+
+import config.constants as constants
+from core.generation_executor import GenerationExecutor
+from core.history_export import (
+    EXPORT_FORMAT_DIRECTORY,
+    EXPORT_FORMAT_TAR,
+    EXPORT_FORMAT_ZIP,
+    export_history,
+)
+from ui.styles import Styles
+
+# 显示名称 -> 导出格式
+_FORMATS = {
+    "目录": EXPORT_FORMAT_DIRECTORY,
+    "ZIP 压缩包": EXPORT_FORMAT_ZIP,
+    "TAR.GZ 压缩包": EXPORT_FORMAT_TAR,
+}
+# 显示名称 -> 天数（None 表示全部）
+_RANGES = {
+    "全部": None,
+    "最近 7 天": 7,
+    "最近 30 天": 30,
+}
+_ALL_LANGUAGES = "全部语言"
+
+
+class HistoryExportDialog(ctk.CTkToplevel):
+    """历史导出对话框"""
+
+    def __init__(self, master, executor: GenerationExecutor):
+        """
+        初始化对话框
+
+        Args:
+            master: 父窗口
+            executor: 执行器（导出在写入线程中进行）
+        """
+        super().__init__(master)
+
+        self.executor = executor
+        self._future = None
+        self._closed = False
+
+        self.title("导出生成历史")
+        self.geometry("420x260")
+        self.resizable(False, False)
+        self.grid_columnconfigure(1, weight=1)
+
+        self._setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _setup_ui(self):
+        """设置用户界面"""
+        rows = [
+            ("语言", [_ALL_LANGUAGES] + constants.PROGRAMMING_LANGUAGES, "language_menu"),
+            ("时间", list(_RANGES), "range_menu"),
+            ("格式", list(_FORMATS), "format_menu"),
+        ]
+        for row, (label_text, values, attribute) in enumerate(rows):
+            label = ctk.CTkLabel(self, text=label_text, font=Styles.FONTS["body"])
+            label.grid(row=row, column=0, sticky="w", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], 0))
+
+            menu = ctk.CTkOptionMenu(self, values=values, font=Styles.FONTS["body"])
+            menu.grid(row=row, column=1, sticky="ew", padx=Styles.SPACING["md"], pady=(Styles.SPACING["md"], 0))
+            setattr(self, attribute, menu)
+
+        self.export_btn = ctk.CTkButton(
+            self,
+            text="导出...",
+            font=Styles.FONTS["body"],
+            height=35,
+            command=self._export,
+        )
+        self.export_btn.grid(row=3, column=0, columnspan=2, sticky="ew", padx=Styles.SPACING["md"], pady=Styles.SPACING["md"])
+
+        self.status_label = ctk.CTkLabel(self, text="", font=Styles.FONTS["small"], wraplength=380)
+        self.status_label.grid(row=4, column=0, columnspan=2, sticky="ew", padx=Styles.SPACING["md"])
+
+    def _export(self):
+        """选择目标位置并在后台导出"""
+        from utils.file_handler import FileHandler
+
+        export_format = _FORMATS[self.format_menu.get()]
+        file_handler = FileHandler(self)
+        if export_format == EXPORT_FORMAT_DIRECTORY:
+            target = file_handler.ask_directory("选择导出目录")
+        else:
+            extension = ".zip" if export_format == EXPORT_FORMAT_ZIP else ".tar.gz"
+            target = file_handler.ask_save_path(
+                "history_export",
+                [(self.format_menu.get(), f"*{extension}"), ("All Files", "*.*")],
+            )
+            if target and not target.lower().endswith(extension):
+                target += extension
+        if not target:
+            return
+
+        language = self.language_menu.get()
+        days = _RANGES[self.range_menu.get()]
+        since = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds") if days else None
+        self.export_btn.configure(state="disabled")
+        self._set_status("正在导出...")
+        self._future = self.executor.submit_io(
+            export_history,
+            target,
+            export_format=export_format,
+            on_progress=self._on_progress,
+            language=None if language == _ALL_LANGUAGES else language,
+            since=since,
+        )
+        self._future.add_done_callback(lambda future: self._post(lambda: self._on_done(future)))
+
+    def _on_progress(self, count: int):
+        """
+        导出进度回调（在写入线程中调用，每 EXPORT_PROGRESS_INTERVAL 条更新一次）
+
+        Args:
+            count: 已处理的记录数
+        """
+        if count % constants.EXPORT_PROGRESS_INTERVAL == 0:
+            self._post(lambda: self._set_status(f"正在导出... 已处理 {count} 条"))
+
+    def _on_done(self, future):
+        """
+        导出完成回调
+
+        Args:
+            future: 导出任务
+        """
+        self.export_btn.configure(state="normal")
+        error = future.exception()
+        if error is not None:
+            self._set_status(f"导出失败: {error}", is_error=True)
+            return
+
+        result = future.result()
+        message = (
+            f"已导出 {result['records']} 条记录（{result['files']} 个文件，"
+            f"{result['duplicates']} 条重复内容）到 {result['target']}"
+        )
+        if result["errors"]:
+            self._set_status(f"{message}；{len(result['errors'])} 个文件失败: {result['errors'][0]}", is_error=True)
+        else:
+            self._set_status(message)
+
+    def _set_status(self, message: str, is_error: bool = False):
+        """
+        显示状态
+
+        Args:
+            message: 状态消息
+            is_error: 是否为错误
+        """
+        self.status_label.configure(text=message, text_color="#F44336" if is_error else "#4CAF50")
+
+    def _post(self, callback):
+        """
+        从后台线程把回调交给 UI 线程执行（窗口关闭后忽略）
+
+        Args:
+            callback: 回调函数
+        """
+        if self._closed:
+            return
+
+        def run():
+            if not self._closed:
+                callback()
+
+        try:
+            self.after(0, run)
+        except RuntimeError:
+            # 主循环已退出
+            pass
+
+    def _on_close(self):
+        """关闭窗口（进行中的导出在后台继续完成）"""
+        self._closed = True
+        self.destroy()
@@ -3,17 +3,23 @@
 应用的主界面
 """
 
+import threading
+import tkinter as tk
+
 import customtkinter as ctk
 
 import config.constants as constants
 from config.settings import get_settings_manager
 from core.claude_api import ClaudeAPIClient
-from core.code_generator import CodeGenerator
-from ui.code_input_panel import CodeInputPanel
-from ui.output_panel import OutputPanel
-from ui.settings_dialog import SettingsDialog
+from core.generation_executor import GenerationExecutor
+from ui.session_tab import SessionTab
 from ui.styles import Styles
+from utils.event_log import get_event_log
+from utils.file_watcher import FileWatcher
+from utils.lazy_import import warm_up
 from utils.logger import get_logger
+from utils.startup_profiler import get_startup_profiler
+from utils.ui_watchdog import UIWatchdog
 
 
 class MainWindow(ctk.CTk):
@@ -26,9 +32,23 @@ class MainWindow(ctk.CTk):
         self.logger = get_logger()
         self.settings = get_settings_manager()
 
-        # API 客户端和代码生成器
+        # API 客户端和生成任务执行器（所有会话标签页共享）
         self.api_client = None
-        self.code_generator = None
+        self.executor = GenerationExecutor()
+
+        # 会话标签页（标签名 -> SessionTab）
+        self.sessions = {}
+        self._session_counter = 0
+        self._active_session = None
+
+        # 界面响应监控（首次绘制后启动，不统计启动过程）
+        self.watchdog = UIWatchdog(self)
+        self.diagnostics_panel = None
+        self.history_export_dialog = None
+        self._closing = False
+
+        # 监视配置文件的外部修改（如其他实例或部署脚本），变化时只重新配置受影响的部分
+        self.config_watcher = FileWatcher(self.settings.config_file, self._on_config_file_event)
 
         # 设置窗口
         self._setup_window()
@@ -42,6 +62,9 @@ class MainWindow(ctk.CTk):
         # 加载设置
         self._load_settings()
 
+        # 事件循环开始后记录首次绘制时间，并在后台预热延迟导入的模块
+        self.after(0, self._on_first_paint)
+
         self.logger.info("应用已启动")
 
     def _setup_window(self):
@@ -140,30 +163,62 @@ class MainWindow(ctk.CTk):
         )
         self.generate_toolbar_btn.grid(row=0, column=0, padx=Styles.SPACING["md"], pady=Styles.SPACING["sm"])
 
+        # 新建会话按钮
+        new_session_btn = ctk.CTkButton(
+            toolbar,
+            text="新建会话",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            command=self._new_session
+        )
+        new_session_btn.grid(row=0, column=1, padx=Styles.SPACING["xs"], pady=Styles.SPACING["sm"])
+
+        # 关闭会话按钮
+        close_session_btn = ctk.CTkButton(
+            toolbar,
+            text="关闭会话",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            fg_color="transparent",
+            border_width=2,
+            command=self._close_session
+        )
+        close_session_btn.grid(row=0, column=2, padx=Styles.SPACING["xs"], pady=Styles.SPACING["sm"])
+
+        # 模型对比按钮
+        compare_btn = ctk.CTkButton(
+            toolbar,
+            text="模型对比",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            fg_color="transparent",
+            border_width=2,
+            command=self._show_compare
+        )
+        compare_btn.grid(row=0, column=3, padx=Styles.SPACING["xs"], pady=Styles.SPACING["sm"])
+
+        # 诊断按钮
+        diagnostics_btn = ctk.CTkButton(
+            toolbar,
+            text="诊断",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            fg_color="transparent",
+            border_width=2,
+            command=self._show_diagnostics
+        )
+        diagnostics_btn.grid(row=0, column=4, padx=(Styles.SPACING["xs"], Styles.SPACING["md"]), pady=Styles.SPACING["sm"])
+
     def _create_main_panel(self):
-        """创建主面板"""
-        # 使用 PanedFrame 分割输入和输出面板
-        paned_frame = ctk.CTkFrame(self)
-        paned_frame.grid(row=2, column=0, sticky="nsew", padx=Styles.SPACING["md"], pady=Styles.SPACING["md"])
-        paned_frame.grid_columnconfigure(0, weight=1)
-        paned_frame.grid_columnconfigure(1, weight=1)
-        paned_frame.grid_rowconfigure(0, weight=1)
-
-        # 输入面板
-        self.input_panel = CodeInputPanel(paned_frame)
-        self.input_panel.grid(row=0, column=0, sticky="nsew", padx=(0, Styles.SPACING["xs"]))
-
-        # 输出面板
-        self.output_panel = OutputPanel(paned_frame)
-        self.output_panel.grid(row=0, column=1, sticky="nsew", padx=(Styles.SPACING["xs"], 0))
-
-        # 设置回调
-        self.input_panel.set_generate_command(self._on_generate)
-        self.input_panel.set_clear_command(self._on_clear_input)
-
-        self.output_panel.set_copy_command(self._on_copy_code)
-        self.output_panel.set_save_command(self._on_save_code)
-        self.output_panel.set_clear_command(self._on_clear_output)
+        """创建主面板（会话标签页）"""
+        self.tabview = ctk.CTkTabview(self, command=self._on_tab_changed)
+        self.tabview.grid(row=2, column=0, sticky="nsew", padx=Styles.SPACING["md"], pady=(0, Styles.SPACING["md"]))
+
+        self._new_session()
 
     def _create_status_bar(self):
         """创建状态栏"""
@@ -197,14 +252,18 @@ class MainWindow(ctk.CTk):
                 self.api_client = ClaudeAPIClient(api_key)
                 model = self.settings.get(constants.CONFIG_MODEL, constants.DEFAULT_MODEL)
                 self.api_client.set_model(model)
-                self.code_generator = CodeGenerator(self.api_client)
                 self._update_status("API 已连接")
             except Exception as e:
-                self.logger.error(f"初始化 API 失败: {e}", exc_info=True)
+                self.api_client = None
+                self.logger.error("初始化 API 失败: %s", e, exc_info=True)
                 self._update_status("API 连接失败", is_error=True)
         else:
+            self.api_client = None
             self._update_status("未配置 API Key")
 
+        for session in self.sessions.values():
+            session.set_api_client(self.api_client)
+
     def _load_settings(self):
         """加载设置"""
         # 更新模型标签
@@ -220,131 +279,199 @@ class MainWindow(ctk.CTk):
                 return name
         return None
 
-    def _on_generate(self):
-        """生成代码按钮回调"""
-        # 检查 API 客户端
-        if not self.api_client or not self.code_generator:
-            self._show_error("未配置 API", "请先在设置中配置您的 Claude API Key")
-            return
+    def _on_first_paint(self):
+        """窗口首次绘制后的回调"""
+        self.update_idletasks()
 
-        # 获取输入
-        description = self.input_panel.get_description()
-        language = self.input_panel.get_language()
-        template = self.input_panel.get_template()
+        profiler = get_startup_profiler()
+        profiler.mark("首次绘制")
+        if profiler.over_budget():
+            self.logger.warning("启动耗时超出预算 %sms: %s", constants.STARTUP_FIRST_PAINT_BUDGET_MS, profiler.report())
+        else:
+            self.logger.info("启动耗时: %s", profiler.report())
 
-        # 验证描述
-        is_valid, error_msg = self.code_generator.validate_description(description)
-        if not is_valid:
-            self._show_error("输入错误", error_msg)
+        warm_up(constants.STARTUP_WARM_UP_MODULES)
+        self.watchdog.start()
+        self.config_watcher.start()
+
+    def _new_session(self):
+        """新建会话标签页"""
+        if len(self.sessions) >= constants.SESSION_MAX_TABS:
+            self._show_error("无法新建会话", f"最多同时打开 {constants.SESSION_MAX_TABS} 个会话")
             return
 
-        # 设置加载状态
-        self.input_panel.set_loading(True)
-        self._update_status("正在生成代码...")
+        self._session_counter += 1
+        name = f"会话 {self._session_counter}"
 
-        # 清空输出
-        self.output_panel.clear()
+        tab_frame = self.tabview.add(name)
+        tab_frame.grid_columnconfigure(0, weight=1)
+        tab_frame.grid_rowconfigure(0, weight=1)
 
-        # 生成代码（使用线程避免阻塞 UI）
-        import threading
+        session = SessionTab(tab_frame, self.executor, self._on_session_status, self._show_error)
+        session.grid(row=0, column=0, sticky="nsew")
+        session.set_api_client(self.api_client)
+        self.sessions[name] = session
 
-        def generate_thread():
-            try:
-                # 获取生成参数
-                temperature = self.settings.get(constants.CONFIG_TEMPERATURE, constants.DEFAULT_TEMPERATURE)
-                max_tokens = self.settings.get(constants.CONFIG_MAX_TOKENS, constants.DEFAULT_MAX_TOKENS)
-
-                # 生成代码
-                code = self.code_generator.generate(
-                    description=description,
-                    language=language,
-                    template_type=template,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    use_stream=True,
-                    callback=lambda text: self.after(0, lambda: self._on_stream_data(text))
-                )
-
-                # 完成后更新 UI
-                self.after(0, lambda: self._on_generate_complete(code))
+        self.tabview.set(name)
+        self._on_tab_changed()
 
-            except Exception as e:
-                self.after(0, lambda: self._on_generate_error(str(e)))
+    def _close_session(self):
+        """关闭当前会话标签页（至少保留一个）"""
+        if len(self.sessions) <= 1:
+            return
 
-        thread = threading.Thread(target=generate_thread, daemon=True)
-        thread.start()
+        name = self.tabview.get()
+        session = self.sessions.pop(name)
+        self._active_session = None
+        session.close()
+        self.tabview.delete(name)
+        self._on_tab_changed()
 
-    def _on_stream_data(self, text: str):
+    def _current_session(self) -> SessionTab:
         """
-        流式数据回调
+        获取当前显示的会话
 
-        Args:
-            text: 流式数据
+        Returns:
+            当前会话标签页
         """
-        self.output_panel.set_code(text, append=True)
+        return self.sessions[self.tabview.get()]
 
-    def _on_generate_complete(self, code: str):
-        """
-        生成完成回调
+    def _on_tab_changed(self):
+        """切换标签页：暂停原标签页的渲染，恢复新标签页并显示其状态"""
+        session = self._current_session()
+        if session is self._active_session:
+            return
 
-        Args:
-            code: 生成的代码
-        """
-        self.input_panel.set_loading(False)
-        self.output_panel.set_code(code)
-        self._update_status("代码生成完成")
-        self.logger.info("代码生成成功")
+        if self._active_session is not None:
+            self._active_session.set_visible(False)
+        self._active_session = session
+        session.set_visible(True)
+
+        self._update_status(session.status_message or "就绪", session.status_is_error)
 
-    def _on_generate_error(self, error_msg: str):
+    def _on_session_status(self, session: SessionTab, message: str, is_error: bool):
         """
-        生成错误回调
+        会话状态变化回调（只显示当前标签页的状态）
 
         Args:
-            error_msg: 错误消息
+            session: 会话标签页
+            message: 状态消息
+            is_error: 是否为错误
         """
-        self.input_panel.set_loading(False)
-        self.output_panel.set_status(f"生成失败: {error_msg}", is_error=True)
-        self._update_status("生成失败", is_error=True)
-        self.logger.error(f"代码生成失败: {error_msg}")
+        if session is self._active_session:
+            self._update_status(message, is_error)
 
-    def _on_clear_input(self):
-        """清除输入回调"""
-        self.input_panel.clear()
+    def _on_generate(self):
+        """工具栏生成按钮回调"""
+        self._current_session().generate()
 
-    def _on_clear_output(self):
-        """清除输出回调"""
-        self.output_panel.clear()
+    def _show_compare(self):
+        """用当前会话的输入打开模型对比窗口"""
+        if not self.api_client:
+            self._show_error("未配置 API", "请先在设置中配置您的 Claude API Key")
+            return
 
-    def _on_copy_code(self):
-        """复制代码回调"""
-        self.output_panel.copy_to_clipboard()
+        session = self._current_session()
+        description = session.input_panel.get_description()
+        is_valid, error_msg = session.code_generator.validate_description(description)
+        if not is_valid:
+            self._show_error("输入错误", error_msg)
+            return
 
-    def _on_save_code(self):
-        """保存代码回调"""
-        self.output_panel.save_to_file(self)
+        from ui.compare_window import CompareWindow
+
+        CompareWindow(
+            self,
+            self.executor,
+            self.api_client,
+            description,
+            session.input_panel.get_language(),
+            session.input_panel.get_template(),
+        )
+
+    def _show_diagnostics(self):
+        """显示界面响应诊断面板（已打开时切换到前台）"""
+        if self.diagnostics_panel is not None and self.diagnostics_panel.winfo_exists():
+            self.diagnostics_panel.focus()
+            return
+
+        from ui.diagnostics_panel import DiagnosticsPanel
+
+        self.diagnostics_panel = DiagnosticsPanel(self, self.watchdog)
 
     def _show_settings(self):
         """显示设置对话框"""
+        from ui.settings_dialog import SettingsDialog
+
         dialog = SettingsDialog(self)
         dialog.set_on_save(self._on_settings_saved)
 
-    def _on_settings_saved(self):
-        """设置保存回调"""
-        # 重新初始化 API
-        self._initialize_api()
+    def _on_settings_saved(self, changed: set[str]):
+        """
+        设置保存回调
 
-        # 更新主题
-        theme = self.settings.get(constants.CONFIG_THEME, constants.DEFAULT_THEME)
-        Styles.configure_appearance(theme)
+        Args:
+            changed: 发生变化的配置键
+        """
+        self._apply_settings_changes(changed)
+
+    def _on_config_file_event(self):
+        """配置文件变化（在监视线程中调用），交给 UI 线程重新加载"""
+        try:
+            self.after(0, self._reload_config)
+        except RuntimeError:
+            # 主循环已退出
+            pass
+
+    def _reload_config(self):
+        """重新加载被外部修改的配置（自身保存引起的事件不会产生变化）"""
+        changed = self.settings.reload()
+        if changed:
+            self.logger.info("配置文件已被外部修改: %s", ", ".join(sorted(changed)))
+            self._apply_settings_changes(changed)
+
+    def _apply_settings_changes(self, changed: set[str]):
+        """
+        只重新配置受影响的部分（温度和最大 token 数在每次生成时读取，无需处理）
 
-        # 更新模型标签
-        self._load_settings()
+        Args:
+            changed: 发生变化的配置键
+        """
+        if not changed:
+            return
+
+        # API Key 变化时重新创建客户端；只有模型变化时保留现有客户端和连接
+        if constants.CONFIG_API_KEY in changed:
+            self._initialize_api()
+        elif constants.CONFIG_MODEL in changed and self.api_client:
+            self.api_client.set_model(self.settings.get(constants.CONFIG_MODEL, constants.DEFAULT_MODEL))
+
+        if constants.CONFIG_MODEL in changed:
+            self._load_settings()
 
-        self.logger.info("设置已更新")
+        if constants.CONFIG_THEME in changed:
+            theme = self.settings.get(constants.CONFIG_THEME, constants.DEFAULT_THEME)
+            Styles.configure_appearance(theme)
+            for session in self.sessions.values():
+                session.refresh_highlight_style()
+
+        self.logger.info("设置已更新: %s", ", ".join(sorted(changed)))
 
     def _show_file_menu(self):
-        """显示文件菜单（简化版）"""
-        pass
+        """显示文件菜单"""
+        menu = tk.Menu(self, tearoff=0)
+        menu.add_command(label="导出生成历史...", command=self._show_history_export)
+        menu.tk_popup(self.winfo_pointerx(), self.winfo_pointery())
+
+    def _show_history_export(self):
+        """显示历史导出对话框（已打开时切换到前台）"""
+        if self.history_export_dialog is not None and self.history_export_dialog.winfo_exists():
+            self.history_export_dialog.focus()
+            return
+
+        from ui.history_export_dialog import HistoryExportDialog
+
+        self.history_export_dialog = HistoryExportDialog(self, self.executor)
 
     def _show_edit_menu(self):
         """显示编辑菜单（简化版）"""
@@ -406,5 +533,38 @@ class MainWindow(ctk.CTk):
 
     def on_closing(self):
         """窗口关闭事件"""
+        if self._closing:
+            return
+        self._closing = True
+
         self.logger.info("应用正在关闭")
+        self.watchdog.stop()
+        self.watchdog.log_summary()
+        self.config_watcher.stop()
+        for session in self.sessions.values():
+            session.close()
+
+        # 取消进行中的生成，并在后台等待历史和保存等写入完成；
+        # 等待期间事件循环继续运行，工作线程投递到界面的回调不会卡住
+        self.withdraw()
+        drain = threading.Thread(target=self.executor.shutdown, name="ShutdownDrain", daemon=True)
+        drain.start()
+        self._finish_closing(drain)
+
+    def _finish_closing(self, drain: threading.Thread):
+        """
+        后台等待结束后销毁窗口
+
+        Args:
+            drain: 等待执行器关闭的线程
+        """
+        if drain.is_alive():
+            self.after(constants.SHUTDOWN_POLL_MS, lambda: self._finish_closing(drain))
+            return
+
+        self.settings.flush()
         self.destroy()
+
+        # 写完日志和事件队列中的记录
+        get_event_log().shutdown()
+        self.logger.shutdown()
@@ -1,13 +1,18 @@
 """
 输出面板模块
-显示生成的代码
+显示生成的代码，并保留历史版本供差异视图比较
 """
 
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
 import customtkinter as ctk
-import pyperclip
 
+import config.constants as constants
+from ui.highlighter import HighlightWorker, TextHighlighter
 from ui.styles import Styles
-from utils.file_handler import FileHandler
+from ui.virtual_text import LineBuffer, VirtualTextView
 
 
 class OutputPanel(ctk.CTkFrame):
@@ -22,9 +27,22 @@ class OutputPanel(ctk.CTkFrame):
         """
         super().__init__(master, **kwargs)
 
-        self.current_code = ""
+        # 代码以缓冲区为准，文本组件只显示可见窗口
+        self.buffer = LineBuffer()
         self.file_handler = None
 
+        # 语法高亮状态：缓冲区版本号在整体替换或清空时递增，旧版本的高亮结果会被丢弃
+        self.language = constants.DEFAULT_LANGUAGE
+        self._buffer_version = 0
+        self._highlight_poll_id = None
+        self.highlight_worker = HighlightWorker()
+
+        # 历史版本：每次整体设置的代码作为一个版本，供差异视图选择比较基准
+        self.history = deque(maxlen=constants.OUTPUT_HISTORY_SIZE)
+        self._history_serial = 0
+        self._change_listeners = []
+        self.diff_view = None
+
         self._setup_ui()
 
     def _setup_ui(self):
@@ -85,15 +103,20 @@ class OutputPanel(ctk.CTkFrame):
         )
         self.code_textbox.grid(row=0, column=0, sticky="nsew")
 
-        # 滚动条
-        scrollbar_y = ctk.CTkScrollbar(textbox_frame, command=self.code_textbox.yview)
+        # 滚动条（纵向滚动由虚拟化视图按缓冲区总行数控制）
+        scrollbar_y = ctk.CTkScrollbar(textbox_frame)
         scrollbar_y.grid(row=0, column=1, sticky="ns")
-        self.code_textbox.configure(yscrollcommand=scrollbar_y.set)
 
         scrollbar_x = ctk.CTkScrollbar(textbox_frame, command=self.code_textbox.xview, orientation="horizontal")
         scrollbar_x.grid(row=1, column=0, sticky="ew")
         self.code_textbox.configure(xscrollcommand=scrollbar_x.set)
 
+        # 虚拟化视图和语法高亮（作用于 CTkTextbox 内部的 tk.Text）
+        self.view = VirtualTextView(self.code_textbox._textbox, scrollbar_y, self.buffer)
+        self.highlighter = TextHighlighter(self.view)
+        self.highlighter.set_style(ctk.get_appearance_mode())
+        self.view.on_window_change = self.highlighter.repaint
+
     def _create_buttons(self):
         """创建按钮"""
         # 按钮容器
@@ -132,6 +155,18 @@ class OutputPanel(ctk.CTkFrame):
         )
         self.clear_btn.grid(row=0, column=2, padx=Styles.SPACING["xs"])
 
+        # 差异按钮
+        self.diff_btn = ctk.CTkButton(
+            button_frame,
+            text="差异",
+            font=Styles.FONTS["body"],
+            height=35,
+            width=100,
+            fg_color="transparent",
+            border_width=2,
+        )
+        self.diff_btn.grid(row=0, column=3, padx=Styles.SPACING["xs"])
+
     def set_code(self, code: str, append: bool = False):
         """
         设置代码内容
@@ -140,28 +175,129 @@ class OutputPanel(ctk.CTkFrame):
             code: 代码内容
             append: 是否追加
         """
-        if append and self.current_code:
-            self.code_textbox.insert("end", code)
-            self.current_code += code
+        appended = append and len(self.buffer) > 0
+        if appended:
+            previous_line_count = self.buffer.line_count
+            self.buffer.append(code)
+            self.view.on_append(code, previous_line_count)
         else:
-            self.code_textbox.delete("1.0", "end")
-            self.code_textbox.insert("1.0", code)
-            self.current_code = code
+            self._buffer_version += 1
+            self.buffer.set_text(code)
+            self.highlighter.reset()
+            self.view.reload()
+            # 流式生成的第一段数据也会走到这里，只有整体设置的代码才记为历史版本
+            if not append:
+                self._add_history(code)
+
+        # 追加时后台只重新分析末尾的脏区域；整体替换时重新分析全部内容
+        self._request_highlight(streaming=append, appended=code if appended else None)
+        self._notify_change(code if append else None)
+
+    def _add_history(self, code: str):
+        """
+        记录一个历史版本（与最近的版本相同或为空时忽略）
+
+        Args:
+            code: 代码内容
+        """
+        if not code.strip() or (self.history and self.history[-1][2] == code):
+            return
+
+        self._history_serial += 1
+        self.history.append((self._history_serial, datetime.now().strftime("%H:%M:%S"), code))
+
+    def add_change_listener(self, listener: Callable[[Optional[str]], None]):
+        """
+        添加内容变化监听器
+
+        Args:
+            listener: 回调函数，参数为追加的文本；整体替换或清空时为 None
+        """
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener: Callable[[Optional[str]], None]):
+        """
+        移除内容变化监听器
+
+        Args:
+            listener: 回调函数
+        """
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def _notify_change(self, appended: Optional[str]):
+        """
+        通知内容变化
+
+        Args:
+            appended: 追加的文本；整体替换或清空时为 None
+        """
+        for listener in list(self._change_listeners):
+            listener(appended)
+
+    def set_language(self, language: str):
+        """
+        设置代码语言（用于语法高亮）
+
+        Args:
+            language: 编程语言
+        """
+        if language == self.language:
+            return
+
+        self.language = language
+        self._buffer_version += 1
+        if len(self.buffer):
+            self.highlighter.reset()
+            self._request_highlight()
+
+    def _request_highlight(self, streaming: bool = False, appended: Optional[str] = None):
+        """
+        向后台线程提交高亮请求：流式追加时只提交新增的文本，否则提交完整文本快照
+
+        Args:
+            streaming: 是否处于流式追加中
+            appended: 追加的文本（可选）
+        """
+        if appended is not None:
+            self.highlight_worker.append(self._buffer_version, appended, self.language)
+        else:
+            self.highlight_worker.submit(self._buffer_version, self.buffer.get_text(), self.language, streaming)
+        if self._highlight_poll_id is None:
+            self._highlight_poll_id = self.after(constants.HIGHLIGHT_POLL_MS, self._poll_highlight)
+
+    def _poll_highlight(self):
+        """取出后台高亮结果，只应用与当前缓冲区版本一致的结果"""
+        self._highlight_poll_id = None
+
+        for result in self.highlight_worker.poll():
+            if result.version == self._buffer_version:
+                self.highlighter.apply(result)
+
+        if self.highlight_worker.busy():
+            self._highlight_poll_id = self.after(constants.HIGHLIGHT_POLL_MS, self._poll_highlight)
+
+    def refresh_highlight_style(self):
+        """根据当前外观模式刷新高亮配色"""
+        self.highlighter.set_style(ctk.get_appearance_mode())
 
     def get_code(self) -> str:
         """
-        获取当前代码
+        获取当前代码（从缓冲区读取，不依赖文本组件中显示的窗口）
 
         Returns:
             代码内容
         """
-        return self.code_textbox.get("1.0", "end").strip()
+        return self.buffer.get_text().strip()
 
     def clear(self):
         """清除代码"""
-        self.code_textbox.delete("1.0", "end")
-        self.current_code = ""
+        self._buffer_version += 1
+        self.buffer.clear()
+        self.highlighter.reset()
+        self.view.reload()
         self.set_status("")
+        self._notify_change(None)
 
     def set_status(self, message: str, is_error: bool = False):
         """
@@ -179,6 +315,8 @@ class OutputPanel(ctk.CTkFrame):
         code = self.get_code()
         if code:
             try:
+                import pyperclip
+
                 pyperclip.copy(code)
                 self.set_status("已复制到剪贴板")
             except Exception as e:
@@ -200,16 +338,32 @@ class OutputPanel(ctk.CTkFrame):
 
         # 创建文件处理器
         if self.file_handler is None:
+            from utils.file_handler import FileHandler
+
             self.file_handler = FileHandler(parent_window)
 
         # 保存文件
-        success, result = self.file_handler.save_code_dialog(code)
+        success, result = self.file_handler.save_code_dialog(code, language=self.language)
 
         if success:
             self.set_status(f"已保存: {result}")
         elif result:  # 有错误消息
             self.set_status(result, is_error=True)
 
+    def show_diff(self):
+        """打开差异视图（已打开时切换到前台）"""
+        if self.diff_view is not None and self.diff_view.winfo_exists():
+            self.diff_view.focus()
+            return
+
+        if not self.history:
+            self.set_status("没有可比较的历史版本", is_error=True)
+            return
+
+        from ui.diff_view import DiffView
+
+        self.diff_view = DiffView(self.winfo_toplevel(), self)
+
     def set_copy_command(self, command):
         """
         设置复制按钮的回调函数
@@ -236,3 +390,19 @@ class OutputPanel(ctk.CTkFrame):
             command: 回调函数
         """
         self.clear_btn.configure(command=command)
+
+    def set_diff_command(self, command):
+        """
+        设置差异按钮的回调函数
+
+        Args:
+            command: 回调函数
+        """
+        self.diff_btn.configure(command=command)
+
+    def destroy(self):
+        """销毁面板并停止后台高亮线程"""
+        if self.diff_view is not None and self.diff_view.winfo_exists():
+            self.diff_view.close()
+        self.highlight_worker.stop()
+        super().destroy()
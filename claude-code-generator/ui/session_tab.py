@@ -0,0 +1,659 @@
+"""
+会话标签页模块
+每个标签页拥有独立的输入、输出、流式渲染、对话上下文和状态，可与其他标签页同时生成
+"""
+
+from typing import Callable, Optional
+
+import customtkinter as ctk
+
+import config.constants as constants
+from config.settings import get_settings_manager
+from core.claude_api import ClaudeAPIClient, GenerationCancelled
+from core.code_generator import CodeGenerator
+from core.context_ingest import build_file_context
+from core.generation_executor import GenerationExecutor, GenerationRejected, GenerationRequest
+from core.history import get_generation_history, make_history_record
+from core.metrics import GenerationMetrics
+from core.multi_file import DemuxFile, MultiFileDemultiplexer
+from core.stream_sink import FileSink, tee
+from ui.code_input_panel import CodeInputPanel
+from ui.output_panel import OutputPanel
+from ui.stream_renderer import StreamRenderer
+from ui.styles import Styles
+from utils.event_log import get_event_log
+from utils.logger import get_logger
+
+
+class SessionTab(ctk.CTkFrame):
+    """
+    会话标签页
+
+    生成任务提交到主窗口共享的执行器，以标签页为来源：结果只在请求仍为最新时写入界面。
+    标签页不可见时暂停流式渲染，数据只缓冲不写入界面；完成结果也推迟到标签页重新显示时再写入
+    """
+
+    def __init__(
+        self,
+        master,
+        executor: GenerationExecutor,
+        on_status: Callable[["SessionTab", str, bool], None],
+        on_error: Callable[[str, str], None],
+        **kwargs,
+    ):
+        """
+        初始化会话标签页
+
+        Args:
+            master: 父容器
+            executor: 共享的生成任务执行器
+            on_status: 状态变化回调，参数为 (标签页, 消息, 是否为错误)
+            on_error: 显示错误对话框的回调，参数为 (标题, 消息)
+        """
+        super().__init__(master, fg_color="transparent", **kwargs)
+
+        self.logger = get_logger()
+        self.settings = get_settings_manager()
+        self.executor = executor
+        self.on_status = on_status
+        self.on_error = on_error
+
+        self.code_generator = None
+        self.status_message = ""
+        self.status_is_error = False
+
+        self._busy = False
+        self._visible = True
+        self._closed = False
+        self._pending_code = None
+        # 最近一次生成识别出的多个文件（相对路径 -> 内容），保存时写入所选目录
+        self._output_files = {}
+
+        self._setup_ui()
+
+    @property
+    def busy(self) -> bool:
+        """是否有正在进行（或排队中）的生成"""
+        return self._busy
+
+    def _setup_ui(self):
+        """设置用户界面"""
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # 输入面板
+        self.input_panel = CodeInputPanel(self)
+        self.input_panel.grid(row=0, column=0, sticky="nsew", padx=(0, Styles.SPACING["xs"]))
+
+        # 输出面板
+        self.output_panel = OutputPanel(self)
+        self.output_panel.grid(row=0, column=1, sticky="nsew", padx=(Styles.SPACING["xs"], 0))
+
+        # 设置回调
+        self.input_panel.set_generate_command(self.generate)
+        self.input_panel.set_clear_command(self.input_panel.clear)
+
+        self.output_panel.set_copy_command(self.output_panel.copy_to_clipboard)
+        self.output_panel.set_save_command(self.save_output)
+        self.output_panel.set_clear_command(self.clear_output)
+        self.output_panel.set_diff_command(self.output_panel.show_diff)
+
+        # 流式渲染器：工作线程推送数据，UI 按帧合并写入
+        self.stream_renderer = StreamRenderer(self, self._on_stream_data)
+
+    def set_api_client(self, api_client: Optional[ClaudeAPIClient]):
+        """
+        设置 API 客户端（重新创建代码生成器，开始新会话）
+
+        Args:
+            api_client: 共享的 API 客户端，未配置时为 None
+        """
+        self.code_generator = CodeGenerator(api_client, self.executor.submit_subtask) if api_client else None
+
+    def set_visible(self, visible: bool):
+        """
+        设置标签页是否可见
+        不可见时暂停渲染；重新可见时写入缓冲的流式数据或推迟的完成结果
+
+        Args:
+            visible: 是否可见
+        """
+        self._visible = visible
+        if not visible:
+            self.stream_renderer.pause()
+            return
+
+        if self._pending_code is not None:
+            code, self._pending_code = self._pending_code, None
+            self.output_panel.set_code(code)
+        self.stream_renderer.resume()
+
+    def close(self):
+        """关闭标签页：取消正在进行的生成并销毁组件"""
+        self._closed = True
+        self.executor.cancel(self)
+        self.stream_renderer.stop()
+        self.destroy()
+
+    def refresh_highlight_style(self):
+        """根据当前外观模式刷新高亮配色"""
+        self.output_panel.refresh_highlight_style()
+
+    def clear_output(self):
+        """清除输出（同时开始新会话）"""
+        self.output_panel.clear()
+        self._pending_code = None
+        self._output_files = {}
+        if self.code_generator:
+            self.code_generator.reset_conversation()
+            self._set_status("已开始新会话")
+
+    def generate(self):
+        """生成代码"""
+        if self._busy:
+            return
+
+        # 检查 API 客户端
+        if not self.code_generator:
+            self.on_error("未配置 API", "请先在设置中配置您的 Claude API Key")
+            return
+
+        # 获取输入
+        description = self.input_panel.get_description()
+        language = self.input_panel.get_language()
+        template = self.input_panel.get_template()
+        mode = self.input_panel.get_mode()
+
+        # 验证描述
+        is_valid, error_msg = self.code_generator.validate_description(description)
+        if not is_valid:
+            self.on_error("输入错误", error_msg)
+            return
+
+        # 修改模式：基于当前输出的代码生成补丁
+        current_code = self.output_panel.get_code()
+        if mode == constants.GENERATION_MODE_EDIT and current_code:
+            self._start_edit(current_code, description, language)
+            return
+
+        # 边生成边保存：普通模式把流式输出直接写入文件，分段和择优模式完成后写入最终代码
+        streaming = mode not in (constants.GENERATION_MODE_SECTIONED, constants.GENERATION_MODE_BEST_OF)
+        file_sink = None
+        if self.input_panel.get_stream_save():
+            file_sink = self._open_file_sink(strip_fences=streaming)
+            if file_sink is None:
+                return
+
+        # 设置加载状态
+        self._set_loading(True)
+        self._set_status("排队中...")
+
+        # 清空输出
+        self._output_files = {}
+        self.output_panel.clear()
+        self.output_panel.set_language(language)
+        self.stream_renderer.start()
+
+        code_generator = self.code_generator
+        context_path = self.input_panel.get_context_path()
+        test_path = self.input_panel.get_test_path()
+        project_dir = self.settings.get(constants.CONFIG_PROJECT_DIR, "")
+        # 流式输出同时交给多文件分拣器，识别各文件的代码块
+        demux = MultiFileDemultiplexer() if streaming else None
+
+        def generate_task(request: GenerationRequest):
+            metrics = GenerationMetrics(code_generator.api_client.model)
+            try:
+                # 参考文件在工作线程中分块读取，只把预算内的相关部分放入提示词
+                contexts = []
+                if context_path:
+                    self._post(lambda: self._set_status("正在读取参考文件..."), request)
+                    try:
+                        contexts.append(build_file_context(context_path, description))
+                    except OSError as e:
+                        raise RuntimeError(f"读取参考文件失败: {e}") from e
+                if project_dir:
+                    self._post(lambda: self._set_status("正在检索项目代码..."), request)
+                    contexts.append(self._retrieve_project_context(project_dir, description))
+                context = "\n\n".join(part for part in contexts if part) or None
+
+                self._post(lambda: self._set_status("正在生成代码..."), request)
+
+                # 获取生成参数
+                temperature = self.settings.get(constants.CONFIG_TEMPERATURE, constants.DEFAULT_TEMPERATURE)
+                max_tokens = self.settings.get(constants.CONFIG_MAX_TOKENS, constants.DEFAULT_MAX_TOKENS)
+
+                stream_callback = tee(
+                    file_sink.write if file_sink and streaming else None,
+                    demux.feed if demux else None,
+                    self.stream_renderer.push,
+                )
+
+                # 生成代码
+                if mode == constants.GENERATION_MODE_SECTIONED:
+                    code = code_generator.generate_sectioned(
+                        description=description,
+                        language=language,
+                        template_type=template,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        callback=stream_callback,
+                        context=context,
+                        cancel_event=request.cancel_event,
+                    )
+                elif mode == constants.GENERATION_MODE_BEST_OF:
+                    test_code = None
+                    if test_path:
+                        try:
+                            with open(test_path, "r", encoding="utf-8") as f:
+                                test_code = f.read()
+                        except (OSError, UnicodeDecodeError) as e:
+                            raise RuntimeError(f"读取测试文件失败: {e}") from e
+                    code, _ = code_generator.generate_best_of(
+                        description=description,
+                        language=language,
+                        template_type=template,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        on_progress=lambda text: self._post(lambda: self._set_status(f"正在择优生成：{text}"), request),
+                        context=context,
+                        cancel_event=request.cancel_event,
+                        test_code=test_code,
+                    )
+                else:
+                    code = code_generator.generate(
+                        description=description,
+                        language=language,
+                        template_type=template,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        use_stream=True,
+                        callback=stream_callback,
+                        cancel_event=request.cancel_event,
+                        metrics=metrics,
+                        context=context,
+                    )
+
+                # 完成后更新 UI，并在后台写入历史
+                self._record_finished(metrics, mode, language, template)
+                files = demux.finish() if demux else []
+                self._post(lambda: self._on_generate_complete(code, files), request)
+                if file_sink is not None:
+                    self._commit_file_sink(file_sink, None if streaming else code, request)
+                self._save_history(description, language, template, mode, code)
+
+            except GenerationCancelled:
+                self._record_finished(metrics, mode, language, template, "cancelled")
+            except Exception as e:
+                self._record_finished(metrics, mode, language, template, "error", str(e))
+                self._post(lambda: self._on_generate_error(str(e)), request)
+
+        request = self._submit(generate_task)
+        if file_sink is not None:
+            # 失败、取消或被拒绝时删除临时文件（已提交时忽略）
+            if request is None:
+                file_sink.abort()
+            else:
+                request.future.add_done_callback(lambda future: file_sink.abort())
+
+    def _retrieve_project_context(self, project_dir: str, description: str) -> str:
+        """
+        增量更新项目代码索引，并检索与描述相关的代码片段（在工作线程中调用）
+
+        Args:
+            project_dir: 项目目录
+            description: 生成描述
+
+        Returns:
+            上下文文本，没有相关代码或索引失败时返回空字符串
+        """
+        from core.code_index import get_code_index
+
+        try:
+            index = get_code_index(project_dir)
+            index.update()
+            return index.build_context(description)
+        except Exception as e:
+            # 检索只是辅助信息，失败时照常生成
+            self.logger.warning("检索项目代码失败: %s", e)
+            return ""
+
+    def _open_file_sink(self, strip_fences: bool) -> Optional[FileSink]:
+        """
+        选择保存位置并创建文件写入器
+
+        Args:
+            strip_fences: 是否去除代码块标记（写入流式输出时为 True）
+
+        Returns:
+            FileSink，用户取消或无法创建文件时返回 None
+        """
+        from utils.file_handler import FileHandler
+
+        path = FileHandler(self.winfo_toplevel()).ask_save_path(language=self.input_panel.get_language())
+        if not path:
+            return None
+
+        try:
+            return FileSink(path, strip_fences=strip_fences)
+        except OSError as e:
+            self.on_error("保存失败", f"无法创建文件: {e}")
+            return None
+
+    def _commit_file_sink(self, file_sink: FileSink, code: Optional[str], request: GenerationRequest):
+        """
+        完成边生成边保存的文件（在工作线程中调用）
+
+        Args:
+            file_sink: 文件写入器
+            code: 需要一次性写入的最终代码（流式写入时为 None）
+            request: 生成请求
+        """
+        try:
+            if code is not None:
+                file_sink.write(code)
+            path = file_sink.commit()
+        except OSError as e:
+            file_sink.abort()
+            self.logger.error("保存文件失败: %s", e)
+            self._post(lambda: self.output_panel.set_status(f"保存文件失败: {e}", is_error=True), request)
+            return
+
+        self.logger.info("代码已保存到: %s", path)
+        self._post(lambda: self.output_panel.set_status(f"已保存: {path}"), request)
+
+    def save_output(self):
+        """保存输出：识别出多个文件时写入所选目录，否则保存为单个文件"""
+        if not self._output_files:
+            self.output_panel.save_to_file(self.winfo_toplevel())
+            return
+
+        from utils.file_handler import FileHandler
+
+        file_handler = FileHandler(self.winfo_toplevel())
+        directory = file_handler.ask_directory()
+        if not directory:
+            return
+
+        self.output_panel.set_status(f"正在保存 {len(self._output_files)} 个文件...")
+        future = self.executor.submit_io(file_handler.save_files, directory, dict(self._output_files))
+        future.add_done_callback(lambda future: self._post(lambda: self._on_files_saved(directory, future)))
+
+    def _on_files_saved(self, directory: str, future):
+        """
+        多文件保存完成回调
+
+        Args:
+            directory: 保存目录
+            future: 保存任务
+        """
+        error = future.exception()
+        if error is not None:
+            self.output_panel.set_status(f"保存文件失败: {error}", is_error=True)
+            return
+
+        saved, errors = future.result()
+        if errors:
+            self.output_panel.set_status(f"已保存 {len(saved)} 个文件，{len(errors)} 个失败: {errors[0]}", is_error=True)
+        else:
+            self.output_panel.set_status(f"已保存 {len(saved)} 个文件到: {directory}")
+
+    def _start_edit(self, current_code: str, instruction: str, language: str):
+        """
+        以修改模式更新当前代码
+
+        Args:
+            current_code: 当前输出的代码
+            instruction: 修改要求
+            language: 编程语言
+        """
+        self._set_loading(True)
+        self._set_status("排队中...")
+        self._output_files = {}
+        self.output_panel.set_language(language)
+        self.stream_renderer.start()
+
+        code_generator = self.code_generator
+
+        def edit_task(request: GenerationRequest):
+            metrics = GenerationMetrics(code_generator.api_client.model)
+            mode = constants.GENERATION_MODE_EDIT
+            try:
+                self._post(lambda: self._set_status("正在生成修改补丁..."), request)
+
+                temperature = self.settings.get(constants.CONFIG_TEMPERATURE, constants.DEFAULT_TEMPERATURE)
+                max_tokens = self.settings.get(constants.CONFIG_MAX_TOKENS, constants.DEFAULT_MAX_TOKENS)
+
+                code, patched = code_generator.edit(
+                    current_code=current_code,
+                    instruction=instruction,
+                    language=language,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    callback=self.stream_renderer.push,
+                    on_fallback=lambda: self._post(self._on_edit_fallback, request),
+                    cancel_event=request.cancel_event,
+                )
+
+                self._record_finished(metrics, mode, language, None, patched=patched)
+                self._post(lambda: self._on_edit_complete(code, patched), request)
+                self._save_history(instruction, language, None, mode, code)
+
+            except GenerationCancelled:
+                self._record_finished(metrics, mode, language, None, "cancelled")
+            except Exception as e:
+                self._record_finished(metrics, mode, language, None, "error", str(e))
+                self._post(lambda: self._on_generate_error(str(e)), request)
+
+        self._submit(edit_task)
+
+    def _submit(self, task: Callable[[GenerationRequest], None]) -> Optional[GenerationRequest]:
+        """
+        向执行器提交生成任务（任务数已达上限时显示错误）
+
+        Args:
+            task: 任务函数
+
+        Returns:
+            生成请求，被拒绝时返回 None
+        """
+        try:
+            return self.executor.submit(self, task)
+        except GenerationRejected as e:
+            self._on_generate_error(str(e))
+            return None
+
+    def _record_finished(
+        self,
+        metrics: GenerationMetrics,
+        mode: str,
+        language: str,
+        template: Optional[str],
+        status: str = "ok",
+        error: Optional[str] = None,
+        **fields,
+    ):
+        """
+        结束计时并记录 generation.finished 事件（在工作线程中调用）
+
+        Args:
+            metrics: 生成指标（只有普通模式记录首 token 时间和用量）
+            mode: 生成模式
+            language: 编程语言
+            template: 模板类型
+            status: ok / cancelled / error
+            error: 错误消息
+            **fields: 其他事件字段
+        """
+        metrics.finish(error)
+        get_event_log().event(
+            "generation.finished",
+            "error" if status == "error" else "info",
+            lazy_fields=metrics.to_dict,
+            source="session",
+            mode=mode,
+            language=language,
+            template=template,
+            status=status,
+            **fields,
+        )
+
+    def _save_history(self, description: str, language: str, template: Optional[str], mode: str, code: str):
+        """
+        在后台写入生成历史（未启用历史时忽略）
+
+        Args:
+            description: 代码描述（或修改要求）
+            language: 编程语言
+            template: 模板类型
+            mode: 生成模式
+            code: 生成的代码
+        """
+        if not self.settings.get(constants.CONFIG_HISTORY_ENABLED, True):
+            return
+
+        record = make_history_record(
+            description,
+            language,
+            template,
+            mode,
+            self.settings.get(constants.CONFIG_MODEL, constants.DEFAULT_MODEL),
+            code,
+        )
+        max_entries = self.settings.get(constants.CONFIG_MAX_HISTORY)
+        self.executor.submit_io(get_generation_history().append, record, max_entries)
+
+    def _post(self, callback: Callable[[], None], request: Optional[GenerationRequest] = None):
+        """
+        从工作线程把回调交给 UI 线程执行（标签页关闭后或请求已过期时忽略）
+
+        Args:
+            callback: 回调函数
+            request: 回调所属的生成请求
+        """
+        if self._closed or (request is not None and request.cancelled):
+            return
+
+        def run():
+            if self._closed or (request is not None and not self.executor.is_current(request)):
+                return
+            callback()
+
+        try:
+            self.after(0, run)
+        except RuntimeError:
+            # 主循环已退出
+            pass
+
+    def _set_loading(self, loading: bool):
+        """
+        设置加载状态
+
+        Args:
+            loading: 是否正在生成
+        """
+        self._busy = loading
+        self.input_panel.set_loading(loading)
+
+    def _set_status(self, message: str, is_error: bool = False):
+        """
+        更新标签页状态（主窗口只显示当前标签页的状态）
+
+        Args:
+            message: 状态消息
+            is_error: 是否为错误
+        """
+        self.status_message = message
+        self.status_is_error = is_error
+        self.on_status(self, message, is_error)
+
+    def _show_result(self, code: str):
+        """
+        写入最终结果；标签页不可见时推迟到重新显示
+
+        Args:
+            code: 最终代码
+        """
+        if self._visible:
+            self.output_panel.set_code(code)
+        else:
+            self._pending_code = code
+
+    def _on_edit_fallback(self):
+        """补丁无法应用，回退为完整重新生成"""
+        self.output_panel.clear()
+        self._set_status("补丁无法应用，正在完整重新生成...")
+
+    def _on_edit_complete(self, code: str, patched: bool):
+        """
+        修改完成回调
+
+        Args:
+            code: 修改后的代码
+            patched: 是否通过补丁完成
+        """
+        self._stop_stream_renderer()
+        self._set_loading(False)
+        self._show_result(code)
+        if patched:
+            self._set_status("代码修改完成（已应用补丁）")
+        else:
+            self._set_status("代码修改完成（已完整重新生成）")
+        self.logger.info("代码修改成功")
+
+    def _on_stream_data(self, text: str):
+        """
+        流式数据回调
+
+        Args:
+            text: 流式数据
+        """
+        self.output_panel.set_code(text, append=True)
+
+    def _on_generate_complete(self, code: str, files: Optional[list[DemuxFile]] = None):
+        """
+        生成完成回调
+
+        Args:
+            code: 生成的代码
+            files: 从流式输出中识别出的文件
+        """
+        self._stop_stream_renderer()
+        self._set_loading(False)
+        self._show_result(code)
+        turn_count = self.code_generator.conversation.turn_count if self.code_generator else 0
+        self._set_status(f"代码生成完成（会话第 {turn_count} 轮）")
+        self.logger.info("代码生成成功")
+
+        # 多个文件：保存时按文件写入目录
+        if files and len(files) > 1:
+            self._output_files = {demux_file.path: demux_file.content for demux_file in files}
+            names = "、".join(demux_file.path for demux_file in files[:constants.MULTI_FILE_STATUS_NAMES])
+            if len(files) > constants.MULTI_FILE_STATUS_NAMES:
+                names += " 等"
+            self.output_panel.set_status(f"识别到 {len(files)} 个文件：{names}（保存时写入所选目录）")
+            self.logger.info("识别到多个文件: %s", ", ".join(demux_file.path for demux_file in files))
+
+    def _on_generate_error(self, error_msg: str):
+        """
+        生成错误回调
+
+        Args:
+            error_msg: 错误消息
+        """
+        self._stop_stream_renderer()
+        self._set_loading(False)
+        self.output_panel.set_status(f"生成失败: {error_msg}", is_error=True)
+        self._set_status("生成失败", is_error=True)
+        self.logger.error("代码生成失败: %s", error_msg)
+
+    def _stop_stream_renderer(self):
+        """停止流式渲染并记录帧耗时统计"""
+        self.stream_renderer.stop()
+        stats = self.stream_renderer.get_stats()
+        if stats["frames"]:
+            self.logger.debug(
+                "流式渲染统计: %d 帧, %d 字符, 平均 %.2fms, P95 %.2fms, 最大 %.2fms",
+                stats["frames"], stats["chars"], stats["avg_ms"], stats["p95_ms"], stats["max_ms"],
+            )
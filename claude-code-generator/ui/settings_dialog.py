@@ -3,6 +3,8 @@
 提供应用设置界面
 """
 
+import os
+
 import customtkinter as ctk
 
 import config.constants as constants
@@ -56,6 +58,9 @@ class SettingsDialog(ctk.CTkToplevel):
         # UI 配置部分
         self._create_ui_section(scroll_frame)
 
+        # 项目代码部分
+        self._create_project_section(scroll_frame)
+
         # 按钮部分
         self._create_buttons(scroll_frame)
 
@@ -178,6 +183,47 @@ class SettingsDialog(ctk.CTkToplevel):
         )
         self.theme_combo.pack(fill="x", padx=Styles.SPACING["sm"], pady=(0, Styles.SPACING["sm"]))
 
+    def _create_project_section(self, parent):
+        """创建项目代码部分"""
+        # 部分标题
+        label = ctk.CTkLabel(
+            parent,
+            text="项目代码",
+            font=Styles.FONTS["subheading"],
+            anchor="w"
+        )
+        label.pack(fill="x", pady=(0, Styles.SPACING["xs"]))
+
+        # 容器
+        frame = ctk.CTkFrame(parent)
+        frame.pack(fill="x", pady=(0, Styles.SPACING["lg"]))
+
+        # 项目目录：生成时检索其中的相关代码放入提示词，留空表示不使用
+        project_label = ctk.CTkLabel(frame, text="项目目录（留空表示不参考项目代码）:", anchor="w")
+        project_label.pack(fill="x", padx=Styles.SPACING["sm"], pady=(Styles.SPACING["sm"], Styles.SPACING["xs"]))
+
+        self.project_dir_entry = ctk.CTkEntry(frame, font=Styles.FONTS["body"])
+        self.project_dir_entry.pack(fill="x", padx=Styles.SPACING["sm"], pady=(0, Styles.SPACING["xs"]))
+
+        browse_btn = ctk.CTkButton(
+            frame,
+            text="浏览...",
+            width=80,
+            height=28,
+            font=Styles.FONTS["small"],
+            command=self._browse_project_dir
+        )
+        browse_btn.pack(anchor="e", padx=Styles.SPACING["sm"], pady=(0, Styles.SPACING["sm"]))
+
+    def _browse_project_dir(self):
+        """选择项目目录"""
+        from utils.file_handler import FileHandler
+
+        directory = FileHandler(self).ask_directory("选择项目目录")
+        if directory:
+            self.project_dir_entry.delete(0, "end")
+            self.project_dir_entry.insert(0, directory)
+
     def _create_buttons(self, parent):
         """创建按钮"""
         # 按钮容器
@@ -232,6 +278,10 @@ class SettingsDialog(ctk.CTkToplevel):
         theme = self.settings.get(constants.CONFIG_THEME, constants.DEFAULT_THEME)
         self.theme_combo.set(theme)
 
+        # 项目目录
+        project_dir = self.settings.get(constants.CONFIG_PROJECT_DIR, "")
+        self.project_dir_entry.insert(0, project_dir)
+
     def _get_model_display_name(self, model_id: str) -> str | None:
         """
         获取模型显示名称
@@ -294,22 +344,31 @@ class SettingsDialog(ctk.CTkToplevel):
             self._show_error("最大 tokens 验证失败", error_msg)
             return
 
+        # 验证项目目录
+        project_dir = self.project_dir_entry.get().strip()
+        if project_dir and not os.path.isdir(project_dir):
+            self._show_error("项目目录无效", f"目录不存在: {project_dir}")
+            return
+
         # 保存设置
-        self.settings.set(constants.CONFIG_API_KEY, api_key)
         model_name = self.model_combo.get()
         model_id = constants.CLAUDE_MODELS.get(model_name, constants.DEFAULT_MODEL)
-        self.settings.set(constants.CONFIG_MODEL, model_id)
-        self.settings.set(constants.CONFIG_TEMPERATURE, temperature)
-        self.settings.set(constants.CONFIG_MAX_TOKENS, max_tokens)
-        self.settings.set(constants.CONFIG_THEME, self.theme_combo.get())
+        changed = self.settings.update({
+            constants.CONFIG_API_KEY: api_key,
+            constants.CONFIG_MODEL: model_id,
+            constants.CONFIG_TEMPERATURE: temperature,
+            constants.CONFIG_MAX_TOKENS: max_tokens,
+            constants.CONFIG_THEME: self.theme_combo.get(),
+            constants.CONFIG_PROJECT_DIR: project_dir,
+        })
 
         # 保存到文件
         try:
             self.settings.save_config()
 
-            # 调用回调
+            # 调用回调（只传入发生变化的键）
             if self.on_save_callback:
-                self.on_save_callback()
+                self.on_save_callback(changed)
 
             self._show_info("设置已保存", "您的设置已成功保存")
             self.destroy()
@@ -364,6 +423,6 @@ class SettingsDialog(ctk.CTkToplevel):
         设置保存回调函数
 
         Args:
-            callback: 回调函数
+            callback: 回调函数，参数为发生变化的配置键集合
         """
         self.on_save_callback = callback
@@ -0,0 +1,200 @@
+"""
+流式渲染模块
+在工作线程和 UI 之间缓冲流式数据，按固定帧间隔合并后一次性写入界面
+"""
+
+import collections
+import threading
+import time
+from typing import Callable
+
+from config.constants import (
+    STREAM_FRAME_MAX_MS,
+    STREAM_FRAME_MIN_MS,
+    STREAM_FRAME_STATS_WINDOW,
+)
+
+
+class StreamRenderer:
+    """帧合并的流式渲染器"""
+
+    def __init__(
+        self,
+        widget,
+        sink: Callable[[str], None],
+        min_interval_ms: int = STREAM_FRAME_MIN_MS,
+        max_interval_ms: int = STREAM_FRAME_MAX_MS,
+    ):
+        """
+        初始化流式渲染器
+
+        Args:
+            widget: 用于调度帧的 Tk 组件
+            sink: 在 UI 线程中接收每帧合并文本的函数
+            min_interval_ms: 最小帧间隔（毫秒）
+            max_interval_ms: 落后时允许放宽到的最大帧间隔（毫秒）
+        """
+        self.widget = widget
+        self.sink = sink
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+
+        self._chunks = collections.deque()
+        self._lock = threading.Lock()
+        self._after_id = None
+        self._interval_ms = min_interval_ms
+        self._active = False
+        self._paused = False
+
+        self._frame_times = collections.deque(maxlen=STREAM_FRAME_STATS_WINDOW)
+        self._frame_count = 0
+        self._char_count = 0
+
+    @property
+    def running(self) -> bool:
+        """渲染器是否正在运行（暂停期间也视为运行中）"""
+        return self._active
+
+    @property
+    def paused(self) -> bool:
+        """渲染器是否已暂停"""
+        return self._paused
+
+    def push(self, text: str) -> None:
+        """
+        推送流式数据（可在任意线程调用）
+
+        Args:
+            text: 流式数据
+        """
+        with self._lock:
+            self._chunks.append(text)
+
+    def start(self) -> None:
+        """开始按帧渲染（UI 线程调用）"""
+        self.clear()
+        self._frame_times.clear()
+        self._frame_count = 0
+        self._char_count = 0
+        self._interval_ms = self.min_interval_ms
+
+        self._active = True
+        self._schedule()
+
+    def stop(self, flush: bool = False) -> None:
+        """
+        停止渲染（UI 线程调用）
+
+        Args:
+            flush: 是否先写入尚未渲染的数据；否则直接丢弃
+        """
+        self._active = False
+        self._cancel()
+
+        if flush:
+            self._render_pending()
+        else:
+            self.clear()
+
+    def pause(self) -> None:
+        """
+        暂停渲染（UI 线程调用）
+        数据继续缓冲但不写入界面，恢复后在下一帧一次性写入
+        """
+        self._paused = True
+        self._cancel()
+
+    def resume(self) -> None:
+        """恢复渲染（UI 线程调用）"""
+        self._paused = False
+        self._schedule()
+
+    def clear(self) -> None:
+        """丢弃尚未渲染的数据"""
+        with self._lock:
+            self._chunks.clear()
+
+    def pending(self) -> int:
+        """
+        获取积压的片段数
+
+        Returns:
+            尚未渲染的片段数
+        """
+        return len(self._chunks)
+
+    def get_stats(self) -> dict:
+        """
+        获取帧耗时统计
+
+        Returns:
+            统计字典（帧数、字符数、平均/P95/最大帧耗时、当前帧间隔和积压片段数）
+        """
+        times = sorted(self._frame_times)
+        count = len(times)
+
+        return {
+            "frames": self._frame_count,
+            "chars": self._char_count,
+            "avg_ms": sum(times) / count if count else 0.0,
+            "p95_ms": times[min(int(count * 0.95), count - 1)] if count else 0.0,
+            "max_ms": times[-1] if count else 0.0,
+            "interval_ms": self._interval_ms,
+            "backlog": self.pending(),
+        }
+
+    def _on_frame(self) -> None:
+        """帧回调：合并积压数据并一次性写入"""
+        self._after_id = None
+
+        start = time.perf_counter()
+        rendered = self._render_pending()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if rendered:
+            self._frame_times.append(elapsed_ms)
+            self._adapt_interval(elapsed_ms)
+
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """运行中且未暂停时安排下一帧"""
+        if self._active and not self._paused and self._after_id is None:
+            self._after_id = self.widget.after(self._interval_ms, self._on_frame)
+
+    def _cancel(self) -> None:
+        """取消已安排的帧"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _render_pending(self) -> bool:
+        """
+        写入所有积压数据
+
+        Returns:
+            有数据写入时返回 True
+        """
+        with self._lock:
+            if not self._chunks:
+                return False
+            text = "".join(self._chunks)
+            self._chunks.clear()
+
+        self.sink(text)
+        self._frame_count += 1
+        self._char_count += len(text)
+        return True
+
+    def _adapt_interval(self, elapsed_ms: float) -> None:
+        """
+        根据帧耗时调整帧间隔
+        写入耗时超过帧间隔一半时说明渲染跟不上，放宽间隔以减少写入次数；否则逐步恢复
+
+        Args:
+            elapsed_ms: 本帧写入耗时（毫秒）
+        """
+        if elapsed_ms > self._interval_ms / 2:
+            self._interval_ms = min(self._interval_ms * 2, self.max_interval_ms)
+        else:
+            self._interval_ms = max(int(self._interval_ms * 0.9), self.min_interval_ms)
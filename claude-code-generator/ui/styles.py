@@ -23,6 +23,8 @@ class Styles:
             "success": "#4CAF50",
             "error": "#F44336",
             "warning": "#FF9800",
+            "diff_insert": "#E6FFEC",
+            "diff_delete": "#FFEBE9",
         },
         # 深色主题
         "dark": {
@@ -36,6 +38,8 @@ class Styles:
             "success": "#4CAF50",
             "error": "#F44336",
             "warning": "#FF9800",
+            "diff_insert": "#1F3D2A",
+            "diff_delete": "#4A2125",
         },
     }
 
@@ -0,0 +1,324 @@
+"""
+虚拟化文本视图模块
+完整文本保存在按行索引的缓冲区中，文本组件只显示可见区域及其上下预留的若干行
+"""
+
+import bisect
+from array import array
+from typing import Callable, Optional
+
+from config.constants import VIRTUAL_VIEW_OVERSCAN_LINES, VIRTUAL_VIEW_WINDOW_LINES
+
+
+class LineBuffer:
+    """按行索引的文本缓冲区（输出内容的权威来源）"""
+
+    def __init__(self):
+        """初始化缓冲区"""
+        # 追加的文本按块保存，需要完整文本时再合并，避免流式追加时反复复制整个字符串
+        self._chunks = []
+        self._chunk_starts = array("Q")
+        self._length = 0
+        self._line_starts = array("Q", [0])
+
+    @property
+    def line_count(self) -> int:
+        """行数（空文本也算一行）"""
+        return len(self._line_starts)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def get_text(self) -> str:
+        """
+        获取完整文本（合并之前追加的文本块）
+
+        Returns:
+            完整文本
+        """
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+            self._chunk_starts = array("Q", [0])
+        return self._chunks[0] if self._chunks else ""
+
+    def set_text(self, text: str) -> None:
+        """
+        替换全部文本
+
+        Args:
+            text: 新文本
+        """
+        self._chunks = []
+        self._chunk_starts = array("Q")
+        self._length = 0
+        self._line_starts = array("Q", [0])
+        self.append(text)
+
+    def append(self, text: str) -> None:
+        """
+        在末尾追加文本
+
+        Args:
+            text: 追加的文本
+        """
+        if not text:
+            return
+
+        base = self._length
+        position = text.find("\n")
+        while position >= 0:
+            self._line_starts.append(base + position + 1)
+            position = text.find("\n", position + 1)
+        self._chunks.append(text)
+        self._chunk_starts.append(base)
+        self._length += len(text)
+
+    def clear(self) -> None:
+        """清空缓冲区"""
+        self.set_text("")
+
+    def line_start(self, line: int) -> int:
+        """
+        获取某行（从 0 开始）的起始偏移量
+
+        Args:
+            line: 行号
+
+        Returns:
+            偏移量；行号超出范围时返回文本长度
+        """
+        if line >= len(self._line_starts):
+            return self._length
+        return self._line_starts[line]
+
+    def to_line_col(self, offset: int) -> tuple[int, int]:
+        """
+        将字符偏移量转换为行号和列号（均从 0 开始）
+
+        Args:
+            offset: 字符偏移量
+
+        Returns:
+            (行号, 列号)
+        """
+        line = bisect.bisect_right(self._line_starts, offset) - 1
+        return line, offset - self._line_starts[line]
+
+    def get_lines(self, first: int, last: int) -> str:
+        """
+        获取 [first, last) 范围内的行（不含最后一行的换行符）
+
+        Args:
+            first: 起始行号
+            last: 结束行号（不含）
+
+        Returns:
+            文本
+        """
+        start = self.line_start(first)
+        end = self._line_starts[last] - 1 if last < len(self._line_starts) else self._length
+        return self._slice(start, end)
+
+    def _slice(self, start: int, end: int) -> str:
+        """
+        获取 [start, end) 范围内的文本（只合并该范围涉及的文本块）
+
+        Args:
+            start: 起始偏移量
+            end: 结束偏移量（不含）
+
+        Returns:
+            文本
+        """
+        if end <= start:
+            return ""
+        first = bisect.bisect_right(self._chunk_starts, start) - 1
+        last = bisect.bisect_left(self._chunk_starts, end)
+        base = self._chunk_starts[first]
+        return "".join(self._chunks[first:last])[start - base:end - base]
+
+
+class VirtualTextView:
+    """
+    虚拟化文本视图
+
+    文本组件中只保存缓冲区的 [first_line, last_line) 行。滚动接近窗口边缘时以当前顶部行为锚点
+    重新填充窗口；纵向滚动条按缓冲区总行数换算位置。
+    文本组件设为只读，内容以缓冲区为准
+    """
+
+    def __init__(
+        self,
+        text_widget,
+        scrollbar,
+        buffer: LineBuffer,
+        on_window_change: Optional[Callable[[], None]] = None,
+        window_lines: int = VIRTUAL_VIEW_WINDOW_LINES,
+        overscan_lines: int = VIRTUAL_VIEW_OVERSCAN_LINES,
+    ):
+        """
+        初始化虚拟化视图
+
+        Args:
+            text_widget: tk.Text 组件
+            scrollbar: 纵向滚动条（需支持 set 和 command）
+            buffer: 文本缓冲区
+            on_window_change: 窗口重新填充后的回调
+            window_lines: 窗口保留的行数
+            overscan_lines: 可见区域上方预留的行数
+        """
+        self.text_widget = text_widget
+        self.scrollbar = scrollbar
+        self.buffer = buffer
+        self.on_window_change = on_window_change
+        self.window_lines = window_lines
+        self.overscan_lines = overscan_lines
+
+        self.first_line = 0
+        self.last_line = 1
+        self._recenter_pending = False
+
+        self.text_widget.configure(state="disabled", yscrollcommand=self._on_widget_scroll)
+        self.scrollbar.configure(command=self._on_scrollbar)
+
+    def reload(self) -> None:
+        """缓冲区内容被整体替换后，从第一行开始重新填充窗口"""
+        self._materialize(0, top_line=0)
+
+    def on_append(self, text: str, previous_line_count: int) -> None:
+        """
+        缓冲区末尾追加文本后更新窗口
+        窗口包含末尾时直接把新文本写入组件；窗口超出上限后以当前顶部行为锚点重新填充
+
+        Args:
+            text: 追加的文本
+            previous_line_count: 追加前缓冲区的行数
+        """
+        if self.last_line < previous_line_count:
+            # 窗口不包含末尾，只需更新滚动条
+            self._update_scrollbar()
+            return
+
+        self._edit(lambda: self.text_widget.insert("end-1c", text))
+        self.last_line = self.buffer.line_count
+
+        if self.last_line - self.first_line > self.window_lines + self.overscan_lines:
+            top = self._top_line()
+            self._materialize(top - self.overscan_lines, top_line=top)
+
+    def scroll_to_line(self, line: int) -> None:
+        """
+        滚动到指定行（从 0 开始），必要时重新填充窗口
+
+        Args:
+            line: 行号
+        """
+        line = max(0, min(line, self.buffer.line_count - 1))
+        visible = self._visible_line_count()
+
+        if self.first_line <= line and line + visible <= self.last_line:
+            self.text_widget.yview(f"{line - self.first_line + 1}.0")
+        else:
+            self._materialize(line - self.overscan_lines, top_line=line)
+
+    def _materialize(self, first: int, top_line: int) -> None:
+        """
+        用缓冲区的一段行重新填充组件
+
+        Args:
+            first: 期望的起始行号（会被限制在有效范围内）
+            top_line: 填充后显示在顶部的行号
+        """
+        total = self.buffer.line_count
+        first = max(0, min(first, total - self.window_lines))
+        last = min(total, first + self.window_lines)
+        text = self.buffer.get_lines(first, last)
+
+        def replace():
+            self.text_widget.delete("1.0", "end")
+            self.text_widget.insert("1.0", text)
+
+        self._edit(replace)
+        self.first_line = first
+        self.last_line = last
+
+        top_line = max(first, min(top_line, last - 1))
+        self.text_widget.yview(f"{top_line - first + 1}.0")
+
+        if self.on_window_change:
+            self.on_window_change()
+        self._update_scrollbar()
+
+    def _edit(self, operation: Callable[[], None]) -> None:
+        """
+        临时解除只读状态执行修改
+
+        Args:
+            operation: 修改操作
+        """
+        self.text_widget.configure(state="normal")
+        try:
+            operation()
+        finally:
+            self.text_widget.configure(state="disabled")
+
+    def _top_line(self) -> int:
+        """当前显示在顶部的缓冲区行号"""
+        return self.first_line + int(self.text_widget.index("@0,0").split(".")[0]) - 1
+
+    def _visible_line_count(self) -> int:
+        """当前可见的行数"""
+        top = int(self.text_widget.index("@0,0").split(".")[0])
+        bottom = int(self.text_widget.index(f"@0,{self.text_widget.winfo_height()}").split(".")[0])
+        return max(bottom - top + 1, 1)
+
+    def _on_widget_scroll(self, first: str, last: str) -> None:
+        """
+        文本组件视图变化的回调：更新滚动条，接近窗口边缘时安排重新填充
+
+        Args:
+            first: 组件内可见区域的起始比例
+            last: 组件内可见区域的结束比例
+        """
+        self._update_scrollbar()
+
+        top = self._top_line()
+        bottom = top + self._visible_line_count()
+        margin = self.overscan_lines // 2
+        near_start = self.first_line > 0 and top - self.first_line < margin
+        near_end = self.last_line < self.buffer.line_count and self.last_line - bottom < margin
+
+        if (near_start or near_end) and not self._recenter_pending:
+            # 在视图回调中修改组件内容会引发重入，推迟到空闲时执行
+            self._recenter_pending = True
+            self.text_widget.after_idle(self._recenter)
+
+    def _recenter(self) -> None:
+        """以当前顶部行为锚点重新填充窗口"""
+        self._recenter_pending = False
+        top = self._top_line()
+        self._materialize(top - self.overscan_lines, top_line=top)
+
+    def _on_scrollbar(self, action: str, *args) -> None:
+        """
+        滚动条回调：按缓冲区总行数换算目标行
+
+        Args:
+            action: "moveto" 或 "scroll"
+            args: moveto 时为比例；scroll 时为数量和单位
+        """
+        total = self.buffer.line_count
+        if action == "moveto":
+            self.scroll_to_line(int(float(args[0]) * total))
+        elif action == "scroll":
+            amount = int(args[0])
+            if len(args) > 1 and args[1] == "pages":
+                amount *= self._visible_line_count()
+            self.scroll_to_line(self._top_line() + amount)
+
+    def _update_scrollbar(self) -> None:
+        """按缓冲区总行数更新滚动条位置"""
+        total = self.buffer.line_count
+        top = self._top_line()
+        visible = self._visible_line_count()
+        self.scrollbar.set(top / total, min((top + visible) / total, 1.0))
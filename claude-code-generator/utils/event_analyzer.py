@@ -0,0 +1,176 @@
+"""
+事件日志离线分析模块
+读取结构化事件日志（包括已轮转压缩的文件），按模型和语言汇总生成延迟的分位数
+
+命令行用法（在项目目录下运行）：
+    python -m utils.event_analyzer [日志文件] [--event generation.finished] [--field latency_ms]
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import math
+import os
+import sys
+from typing import Iterable, Iterator, Optional
+
+from config.constants import EVENT_LOG_FILE_NAME, EVENT_PERCENTILES, LOGS_DIR
+
+# 默认汇总的事件和字段
+DEFAULT_EVENT = "generation.finished"
+DEFAULT_FIELDS = ("ttft_ms", "latency_ms")
+
+
+def iter_events(log_file: str = os.path.join(LOGS_DIR, EVENT_LOG_FILE_NAME)) -> Iterator[dict]:
+    """
+    按时间顺序读取事件（先读轮转出的旧文件，跳过损坏的行）
+
+    Args:
+        log_file: 当前事件日志文件路径
+
+    Returns:
+        事件字典迭代器
+    """
+    rotated = glob.glob(f"{glob.escape(log_file)}.*.gz")
+    # 编号越大越旧
+    rotated.sort(key=lambda path: int(path[len(log_file) + 1:-3]), reverse=True)
+
+    for path in rotated + [log_file]:
+        if not os.path.exists(path):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    yield event
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """
+    计算分位数（线性插值）
+
+    Args:
+        sorted_values: 已排序的非空数值列表
+        pct: 百分位（0~100）
+
+    Returns:
+        分位数
+    """
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_latency(
+    events: Iterable[dict],
+    event_name: str = DEFAULT_EVENT,
+    fields: Iterable[str] = DEFAULT_FIELDS,
+    percentiles: Iterable[float] = EVENT_PERCENTILES,
+) -> dict[tuple[str, str], dict]:
+    """
+    按 (模型, 语言) 汇总成功事件的字段分位数
+
+    Args:
+        events: 事件
+        event_name: 要汇总的事件名
+        fields: 要汇总的数值字段
+        percentiles: 百分位列表
+
+    Returns:
+        (模型, 语言) -> {"runs": 成功次数, "errors": 失败次数, 字段名: {百分位: 值}}
+    """
+    fields = tuple(fields)
+    percentiles = tuple(percentiles)
+    groups = {}
+
+    for event in events:
+        if event.get("event") != event_name:
+            continue
+        key = (event.get("model") or "-", event.get("language") or "-")
+        group = groups.setdefault(key, {"runs": 0, "errors": 0, "values": {field: [] for field in fields}})
+        if event.get("status", "ok") != "ok":
+            group["errors"] += 1
+            continue
+
+        group["runs"] += 1
+        for field in fields:
+            value = event.get(field)
+            if isinstance(value, (int, float)):
+                group["values"][field].append(value)
+
+    summary = {}
+    for key, group in sorted(groups.items()):
+        entry = {"runs": group["runs"], "errors": group["errors"]}
+        for field, values in group["values"].items():
+            values.sort()
+            entry[field] = {pct: percentile(values, pct) for pct in percentiles} if values else None
+        summary[key] = entry
+    return summary
+
+
+def format_summary(summary: dict[tuple[str, str], dict], fields: Iterable[str] = DEFAULT_FIELDS) -> str:
+    """
+    把汇总结果格式化为文本表格
+
+    Args:
+        summary: summarize_latency 的结果
+        fields: 要显示的字段
+
+    Returns:
+        表格文本
+    """
+    if not summary:
+        return "没有可汇总的事件"
+
+    fields = tuple(fields)
+    percentiles = next(
+        (tuple(entry[field]) for entry in summary.values() for field in fields if entry.get(field)),
+        EVENT_PERCENTILES,
+    )
+
+    header = ["模型", "语言", "成功", "失败"]
+    for field in fields:
+        header.extend(f"{field} p{pct:g}" for pct in percentiles)
+
+    rows = [header]
+    for (model, language), entry in summary.items():
+        row = [model, language, str(entry["runs"]), str(entry["errors"])]
+        for field in fields:
+            values = entry.get(field)
+            row.extend(f"{values[pct]:.0f}" if values else "-" for pct in percentiles)
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数（默认使用 sys.argv）
+
+    Returns:
+        退出码
+    """
+    parser = argparse.ArgumentParser(description="按模型和语言汇总事件日志中的延迟分位数")
+    parser.add_argument("log_file", nargs="?", default=os.path.join(LOGS_DIR, EVENT_LOG_FILE_NAME), help="事件日志文件")
+    parser.add_argument("--event", default=DEFAULT_EVENT, help="要汇总的事件名")
+    parser.add_argument("--field", action="append", dest="fields", help="要汇总的字段（可重复，默认 ttft_ms 和 latency_ms）")
+    args = parser.parse_args(argv)
+
+    fields = args.fields or DEFAULT_FIELDS
+    summary = summarize_latency(iter_events(args.log_file), args.event, fields)
+    print(format_summary(summary, fields))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
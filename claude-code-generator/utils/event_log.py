@@ -0,0 +1,186 @@
+"""
+结构化事件日志模块
+以 JSON Lines 记录生成请求的诊断事件（请求 ID、模型、耗时、用量等），供离线分析
+
+- 字段值可以是无参函数，只有事件实际被记录时才调用；低于记录级别或未被采样的事件不计算任何字段
+- 高频事件（如每个流式片段）按 EVENT_SAMPLE_RATES 采样，被记录的事件带有 sample_rate 字段
+- context() 为当前线程（上下文）绑定公共字段，期间记录的事件自动带上这些字段
+- 序列化和写入在后台线程中进行，文件按大小和日期轮转
+
+离线分析见 utils.event_analyzer
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from datetime import datetime
+from logging.handlers import QueueListener
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config.constants import (
+    EVENT_LOG_FILE_NAME,
+    EVENT_LOG_LEVEL,
+    EVENT_LOG_LEVELS,
+    EVENT_SAMPLE_RATES,
+    LOG_BACKUP_COUNT,
+    LOG_MAX_BYTES,
+    LOGS_DIR,
+)
+from utils.logger import CompressedRotatingFileHandler, ThreadQueueHandler
+
+# 当前上下文绑定的公共字段
+_context_fields = contextvars.ContextVar("event_context", default={})
+
+
+class _JSONFormatter(logging.Formatter):
+    """把事件记录格式化为一行 JSON（在后台线程中执行）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.event, ensure_ascii=False, default=str)
+
+
+class EventLog:
+    """结构化事件日志"""
+
+    def __init__(
+        self,
+        log_file: str = os.path.join(LOGS_DIR, EVENT_LOG_FILE_NAME),
+        level: str = EVENT_LOG_LEVEL,
+        sample_rates: Optional[Dict[str, float]] = None,
+    ):
+        """
+        初始化事件日志（文件在第一个事件写入时才创建）
+
+        Args:
+            log_file: 事件日志文件路径
+            level: 记录级别（debug / info / warning / error）
+            sample_rates: 事件名 -> 采样率，默认使用 EVENT_SAMPLE_RATES
+        """
+        self.log_file = log_file
+        self.min_level = EVENT_LOG_LEVELS[level]
+        self.sample_rates = dict(EVENT_SAMPLE_RATES if sample_rates is None else sample_rates)
+
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._handler = CompressedRotatingFileHandler(log_file, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+        self._handler.setFormatter(_JSONFormatter())
+        self._queue_handler = ThreadQueueHandler(queue.SimpleQueue())
+        self._listener = QueueListener(self._queue_handler.queue, self._handler)
+        self._listener.start()
+
+    def set_sample_rate(self, name: str, rate: float) -> None:
+        """
+        设置某个事件的采样率
+
+        Args:
+            name: 事件名
+            rate: 采样率（0 表示不记录，1 表示全部记录）
+        """
+        self.sample_rates[name] = min(1.0, max(0.0, rate))
+
+    def enabled(self, name: str, level: str = "info") -> bool:
+        """
+        检查事件是否会被记录（不考虑采样）
+
+        Args:
+            name: 事件名
+            level: 事件级别
+
+        Returns:
+            是否记录
+        """
+        return EVENT_LOG_LEVELS[level] >= self.min_level and self.sample_rates.get(name, 1.0) > 0
+
+    def event(
+        self,
+        name: str,
+        level: str = "info",
+        lazy_fields: Optional[Callable[[], Dict[str, Any]]] = None,
+        **fields: Any,
+    ) -> None:
+        """
+        记录一个事件
+
+        Args:
+            name: 事件名（如 "generation.finished"）
+            level: 事件级别
+            lazy_fields: 返回字段字典的无参函数（可选），只在事件被记录时调用
+            **fields: 事件字段；值为无参函数时只在事件被记录时调用
+        """
+        if EVENT_LOG_LEVELS[level] < self.min_level:
+            return
+
+        rate = self.sample_rates.get(name, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "event": name,
+            "level": level,
+        }
+        if rate < 1.0:
+            record["sample_rate"] = rate
+        record.update(_context_fields.get())
+        if lazy_fields is not None:
+            record.update(lazy_fields())
+        for key, value in fields.items():
+            record[key] = value() if callable(value) else value
+
+        # 直接入队，由后台线程序列化和写入
+        log_record = logging.LogRecord(name, logging.INFO, "", 0, "", None, None)
+        log_record.event = record
+        self._queue_handler.enqueue(log_record)
+
+    @contextlib.contextmanager
+    def context(self, **fields: Any) -> Iterator[None]:
+        """
+        在 with 块内为当前线程记录的事件绑定公共字段（可嵌套）；
+        提交到线程池的任务需通过 contextvars.copy_context().run 执行才能继承这些字段
+
+        Args:
+            **fields: 公共字段
+        """
+        token = _context_fields.set({**_context_fields.get(), **fields})
+        try:
+            yield
+        finally:
+            _context_fields.reset(token)
+
+    def shutdown(self) -> None:
+        """写完队列中的事件并停止后台线程（之后的事件不再记录）"""
+        if self._listener is None:
+            return
+
+        listener, self._listener = self._listener, None
+        self.min_level = max(EVENT_LOG_LEVELS.values()) + 1
+        listener.stop()
+        self._handler.close()
+
+
+# 全局事件日志实例（可能在多个工作线程中首次获取）
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    """
+    获取全局事件日志实例
+
+    Returns:
+        EventLog 实例
+    """
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog()
+            atexit.register(_event_log.shutdown)
+        return _event_log
@@ -4,12 +4,15 @@
 """
 
 import os
+import tempfile
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog
 from typing import Optional
 
+from config.constants import MULTI_FILE_WRITE_WORKERS
 from utils.logger import get_logger
-from utils.validators import sanitize_filename, validate_file_path
+from utils.validators import get_file_extension, sanitize_filename, validate_file_path
 
 
 class FileHandler:
@@ -29,7 +32,8 @@ class FileHandler:
         self,
         code: str,
         default_name: str = "generated_code",
-        file_types: Optional[list[tuple[str, str]]] = None
+        file_types: Optional[list[tuple[str, str]]] = None,
+        language: Optional[str] = None
     ) -> tuple[bool, str]:
         """
         打开保存文件对话框并保存代码
@@ -38,6 +42,7 @@ class FileHandler:
             code: 要保存的代码
             default_name: 默认文件名
             file_types: 文件类型列表
+            language: 编程语言（用于确定默认扩展名，默认为 .py）
 
         Returns:
             (是否成功, 文件路径或错误消息)
@@ -45,22 +50,9 @@ class FileHandler:
         if not code:
             return False, "没有可保存的代码"
 
-        # 默认文件类型
-        if file_types is None:
-            file_types = [
-                ("Python Files", "*.py"),
-                ("All Files", "*.*"),
-            ]
-
         try:
             # 打开保存对话框
-            file_path = filedialog.asksaveasfilename(
-                title="保存代码",
-                defaultextension=".py",
-                initialfile=sanitize_filename(default_name),
-                filetypes=file_types,
-                parent=self.parent_window
-            )
+            file_path = self.ask_save_path(default_name, file_types, language)
 
             # 用户取消
             if not file_path:
@@ -74,6 +66,40 @@ class FileHandler:
             self.logger.error(error_msg, exc_info=True)
             return False, error_msg
 
+    def ask_save_path(
+        self,
+        default_name: str = "generated_code",
+        file_types: Optional[list[tuple[str, str]]] = None,
+        language: Optional[str] = None
+    ) -> str:
+        """
+        打开保存文件对话框
+
+        Args:
+            default_name: 默认文件名
+            file_types: 文件类型列表
+            language: 编程语言（用于确定默认扩展名，默认为 .py）
+
+        Returns:
+            选择的文件路径，用户取消时返回空字符串
+        """
+        extension = get_file_extension(language) if language else ".py"
+
+        # 默认文件类型
+        if file_types is None:
+            file_types = [
+                (f"{language or 'Python'} Files", f"*{extension}"),
+                ("All Files", "*.*"),
+            ]
+
+        return filedialog.asksaveasfilename(
+            title="保存代码",
+            defaultextension=extension,
+            initialfile=sanitize_filename(default_name),
+            filetypes=file_types,
+            parent=self.parent_window
+        )
+
     def save_code(self, file_path: str, code: str) -> tuple[bool, str]:
         """
         保存代码到文件
@@ -99,11 +125,10 @@ class FileHandler:
             if directory and not os.path.exists(directory):
                 os.makedirs(directory)
 
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(code)
+            # 写入文件（先写临时文件再替换，写入中途失败不会损坏原文件）
+            write_atomic(file_path, code)
 
-            self.logger.info(f"代码已保存到: {file_path}")
+            self.logger.info("代码已保存到: %s", file_path)
             return True, file_path
 
         except PermissionError:
@@ -116,6 +141,78 @@ class FileHandler:
             self.logger.error(error_msg, exc_info=True)
             return False, error_msg
 
+    def ask_directory(self, title: str = "选择保存目录") -> str:
+        """
+        打开目录选择对话框
+
+        Args:
+            title: 对话框标题
+
+        Returns:
+            选择的目录，用户取消时返回空字符串
+        """
+        return filedialog.askdirectory(title=title, mustexist=False, parent=self.parent_window)
+
+    def ask_open_path(self, title: str = "打开文件") -> str:
+        """
+        打开文件选择对话框（只选择路径，不读取内容）
+
+        Args:
+            title: 对话框标题
+
+        Returns:
+            选择的文件路径，用户取消时返回空字符串
+        """
+        return filedialog.askopenfilename(title=title, parent=self.parent_window)
+
+    def save_files(
+        self,
+        base_dir: str,
+        files: dict[str, str],
+        max_workers: int = MULTI_FILE_WRITE_WORKERS,
+    ) -> tuple[list[str], list[str]]:
+        """
+        并行保存多个文件（每个文件原子写入）
+
+        Args:
+            base_dir: 保存目录
+            files: 相对路径 -> 内容（相对路径应已清理，不能指向目录之外）
+            max_workers: 写入线程数
+
+        Returns:
+            (已保存的文件路径列表, 错误消息列表)
+        """
+        base_dir = os.path.abspath(base_dir)
+        targets = []
+        errors = []
+        for relative_path, content in files.items():
+            path = os.path.abspath(os.path.join(base_dir, relative_path))
+            if os.path.commonpath([base_dir, path]) != base_dir:
+                errors.append(f"{relative_path}: 路径超出保存目录")
+                continue
+            targets.append((path, content))
+
+        def save(target: tuple[str, str]) -> Optional[str]:
+            path, content = target
+            try:
+                write_atomic(path, content)
+                return None
+            except OSError as e:
+                return f"{os.path.relpath(path, base_dir)}: {e}"
+
+        saved = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as executor:
+            for (path, _), error in zip(targets, executor.map(save, targets)):
+                if error:
+                    errors.append(error)
+                else:
+                    saved.append(path)
+
+        self.logger.info("已保存 %d 个文件到: %s", len(saved), base_dir)
+        for error in errors:
+            self.logger.error("保存文件失败: %s", error)
+        return saved, errors
+
     def read_file_dialog(
         self,
         file_types: Optional[list[tuple[str, str]]] = None
@@ -159,7 +256,7 @@ class FileHandler:
 
     def read_file(self, file_path: str) -> tuple[bool, str, str]:
         """
-        读取文件内容
+        读取文件内容（一次读入整个文件；大文件作为生成的参考上下文时使用 core.context_ingest 分块读取）
 
         Args:
             file_path: 文件路径
@@ -180,7 +277,7 @@ class FileHandler:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
 
-            self.logger.info(f"文件已读取: {file_path}")
+            self.logger.info("文件已读取: %s", file_path)
             return True, content, file_path
 
         except PermissionError:
@@ -192,3 +289,32 @@ class FileHandler:
             error_msg = f"读取文件失败: {str(e)}"
             self.logger.error(error_msg, exc_info=True)
             return False, "", error_msg
+
+
+def write_atomic(file_path: str, content: str) -> None:
+    """
+    原子写入文本文件：写入同目录的临时文件并落盘后替换目标文件
+
+    Args:
+        file_path: 文件路径
+        content: 文件内容
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有当前用户可读写：沿用原文件的权限，新文件使用常规权限
+        mode = os.stat(file_path).st_mode & 0o777 if os.path.exists(file_path) else 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,195 @@
+"""
+文件监视模块
+在后台线程中监视单个文件的变化：Linux 上使用 inotify（通过 ctypes 调用），其他平台或 inotify 不可用时定时检查文件状态
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from config.constants import CONFIG_WATCH_DEBOUNCE_S, CONFIG_WATCH_POLL_S
+from utils.logger import get_logger
+
+# inotify 事件（监视所在目录，原子替换表现为 IN_MOVED_TO）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class FileWatcher:
+    """
+    文件监视器
+
+    文件被修改、替换、创建或删除时调用回调（在监视线程中调用）；短时间内的连续事件合并为一次回调
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[], None],
+        poll_interval: float = CONFIG_WATCH_POLL_S,
+        debounce: float = CONFIG_WATCH_DEBOUNCE_S,
+    ):
+        """
+        初始化文件监视器
+
+        Args:
+            path: 要监视的文件路径
+            on_change: 变化回调
+            poll_interval: 定时检查的间隔（秒，仅在 inotify 不可用时使用）
+            debounce: 合并连续事件的等待时间（秒）
+        """
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.logger = get_logger()
+
+        self.mode = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """启动监视线程"""
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="FileWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        """监视线程主循环"""
+        fd = self._open_inotify()
+        if fd is None:
+            self.mode = "poll"
+            self._run_polling()
+            return
+
+        self.mode = "inotify"
+        try:
+            self._run_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def _notify(self) -> None:
+        """调用变化回调（回调异常只记录日志）"""
+        try:
+            self.on_change()
+        except Exception as e:
+            self.logger.error("文件变化回调失败: %s", e, exc_info=True)
+
+    def _open_inotify(self) -> Optional[int]:
+        """
+        创建 inotify 实例并监视文件所在目录
+
+        Returns:
+            inotify 文件描述符，不可用时返回 None
+        """
+        if not sys.platform.startswith("linux"):
+            return None
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            if libc.inotify_add_watch(fd, os.fsencode(directory), _IN_MASK) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError) as e:
+            self.logger.debug("inotify 不可用，改为定时检查: %s", e)
+            return None
+
+    def _run_inotify(self, fd: int) -> None:
+        """
+        基于 inotify 的监视循环
+
+        Args:
+            fd: inotify 文件描述符
+        """
+        name = os.path.basename(self.path)
+        deadline = None
+
+        while not self._stop_event.is_set():
+            # 有待处理的变化时只等到合并期结束
+            timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([fd], [], [], timeout)
+
+            if readable and self._read_events(fd, name):
+                deadline = time.monotonic() + self.debounce
+            elif deadline is not None and time.monotonic() >= deadline:
+                deadline = None
+                self._notify()
+
+    @staticmethod
+    def _read_events(fd: int, name: str) -> bool:
+        """
+        读取 inotify 事件
+
+        Args:
+            fd: inotify 文件描述符
+            name: 监视的文件名
+
+        Returns:
+            是否有与该文件相关的事件
+        """
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        matched = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            start = offset + _EVENT_HEADER.size
+            event_name = data[start:start + length].rstrip(b"\0")
+            if os.fsdecode(event_name) == name:
+                matched = True
+            offset = start + length
+        return matched
+
+    def _stat(self) -> Optional[tuple]:
+        """
+        获取文件状态签名
+
+        Returns:
+            (修改时间, 大小, inode)，文件不存在时返回 None
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _run_polling(self) -> None:
+        """定时检查文件状态的监视循环"""
+        signature = self._stat()
+        while not self._stop_event.wait(self.poll_interval):
+            current = self._stat()
+            if current != signature:
+                signature = current
+                self._notify()
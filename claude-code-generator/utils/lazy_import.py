@@ -0,0 +1,92 @@
+"""
+延迟导入模块
+启动时不导入体积较大或很少使用的依赖，首次访问属性时再导入，并可在后台线程中预热
+"""
+
+import importlib
+import threading
+from types import ModuleType
+
+from utils.logger import get_logger
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理
+
+    首次访问属性时才真正导入模块，之后的访问直接转发给已导入的模块。
+    导入过程加锁，可在多个线程中同时使用
+    """
+
+    def __init__(self, name: str):
+        """
+        初始化模块代理
+
+        Args:
+            name: 模块名（如 "anthropic"）
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """模块是否已导入"""
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        """
+        导入模块（已导入时直接返回）
+
+        Returns:
+            模块对象
+        """
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    创建延迟导入的模块代理
+
+    Args:
+        name: 模块名
+
+    Returns:
+        模块代理
+    """
+    return LazyModule(name)
+
+
+def warm_up(module_names: list[str]) -> threading.Thread:
+    """
+    在后台线程中依次导入模块，使首次使用时无需等待
+
+    Args:
+        module_names: 模块名列表
+
+    Returns:
+        后台线程
+    """
+    def run():
+        logger = get_logger()
+        for name in module_names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                # 预热失败不影响启动，首次使用时会再次导入并报告错误
+                logger.debug("预热导入 %s 失败: %s", name, e)
+
+    thread = threading.Thread(target=run, name="ImportWarmUp", daemon=True)
+    thread.start()
+    return thread
@@ -1,14 +1,92 @@
 """
 日志记录模块
 提供应用日志功能
+
+日志调用只把记录放入队列，由后台线程写入控制台和文件；
+日志文件超过大小上限或跨天时轮转，旧文件压缩保存
 """
 
+import atexit
+import gzip
 import logging
 import os
-from datetime import datetime
-from typing import Optional
+import queue
+import shutil
+from datetime import date
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config.constants import (
+    LOG_BACKUP_COUNT,
+    LOG_DATE_FORMAT,
+    LOG_FILE_NAME,
+    LOG_FORMAT,
+    LOG_MAX_BYTES,
+    LOGS_DIR,
+)
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """按大小和日期轮转的文件处理器，轮转出的文件使用 gzip 压缩"""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        """
+        初始化处理器
+
+        Args:
+            filename: 日志文件路径
+            max_bytes: 单个文件的大小上限
+            backup_count: 保留的轮转文件数
+        """
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+        self._opened_on = self._file_date()
+
+    def _file_date(self) -> date:
+        """
+        获取当前日志文件的日期（文件不存在时为今天）
+
+        Returns:
+            日期
+        """
+        if os.path.exists(self.baseFilename):
+            return date.fromtimestamp(os.path.getmtime(self.baseFilename))
+        return date.today()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """跨天或超过大小上限时轮转"""
+        if date.today() != self._opened_on and os.path.exists(self.baseFilename):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        """轮转并记录新文件的日期"""
+        super().doRollover()
+        self._opened_on = date.today()
+
+    @staticmethod
+    def _compress(source: str, dest: str) -> None:
+        """
+        压缩轮转出的文件
+
+        Args:
+            source: 原日志文件
+            dest: 压缩文件路径
+        """
+        with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+
+class ThreadQueueHandler(QueueHandler):
+    """
+    同进程使用的队列处理器
 
-from config.constants import LOGS_DIR
+    记录不跨进程传递，无需在调用线程中预先格式化，格式化在后台线程中进行
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 class Logger:
@@ -36,66 +114,98 @@ class Logger:
         # 创建日志记录器
         self._logger = logging.getLogger("ClaudeCodeGenerator")
         self._logger.setLevel(logging.DEBUG)
+        self._listener = None
 
         # 防止重复添加处理器
         if self._logger.handlers:
             return
 
-        # 创建文件处理器（按日期）
-        log_file = os.path.join(
-            LOGS_DIR,
-            f"app_{datetime.now().strftime('%Y%m%d')}.log"
+        # 文件处理器（按大小和日期轮转）
+        self._file_handler = CompressedRotatingFileHandler(
+            os.path.join(LOGS_DIR, LOG_FILE_NAME),
+            LOG_MAX_BYTES,
+            LOG_BACKUP_COUNT,
         )
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
+        self._file_handler.setLevel(logging.DEBUG)
+
+        # 控制台处理器
+        self._console_handler = logging.StreamHandler()
+        self._console_handler.setLevel(logging.INFO)
+
+        # 格式化器
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+        self._file_handler.setFormatter(formatter)
+        self._console_handler.setFormatter(formatter)
+
+        # 日志调用只入队，由后台线程写入
+        self._queue_handler = ThreadQueueHandler(queue.SimpleQueue())
+        self._listener = QueueListener(
+            self._queue_handler.queue,
+            self._file_handler,
+            self._console_handler,
+            respect_handler_level=True,
+        )
+        self._logger.addHandler(self._queue_handler)
+        self._listener.start()
 
-        # 创建控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
+        # 未显式调用 shutdown 时在进程退出前写完队列中的记录
+        atexit.register(self.shutdown)
 
-        # 创建格式化器
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+    def shutdown(self):
+        """
+        写完队列中的记录并停止后台线程
+        之后的日志直接同步写入，不会丢失
+        """
+        if self._listener is None:
+            return
+
+        listener, self._listener = self._listener, None
+        listener.stop()
 
-        # 添加处理器
-        self._logger.addHandler(file_handler)
-        self._logger.addHandler(console_handler)
+        self._logger.removeHandler(self._queue_handler)
+        self._logger.addHandler(self._file_handler)
+        self._logger.addHandler(self._console_handler)
+        self._file_handler.flush()
 
-    def debug(self, message: str):
-        """记录调试信息"""
-        self._logger.debug(message)
+    def debug(self, message: str, *args):
+        """
+        记录调试信息
+
+        Args:
+            message: 消息（可含 %s 等占位符）
+            *args: 占位符参数，仅在该级别启用时才格式化
+        """
+        self._logger.debug(message, *args)
 
-    def info(self, message: str):
-        """记录一般信息"""
-        self._logger.info(message)
+    def info(self, message: str, *args):
+        """记录一般信息（参数同 debug）"""
+        self._logger.info(message, *args)
 
-    def warning(self, message: str):
-        """记录警告信息"""
-        self._logger.warning(message)
+    def warning(self, message: str, *args):
+        """记录警告信息（参数同 debug）"""
+        self._logger.warning(message, *args)
 
-    def error(self, message: str, exc_info: bool = False):
+    def error(self, message: str, *args, exc_info: bool = False):
         """
         记录错误信息
 
         Args:
-            message: 错误消息
+            message: 错误消息（可含占位符）
+            *args: 占位符参数
             exc_info: 是否包含异常信息
         """
-        self._logger.error(message, exc_info=exc_info)
+        self._logger.error(message, *args, exc_info=exc_info)
 
-    def critical(self, message: str, exc_info: bool = False):
+    def critical(self, message: str, *args, exc_info: bool = False):
         """
         记录严重错误信息
 
         Args:
-            message: 错误消息
+            message: 错误消息（可含占位符）
+            *args: 占位符参数
             exc_info: 是否包含异常信息
         """
-        self._logger.critical(message, exc_info=exc_info)
+        self._logger.critical(message, *args, exc_info=exc_info)
 
 
 # 全局日志实例
@@ -0,0 +1,299 @@
+"""
+Myers 差异算法模块
+线性空间的 Myers 差异算法（中间蛇分治），按行比较，行内容先映射为整数编号以加快比较。
+输出与 difflib.SequenceMatcher.get_opcodes 相同格式的操作列表
+"""
+
+from config.constants import DIFF_MAX_EDIT_COST, DIFF_STABLE_LINES
+
+# 操作类型
+EQUAL = "equal"
+INSERT = "insert"
+DELETE = "delete"
+REPLACE = "replace"
+
+
+def hash_lines(a: list[str], b: list[str]) -> tuple[list[int], list[int]]:
+    """
+    把两组行映射为整数编号（相同内容的行编号相同）
+
+    Args:
+        a: 旧文本的行
+        b: 新文本的行
+
+    Returns:
+        (旧文本编号列表, 新文本编号列表)
+    """
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def diff_lines(a: list[str], b: list[str], max_cost: int = DIFF_MAX_EDIT_COST) -> list[tuple]:
+    """
+    比较两组行
+
+    Args:
+        a: 旧文本的行
+        b: 新文本的行
+        max_cost: 单个区域允许的最大编辑距离，超出时整个区域视为替换（避免完全不同的文本耗时过长）
+
+    Returns:
+        操作列表，每项为 (类型, i1, i2, j1, j2)，表示 a[i1:i2] 与 b[j1:j2] 的关系
+    """
+    a_ids, b_ids = hash_lines(a, b)
+    return diff_ids(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), max_cost)
+
+
+def diff_ids(
+    a: list[int],
+    b: list[int],
+    a_lo: int,
+    a_hi: int,
+    b_lo: int,
+    b_hi: int,
+    max_cost: int = DIFF_MAX_EDIT_COST,
+) -> list[tuple]:
+    """
+    比较两个编号序列的指定区域
+
+    Args:
+        a: 旧序列
+        b: 新序列
+        a_lo: 旧序列起点
+        a_hi: 旧序列终点（不含）
+        b_lo: 新序列起点
+        b_hi: 新序列终点（不含）
+        max_cost: 单个区域允许的最大编辑距离
+
+    Returns:
+        覆盖 a[a_lo:a_hi] 和 b[b_lo:b_hi] 的操作列表
+    """
+    runs = _matching_runs(a, b, a_lo, a_hi, b_lo, b_hi, max_cost)
+    return _runs_to_opcodes(runs, a_lo, a_hi, b_lo, b_hi)
+
+
+def _matching_runs(
+    a: list[int],
+    b: list[int],
+    a_lo: int,
+    a_hi: int,
+    b_lo: int,
+    b_hi: int,
+    max_cost: int,
+) -> list[tuple[int, int, int]]:
+    """
+    分治求出所有相同的连续区段
+
+    Returns:
+        按位置排序的 (旧起点, 新起点, 长度) 列表
+    """
+    runs = []
+    stack = [(a_lo, a_hi, b_lo, b_hi)]
+
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+
+        # 去掉相同的开头和结尾
+        prefix = 0
+        while a_lo + prefix < a_hi and b_lo + prefix < b_hi and a[a_lo + prefix] == b[b_lo + prefix]:
+            prefix += 1
+        if prefix:
+            runs.append((a_lo, b_lo, prefix))
+            a_lo += prefix
+            b_lo += prefix
+
+        suffix = 0
+        while a_lo < a_hi - suffix and b_lo < b_hi - suffix and a[a_hi - 1 - suffix] == b[b_hi - 1 - suffix]:
+            suffix += 1
+        if suffix:
+            runs.append((a_hi - suffix, b_hi - suffix, suffix))
+            a_hi -= suffix
+            b_hi -= suffix
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        snake = _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi, max_cost)
+        if snake is None:
+            # 差异过大，整个区域视为替换
+            continue
+
+        x1, y1, x2, y2 = snake
+        if x2 > x1:
+            runs.append((x1, y1, x2 - x1))
+        stack.append((x2, a_hi, y2, b_hi))
+        stack.append((a_lo, x1, b_lo, y1))
+
+    runs.sort()
+    return runs
+
+
+def _middle_snake(
+    a: list[int],
+    b: list[int],
+    a_lo: int,
+    a_hi: int,
+    b_lo: int,
+    b_hi: int,
+    max_cost: int,
+):
+    """
+    查找最短编辑路径的中间蛇（同时从两端搜索，只需线性空间）
+
+    Returns:
+        中间蛇的 (x1, y1, x2, y2)（绝对位置）；编辑距离超过 max_cost 时返回 None
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta % 2 != 0
+    max_d = min((n + m + 1) // 2, max_cost)
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(max_d + 1):
+        # 正向搜索
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+
+            # 反向对角线 c 对应正向对角线 delta - c
+            c = delta - k
+            if odd and -(d - 1) <= c <= d - 1 and x + backward[offset + c] >= n:
+                return a_lo + start_x, b_lo + start_y, a_lo + x, b_lo + y
+
+        # 反向搜索（在反转后的序列上进行）
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+
+            c = delta - k
+            if not odd and -d <= c <= d and x + forward[offset + c] >= n:
+                return a_lo + n - x, b_lo + m - y, a_lo + n - start_x, b_lo + m - start_y
+
+    return None
+
+
+def _runs_to_opcodes(
+    runs: list[tuple[int, int, int]],
+    a_lo: int,
+    a_hi: int,
+    b_lo: int,
+    b_hi: int,
+) -> list[tuple]:
+    """
+    把相同区段转换为操作列表（合并相邻的相同区段）
+
+    Returns:
+        操作列表
+    """
+    opcodes = []
+    i, j = a_lo, b_lo
+
+    for a_start, b_start, length in runs + [(a_hi, b_hi, 0)]:
+        if i < a_start and j < b_start:
+            opcodes.append((REPLACE, i, a_start, j, b_start))
+        elif i < a_start:
+            opcodes.append((DELETE, i, a_start, j, b_start))
+        elif j < b_start:
+            opcodes.append((INSERT, i, a_start, j, b_start))
+
+        if length:
+            if opcodes and opcodes[-1][0] == EQUAL and opcodes[-1][2] == a_start:
+                tag, i1, _, j1, _ = opcodes.pop()
+                opcodes.append((EQUAL, i1, a_start + length, j1, b_start + length))
+            else:
+                opcodes.append((EQUAL, a_start, a_start + length, b_start, b_start + length))
+
+        i, j = a_start + length, b_start + length
+
+    return opcodes
+
+
+class IncrementalDiff:
+    """
+    增量差异
+
+    新文本流式到达时只比较尚未稳定的部分：距离新文本末尾超过 DIFF_STABLE_LINES 行的
+    相同区段及其之前的操作被冻结，之后每次只从冻结点重新比较。
+    末尾尚未匹配的旧行（可能在后续内容中出现）不输出，由 pending_old_start 标出
+    """
+
+    def __init__(self, old_lines: list[str], stable_lines: int = DIFF_STABLE_LINES):
+        """
+        初始化增量差异
+
+        Args:
+            old_lines: 旧文本的行
+            stable_lines: 冻结操作时距离新文本末尾的最少行数
+        """
+        self.old_lines = old_lines
+        self.stable_lines = stable_lines
+
+        self._ids = {}
+        self._a = [self._ids.setdefault(line, len(self._ids)) for line in old_lines]
+        self._b = []
+
+        self._frozen = []
+        self._frozen_a = 0
+        self._frozen_b = 0
+        self.pending_old_start = 0
+
+    def update(self, new_lines: list[str]) -> list[tuple]:
+        """
+        用新文本的已完成行（调用方需去掉末尾未完成的行）更新差异
+
+        Args:
+            new_lines: 新文本的行（必须以上次传入的行为前缀）
+
+        Returns:
+            操作列表；不包含末尾尚未匹配的旧行
+        """
+        for line in new_lines[len(self._b):]:
+            self._b.append(self._ids.setdefault(line, len(self._ids)))
+
+        # 旧文本只取与新增部分相当的窗口，避免短前缀与长旧文本比较时编辑距离过大
+        a_hi = min(len(self._a), self._frozen_a + 2 * (len(self._b) - self._frozen_b) + self.stable_lines)
+        tail = diff_ids(self._a, self._b, self._frozen_a, a_hi, self._frozen_b, len(self._b))
+
+        # 末尾未匹配的旧行可能在后续内容中出现：删除暂不输出，替换只输出新增的行
+        self.pending_old_start = a_hi
+        if tail and tail[-1][0] == DELETE:
+            self.pending_old_start = tail.pop()[1]
+        elif tail and tail[-1][0] == REPLACE:
+            _, i1, _, j1, j2 = tail.pop()
+            tail.append((INSERT, i1, i1, j1, j2))
+            self.pending_old_start = i1
+
+        # 冻结距离末尾足够远的相同区段之前的操作
+        limit = len(self._b) - self.stable_lines
+        freeze = 0
+        for index, opcode in enumerate(tail):
+            if opcode[0] == EQUAL and opcode[4] <= limit:
+                freeze = index + 1
+        if freeze:
+            self._frozen.extend(tail[:freeze])
+            self._frozen_a = tail[freeze - 1][2]
+            self._frozen_b = tail[freeze - 1][4]
+            tail = tail[freeze:]
+
+        return self._frozen + tail
@@ -1,40 +1,316 @@
 """
 安全模块
 提供加密和解密功能，用于保护 API Key 等敏感信息
-使用 Windows DPAPI 进行加密
+
+支持多种密钥存储后端，密文以 "后端名:" 为前缀，解密时按前缀选择后端：
+- dpapi: Windows DPAPI，仅当前 Windows 用户可以解密
+- env: 不保存密钥，只记录环境变量名，读取时从环境变量获取（适用于服务器和 CI）
+- file: 使用本地密钥文件（仅当前用户可读写）加密，适用于非 Windows 平台
+
+后端在首次加解密时才选择和创建，导入本模块不加载任何平台相关模块和加密模块
 """
 
 import base64
-import win32crypt
+import importlib.util
+import os
+import sys
+import threading
 
+from config.constants import SECRET_API_KEY_ENV_VAR, SECRET_BACKEND_ENV_VAR, SECRET_KEY_FILE
+from utils.lazy_import import lazy_import
 
-def encrypt_api_key(api_key: str) -> str:
-    """
-    加密 API Key
-    使用 Windows DPAPI 加密，仅当前 Windows 用户可以解密
+# 加密相关模块只有密钥文件后端使用（OpenSSL 加载较慢），首次加解密时再导入
+hashlib = lazy_import("hashlib")
+hmac = lazy_import("hmac")
+secrets = lazy_import("secrets")
 
-    Args:
-        api_key: 明文 API Key
 
-    Returns:
-        Base64 编码的加密字符串
-    """
-    try:
-        # 将字符串转换为字节
-        data = api_key.encode('utf-8')
+class SecretProvider:
+    """密钥存储后端基类"""
+
+    # 后端名称（密文前缀）
+    name = ""
+
+    def available(self) -> bool:
+        """
+        检查后端在当前环境下是否可用
+
+        Returns:
+            可用返回 True
+        """
+        return True
+
+    def encrypt(self, plaintext: str) -> str:
+        """
+        加密
+
+        Args:
+            plaintext: 明文
+
+        Returns:
+            密文（不含前缀）
+        """
+        raise NotImplementedError
+
+    def decrypt(self, payload: str) -> str:
+        """
+        解密
+
+        Args:
+            payload: 密文（不含前缀）
+
+        Returns:
+            明文
+        """
+        raise NotImplementedError
+
+
+class DPAPISecretProvider(SecretProvider):
+    """Windows DPAPI 后端"""
+
+    name = "dpapi"
+
+    def available(self) -> bool:
+        return sys.platform == "win32" and importlib.util.find_spec("win32crypt") is not None
+
+    def encrypt(self, plaintext: str) -> str:
+        # 延迟导入，仅在实际加解密时加载 pywin32
+        import win32crypt
 
-        # 使用 Windows DPAPI 加密
         encrypted = win32crypt.CryptProtectData(
-            data,
+            plaintext.encode("utf-8"),
             None,  # 描述
             None,  # 可选熵
             None,  # 保留
             None,  # 提示句柄
             0      # 标志
         )
+        return base64.b64encode(encrypted).decode("utf-8")
+
+    def decrypt(self, payload: str) -> str:
+        import win32crypt
+
+        decrypted = win32crypt.CryptUnprotectData(
+            base64.b64decode(payload),
+            None,  # 描述
+            None,  # 可选熵
+            None,  # 保留
+            0      # 标志
+        )
+        return decrypted[1].decode("utf-8")
+
+
+class EnvironmentSecretProvider(SecretProvider):
+    """
+    环境变量后端
+
+    加密时不保存明文，只记录环境变量名（要求该环境变量的值就是要保存的密钥）；解密时读取该环境变量
+    """
+
+    name = "env"
+
+    def __init__(self, env_var: str = SECRET_API_KEY_ENV_VAR):
+        """
+        初始化环境变量后端
+
+        Args:
+            env_var: 保存密钥的环境变量名
+        """
+        self.env_var = env_var
+
+    def encrypt(self, plaintext: str) -> str:
+        # 只记录变量名，变量值与密钥不一致时保存后就再也取不回这个密钥
+        if os.environ.get(self.env_var) != plaintext:
+            raise ValueError(f"环境变量 {self.env_var} 未设置或与要保存的密钥不一致")
+        return self.env_var
+
+    def decrypt(self, payload: str) -> str:
+        value = os.environ.get(payload)
+        if not value:
+            raise ValueError(f"环境变量 {payload} 未设置")
+        return value
+
+
+class KeyFileSecretProvider(SecretProvider):
+    """
+    密钥文件后端
+
+    首次使用时生成 32 字节随机密钥并以仅当前用户可读写的权限保存。
+    使用 HMAC-SHA256 计数器模式生成密钥流加密，再对随机数和密文计算 HMAC-SHA256 校验值
+    """
+
+    name = "file"
+
+    _NONCE_SIZE = 16
+    _TAG_SIZE = 32
+
+    def __init__(self, key_file: str = SECRET_KEY_FILE):
+        """
+        初始化密钥文件后端
+
+        Args:
+            key_file: 密钥文件路径
+        """
+        self.key_file = key_file
+        self._lock = threading.Lock()
+        self._keys = None
+
+    def _get_keys(self) -> tuple[bytes, bytes]:
+        """
+        读取（或生成）密钥文件并派生加密密钥和校验密钥（结果缓存）
+
+        Returns:
+            (加密密钥, 校验密钥)
+        """
+        with self._lock:
+            if self._keys is None:
+                master_key = self._load_or_create_key()
+                self._keys = (
+                    hmac.new(master_key, b"encrypt", hashlib.sha256).digest(),
+                    hmac.new(master_key, b"authenticate", hashlib.sha256).digest(),
+                )
+            return self._keys
 
-        # 返回 Base64 编码的字符串
-        return base64.b64encode(encrypted).decode('utf-8')
+    def _load_or_create_key(self) -> bytes:
+        """
+        读取密钥文件，不存在时生成
+
+        Returns:
+            主密钥
+        """
+        directory = os.path.dirname(self.key_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        try:
+            # O_EXCL 保证多个进程同时启动时只有一个生成密钥
+            fd = os.open(self.key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            if os.name == "posix" and os.stat(self.key_file).st_mode & 0o077:
+                os.chmod(self.key_file, 0o600)
+            with open(self.key_file, "rb") as f:
+                key = f.read()
+            if len(key) != 32:
+                raise ValueError("密钥文件已损坏")
+            return key
+
+        key = secrets.token_bytes(32)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    @staticmethod
+    def _keystream_xor(key: bytes, nonce: bytes, data: bytes) -> bytes:
+        """
+        与 HMAC-SHA256 计数器模式生成的密钥流异或
+
+        Args:
+            key: 加密密钥
+            nonce: 随机数
+            data: 数据
+
+        Returns:
+            异或结果
+        """
+        stream = bytearray()
+        for counter in range((len(data) + 31) // 32):
+            stream += hmac.new(key, nonce + counter.to_bytes(8, "big"), hashlib.sha256).digest()
+        return bytes(a ^ b for a, b in zip(data, stream))
+
+    def encrypt(self, plaintext: str) -> str:
+        encrypt_key, mac_key = self._get_keys()
+        nonce = secrets.token_bytes(self._NONCE_SIZE)
+        ciphertext = self._keystream_xor(encrypt_key, nonce, plaintext.encode("utf-8"))
+        tag = hmac.new(mac_key, nonce + ciphertext, hashlib.sha256).digest()
+        return base64.b64encode(nonce + ciphertext + tag).decode("utf-8")
+
+    def decrypt(self, payload: str) -> str:
+        encrypt_key, mac_key = self._get_keys()
+        data = base64.b64decode(payload)
+        if len(data) < self._NONCE_SIZE + self._TAG_SIZE:
+            raise ValueError("密文长度错误")
+
+        nonce = data[:self._NONCE_SIZE]
+        ciphertext = data[self._NONCE_SIZE:-self._TAG_SIZE]
+        tag = data[-self._TAG_SIZE:]
+        expected = hmac.new(mac_key, nonce + ciphertext, hashlib.sha256).digest()
+        if not hmac.compare_digest(tag, expected):
+            raise ValueError("密文校验失败（密钥文件可能已更换）")
+
+        return self._keystream_xor(encrypt_key, nonce, ciphertext).decode("utf-8")
+
+
+# 后端名称 -> 后端类
+SECRET_PROVIDERS = {
+    DPAPISecretProvider.name: DPAPISecretProvider,
+    EnvironmentSecretProvider.name: EnvironmentSecretProvider,
+    KeyFileSecretProvider.name: KeyFileSecretProvider,
+}
+
+# 已创建的后端实例和默认后端（首次使用时确定）
+_providers = {}
+_default_provider = None
+_providers_lock = threading.Lock()
+
+
+def get_secret_provider(name: str | None = None) -> SecretProvider:
+    """
+    获取密钥存储后端
+
+    Args:
+        name: 后端名称；为空时使用默认后端（环境变量指定的后端，否则 Windows 上为 dpapi，其他平台为 file）
+
+    Returns:
+        SecretProvider 实例
+    """
+    global _default_provider
+
+    with _providers_lock:
+        if name is None:
+            if _default_provider is None:
+                _default_provider = _choose_default_provider()
+            return _default_provider
+
+        if name not in SECRET_PROVIDERS:
+            raise ValueError(f"未知的密钥存储后端: {name}")
+        if name not in _providers:
+            _providers[name] = SECRET_PROVIDERS[name]()
+        return _providers[name]
+
+
+def _choose_default_provider() -> SecretProvider:
+    """
+    选择默认后端（调用方需持有锁）
+
+    Returns:
+        SecretProvider 实例
+    """
+    name = os.environ.get(SECRET_BACKEND_ENV_VAR, "").strip().lower()
+    if name and name not in SECRET_PROVIDERS:
+        raise ValueError(f"环境变量 {SECRET_BACKEND_ENV_VAR} 指定了未知的后端: {name}")
+
+    if not name:
+        dpapi = _providers.get(DPAPISecretProvider.name) or DPAPISecretProvider()
+        name = DPAPISecretProvider.name if dpapi.available() else KeyFileSecretProvider.name
+
+    if name not in _providers:
+        _providers[name] = SECRET_PROVIDERS[name]()
+    return _providers[name]
+
+
+def encrypt_api_key(api_key: str) -> str:
+    """
+    加密 API Key
+
+    Args:
+        api_key: 明文 API Key
+
+    Returns:
+        带后端前缀的密文，如 "file:..."
+    """
+    try:
+        provider = get_secret_provider()
+        return f"{provider.name}:{provider.encrypt(api_key)}"
     except Exception as e:
         raise RuntimeError(f"加密失败: {str(e)}")
 
@@ -42,36 +318,26 @@ def encrypt_api_key(api_key: str) -> str:
 def decrypt_api_key(encrypted_key: str) -> str:
     """
     解密 API Key
-    使用 Windows DPAPI 解密
+    按密文前缀选择后端；没有前缀的旧密文按 DPAPI 解密
 
     Args:
-        encrypted_key: Base64 编码的加密字符串
+        encrypted_key: 加密字符串
 
     Returns:
         明文 API Key
     """
     try:
-        # 从 Base64 解码
-        data = base64.b64decode(encrypted_key)
-
-        # 使用 Windows DPAPI 解密
-        decrypted = win32crypt.CryptUnprotectData(
-            data,
-            None,  # 描述
-            None,  # 可选熵
-            None,  # 保留
-            0      # 标志
-        )
-
-        # 返回解密后的字符串
-        return decrypted[1].decode('utf-8')
+        name, separator, payload = encrypted_key.partition(":")
+        if separator and name in SECRET_PROVIDERS:
+            return get_secret_provider(name).decrypt(payload)
+        return get_secret_provider(DPAPISecretProvider.name).decrypt(encrypted_key)
     except Exception as e:
         raise RuntimeError(f"解密失败: {str(e)}")
 
 
 def is_encrypted(value: str) -> bool:
     """
-    检查值是否已加密
+    检查值是否为带后端前缀的密文
 
     Args:
         value: 要检查的值
@@ -79,10 +345,5 @@ def is_encrypted(value: str) -> bool:
     Returns:
         如果是加密的值返回 True，否则返回 False
     """
-    try:
-        # 尝试 Base64 解码
-        decoded = base64.b64decode(value)
-        # 如果解码成功且长度合理，认为可能是加密的
-        return len(decoded) > 0
-    except Exception:
-        return False
+    name, separator, _ = value.partition(":")
+    return bool(separator) and name in SECRET_PROVIDERS
@@ -0,0 +1,252 @@
+"""
+启动性能分析模块
+记录启动各阶段的耗时，并解析 -X importtime 的输出检查导入耗时是否超出预算
+
+命令行检查（在项目目录下运行）：
+    python -m utils.startup_profiler
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from config.constants import (
+    STARTUP_BUDGET_SCALE_ENV,
+    STARTUP_DEFERRED_MODULES,
+    STARTUP_FIRST_PAINT_BUDGET_MS,
+    STARTUP_IMPORT_BUDGET_MS,
+)
+
+# 本模块应在入口文件中最先导入，以此作为启动计时起点
+_START_TIME = time.perf_counter()
+
+
+class StartupProfiler:
+    """启动阶段计时器"""
+
+    def __init__(self, start_time: float = _START_TIME):
+        """
+        初始化计时器
+
+        Args:
+            start_time: 计时起点（time.perf_counter 的值）
+        """
+        self.start_time = start_time
+        self._marks = []
+
+    def mark(self, name: str) -> float:
+        """
+        记录一个启动阶段
+
+        Args:
+            name: 阶段名称
+
+        Returns:
+            距计时起点的毫秒数
+        """
+        elapsed_ms = (time.perf_counter() - self.start_time) * 1000
+        self._marks.append((name, elapsed_ms))
+        return elapsed_ms
+
+    def get_marks(self) -> list[tuple[str, float]]:
+        """
+        获取已记录的阶段
+
+        Returns:
+            (阶段名称, 毫秒数) 列表
+        """
+        return list(self._marks)
+
+    def elapsed(self, name: str) -> float | None:
+        """
+        获取某个阶段的耗时
+
+        Args:
+            name: 阶段名称
+
+        Returns:
+            毫秒数，未记录时返回 None
+        """
+        for mark_name, elapsed_ms in self._marks:
+            if mark_name == name:
+                return elapsed_ms
+        return None
+
+    def report(self) -> str:
+        """
+        生成启动耗时摘要
+
+        Returns:
+            摘要文本
+        """
+        return ", ".join(f"{name} {elapsed_ms:.0f}ms" for name, elapsed_ms in self._marks)
+
+    def over_budget(self, name: str = "首次绘制", budget_ms: float = STARTUP_FIRST_PAINT_BUDGET_MS) -> bool:
+        """
+        检查某个阶段是否超出预算
+
+        Args:
+            name: 阶段名称
+            budget_ms: 预算（毫秒）
+
+        Returns:
+            超出预算返回 True
+        """
+        elapsed_ms = self.elapsed(name)
+        return elapsed_ms is not None and elapsed_ms > budget_ms
+
+
+# 全局计时器实例
+_startup_profiler = None
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """
+    获取全局启动计时器
+
+    Returns:
+        StartupProfiler 实例
+    """
+    global _startup_profiler
+    if _startup_profiler is None:
+        _startup_profiler = StartupProfiler()
+    return _startup_profiler
+
+
+def parse_importtime(output: str) -> list[dict]:
+    """
+    解析 python -X importtime 的输出
+
+    Args:
+        output: 标准错误输出
+
+    Returns:
+        按导入顺序排列的记录，每项包含 module、self_us、cumulative_us 和 depth（0 表示顶层导入）
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+
+        name_field = parts[2][1:]
+        module = name_field.strip()
+        entries.append({
+            "module": module,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+            "depth": (len(name_field) - len(name_field.lstrip())) // 2,
+        })
+
+    return entries
+
+
+def scaled_budget(budget_ms: float) -> float:
+    """
+    按环境变量放宽预算（如设置为 2 表示预算加倍；不会收紧预算）
+
+    Args:
+        budget_ms: 预算（毫秒）
+
+    Returns:
+        放宽后的预算（毫秒）
+    """
+    try:
+        scale = float(os.environ.get(STARTUP_BUDGET_SCALE_ENV, "1"))
+    except ValueError:
+        scale = 1.0
+    return budget_ms * max(scale, 1.0)
+
+
+def profile_imports(module: str = "main", cwd: str | None = None) -> tuple[list[dict], str]:
+    """
+    在子进程中以 -X importtime 导入模块
+
+    Args:
+        module: 要导入的模块
+        cwd: 工作目录（默认项目根目录）
+
+    Returns:
+        (导入记录, 错误输出)；导入失败时错误输出包含异常信息
+    """
+    if cwd is None:
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    error = result.stderr if result.returncode != 0 else ""
+    return parse_importtime(result.stderr), error
+
+
+def check_import_budget(
+    entries: list[dict],
+    module: str = "main",
+    budget_ms: float | None = None,
+    deferred: list[str] = STARTUP_DEFERRED_MODULES,
+) -> list[str]:
+    """
+    检查导入耗时和延迟导入约定
+
+    Args:
+        entries: 导入记录
+        module: 入口模块名
+        budget_ms: 入口模块的累计导入预算（毫秒，默认为按环境变量放宽后的 STARTUP_IMPORT_BUDGET_MS）
+        deferred: 启动时不应被导入的模块
+
+    Returns:
+        问题列表，为空表示通过
+    """
+    if budget_ms is None:
+        budget_ms = scaled_budget(STARTUP_IMPORT_BUDGET_MS)
+    problems = []
+
+    root = next((entry for entry in entries if entry["module"] == module), None)
+    if root is None:
+        problems.append(f"未找到 {module} 的导入记录")
+    elif root["cumulative_us"] / 1000 > budget_ms:
+        problems.append(f"导入 {module} 耗时 {root['cumulative_us'] / 1000:.0f}ms，超出预算 {budget_ms:.0f}ms")
+
+    imported = {entry["module"] for entry in entries}
+    for name in deferred:
+        if name in imported:
+            problems.append(f"{name} 应延迟导入，但在启动时被导入")
+
+    return problems
+
+
+def main() -> int:
+    """
+    命令行入口：输出导入耗时排行并检查预算
+
+    Returns:
+        退出码，通过返回 0
+    """
+    entries, error = profile_imports()
+    if error:
+        print(error)
+        return 1
+
+    print("累计耗时最多的导入：")
+    for entry in sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:15]:
+        indent = "  " * entry["depth"]
+        print(f"  {entry['cumulative_us'] / 1000:8.1f}ms  {indent}{entry['module']}")
+
+    problems = check_import_budget(entries)
+    for problem in problems:
+        print(f"[失败] {problem}")
+    if not problems:
+        print("[通过] 启动导入在预算之内")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Token 估算模块
+在不依赖分词器的情况下粗略估算文本的 token 数
+"""
+
+import re
+
+# CJK 字符（中日韩统一表意文字、假名、全角标点）
+_CJK_PATTERN = re.compile("[\u3000-\u303f\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# 非 CJK 文本平均每个 token 对应的字符数
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+    CJK 字符按每字一个 token 计算，其余字符按约 4 个字符一个 token 计算
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "\n...\n") -> str:
+    """
+    将文本截断到指定 token 数以内
+    保留开头和结尾，中间用标记替换
+
+    Args:
+        text: 文本
+        max_tokens: 最大 token 数
+        marker: 截断标记
+
+    Returns:
+        截断后的文本
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 按比例换算为字符数，头部保留 2/3，尾部保留 1/3
+    ratio = max_tokens / max(estimate_tokens(text), 1)
+    keep_chars = max(int(len(text) * ratio) - len(marker), 0)
+    head = keep_chars * 2 // 3
+    tail = keep_chars - head
+
+    return text[:head] + marker + (text[-tail:] if tail else "")
@@ -0,0 +1,281 @@
+"""
+界面响应监控模块
+监控线程定时通过 after 向 Tk 事件循环投递心跳，测量心跳的排队延迟；
+投递前先启动采样定时器，心跳在阈值内未执行时由定时器采集主线程当前的 Python 调用栈
+（线程化的 Tcl 中 after 本身会阻塞到主线程处理为止，不能由监控线程自己计时），
+统计延迟直方图和最常见的卡顿位置
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from typing import Optional
+
+from config.constants import (
+    WATCHDOG_HISTOGRAM_BUCKETS_MS,
+    WATCHDOG_INTERVAL_MS,
+    WATCHDOG_STACK_DEPTH,
+    WATCHDOG_STALL_THRESHOLD_MS,
+    WATCHDOG_TOP_STACKS,
+)
+from utils.logger import get_logger
+
+
+def capture_stack(thread_id: int, depth: int = WATCHDOG_STACK_DEPTH) -> tuple[str, ...]:
+    """
+    采集指定线程当前的调用栈
+
+    Args:
+        thread_id: 线程 ID
+        depth: 最多保留的帧数（保留最内层的帧）
+
+    Returns:
+        从外到内的帧描述，每项为 "文件名:行号 函数名"；线程不存在时返回空元组
+    """
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return ()
+
+    return tuple(
+        f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}"
+        for entry in traceback.extract_stack(frame, limit=depth)
+    )
+
+
+class StallRecord:
+    """同一调用栈的卡顿统计"""
+
+    def __init__(self, stack: tuple[str, ...]):
+        """
+        初始化统计
+
+        Args:
+            stack: 调用栈
+        """
+        self.stack = stack
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, duration_ms: float) -> None:
+        """
+        记录一次卡顿
+
+        Args:
+            duration_ms: 卡顿时长（毫秒）
+        """
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+
+class UIWatchdog:
+    """
+    界面响应监控
+
+    监控线程投递心跳后等待主线程执行：超过阈值仍未执行时由采样定时器采集一次主线程调用栈，
+    心跳执行后以实际延迟作为卡顿时长记录
+    """
+
+    def __init__(
+        self,
+        root,
+        interval_ms: int = WATCHDOG_INTERVAL_MS,
+        threshold_ms: int = WATCHDOG_STALL_THRESHOLD_MS,
+    ):
+        """
+        初始化监控
+
+        Args:
+            root: Tk 根窗口（需在主线程中创建）
+            interval_ms: 心跳间隔（毫秒）
+            threshold_ms: 卡顿阈值（毫秒）
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.logger = get_logger()
+
+        self._main_thread_id = threading.main_thread().ident
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._beat_event = threading.Event()
+        self._thread = None
+        self._timer = None
+        self._stall_stack = None
+
+        self._beat_sent = 0.0
+        self._beat_latency_ms = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计数据"""
+        with self._lock:
+            self._histogram = [0] * (len(WATCHDOG_HISTOGRAM_BUCKETS_MS) + 1)
+            self._beats = 0
+            self._max_latency_ms = 0.0
+            self._stall_count = 0
+            self._stall_total_ms = 0.0
+            self._stacks = {}
+
+    @property
+    def running(self) -> bool:
+        """监控线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动监控线程"""
+        if self.running:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="UIWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止监控线程"""
+        self._stop_event.set()
+        self._beat_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        """监控线程主循环"""
+        threshold = self.threshold_ms / 1000
+
+        while not self._stop_event.is_set():
+            self._beat_event.clear()
+            self._stall_stack = None
+            self._timer = threading.Timer(threshold, self._sample_stall)
+            self._timer.daemon = True
+            self._beat_sent = time.perf_counter()
+            self._timer.start()
+            try:
+                self.root.after(0, self._beat)
+            except RuntimeError:
+                # 主循环已退出
+                self._timer.cancel()
+                return
+
+            self._beat_event.wait()
+            # 等采样结束，避免定时器和本次记录交错
+            self._timer.cancel()
+            self._timer.join()
+            if self._stop_event.is_set():
+                return
+
+            self._record(self._beat_latency_ms, self._stall_stack)
+            self._stop_event.wait(self.interval_ms / 1000)
+
+    def _sample_stall(self) -> None:
+        """采样定时器回调：心跳超过阈值仍未执行时采集主线程调用栈"""
+        if not self._beat_event.is_set():
+            self._stall_stack = capture_stack(self._main_thread_id)
+
+    def _beat(self) -> None:
+        """心跳（在主线程中执行）"""
+        self._beat_latency_ms = (time.perf_counter() - self._beat_sent) * 1000
+        if self._timer is not None:
+            self._timer.cancel()
+        self._beat_event.set()
+
+    def _record(self, latency_ms: float, stack: Optional[tuple[str, ...]]) -> None:
+        """
+        记录一次心跳延迟
+
+        Args:
+            latency_ms: 延迟（毫秒）
+            stack: 卡顿时采集的主线程调用栈（未采集到时为 None，卡顿仍计入总数）
+        """
+        with self._lock:
+            self._beats += 1
+            self._histogram[bisect_left(WATCHDOG_HISTOGRAM_BUCKETS_MS, latency_ms)] += 1
+            self._max_latency_ms = max(self._max_latency_ms, latency_ms)
+
+            if latency_ms < self.threshold_ms:
+                return
+
+            self._stall_count += 1
+            self._stall_total_ms += latency_ms
+            if stack:
+                record = self._stacks.get(stack)
+                if record is None:
+                    record = self._stacks[stack] = StallRecord(stack)
+                record.add(latency_ms)
+
+        location = " <- ".join(reversed(stack[-3:])) if stack else "未知"
+        self.logger.warning("界面卡顿 %.0fms，主线程位于: %s", latency_ms, location)
+
+    def get_report(self, top: int = WATCHDOG_TOP_STACKS) -> dict:
+        """
+        获取统计报告
+
+        Args:
+            top: 列出的卡顿调用栈数量（按累计卡顿时长排序）
+
+        Returns:
+            包含 beats、max_latency_ms、stall_count、stall_total_ms、histogram 和 top_stacks 的字典；
+            histogram 为 (区间上限毫秒, 次数) 列表，最后一个区间上限为 None
+        """
+        with self._lock:
+            bounds = list(WATCHDOG_HISTOGRAM_BUCKETS_MS) + [None]
+            records = sorted(self._stacks.values(), key=lambda r: r.total_ms, reverse=True)[:top]
+            return {
+                "beats": self._beats,
+                "max_latency_ms": self._max_latency_ms,
+                "stall_count": self._stall_count,
+                "stall_total_ms": self._stall_total_ms,
+                "histogram": list(zip(bounds, self._histogram)),
+                "top_stacks": [
+                    {"stack": r.stack, "count": r.count, "total_ms": r.total_ms, "max_ms": r.max_ms}
+                    for r in records
+                ],
+            }
+
+    def format_report(self, top: int = WATCHDOG_TOP_STACKS) -> str:
+        """
+        生成文本报告
+
+        Args:
+            top: 列出的卡顿调用栈数量
+
+        Returns:
+            报告文本
+        """
+        report = self.get_report(top)
+        lines = [
+            f"心跳 {report['beats']} 次，最大延迟 {report['max_latency_ms']:.0f}ms，"
+            f"卡顿 {report['stall_count']} 次（超过 {self.threshold_ms}ms），累计 {report['stall_total_ms'] / 1000:.1f}s",
+            "",
+            "延迟分布：",
+        ]
+
+        lower = 0
+        for bound, count in report["histogram"]:
+            label = f"{lower}-{bound}ms" if bound is not None else f">{lower}ms"
+            lines.append(f"  {label:>12}  {count}")
+            lower = bound
+
+        if report["top_stacks"]:
+            lines.append("")
+            lines.append("主要卡顿位置：")
+            for index, item in enumerate(report["top_stacks"], start=1):
+                lines.append(
+                    f"  #{index} {item['count']} 次，累计 {item['total_ms']:.0f}ms，最长 {item['max_ms']:.0f}ms"
+                )
+                for frame in reversed(item["stack"]):
+                    lines.append(f"      {frame}")
+
+        return "\n".join(lines)
+
+    def log_summary(self) -> None:
+        """把统计报告写入日志（有卡顿时为警告级别）"""
+        report = self.format_report()
+        if self._stall_count:
+            self.logger.warning("界面响应统计:\n%s", report)
+        else:
+            self.logger.info("界面响应统计:\n%s", report)
@@ -5,6 +5,8 @@
 
 import re
 
+from config.constants import DEFAULT_FILE_EXTENSION, LANGUAGE_EXTENSIONS
+
 
 def validate_api_key(api_key: str) -> tuple[bool, str]:
     """
@@ -121,3 +123,42 @@ def sanitize_filename(filename: str) -> str:
         filename = "untitled"
 
     return filename
+
+
+def sanitize_relative_path(path: str) -> str | None:
+    """
+    清理相对路径（如模型输出中的文件名），各级名称分别清理
+
+    Args:
+        path: 原始路径
+
+    Returns:
+        使用 / 分隔的相对路径；绝对路径或包含 .. 时返回 None
+    """
+    path = path.strip().replace("\\", "/")
+    if not path or path.startswith("/") or re.match(r"^[A-Za-z]:", path):
+        return None
+
+    parts = []
+    for part in path.split("/"):
+        part = part.strip()
+        if part in ("", "."):
+            continue
+        if part == "..":
+            return None
+        parts.append(sanitize_filename(part))
+
+    return "/".join(parts) if parts else None
+
+
+def get_file_extension(language: str | None) -> str:
+    """
+    获取语言对应的文件扩展名
+
+    Args:
+        language: 语言名称或代码块标记中的语言（不区分大小写）
+
+    Returns:
+        扩展名（含点号），未知语言返回 DEFAULT_FILE_EXTENSION
+    """
+    return LANGUAGE_EXTENSIONS.get((language or "").strip().lower(), DEFAULT_FILE_EXTENSION)